@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Extraction wire-format benchmark: Gemini output tokens, latency and accuracy of the verbose
+and compact extraction formats (AKILI_EXTRACT_COMPACT_SCHEMA, see gemini_extract.py).
+
+For every chip in benchmark/dataset.json with a local PDF (<pdf-dir>/<chip>.pdf), the pages
+cited by its questions (source_page, 1-based) are rendered once and extracted with each
+format. Output tokens come from the response usage metadata (the shared Gemini client's
+"extract" counters); the Gemini response cache is bypassed so every page is really sent.
+A question counts as found when one of the units extracted from its page matches the
+expected answer (answers_match from run_benchmark.py). For the verbose run, the size of the
+same facts re-encoded in the compact format (compact_extraction) is reported as well.
+
+Usage:
+    python benchmark/output_tokens.py --pdf-dir datasheets/
+    python benchmark/output_tokens.py --pdf-dir datasheets/ --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import fitz  # noqa: E402
+
+from akili import config  # noqa: E402
+from akili.ingest.gemini_client import get_gemini_client  # noqa: E402
+from akili.ingest.gemini_extract import compact_extraction, extract_page  # noqa: E402
+from akili.ingest.render_profiles import render_page  # noqa: E402
+from render_profiles import _found, _pages_by_chip  # noqa: E402
+
+DATASET_PATH = Path(__file__).parent / "dataset.json"
+FORMATS = ("verbose", "compact")
+
+
+@dataclass
+class FormatResult:
+    """Aggregate measurements for one wire format."""
+
+    format: str
+    pages: int = 0
+    output_tokens: int = 0
+    facts: int = 0
+    compact_chars: int = 0
+    verbose_chars: int = 0
+    extract_seconds: float = 0.0
+    questions: int = 0
+    found: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        pages = max(1, self.pages)
+        return {
+            "format": self.format,
+            "pages": self.pages,
+            "avg_output_tokens": round(self.output_tokens / pages),
+            "avg_facts": round(self.facts / pages, 1),
+            "avg_extract_s": round(self.extract_seconds / pages, 2),
+            "accuracy": round(self.found / self.questions, 3) if self.questions else None,
+            "reencoded_ratio": (
+                round(self.compact_chars / self.verbose_chars, 3) if self.verbose_chars else None
+            ),
+            "errors": len(self.errors),
+        }
+
+
+def _output_tokens() -> int:
+    return get_gemini_client().stats().get("extract", {}).get("output_tokens", 0)
+
+
+def run(pdf_dir: Path) -> list[FormatResult]:
+    dataset = json.loads(DATASET_PATH.read_text())
+    results = {name: FormatResult(name) for name in FORMATS}
+    config.GEMINI_CACHE_ENABLED = False
+    for pdf, pages in _pages_by_chip(dataset, pdf_dir).items():
+        doc = fitz.open(pdf)
+        try:
+            for page_index, questions in sorted(pages.items()):
+                if page_index >= len(doc):
+                    continue
+                image = render_page(doc[page_index])
+                for name in FORMATS:
+                    result = results[name]
+                    config.EXTRACT_COMPACT_SCHEMA = name == "compact"
+                    tokens_before = _output_tokens()
+                    started = time.perf_counter()
+                    try:
+                        extraction = extract_page(page_index, image, pdf.stem)
+                    except Exception as e:
+                        result.errors.append(f"{pdf.stem} p{page_index + 1}: {e}")
+                        continue
+                    result.extract_seconds += time.perf_counter() - started
+                    result.output_tokens += _output_tokens() - tokens_before
+                    result.pages += 1
+                    result.facts += (
+                        len(extraction.units) + len(extraction.bijections) + len(extraction.grids)
+                    )
+                    if name == "verbose":
+                        result.verbose_chars += len(extraction.model_dump_json(exclude_none=True))
+                        result.compact_chars += len(json.dumps(compact_extraction(extraction)))
+                    result.questions += len(questions)
+                    result.found += sum(1 for q in questions if _found(q, extraction))
+        finally:
+            doc.close()
+    return list(results.values())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare extraction wire formats")
+    parser.add_argument("--pdf-dir", type=Path, required=True, help="Directory of <chip>.pdf")
+    parser.add_argument("--json", type=Path, help="Write the summary to this file")
+    args = parser.parse_args()
+
+    results = run(args.pdf_dir)
+    summaries = [r.summary() for r in results]
+    header = [
+        "format",
+        "pages",
+        "avg_output_tokens",
+        "avg_facts",
+        "avg_extract_s",
+        "accuracy",
+        "reencoded_ratio",
+    ]
+    print("| " + " | ".join(header) + " |")
+    print("|" + "|".join("---" for _ in header) + "|")
+    for summary in summaries:
+        print("| " + " | ".join(str(summary[h]) for h in header) + " |")
+    for result in results:
+        for error in result.errors:
+            print(f"  {result.format}: {error}")
+    if args.json:
+        args.json.write_text(
+            json.dumps({"summary": summaries, "results": [asdict(r) for r in results]}, indent=2)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
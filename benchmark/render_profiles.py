@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Render-profile benchmark: payload size, render time, extraction latency and accuracy per
+render profile (see src/akili/ingest/render_profiles.py).
+
+For every chip in benchmark/dataset.json with a local PDF (<pdf-dir>/<chip>.pdf), the pages
+cited by its questions (source_page, 1-based) are rendered with each profile. Bytes,
+estimated Gemini input tokens and render time are always reported. Unless --no-extract, each
+rendering is also sent to extract_page; a question counts as found when one of the units
+extracted from its page matches the expected answer (answers_match from run_benchmark.py).
+
+Usage:
+    python benchmark/render_profiles.py --pdf-dir datasheets/            # full run
+    python benchmark/render_profiles.py --pdf-dir datasheets/ --no-extract  # size/CPU only
+    python benchmark/render_profiles.py --pdf-dir datasheets/ --profiles standard,text --json out.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import fitz  # noqa: E402
+
+from akili.ingest.gemini_extract import extract_page  # noqa: E402
+from akili.ingest.rate_limit import estimate_image_tokens  # noqa: E402
+from akili.ingest.render_profiles import RENDER_PROFILES, render_page  # noqa: E402
+from run_benchmark import answers_match  # noqa: E402
+
+DATASET_PATH = Path(__file__).parent / "dataset.json"
+
+
+@dataclass
+class ProfileResult:
+    """Aggregate measurements for one render profile."""
+
+    profile: str
+    pages: int = 0
+    image_bytes: int = 0
+    input_tokens: int = 0
+    render_seconds: float = 0.0
+    extract_seconds: float = 0.0
+    questions: int = 0
+    found: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def summary(self) -> dict:
+        pages = max(1, self.pages)
+        return {
+            "profile": self.profile,
+            "pages": self.pages,
+            "avg_kb": round(self.image_bytes / pages / 1024, 1),
+            "avg_tokens": round(self.input_tokens / pages),
+            "avg_render_ms": round(self.render_seconds / pages * 1000, 1),
+            "avg_extract_s": round(self.extract_seconds / pages, 2) if self.questions else None,
+            "accuracy": round(self.found / self.questions, 3) if self.questions else None,
+            "errors": len(self.errors),
+        }
+
+
+def _pages_by_chip(dataset: dict, pdf_dir: Path) -> dict[Path, dict[int, list[dict]]]:
+    """{pdf: {page_index: [questions]}} for chips whose PDF is present."""
+    out: dict[Path, dict[int, list[dict]]] = {}
+    for chip in dataset["chips"]:
+        pdf = pdf_dir / f"{chip['chip']}.pdf"
+        if not pdf.is_file():
+            print(f"  skipping {chip['chip']}: {pdf} not found")
+            continue
+        pages: dict[int, list[dict]] = {}
+        for question in chip["questions"]:
+            if isinstance(question.get("source_page"), int) and question["source_page"] >= 1:
+                pages.setdefault(question["source_page"] - 1, []).append(question)
+        out[pdf] = pages
+    return out
+
+
+def _found(question: dict, extraction) -> bool:
+    return any(
+        answers_match(question["expected_answer"], f"{u.value} {u.unit_of_measure or ''}")
+        for u in extraction.units
+    )
+
+
+def run(pdf_dir: Path, profiles: list[str], extract: bool) -> list[ProfileResult]:
+    dataset = json.loads(DATASET_PATH.read_text())
+    results = {name: ProfileResult(name) for name in profiles}
+    for pdf, pages in _pages_by_chip(dataset, pdf_dir).items():
+        doc = fitz.open(pdf)
+        try:
+            for page_index, questions in sorted(pages.items()):
+                if page_index >= len(doc):
+                    continue
+                page = doc[page_index]
+                for name in profiles:
+                    result = results[name]
+                    started = time.perf_counter()
+                    image = render_page(page, RENDER_PROFILES[name])
+                    result.render_seconds += time.perf_counter() - started
+                    result.pages += 1
+                    result.image_bytes += len(image)
+                    result.input_tokens += estimate_image_tokens(image)
+                    if not extract:
+                        continue
+                    started = time.perf_counter()
+                    try:
+                        extraction = extract_page(page_index, image, pdf.stem)
+                    except Exception as e:
+                        result.errors.append(f"{pdf.stem} p{page_index + 1}: {e}")
+                        continue
+                    result.extract_seconds += time.perf_counter() - started
+                    result.questions += len(questions)
+                    result.found += sum(1 for q in questions if _found(q, extraction))
+        finally:
+            doc.close()
+    return list(results.values())
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare page render profiles")
+    parser.add_argument("--pdf-dir", type=Path, required=True, help="Directory of <chip>.pdf")
+    parser.add_argument(
+        "--profiles",
+        default=",".join(RENDER_PROFILES),
+        help="Comma-separated profiles (default: all)",
+    )
+    parser.add_argument(
+        "--no-extract", action="store_true", help="Only measure size and render time"
+    )
+    parser.add_argument("--json", type=Path, help="Write the summary to this file")
+    args = parser.parse_args()
+
+    profiles = [p.strip() for p in args.profiles.split(",") if p.strip()]
+    unknown = [p for p in profiles if p not in RENDER_PROFILES]
+    if unknown:
+        parser.error(f"unknown profile(s): {', '.join(unknown)}")
+
+    results = run(args.pdf_dir, profiles, extract=not args.no_extract)
+    summaries = [r.summary() for r in results]
+    header = [
+        "profile",
+        "pages",
+        "avg_kb",
+        "avg_tokens",
+        "avg_render_ms",
+        "avg_extract_s",
+        "accuracy",
+    ]
+    print("| " + " | ".join(header) + " |")
+    print("|" + "|".join("---" for _ in header) + "|")
+    for summary in summaries:
+        print("| " + " | ".join(str(summary[h]) for h in header) + " |")
+    for result in results:
+        for error in result.errors:
+            print(f"  {result.profile}: {error}")
+    if args.json:
+        args.json.write_text(
+            json.dumps({"summary": summaries, "results": [asdict(r) for r in results]}, indent=2)
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
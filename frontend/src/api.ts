@@ -158,9 +158,26 @@ export async function deleteDocument(docId: string): Promise<void> {
   }
 }
 
+/** Canonical fact streamed in a "fact" event (preview; the stored result is authoritative) */
+export interface IngestFact {
+  type: 'unit' | 'bijection' | 'grid';
+  id: string;
+  page: number;
+  origin: { x: number; y: number };
+  bbox?: { x1: number; y1: number; x2: number; y2: number };
+  label?: string;
+  value?: unknown;
+  unit_of_measure?: string;
+  mapping?: Record<string, string>;
+  rows?: number;
+  cols?: number;
+}
+
 /** Server-sent progress event from POST /ingest/stream */
 export interface IngestProgressEvent {
-  phase: 'rendering' | 'rendering_done' | 'extracting' | 'canonicalizing' | 'storing' | 'done' | 'error';
+  phase: 'queued' | 'rendering' | 'rendering_done' | 'extracting' | 'fact' | 'canonicalizing' | 'storing' | 'done' | 'error';
+  job_id?: string;
+  queue_position?: number | null;
   total_pages?: number;
   page?: number;
   doc_id?: string;
@@ -173,6 +190,7 @@ export interface IngestProgressEvent {
   extraction_warning?: string;
   extraction_note?: string;
   message?: string;
+  fact?: IngestFact;
 }
 
 /**
@@ -53,6 +53,9 @@ const FileUploader: React.FC<FileUploaderProps> = ({ onSuccess, onBack }) => {
   const [copied, setCopied] = useState(false);
   const progressIntervalRef = useRef<ReturnType<typeof setInterval> | null>(null);
   const progressStartRef = useRef<number>(0);
+  // Facts streamed so far ("fact" events) and the last page detail they are shown next to.
+  const factsCountRef = useRef(0);
+  const pageDetailRef = useRef<string | null>(null);
 
   // Batch state
   const [batchFiles, setBatchFiles] = useState<FileProgress[]>([]);
@@ -86,15 +89,25 @@ const FileUploader: React.FC<FileUploaderProps> = ({ onSuccess, onBack }) => {
     }
   };
 
+  const showPageDetail = (detail: string | null) => {
+    pageDetailRef.current = detail;
+    const facts = factsCountRef.current;
+    const factsDetail = facts > 0 ? `${facts} fact${facts === 1 ? '' : 's'} found` : null;
+    setProgressDetail([detail, factsDetail].filter(Boolean).join(' · ') || null);
+  };
+
   const processProgressEvent = (event: IngestProgressEvent) => {
-    if (event.phase === 'rendering' || event.phase === 'rendering_done') {
+    if (event.phase === 'fact') {
+      factsCountRef.current += 1;
+      showPageDetail(pageDetailRef.current);
+    } else if (event.phase === 'rendering' || event.phase === 'rendering_done') {
       setPhase('rendering');
       setProgressDetail(event.total_pages != null ? `${event.total_pages} page(s)` : null);
     } else if (event.phase === 'extracting') {
       setPhase('extracting');
       const total = event.total_pages ?? 0;
       const page = event.page ?? 0;
-      setProgressDetail(total > 0 ? `Page ${page + 1} of ${total}` : null);
+      showPageDetail(total > 0 ? `Page ${page + 1} of ${total}` : null);
     } else if (event.phase === 'canonicalizing') {
       setPhase('canonicalizing');
       const total = event.total_pages ?? 0;
@@ -115,6 +128,8 @@ const FileUploader: React.FC<FileUploaderProps> = ({ onSuccess, onBack }) => {
     setPhase('uploading');
     setProgress(0);
     setProgressDetail(null);
+    factsCountRef.current = 0;
+    pageDetailRef.current = null;
     progressStartRef.current = Date.now();
 
     progressIntervalRef.current = setInterval(() => {
@@ -88,16 +88,37 @@ export const handlers = [
     return HttpResponse.json({ status: 'ok' });
   }),
 
-  // Ingest (non-streaming)
+  // Ingest (non-streaming): queued as a background job
   http.post(`${API_BASE}/ingest`, () => {
+    return HttpResponse.json(
+      {
+        job_id: 'job-new',
+        doc_id: 'doc-new',
+        filename: 'test-upload.pdf',
+        status: 'queued',
+        queue_position: 1,
+      },
+      { status: 202 },
+    );
+  }),
+
+  http.get(`${API_BASE}/jobs/:jobId`, () => {
     return HttpResponse.json({
+      job_id: 'job-new',
       doc_id: 'doc-new',
       filename: 'test-upload.pdf',
-      page_count: 5,
-      units_count: 20,
-      bijections_count: 2,
-      grids_count: 4,
-      pages_failed: 0,
+      status: 'done',
+      queue_position: null,
+      progress: null,
+      result: {
+        doc_id: 'doc-new',
+        filename: 'test-upload.pdf',
+        page_count: 5,
+        units_count: 20,
+        bijections_count: 2,
+        grids_count: 4,
+        pages_failed: 0,
+      },
     });
   }),
 ];
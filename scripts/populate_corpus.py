@@ -29,6 +29,9 @@ from src.akili.corpus.loader import compute_pdf_hash, serialize_canonical_for_co
 from src.akili.ingest.pipeline import ingest_document
 from src.akili.store import create_store
 
+# The Gemini client reads the work tag from akili.ingest.scheduler, not a src.akili copy.
+from akili.ingest.scheduler import Priority, gemini_work
+
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger(__name__)
 
@@ -112,11 +115,13 @@ async def process_chip(chip: str, store: object, dry_run: bool = False) -> bool:
 
         # Run ingestion
         try:
-            doc_id, canonical_objects, pages_ok, pages_failed = ingest_document(
-                pdf_path=pdf_path,
-                doc_id=f"corpus_{chip.lower().replace('-', '_')}",
-                store=None,  # Don't store in main tables
-            )
+            # Corpus builds are bulk work: they yield to queries and uploads.
+            with gemini_work(Priority.BULK, "corpus"):
+                doc_id, canonical_objects, pages_ok, pages_failed = ingest_document(
+                    pdf_path=pdf_path,
+                    doc_id=f"corpus_{chip.lower().replace('-', '_')}",
+                    store=None,  # Don't store in main tables
+                )
 
             # Separate canonical objects by type
             from akili.canonical import Bijection, ConditionalUnit, Grid, Range, Unit
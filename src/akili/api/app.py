@@ -9,7 +9,7 @@ import logging
 import os
 from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -18,6 +18,11 @@ from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import Response
 
 from akili import config
+from akili.ingest.gemini_client import get_gemini_client
+from akili.ingest.key_pool import get_key_pool
+from akili.ingest.rate_limit import get_rate_limiter
+from akili.ingest.response_cache import get_response_cache
+from akili.ingest.scheduler import get_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -213,8 +218,15 @@ async def lifespan(app: FastAPI):
                 "Authentication is DISABLED — all endpoints are public. "
                 "Set AKILI_REQUIRE_AUTH=1 and FIREBASE_PROJECT_ID to enable auth in production."
             )
+    from akili.api.deps import document_pdf_path
+    from akili.api.routers.ingest import get_job_manager
+
+    jobs = get_job_manager()
+    jobs.start()
+    jobs.recover(document_pdf_path)
     yield
-    # -- shutdown -- (nothing to clean up currently)
+    # -- shutdown --
+    jobs.drain(config.INGEST_DRAIN_TIMEOUT)
 
 
 # ---------------------------------------------------------------------------
@@ -294,6 +306,21 @@ app.include_router(chat_router)
 # ---------------------------------------------------------------------------
 
 
+def _store_stats(name: str, stats: Callable[[], Any]) -> Any:
+    """A /status section backed by a database; a store that fails reports its error
+    instead of failing the whole endpoint."""
+    try:
+        return stats()
+    except Exception as e:
+        logger.warning("/status: %s stats unavailable: %s", name, e)
+        return {"error": f"{type(e).__name__}: {e}"}
+
+
+def _cache_stats() -> dict | None:
+    cache = get_response_cache()
+    return cache.stats() if cache is not None else None
+
+
 @app.get("/status")
 def status() -> JSONResponse:
     """Check API and env without running ingest."""
@@ -303,6 +330,10 @@ def status() -> JSONResponse:
     using_pg = db_url.startswith("postgresql")
     db_path = config.DB_PATH
     db_exists = Path(db_path).parent.exists() if db_path and not using_pg else False
+    key_pool = get_key_pool()
+    scheduler = get_scheduler()
+    from akili.api.routers.ingest import get_job_manager
+
     return JSONResponse(
         content={
             "ok": True,
@@ -316,6 +347,13 @@ def status() -> JSONResponse:
             "database": "postgresql" if using_pg else "sqlite",
             "AKILI_DB_PATH": db_path if not using_pg else None,
             "db_dir_exists": db_exists if not using_pg else None,
+            "gemini_cache": _store_stats("gemini_cache", _cache_stats),
+            "gemini_calls": get_gemini_client().stats(),
+            "gemini_routes": get_gemini_client().route_stats(),
+            "gemini_rate": get_rate_limiter().stats(),
+            "gemini_keys": key_pool.stats() if key_pool is not None else None,
+            "gemini_scheduler": scheduler.stats() if scheduler is not None else None,
+            "ingest_jobs": _store_stats("ingest_jobs", lambda: get_job_manager().stats()),
         }
     )
 
@@ -15,6 +15,9 @@ from fastapi import HTTPException
 
 from akili import config
 from akili.store import Store, create_store
+from akili.store.blobs import BlobStore
+from akili.store.checkpoints import CheckpointStore
+from akili.store.jobs import JobStore
 from akili.store.corrections import CorrectionStore
 from akili.store.usage import UsageStore
 
@@ -66,17 +69,73 @@ def get_correction_store() -> CorrectionStore:
     return _correction_store
 
 
+_checkpoint_store: CheckpointStore | None = None
+_checkpoint_store_lock = threading.Lock()
+
+
+def get_checkpoint_store() -> CheckpointStore:
+    global _checkpoint_store
+    if _checkpoint_store is None:
+        with _checkpoint_store_lock:
+            if _checkpoint_store is None:
+                db_url = os.environ.get("DATABASE_URL", "")
+                _checkpoint_store = CheckpointStore(db_url=db_url or None)
+    return _checkpoint_store
+
+
+_job_store: JobStore | None = None
+_job_store_lock = threading.Lock()
+
+
+def get_job_store() -> JobStore:
+    global _job_store
+    if _job_store is None:
+        with _job_store_lock:
+            if _job_store is None:
+                db_url = os.environ.get("DATABASE_URL", "")
+                _job_store = JobStore(db_url=db_url or None)
+    return _job_store
+
+
+_blob_store: BlobStore | None = None
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        with _blob_store_lock:
+            if _blob_store is None:
+                db_url = os.environ.get("DATABASE_URL", "")
+                _blob_store = BlobStore(docs_dir() / "blobs", db_url=db_url or None)
+    return _blob_store
+
+
 # ---------------------------------------------------------------------------
 # Utilities
 # ---------------------------------------------------------------------------
 
 
 def docs_dir() -> Path:
-    """Directory where ingested PDFs are stored (next to DB)."""
+    """Directory where ingested PDFs are stored (AKILI_DOCS_DIR if set, else next to DB)."""
+    explicit = os.environ.get("AKILI_DOCS_DIR")
+    if explicit:
+        return Path(explicit).resolve()
     db_path = config.DB_PATH
     return Path(db_path).resolve().parent / "docs"
 
 
+def document_pdf_path(doc_id: str) -> Path:
+    """Stored PDF of a document: its blob (see store/blobs.py), else docs/{doc_id}.pdf."""
+    return get_blob_store().path_for(doc_id) or docs_dir() / f"{doc_id}.pdf"
+
+
+def delete_document_pdf(doc_id: str) -> None:
+    """Release a document's blob reference and remove its per-document PDF, if any."""
+    get_blob_store().release(doc_id)
+    (docs_dir() / f"{doc_id}.pdf").unlink(missing_ok=True)
+
+
 _LEGACY_DOC_ID_RE = re.compile(r"^[a-zA-Z0-9_-]+$")
 
 
@@ -10,8 +10,17 @@ from typing import Any
 from fastapi import APIRouter, Depends, HTTPException
 from fastapi.responses import FileResponse, JSONResponse
 
-from akili.api.auth import get_current_user
-from akili.api.deps import docs_dir, get_store, require_doc_access, validate_doc_id
+from akili.api.auth import get_current_user, is_auth_required
+from akili.api.deps import (
+    delete_document_pdf,
+    document_pdf_path,
+    get_checkpoint_store,
+    get_store,
+    require_doc_access,
+    validate_doc_id,
+)
+from akili.api.routers.ingest import get_job_manager
+from akili.ingest.jobs import JobConflictError, QueueFullError
 
 logger = logging.getLogger(__name__)
 
@@ -33,15 +42,14 @@ async def delete_document(
     doc_id: str,
     _user: dict[str, Any] | None = Depends(get_current_user),
 ) -> JSONResponse:
-    """Delete an ingested document (canonical store and PDF file)."""
+    """Delete an ingested document (canonical store and its reference to the PDF file)."""
     validate_doc_id(doc_id)
     require_doc_access(doc_id, _user)  # A2: ownership check
     store = get_store()
     store.delete_document(doc_id)
+    get_checkpoint_store().delete_run(doc_id)
     try:
-        dest = docs_dir() / f"{doc_id}.pdf"
-        if dest.is_file():
-            dest.unlink()
+        delete_document_pdf(doc_id)
     except OSError:
         logger.warning("Failed to delete PDF file for doc_id=%s", doc_id)
     return JSONResponse(content={"doc_id": doc_id, "deleted": True})
@@ -55,7 +63,7 @@ async def get_document_file(
     """Return the ingested PDF file for a document (for viewer / Show on document)."""
     validate_doc_id(doc_id)
     require_doc_access(doc_id, _user)  # A2: ownership check
-    dest = docs_dir() / f"{doc_id}.pdf"
+    dest = document_pdf_path(doc_id)
     if not dest.is_file():
         raise HTTPException(
             status_code=404,
@@ -64,6 +72,59 @@ async def get_document_file(
     return FileResponse(dest, media_type="application/pdf", filename=f"{doc_id}.pdf")
 
 
+@router.post("/documents/{doc_id}/retry", status_code=202)
+async def retry_document(
+    doc_id: str,
+    _user: dict[str, Any] | None = Depends(get_current_user),
+) -> JSONResponse:
+    """Queue a re-extraction of only the pages missing from a partial or interrupted ingest.
+
+    Pages checkpointed by earlier runs are reused as-is; the multi-page table merge
+    is re-run over the full page set and the document's canonical objects are replaced.
+    Returns 202 with job_id (poll GET /jobs/{job_id}); 409 while a job for the document is
+    still queued or running.
+    """
+    validate_doc_id(doc_id)
+    require_doc_access(doc_id, _user)  # A2: ownership check
+    checkpoints = get_checkpoint_store()
+    run = checkpoints.get_run(doc_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="No ingest checkpoints for this document")
+    if is_auth_required() and run["uploaded_by"] and run["uploaded_by"] != (_user or {}).get("uid"):
+        raise HTTPException(status_code=403, detail="Not authorized to access this document")
+    pdf_path = document_pdf_path(doc_id)
+    if not pdf_path.is_file():
+        raise HTTPException(status_code=404, detail="Document file not found")
+
+    manager = get_job_manager()
+    try:
+        job = manager.submit(
+            doc_id,
+            pdf_path,
+            run["filename"] or f"{doc_id}.pdf",
+            run["uploaded_by"] or (_user or {}).get("uid"),
+            retry=True,
+        )
+    except JobConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e)) from e
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{e}. Please retry shortly.",
+            headers={"Retry-After": "30"},
+        ) from e
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.job_id,
+            "doc_id": doc_id,
+            "filename": job.filename,
+            "status": "queued",
+            "queue_position": manager.queue_position(job.job_id),
+        },
+    )
+
+
 @router.get("/documents/{doc_id}/canonical")
 async def get_canonical(
     doc_id: str,
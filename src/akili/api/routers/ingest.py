@@ -1,16 +1,22 @@
 """
-Document ingestion endpoints: upload PDF, streaming ingest.
+Document ingestion endpoints: upload PDF, streaming ingest, job status.
+
+Uploads are admitted as background jobs (see ingest/jobs.py) and run on a fixed worker
+pool, so ingest never blocks the event loop and bursts queue instead of spawning threads.
+An upload is streamed in chunks to its final location; magic bytes, size limit and SHA-256
+(for the corpus lookup) are checked on the way, so memory per upload stays constant.
 """
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import json
 import logging
+import os
 import queue
-import shutil
-import tempfile
 import threading
+import uuid
 from pathlib import Path
 from typing import Any
 
@@ -18,12 +24,21 @@ from fastapi import APIRouter, Depends, File, HTTPException, Request, UploadFile
 from fastapi.responses import JSONResponse, StreamingResponse
 
 from akili import config
-from akili.api.auth import get_current_user
-from akili.api.deps import docs_dir, get_store, get_usage_store, is_debug, validate_doc_id
-from akili.canonical import Bijection, Grid, Unit
+from akili.api.auth import get_current_user, is_auth_required
+from akili.api.deps import (
+    docs_dir,
+    get_blob_store,
+    get_checkpoint_store,
+    get_job_store,
+    get_store,
+    get_usage_store,
+    is_debug,
+    validate_doc_id,
+)
+from akili.ingest.jobs import IngestJob, IngestJobManager, QueueFullError
 from akili.ingest.pipeline import ingest_document
-from akili.store import Store
-from akili.store.usage import UsageStore
+from akili.ingest.scheduler import Priority, gemini_work
+from akili.store.checkpoints import CheckpointStore
 
 logger = logging.getLogger(__name__)
 
@@ -36,79 +51,72 @@ def _get_limiter():
     return limiter
 
 
-@router.post("/ingest")
-async def ingest(
-    request: Request,
-    _user: dict[str, Any] | None = Depends(get_current_user),
-    file: UploadFile = File(...),
-) -> JSONResponse:
-    """
-    Upload a PDF; run ingestion pipeline; persist canonical objects.
-    Returns doc_id and counts of units, bijections, grids.
-    """
-    user_id = (_user or {}).get("uid", request.client.host if request.client else "anonymous")
-    usage = get_usage_store()
-    allowed, used, limit = usage.check_limit(user_id, "ingest")
-    if not allowed:
-        raise HTTPException(
-            status_code=403,
-            detail=f"Free tier limit reached: {used}/{limit} documents. Contact us to upgrade.",
-        )
+# ---------------------------------------------------------------------------
+# Job manager (thread-safe lazy init; started/drained by the app lifespan)
+# ---------------------------------------------------------------------------
 
-    if not file.filename or not file.filename.lower().endswith(".pdf"):
-        raise HTTPException(status_code=400, detail="File must be a PDF")
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty file")
-    if not content[:5].startswith(b"%PDF-"):
-        raise HTTPException(status_code=400, detail="File is not a valid PDF (bad magic bytes)")
-    max_bytes = config.MAX_UPLOAD_BYTES
-    if max_bytes > 0 and len(content) > max_bytes:
-        raise HTTPException(
-            status_code=413,
-            detail=(
-                f"File too large (max {max_bytes} bytes). Set AKILI_MAX_UPLOAD_BYTES to override."
-            ),
-        )
-    store = get_store()
-    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-        tmp.write(content)
-        tmp_path = Path(tmp.name)
+_job_manager: IngestJobManager | None = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> IngestJobManager:
+    global _job_manager
+    if _job_manager is None:
+        with _job_manager_lock:
+            if _job_manager is None:
+                _job_manager = IngestJobManager(
+                    _run_ingest_job,
+                    get_job_store(),
+                    workers=config.INGEST_JOB_WORKERS,
+                    max_queued=config.INGEST_MAX_QUEUED,
+                    lease_seconds=config.INGEST_JOB_LEASE_SECONDS,
+                )
+    return _job_manager
+
+
+def _run_ingest_job(job: IngestJob, progress: Any) -> dict[str, Any]:
+    """Job runner: ingest with checkpoints, record usage, and build the response payload."""
+
+    def callback(msg: dict) -> None:
+        # The job manager emits its own terminal "done" event with the result below.
+        if msg.get("phase") != "done":
+            progress(msg)
+
+    checkpoints = get_checkpoint_store()
     try:
-        doc_id, canonical, total_pages, pages_failed = ingest_document(
-            tmp_path, store=store, uploaded_by=user_id
-        )
-        validate_doc_id(doc_id)
-        dd = docs_dir()
-        dd.mkdir(parents=True, exist_ok=True)
-        dest = dd / f"{doc_id}.pdf"
-        shutil.copy2(tmp_path, dest)
-    except HTTPException:
+        with gemini_work(Priority.INGEST, job.user_id):
+            _, canonical, total_pages, pages_failed = ingest_document(
+                job.pdf_path,
+                doc_id=job.doc_id,
+                store=get_store(),
+                progress_callback=callback,
+                uploaded_by=job.user_id,
+                checkpoints=checkpoints,
+                filename=job.filename,
+                content_hash=job.content_hash,
+            )
+    except Exception:
+        if not job.retry:  # a retried document keeps its PDF for the next retry
+            _discard_upload(job.pdf_path, job.doc_id, checkpoints)
         raise
-    except Exception as e:
-        err_msg = str(e)
-        logger.exception("Ingest failed: %s", err_msg)
-        if "429" in err_msg or "Resource exhausted" in err_msg or "ResourceExhausted" in err_msg:
-            raise HTTPException(
-                status_code=429,
-                detail=(
-                    "Gemini rate limit (429). Please wait a minute and try again. "
-                    "See https://cloud.google.com/vertex-ai/generative-ai/docs/error-code-429"
-                ),
-            ) from e
-        detail = "Internal server error"
-        if is_debug():
-            detail = f"Ingest error: {type(e).__name__}"
-        raise HTTPException(status_code=500, detail=detail) from e
-    finally:
-        tmp_path.unlink(missing_ok=True)
+    if job.user_id:
+        get_usage_store().record(job.user_id, "ingest")
+    return _ingest_result(job, canonical, total_pages, pages_failed)
+
+
+def _ingest_result(
+    job: IngestJob, canonical: list, total_pages: int, pages_failed: int
+) -> dict[str, Any]:
+    from akili.canonical import Bijection, Grid, Unit
+
     units = [o for o in canonical if isinstance(o, Unit)]
     bijections = [o for o in canonical if isinstance(o, Bijection)]
     grids = [o for o in canonical if isinstance(o, Grid)]
     resp: dict[str, Any] = {
-        "doc_id": doc_id,
-        "filename": file.filename or "upload.pdf",
+        "doc_id": job.doc_id,
+        "filename": job.filename or "upload.pdf",
         "page_count": total_pages,
+        "total_pages": total_pages,
         "units_count": len(units),
         "bijections_count": len(bijections),
         "grids_count": len(grids),
@@ -124,60 +132,34 @@ async def ingest(
         resp["extraction_note"] = (
             f"Extracted from {total_pages - pages_failed} of {total_pages} pages. "
             f"{pages_failed} page(s) were skipped (often due to rate limits). "
-            "Try increasing AKILI_GEMINI_PAGE_DELAY_SECONDS in .env (e.g. 4) and re-upload."
+            f"POST /documents/{job.doc_id}/retry re-extracts only the skipped pages."
         )
-    usage.record(user_id, "ingest")
-    return JSONResponse(content=resp)
-
-
-def _run_ingest_with_progress(
-    tmp_path: Path,
-    store: Store,
-    progress_queue: queue.Queue,
-    filename: str,
-    dd: Path,
-    usage_store: UsageStore | None = None,
-    user_id: str | None = None,
-    uploaded_by: str | None = None,
-) -> None:
-    """Run ingest in a thread; put progress events into queue."""
-    result_holder: list[dict] = []
+    return resp
 
-    def callback(msg: dict) -> None:
-        if msg.get("phase") != "done":
-            progress_queue.put(msg)
-        else:
-            result_holder.append(msg)
 
-    try:
-        doc_id, canonical, total_pages, pages_failed = ingest_document(
-            tmp_path, store=store, progress_callback=callback, uploaded_by=uploaded_by
+def _public_error(error: str | None) -> str:
+    """Client-facing failure message; internals only in debug mode."""
+    error = error or ""
+    if "429" in error or "Resource exhausted" in error or "ResourceExhausted" in error:
+        return (
+            "Gemini rate limit (429). Please wait a minute and try again. "
+            "See https://cloud.google.com/vertex-ai/generative-ai/docs/error-code-429"
         )
-        validate_doc_id(doc_id)
-        dd.mkdir(parents=True, exist_ok=True)
-        dest = dd / f"{doc_id}.pdf"
-        shutil.copy2(tmp_path, dest)
-        if usage_store and user_id:
-            usage_store.record(user_id, "ingest")
-        done = result_holder[0] if result_holder else {}
-        done["filename"] = filename or "upload.pdf"
-        progress_queue.put(done)
-    except Exception as e:
-        logger.exception("Ingest stream failed: %s", e)
-        msg = str(e) if is_debug() else "An error occurred during ingest."
-        progress_queue.put({"phase": "error", "message": msg})
+    return error if is_debug() else "An error occurred during ingest."
 
 
-@router.post("/ingest/stream")
-async def ingest_stream(
-    request: Request,
-    _user: dict[str, Any] | None = Depends(get_current_user),
-    file: UploadFile = File(...),
-) -> StreamingResponse:
-    """
-    Upload a PDF and run ingestion with server-sent progress.
-    """
-    user_id = (_user or {}).get("uid", request.client.host if request.client else "anonymous")
+# ---------------------------------------------------------------------------
+# Upload helpers
+# ---------------------------------------------------------------------------
+
+
+# Bytes read from the spooled upload per step.
+_UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+def _check_upload(request: Request, user: dict[str, Any] | None, file: UploadFile) -> None:
+    """Apply free-tier and file-name checks before any bytes are read."""
+    user_id = _user_id(request, user)
     usage = get_usage_store()
     allowed, used, limit = usage.check_limit(user_id, "ingest")
     if not allowed:
@@ -188,40 +170,183 @@ async def ingest_stream(
 
     if not file.filename or not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="File must be a PDF")
-    content = await file.read()
-    if not content:
-        raise HTTPException(status_code=400, detail="Empty file")
-    if not content[:5].startswith(b"%PDF-"):
-        raise HTTPException(status_code=400, detail="File is not a valid PDF (bad magic bytes)")
+
+
+def _bad_magic() -> HTTPException:
+    return HTTPException(status_code=400, detail="File is not a valid PDF (bad magic bytes)")
+
+
+async def _receive_upload(file: UploadFile, doc_id: str) -> tuple[Path, str]:
+    """
+    Stream the upload to its permanent location (needed for resume) in chunks, checking the
+    magic bytes and size limit and hashing as it goes; returns (path, SHA-256 hex digest).
+
+    Bytes go to a hidden .part file that is renamed into place once complete, so a
+    rejected or interrupted upload never leaves a partial PDF behind. With
+    AKILI_BLOB_STORE_ENABLED the place is the content-addressed blob (store/blobs.py), and a
+    datasheet that is already stored is not kept twice.
+    """
+    validate_doc_id(doc_id)
+    dd = docs_dir()
+    dd.mkdir(parents=True, exist_ok=True)
+    dest = dd / f"{doc_id}.pdf"
+    partial = dd / f".{doc_id}.pdf.part"
     max_bytes = config.MAX_UPLOAD_BYTES
-    if max_bytes > 0 and len(content) > max_bytes:
-        raise HTTPException(
-            status_code=413,
-            detail=(
-                f"File too large (max {max_bytes} bytes). Set AKILI_MAX_UPLOAD_BYTES to override."
-            ),
+    digest = hashlib.sha256()
+    head = b""
+    size = 0
+    try:
+        with partial.open("wb") as out:
+            while chunk := await file.read(_UPLOAD_CHUNK_BYTES):
+                if len(head) < 5:
+                    head += chunk[: 5 - len(head)]
+                    if len(head) == 5 and head != b"%PDF-":
+                        raise _bad_magic()
+                size += len(chunk)
+                if max_bytes > 0 and size > max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=(
+                            f"File too large (max {max_bytes} bytes). "
+                            "Set AKILI_MAX_UPLOAD_BYTES to override."
+                        ),
+                    )
+                digest.update(chunk)
+                await asyncio.to_thread(out.write, chunk)
+        if size == 0:
+            raise HTTPException(status_code=400, detail="Empty file")
+        if head != b"%PDF-":
+            raise _bad_magic()
+        content_hash = digest.hexdigest()
+        if config.BLOB_STORE_ENABLED:
+            dest = await asyncio.to_thread(get_blob_store().put, doc_id, partial, content_hash)
+        else:
+            os.replace(partial, dest)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+    return dest, content_hash
+
+
+def _user_id(request: Request, user: dict[str, Any] | None) -> str:
+    return (user or {}).get("uid", request.client.host if request.client else "anonymous")
+
+
+def _drop_upload(dest: Path, doc_id: str) -> None:
+    """Remove a stored upload: release its blob reference, or delete its own file."""
+    if not get_blob_store().release(doc_id):
+        dest.unlink(missing_ok=True)
+
+
+def _discard_upload(dest: Path, doc_id: str, checkpoints: CheckpointStore) -> None:
+    """Drop the stored PDF after a failed ingest unless some pages were checkpointed."""
+    if checkpoints.completed_pages(doc_id):
+        return
+    checkpoints.delete_run(doc_id)
+    _drop_upload(dest, doc_id)
+
+
+async def _submit(
+    request: Request,
+    user: dict[str, Any] | None,
+    file: UploadFile,
+    listener: Any = None,
+) -> IngestJob:
+    """Check and store the upload and admit it as a job; 503 with Retry-After when the queue
+    is full."""
+    _check_upload(request, user, file)
+    doc_id = str(uuid.uuid4())
+    pdf_path, content_hash = await _receive_upload(file, doc_id)
+    try:
+        return get_job_manager().submit(
+            doc_id,
+            pdf_path,
+            file.filename or "upload.pdf",
+            _user_id(request, user),
+            listener=listener,
+            content_hash=content_hash,
         )
-    store = get_store()
-    with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
-        tmp.write(content)
-        tmp_path = Path(tmp.name)
-    progress_queue: queue.Queue = queue.Queue()
-    dd = docs_dir()
-    filename = file.filename or "upload.pdf"
-    thread = threading.Thread(
-        target=_run_ingest_with_progress,
-        args=(tmp_path, store, progress_queue, filename, dd, usage, user_id, user_id),
+    except QueueFullError as e:
+        _drop_upload(pdf_path, doc_id)
+        raise HTTPException(
+            status_code=503,
+            detail=f"{e}. Please retry shortly.",
+            headers={"Retry-After": "30"},
+        ) from e
+
+
+# ---------------------------------------------------------------------------
+# Endpoints
+# ---------------------------------------------------------------------------
+
+
+@router.post("/ingest", status_code=202)
+async def ingest(
+    request: Request,
+    _user: dict[str, Any] | None = Depends(get_current_user),
+    file: UploadFile = File(...),
+) -> JSONResponse:
+    """
+    Upload a PDF and queue it for ingestion.
+    Returns 202 with job_id, doc_id and queue_position; poll GET /jobs/{job_id} for the result.
+    """
+    job = await _submit(request, _user, file)
+    manager = get_job_manager()
+    return JSONResponse(
+        status_code=202,
+        content={
+            "job_id": job.job_id,
+            "doc_id": job.doc_id,
+            "filename": job.filename,
+            "status": "queued",
+            "queue_position": manager.queue_position(job.job_id),
+        },
     )
-    thread.start()
 
-    async def cleanup_and_stream() -> Any:
-        try:
-            loop = asyncio.get_event_loop()
-            async for chunk in _stream_sse(progress_queue, loop):
-                yield chunk
-        finally:
-            thread.join(timeout=30.0)
-            tmp_path.unlink(missing_ok=True)
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    _user: dict[str, Any] | None = Depends(get_current_user),
+) -> JSONResponse:
+    """Status of an ingest job: queued (with position), running (with progress), done, failed."""
+    validate_doc_id(job_id)
+    record = get_job_manager().status(job_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if is_auth_required() and record["user_id"] != (_user or {}).get("uid"):
+        raise HTTPException(status_code=404, detail="Job not found")
+    content: dict[str, Any] = {
+        "job_id": record["job_id"],
+        "doc_id": record["doc_id"],
+        "filename": record["filename"],
+        "status": record["status"],
+        "queue_position": record["queue_position"],
+        "progress": record["progress"],
+        "result": record["result"],
+    }
+    if record["status"] == "failed":
+        content["error"] = _public_error(record["error"])
+    return JSONResponse(content=content)
+
+
+@router.post("/ingest/stream")
+async def ingest_stream(
+    request: Request,
+    _user: dict[str, Any] | None = Depends(get_current_user),
+    file: UploadFile = File(...),
+) -> StreamingResponse:
+    """
+    Upload a PDF and run ingestion with server-sent progress.
+
+    The first event is {"phase": "queued", "job_id", "queue_position"}; the job keeps running
+    if the client disconnects, and its result stays available from GET /jobs/{job_id}.
+    With AKILI_EXTRACT_STREAMING_ENABLED, {"phase": "fact", "page", "fact"} events carry each
+    canonical fact as soon as Gemini has returned it, before its page is done.
+    """
+    progress_queue: queue.Queue = queue.Queue()
+    # The job manager puts the "queued" event first, before a worker can start the job.
+    job = await _submit(request, _user, file, progress_queue.put)
 
     async def _stream_sse(q: queue.Queue, loop: asyncio.AbstractEventLoop) -> Any:
         while True:
@@ -236,12 +361,18 @@ async def ingest_stream(
             if msg is None:
                 continue
             phase = msg.get("phase")
+            if phase == "error":
+                msg = {
+                    "phase": "error",
+                    "job_id": job.job_id,
+                    "message": _public_error(msg.get("error")),
+                }
             yield f"data: {json.dumps(msg)}\n\n"
             if phase in ("done", "error"):
                 break
 
     return StreamingResponse(
-        cleanup_and_stream(),
+        _stream_sse(progress_queue, asyncio.get_event_loop()),
         media_type="text/event-stream",
         headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
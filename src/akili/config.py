@@ -27,6 +27,13 @@ def _int_env(key: str, default: str) -> int:
 # Google API Key (single source of truth)
 # ---------------------------------------------------------------------------
 GOOGLE_API_KEY: str = os.environ.get("GOOGLE_API_KEY", "")
+# Optional pool of keys (one per key/project), each with its own AKILI_GEMINI_RPM/TPM quota;
+# calls go to the least-loaded key (see ingest/key_pool.py). Empty: GOOGLE_API_KEY only.
+GEMINI_API_KEYS: list[str] = [
+    k.strip() for k in os.environ.get("AKILI_GEMINI_API_KEYS", "").split(",") if k.strip()
+]
+if not GOOGLE_API_KEY.strip() and GEMINI_API_KEYS:
+    GOOGLE_API_KEY = GEMINI_API_KEYS[0]
 if not GOOGLE_API_KEY.strip():
     import warnings
 
@@ -43,12 +50,46 @@ if not GOOGLE_API_KEY.strip():
 GEMINI_MODEL: str = os.environ.get("AKILI_GEMINI_MODEL", "gemini-2.0-flash")
 # Fallback model for retries on NotFound/PermissionDenied (A6)
 GEMINI_FALLBACK_MODEL: str | None = os.environ.get("AKILI_GEMINI_FALLBACK_MODEL") or None
+# Model per task and page type, e.g. "classify=gemini-2.0-flash-lite,extract:pinout_table=
+# gemini-2.5-pro"; calls without a route use GEMINI_MODEL. See ingest/model_routing.py.
+GEMINI_MODEL_ROUTES: str = os.environ.get("AKILI_GEMINI_MODEL_ROUTES", "")
 GEMINI_MAX_RETRIES: int = _int_env("AKILI_GEMINI_MAX_RETRIES", "6")
 GEMINI_BACKOFF_BASE: float = _float_env("AKILI_GEMINI_BACKOFF_BASE", "8.0")
+# Legacy fixed delay between pages; superseded by the shared RPM/TPM limiter below.
 GEMINI_PAGE_DELAY: float = _float_env("AKILI_GEMINI_PAGE_DELAY_SECONDS", "4.0")
+# Shared Gemini budget across all workers (0 disables a bucket). Unless set, the request
+# rate comes from the page delay (60 / 4 s = 15 RPM by default, a delay of 0 = unlimited),
+# so setups that never configured a rate keep the pacing the fixed delay gave them.
+GEMINI_RPM: float = _float_env(
+    "AKILI_GEMINI_RPM", str(60.0 / GEMINI_PAGE_DELAY) if GEMINI_PAGE_DELAY > 0 else "0"
+)
+GEMINI_TPM: float = _float_env("AKILI_GEMINI_TPM", "1000000")
 GEMINI_429_COOLDOWN: float = _float_env("AKILI_GEMINI_429_COOLDOWN_SECONDS", "60.0")
+# Adaptive (AIMD) governing of the shared budget: 429s shrink the allowed rate and
+# concurrency, successes grow them back toward RPM/TPM and the concurrency ceiling. Replaces
+# the fixed 429 cooldown and the per-call exponential backoff. See ingest/rate_limit.py.
+GEMINI_ADAPTIVE_RATE: bool = _bool_env("AKILI_GEMINI_ADAPTIVE_RATE")
+GEMINI_MAX_CONCURRENCY: int = _int_env("AKILI_GEMINI_MAX_CONCURRENCY", "8")
+GEMINI_AIMD_INCREASE: float = _float_env("AKILI_GEMINI_AIMD_INCREASE", "0.02")
+GEMINI_AIMD_DECREASE: float = _float_env("AKILI_GEMINI_AIMD_DECREASE", "0.5")
+# Priority scheduling of the budget (interactive > ingest > bulk, round-robin over tenants
+# within a class); ingest and bulk leave this share of it to interactive calls.
+GEMINI_SCHEDULER_ENABLED: bool = _bool_env("AKILI_GEMINI_SCHEDULER_ENABLED")
+GEMINI_INTERACTIVE_RESERVE: float = _float_env("AKILI_GEMINI_INTERACTIVE_RESERVE", "0.1")
+# Tail-latency hedging of extraction calls: a call still running after the kind's rolling
+# latency percentile gets a duplicate request (first success wins), for at most
+# HEDGE_MAX_FRACTION of that kind's requests. See ingest/gemini_client.py.
+GEMINI_HEDGE_ENABLED: bool = _bool_env("AKILI_GEMINI_HEDGE_ENABLED")
+GEMINI_HEDGE_PERCENTILE: float = _float_env("AKILI_GEMINI_HEDGE_PERCENTILE", "0.9")
+GEMINI_HEDGE_MAX_FRACTION: float = _float_env("AKILI_GEMINI_HEDGE_MAX_FRACTION", "0.1")
 GEMINI_CALL_TIMEOUT: float = _float_env("AKILI_GEMINI_CALL_TIMEOUT_SECONDS", "300.0")
 FORMAT_TIMEOUT: float = _float_env("AKILI_FORMAT_TIMEOUT_SEC", "2.5")
+# Content-addressed cache of Gemini page responses (see ingest/response_cache.py).
+# Uses DATABASE_URL when it is PostgreSQL, otherwise a SQLite file (default: akili_cache.db
+# next to AKILI_DB_PATH).
+GEMINI_CACHE_ENABLED: bool = _bool_env("AKILI_GEMINI_CACHE_ENABLED")
+GEMINI_CACHE_DB_PATH: str = os.environ.get("AKILI_GEMINI_CACHE_DB_PATH", "")
+GEMINI_CACHE_MAX_BYTES: int = _int_env("AKILI_GEMINI_CACHE_MAX_BYTES", "268435456")  # 256 MB
 
 # ---------------------------------------------------------------------------
 # Storage
@@ -60,8 +101,70 @@ DB_PATH: str = os.environ.get("AKILI_DB_PATH", "akili.db")
 # ---------------------------------------------------------------------------
 MAX_UPLOAD_BYTES: int = _int_env("AKILI_MAX_UPLOAD_BYTES", "104857600")  # 100 MB
 MAX_PAGES: int = _int_env("AKILI_MAX_PAGES", "500")
+# Pages classified/extracted concurrently per ingest (bounded by the shared rate limiter)
+INGEST_WORKERS: int = _int_env("AKILI_INGEST_WORKERS", "4")
+# Multi-page extraction: up to EXTRACT_BATCH_PAGES pages (halved for table-heavy page types)
+# and EXTRACT_BATCH_MAX_BYTES of page images share one Gemini request. 1 = one page per call.
+EXTRACT_BATCH_PAGES: int = _int_env("AKILI_EXTRACT_BATCH_PAGES", "1")
+EXTRACT_BATCH_MAX_BYTES: int = _int_env("AKILI_EXTRACT_BATCH_MAX_BYTES", "8000000")  # 8 MB
+# Stream single-page extraction responses and emit each fact ("fact" progress event) as soon
+# as its JSON object is complete, before the page finishes.
+EXTRACT_STREAMING_ENABLED: bool = _bool_env("AKILI_EXTRACT_STREAMING_ENABLED")
+# Ask Gemini for the compact extraction wire format (positional arrays, row-major grid
+# values, bbox 4-tuples) instead of one JSON object per fact; cuts output tokens.
+EXTRACT_COMPACT_SCHEMA: bool = _bool_env("AKILI_EXTRACT_COMPACT_SCHEMA")
+# Background ingest jobs: documents ingested at once, uploads allowed to wait, and how long
+# shutdown waits for running jobs (unfinished jobs resume from checkpoints on restart).
+INGEST_JOB_WORKERS: int = _int_env("AKILI_INGEST_JOB_WORKERS", "2")
+INGEST_MAX_QUEUED: int = _int_env("AKILI_INGEST_MAX_QUEUED", "20")
+INGEST_DRAIN_TIMEOUT: float = _float_env("AKILI_INGEST_DRAIN_TIMEOUT", "30")
+# Seconds an instance's lease on its unfinished jobs outlives its last heartbeat; after that
+# another instance sharing the job store may resume them.
+INGEST_JOB_LEASE_SECONDS: float = _float_env("AKILI_INGEST_JOB_LEASE_SECONDS", "60")
 CONSENSUS_ENABLED: bool = _bool_env("AKILI_CONSENSUS_ENABLED")
+# "always": precision + recall pass on every high-risk page. "adaptive": run the precision
+# pass, score it locally, and only run the recall pass when the score is below the threshold.
+CONSENSUS_MODE: str = os.environ.get("AKILI_CONSENSUS_MODE", "always").strip().lower()
+CONSENSUS_ADAPTIVE_THRESHOLD: float = _float_env("AKILI_CONSENSUS_ADAPTIVE_THRESHOLD", "0.85")
 PAGE_CLASSIFY_ENABLED: bool = _bool_env("AKILI_PAGE_CLASSIFY_ENABLED")
+# Classify pages locally from PyMuPDF features first; Gemini only below the confidence.
+PAGE_CLASSIFY_LOCAL: bool = _bool_env("AKILI_PAGE_CLASSIFY_LOCAL")
+PAGE_CLASSIFY_LOCAL_MIN_CONFIDENCE: float = _float_env(
+    "AKILI_PAGE_CLASSIFY_LOCAL_MIN_CONFIDENCE", "0.6"
+)
+# Classify pages on numbered contact sheets, CLASSIFY_SHEET_TILES pages per Gemini call.
+CLASSIFY_BATCH_ENABLED: bool = _bool_env("AKILI_CLASSIFY_BATCH_ENABLED")
+CLASSIFY_SHEET_TILES: int = _int_env("AKILI_CLASSIFY_SHEET_TILES", "16")
+# Reuse the extraction of a near-duplicate page (same text layer, dHash within the distance)
+# instead of sending the page to Gemini again.
+PAGE_DEDUP_ENABLED: bool = _bool_env("AKILI_PAGE_DEDUP_ENABLED")
+PAGE_DEDUP_MAX_DISTANCE: int = _int_env("AKILI_PAGE_DEDUP_MAX_DISTANCE", "8")
+# Render pages of a known type with a smaller profile (grayscale / JPEG / DPI), see
+# render_profiles.py; RENDER_PROFILE_MAP overrides it per type ("pinout_table=standard,...").
+RENDER_PROFILES_ENABLED: bool = _bool_env("AKILI_RENDER_PROFILES_ENABLED")
+RENDER_PROFILE_MAP: str = os.environ.get("AKILI_RENDER_PROFILE_MAP", "")
+# Tiled extraction: pages of these types (known before rendering: from the contact sheets,
+# else the local classifier, which tiling turns on) are also rendered as TILE_ROWS x
+# TILE_COLS overlapping tiles at TILE_DPI and extracted tile by tile in parallel.
+TILED_EXTRACTION_ENABLED: bool = _bool_env("AKILI_TILED_EXTRACTION_ENABLED")
+TILE_PAGE_TYPES: list[str] = [
+    t.strip()
+    for t in os.environ.get("AKILI_TILE_PAGE_TYPES", "pinout_table,electrical_specs").split(",")
+    if t.strip()
+]
+TILE_ROWS: int = _int_env("AKILI_TILE_ROWS", "2")
+TILE_COLS: int = _int_env("AKILI_TILE_COLS", "1")
+TILE_OVERLAP: float = _float_env("AKILI_TILE_OVERLAP", "0.1")
+TILE_DPI: int = _int_env("AKILI_TILE_DPI", "200")
+# Region-of-interest cropping: render only the padded bounding box of a page's layout content
+# (roi.py) when it covers at most ROI_MAX_AREA of the page; coordinates are mapped back.
+ROI_ENABLED: bool = _bool_env("AKILI_ROI_ENABLED")
+ROI_MAX_AREA: float = _float_env("AKILI_ROI_MAX_AREA", "0.85")
+ROI_PADDING: float = _float_env("AKILI_ROI_PADDING", "0.02")
+# Born-digital fast path: trust PyMuPDF text-layer extraction for pages whose numeric
+# coverage reaches the threshold; other pages are rendered and sent to Gemini.
+TEXT_LAYER_ENABLED: bool = _bool_env("AKILI_TEXT_LAYER_ENABLED")
+TEXT_LAYER_MIN_CONFIDENCE: float = _float_env("AKILI_TEXT_LAYER_MIN_CONFIDENCE", "0.7")
 
 # ---------------------------------------------------------------------------
 # Verification thresholds
@@ -105,3 +208,6 @@ DOCS_DIR: str = os.environ.get(
         os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "data", "docs"
     ),
 )
+# Store uploads once per unique content (docs/blobs/, reference-counted by documents) instead
+# of one docs/{doc_id}.pdf copy per upload. See store/blobs.py.
+BLOB_STORE_ENABLED: bool = _bool_env("AKILI_BLOB_STORE_ENABLED")
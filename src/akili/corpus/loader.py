@@ -56,9 +56,12 @@ class CorpusEntry:
 
 
 def compute_pdf_hash(pdf_path: Path | str) -> str:
-    """Compute SHA-256 hash of PDF content for corpus matching."""
+    """Compute SHA-256 hash of PDF content for corpus matching (read in 1 MiB chunks)."""
+    digest = hashlib.sha256()
     with open(pdf_path, "rb") as f:
-        return hashlib.sha256(f.read()).hexdigest()
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 def check_corpus_match(
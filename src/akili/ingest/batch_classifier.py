@@ -0,0 +1,226 @@
+"""
+Contact-sheet page classification: many pages per Gemini call instead of one call per page.
+
+Pages are scaled into a grid of numbered tiles on a "contact sheet" (a PDF page built with
+PyMuPDF and rendered once), and Gemini returns one PageType per tile as JSON. With
+AKILI_CLASSIFY_SHEET_TILES=16 a 300-page datasheet needs 19 classification calls instead
+of 300. Tiles missing from a response (or a sheet whose response does not parse) are simply
+left out of the result; the pipeline classifies those pages one at a time with classify_page.
+With AKILI_PAGE_CLASSIFY_LOCAL, confidently classified pages never go on a sheet.
+
+Sheets are built on the calling thread (PyMuPDF is not shared across threads), but their
+Gemini calls can be handed to a thread pool (submit): the pipeline then starts rendering
+while the sheets are classified, and looking up a page waits only for that page's sheet.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from collections.abc import Mapping
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Any, Callable, Collection, Iterator
+
+import fitz  # PyMuPDF
+
+from akili import config
+from akili.ingest.gemini_client import get_gemini_client
+from akili.ingest.gemini_extract import _decode_response_json
+from akili.ingest.local_classifier import classify_pdf_page
+from akili.ingest.model_routing import route_for
+from akili.ingest.page_classifier import (
+    CATEGORY_DESCRIPTIONS,
+    CLASSIFY_PROMPT_VERSION,
+    VALID_PAGE_TYPES,
+    PageType,
+)
+from akili.ingest.rate_limit import estimate_request_tokens
+from akili.ingest.response_cache import cache_key, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# Tile size in points (US Letter scaled to ~40%); sheets render at _SHEET_DPI.
+_TILE_WIDTH = 245.0
+_TILE_HEIGHT = 317.0
+_TILE_GAP = 8.0
+_LABEL_SIZE = 18.0
+_SHEET_DPI = 72
+
+_BATCH_PROMPT = """\
+This image is a contact sheet of {count} datasheet page thumbnails. Each tile has its \
+number (1 to {count}) in a black box at its top-left corner. Classify every tile into \
+exactly ONE of these categories:
+{categories}
+
+Respond with JSON only, one entry per tile:
+{{"pages": [{{"tile": 1, "type": "<category>"}}, ...]}}"""
+
+
+def build_contact_sheet(doc: fitz.Document, page_indices: list[int]) -> bytes:
+    """Render the given pages of doc as numbered tiles (1-based, row-major) on one PNG."""
+    cols = max(1, math.ceil(math.sqrt(len(page_indices))))
+    rows = max(1, math.ceil(len(page_indices) / cols))
+    sheet_doc = fitz.open()
+    try:
+        sheet = sheet_doc.new_page(
+            width=cols * (_TILE_WIDTH + _TILE_GAP) + _TILE_GAP,
+            height=rows * (_TILE_HEIGHT + _TILE_GAP) + _TILE_GAP,
+        )
+        for tile, page_index in enumerate(page_indices):
+            row, col = divmod(tile, cols)
+            x0 = _TILE_GAP + col * (_TILE_WIDTH + _TILE_GAP)
+            y0 = _TILE_GAP + row * (_TILE_HEIGHT + _TILE_GAP)
+            cell = fitz.Rect(x0, y0, x0 + _TILE_WIDTH, y0 + _TILE_HEIGHT)
+            sheet.show_pdf_page(cell, doc, page_index)
+            sheet.draw_rect(cell, color=(0.5, 0.5, 0.5), width=0.5)
+            label = str(tile + 1)
+            box = fitz.Rect(x0, y0, x0 + _LABEL_SIZE * (0.6 * len(label) + 0.6), y0 + 22)
+            sheet.draw_rect(box, color=(0, 0, 0), fill=(0, 0, 0))
+            sheet.insert_text((x0 + 4, y0 + 17), label, fontsize=_LABEL_SIZE, color=(1, 1, 1))
+        pix = sheet.get_pixmap(dpi=_SHEET_DPI, alpha=False)
+        return pix.tobytes(output="png")
+    finally:
+        sheet_doc.close()
+
+
+def parse_sheet_response(text: str, page_indices: list[int]) -> dict[int, PageType]:
+    """Map a {"pages": [{"tile", "type"}]} response back to page indices (valid tiles only)."""
+    data = _decode_response_json(text, page_indices[0] if page_indices else 0)
+    entries = data.get("pages") if data is not None else None
+    if not isinstance(entries, list):
+        return {}
+    labels: dict[int, PageType] = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        tile, label = entry.get("tile"), entry.get("type")
+        if not isinstance(tile, int) or not 1 <= tile <= len(page_indices):
+            continue
+        if isinstance(label, str) and label.strip().lower() in VALID_PAGE_TYPES:
+            labels[page_indices[tile - 1]] = label.strip().lower()  # type: ignore[assignment]
+    return labels
+
+
+def _classify_sheet(sheet_png: bytes, page_indices: list[int]) -> dict[int, PageType]:
+    """Page types from one contact sheet; {} when its call fails (already logged)."""
+    try:
+        return _call_sheet(sheet_png, page_indices)
+    except Exception as e:
+        logger.warning(
+            "Contact-sheet classification failed for pages %d-%d: %s",
+            page_indices[0],
+            page_indices[-1],
+            e,
+        )
+        return {}
+
+
+def _call_sheet(sheet_png: bytes, page_indices: list[int]) -> dict[int, PageType]:
+    prompt = _BATCH_PROMPT.format(count=len(page_indices), categories=CATEGORY_DESCRIPTIONS)
+
+    cache = get_response_cache()
+    route = route_for("classify_batch")
+    key = ""
+    if cache is not None:
+        key = cache_key(
+            "classify_batch", sheet_png, CLASSIFY_PROMPT_VERSION, route.model or config.GEMINI_MODEL
+        )
+        cached = cache.get(key)
+        if cached is not None:
+            return parse_sheet_response(cached, page_indices)
+
+    image_part = {"inline_data": {"mime_type": "image/png", "data": sheet_png}}
+    result = get_gemini_client().generate(
+        "classify_batch",
+        [prompt, image_part],
+        generation_config={"response_mime_type": "application/json"},
+        request_tokens=estimate_request_tokens(prompt, [sheet_png]),
+        route=route,
+    )
+    labels = parse_sheet_response(result.text, page_indices)
+    if len(labels) < len(page_indices):
+        logger.warning(
+            "Contact sheet classified %d of %d page(s); the rest fall back to per-page calls.",
+            len(labels),
+            len(page_indices),
+        )
+    if cache is not None and labels:
+        cache.put(key, "classify_batch", result.model_name, result.text)
+    return labels
+
+
+class SheetLabels(Mapping[int, PageType]):
+    """Page types of a PDF, some still being classified on their contact sheet. Looking up
+    a page waits for its own sheet; iterating (or len) waits for every sheet."""
+
+    def __init__(self, labels: dict[int, PageType], sheets: dict[int, Future]):
+        self._labels = labels
+        self._sheets = sheets  # page_index -> future of its sheet's {page_index: PageType}
+
+    def __getitem__(self, page_index: int) -> PageType:
+        if page_index in self._labels:
+            return self._labels[page_index]
+        sheet = self._sheets.get(page_index)
+        if sheet is None:
+            raise KeyError(page_index)
+        return sheet.result()[page_index]
+
+    def _all(self) -> dict[int, PageType]:
+        labels = dict(self._labels)
+        for sheet in {id(f): f for f in self._sheets.values()}.values():
+            labels.update(sheet.result())
+        return labels
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._all())
+
+    def __len__(self) -> int:
+        return len(self._all())
+
+
+def _run_inline(fn: Callable[..., Any], *args: Any) -> Future:
+    future: Future = Future()
+    future.set_result(fn(*args))
+    return future
+
+
+def classify_pdf_pages(
+    pdf_path: Path,
+    skip: Collection[int] = (),
+    submit: Callable[..., Future] = _run_inline,
+) -> Mapping[int, PageType]:
+    """
+    Classify the pages of a PDF in batches of AKILI_CLASSIFY_SHEET_TILES per Gemini call.
+
+    Returns {page_index: PageType} for the pages that could be classified; pages in skip
+    are ignored. Pages absent from the result should be classified with classify_page.
+    Returns {} when classification is disabled or no API key is configured. Each sheet's
+    Gemini call is run with submit(fn, *args) (e.g. a pool's submit; default: inline) and
+    the result is a SheetLabels whose lookups wait for the page's sheet.
+    """
+    if not config.PAGE_CLASSIFY_ENABLED or not config.GOOGLE_API_KEY.strip():
+        return {}
+    labels: dict[int, PageType] = {}
+    sheets: dict[int, Future] = {}
+    doc = fitz.open(pdf_path)
+    try:
+        pending: list[int] = []
+        for page_index in range(len(doc)):
+            if page_index in skip:
+                continue
+            if config.PAGE_CLASSIFY_LOCAL:
+                label, confidence = classify_pdf_page(doc[page_index])
+                if confidence >= config.PAGE_CLASSIFY_LOCAL_MIN_CONFIDENCE:
+                    labels[page_index] = label
+                    continue
+            pending.append(page_index)
+
+        per_sheet = max(1, config.CLASSIFY_SHEET_TILES)
+        for start in range(0, len(pending), per_sheet):
+            batch = pending[start : start + per_sheet]
+            sheet = submit(_classify_sheet, build_contact_sheet(doc, batch), batch)
+            sheets.update(dict.fromkeys(batch, sheet))
+    finally:
+        doc.close()
+    return SheetLabels(labels, sheets)
@@ -4,21 +4,71 @@ Consensus extraction: run Gemini twice with varied prompts and compare results.
 Agreement -> high confidence. Disagreement -> flag for review or tiebreaker.
 Only used for high-risk page types (electrical_specs, absolute_max_ratings)
 when AKILI_CONSENSUS_ENABLED=1.
+
+With AKILI_CONSENSUS_MODE=adaptive the precision pass runs alone and is scored locally
+(score_extraction); the recall pass only runs when that score is below
+AKILI_CONSENSUS_ADAPTIVE_THRESHOLD. Each page's decision is reported via on_decision.
 """
 
 from __future__ import annotations
 
 import logging
+import math
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from difflib import SequenceMatcher
+from typing import Callable
 
 from akili import config
 from akili.ingest.extract_schema import PageExtraction
 from akili.ingest.gemini_extract import extract_page
+from akili.ingest.model_routing import Route
+from akili.ingest.scheduler import in_current_work
+from akili.verify.z3_checks import is_known_unit, unit_normalization_issues
 
 logger = logging.getLogger(__name__)
 
 HIGH_RISK_PAGE_TYPES = {"electrical_specs", "absolute_max_ratings"}
 
+# Width of the numeric value buckets used to find match candidates (see _unit_similarity).
+_VALUE_BIN = 0.01
+
+# Adaptive mode: penalty weight of each first-pass quality signal (share of affected units).
+_SIGNAL_WEIGHTS: dict[str, float] = {
+    "unparseable_values": 0.3,
+    "unit_normalization": 0.2,
+    "unknown_units": 0.1,
+    "missing_bbox": 0.15,
+    "missing_context": 0.1,
+    "text_layer_disagreement": 0.25,
+}
+
+
+@dataclass
+class ConsensusDecision:
+    """Per-page consensus record: whether the recall pass ran and, in adaptive mode, why."""
+
+    page_index: int
+    mode: str
+    second_pass: bool
+    score: float | None = None
+    reasons: list[str] = field(default_factory=list)
+
+
+def merge_decisions(decisions: list[ConsensusDecision]) -> ConsensusDecision:
+    """One page's decision from those of its tiles: the recall pass ran if it ran on any
+    tile, the score is the lowest tile score, and the reasons are all tiles' reasons."""
+    scores = [d.score for d in decisions if d.score is not None]
+    return ConsensusDecision(
+        decisions[0].page_index,
+        decisions[0].mode,
+        any(d.second_pass for d in decisions),
+        min(scores) if scores else None,
+        list(dict.fromkeys(r for d in decisions for r in d.reasons)),
+    )
+
+
 _PRECISION_SUFFIX = (
     "\n\nIMPORTANT: Prioritize PRECISION. Only extract facts you are highly confident about. "
     "Omit any value where you are unsure of the exact number or unit. "
@@ -78,44 +128,174 @@ def _unit_similarity(u1: dict, u2: dict) -> float:
     return score / weights if weights > 0 else 0.0
 
 
+def _value_keys(value: object) -> list[tuple]:
+    """Blocking keys for a unit value: numeric values also probe the neighbouring 0.01 bins."""
+    text = str(value).strip()
+    if not text:
+        return []
+    try:
+        number = float(text)
+    except ValueError:
+        return [("s", "".join(ch for ch in text.lower() if ch.isalnum()))]
+    if number != number or number in (float("inf"), float("-inf")):
+        return [("s", text.lower())]
+    bin_ = math.floor(number / _VALUE_BIN)
+    return [("n", bin_ - 1), ("n", bin_), ("n", bin_ + 1)]
+
+
+def _label_key(unit: dict) -> tuple | None:
+    label = (unit.get("label") or "").lower().strip()
+    return ("l", label) if label else None
+
+
+def _candidate_pairs(units_a: list[dict], units_b: list[dict]) -> set[tuple[int, int]]:
+    """Index units_b by value and label; return (i, j) pairs sharing a bucket.
+
+    With the similarity weights above, two units whose numeric values differ and whose
+    labels differ cannot reach a 0.6 threshold, so blocking on value or label loses no
+    numeric match; only fuzzy matches between different non-numeric values are skipped.
+    """
+    index: dict[tuple, list[int]] = defaultdict(list)
+    for j, ub in enumerate(units_b):
+        keys = _value_keys(ub.get("value"))
+        # Each numeric value is indexed under its own bin only; lookups probe neighbours.
+        if keys and keys[0][0] == "n":
+            keys = [keys[1]]
+        label = _label_key(ub)
+        if label is not None:
+            keys.append(label)
+        for key in keys:
+            index[key].append(j)
+
+    pairs: set[tuple[int, int]] = set()
+    for i, ua in enumerate(units_a):
+        keys = _value_keys(ua.get("value"))
+        label = _label_key(ua)
+        if label is not None:
+            keys.append(label)
+        for key in keys:
+            pairs.update((i, j) for j in index.get(key, ()))
+    return pairs
+
+
+def _max_weight_assignment(weights: list[list[float]]) -> list[tuple[int, int]]:
+    """Hungarian algorithm: (row, col) pairs maximizing total weight (rows <= cols)."""
+    n = len(weights)
+    m = len(weights[0]) if n else 0
+    # Min-cost formulation with 1-based potentials (e-maxx variant), O(n^2 * m).
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    p = [0] * (m + 1)
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        p[0] = i
+        j0 = 0
+        minv = [math.inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = p[j0]
+            delta = math.inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                cur = -weights[i0 - 1][j - 1] - u[i0] - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[p[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if p[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            p[j0] = p[j1]
+            j0 = j1
+    return [(p[j] - 1, j - 1) for j in range(1, m + 1) if p[j]]
+
+
 def _match_units(
     units_a: list[dict], units_b: list[dict], threshold: float = 0.6
 ) -> tuple[list[tuple[dict, dict, float]], list[dict], list[dict]]:
     """Match units from two extractions by similarity.
 
+    Candidates are limited to units sharing a value or label bucket; each connected group of
+    candidate pairs at or above threshold is then solved as a maximum-weight assignment.
     Returns (matched_pairs, unmatched_a, unmatched_b).
-    Each matched pair is (unit_a, unit_b, similarity_score).
+    Each matched pair is (unit_a, unit_b, similarity_score), in units_a order.
     """
-    used_b: set[int] = set()
-    matched: list[tuple[dict, dict, float]] = []
-    unmatched_a: list[dict] = []
-
-    for ua in units_a:
-        best_idx = -1
-        best_score = 0.0
-        for j, ub in enumerate(units_b):
-            if j in used_b:
-                continue
-            sim = _unit_similarity(ua, ub)
-            if sim > best_score:
-                best_score = sim
-                best_idx = j
-        if best_idx >= 0 and best_score >= threshold:
-            matched.append((ua, units_b[best_idx], best_score))
-            used_b.add(best_idx)
-        else:
-            unmatched_a.append(ua)
-
+    edges: dict[tuple[int, int], float] = {}
+    for i, j in _candidate_pairs(units_a, units_b):
+        sim = _unit_similarity(units_a[i], units_b[j])
+        if sim >= threshold:
+            edges[(i, j)] = sim
+
+    # Connected components over the bipartite candidate graph (b indices offset by len(a)).
+    parent = list(range(len(units_a) + len(units_b)))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for i, j in edges:
+        parent[find(i)] = find(len(units_a) + j)
+    groups: dict[int, tuple[set[int], set[int]]] = defaultdict(lambda: (set(), set()))
+    for i, j in edges:
+        rows, cols = groups[find(i)]
+        rows.add(i)
+        cols.add(j)
+
+    pairs: list[tuple[int, int]] = []
+    for rows_set, cols_set in groups.values():
+        rows, cols = sorted(rows_set), sorted(cols_set)
+        transpose = len(rows) > len(cols)
+        if transpose:
+            rows, cols = cols, rows
+        weights = [[edges.get((c, r) if transpose else (r, c), 0.0) for c in cols] for r in rows]
+        for r, c in _max_weight_assignment(weights):
+            i, j = (cols[c], rows[r]) if transpose else (rows[r], cols[c])
+            if (i, j) in edges:
+                pairs.append((i, j))
+
+    pairs.sort()
+    matched = [(units_a[i], units_b[j], edges[(i, j)]) for i, j in pairs]
+    used_a = {i for i, _ in pairs}
+    used_b = {j for _, j in pairs}
+    unmatched_a = [ua for i, ua in enumerate(units_a) if i not in used_a]
     unmatched_b = [ub for j, ub in enumerate(units_b) if j not in used_b]
     return matched, unmatched_a, unmatched_b
 
 
+_Matches = tuple[list[tuple[dict, dict, float]], list[dict], list[dict]]
+
+
+def _dump_units(extraction: PageExtraction) -> list[dict]:
+    return [u.model_dump() for u in extraction.units]
+
+
 def compute_agreement(extraction_a: PageExtraction, extraction_b: PageExtraction) -> float:
     """Compute agreement score (0.0 to 1.0) between two page extractions."""
-    units_a = [u.model_dump() for u in extraction_a.units]
-    units_b = [u.model_dump() for u in extraction_b.units]
+    units_a = _dump_units(extraction_a)
+    units_b = _dump_units(extraction_b)
+    matches = _match_units(units_a, units_b) if units_a or units_b else None
+    return _agreement(extraction_a, extraction_b, matches)
 
-    if not units_a and not units_b:
+
+def _agreement(
+    extraction_a: PageExtraction, extraction_b: PageExtraction, matches: _Matches | None
+) -> float:
+    if matches is None:
         bij_a = len(extraction_a.bijections)
         bij_b = len(extraction_b.bijections)
         grid_a = len(extraction_a.grids)
@@ -126,13 +306,9 @@ def compute_agreement(extraction_a: PageExtraction, extraction_b: PageExtraction
         matched_items = min(bij_a, bij_b) + min(grid_a, grid_b)
         return matched_items / max(max(bij_a, bij_b) + max(grid_a, grid_b), 1)
 
-    matched, unmatched_a, unmatched_b = _match_units(units_a, units_b)
-    total_facts = len(units_a) + len(units_b)
-    if total_facts == 0:
-        return 1.0
-
+    matched, _, _ = matches
     agreement_score = sum(sim for _, _, sim in matched)
-    max_possible = max(len(units_a), len(units_b))
+    max_possible = max(len(extraction_a.units), len(extraction_b.units))
 
     return min(1.0, agreement_score / max_possible) if max_possible > 0 else 1.0
 
@@ -147,32 +323,25 @@ def merge_extractions(
     Agreement facts use values from extraction_a (precision-focused).
     Disagreement facts are included but will get lower confidence downstream.
     """
-    units_a = [u.model_dump() for u in extraction_a.units]
-    units_b = [u.model_dump() for u in extraction_b.units]
+    matches = _match_units(
+        _dump_units(extraction_a), _dump_units(extraction_b), agreement_threshold
+    )
+    return _merge(extraction_a, extraction_b, matches)
 
-    matched, unmatched_a, unmatched_b = _match_units(units_a, units_b, agreement_threshold)
 
+def _merge(
+    extraction_a: PageExtraction, extraction_b: PageExtraction, matches: _Matches
+) -> PageExtraction:
     from pydantic import ValidationError
 
     from akili.ingest.extract_schema import UnitExtract
 
+    matched, unmatched_a, unmatched_b = matches
     merged_units: list[UnitExtract] = []
 
-    for ua, _ub, _sim in matched:
+    for unit in [ua for ua, _ub, _sim in matched] + unmatched_a + unmatched_b:
         try:
-            merged_units.append(UnitExtract.model_validate(ua))
-        except (ValidationError, ValueError, TypeError):
-            continue
-
-    for ua in unmatched_a:
-        try:
-            merged_units.append(UnitExtract.model_validate(ua))
-        except (ValidationError, ValueError, TypeError):
-            continue
-
-    for ub in unmatched_b:
-        try:
-            merged_units.append(UnitExtract.model_validate(ub))
+            merged_units.append(UnitExtract.model_validate(unit))
         except (ValidationError, ValueError, TypeError):
             continue
 
@@ -186,24 +355,123 @@ def merge_extractions(
     )
 
 
+def _as_number(value: object) -> float | None:
+    try:
+        number = float(str(value).strip())
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _numbers(extraction: PageExtraction) -> set[float]:
+    values: list[object] = [u.value for u in extraction.units]
+    for grid in extraction.grids:
+        values.extend(cell.value for cell in grid.cells)
+    return {round(n, 6) for v in values if (n := _as_number(v)) is not None}
+
+
+def score_extraction(
+    extraction: PageExtraction, text_hint: PageExtraction | None = None
+) -> tuple[float, list[str]]:
+    """Score a single extraction pass locally (0.0-1.0) and name the signals that lowered it.
+
+    Signals are the share of units with a unit of measure but a non-numeric value, a Z3
+    unit-normalization issue, an unknown unit, no bbox or no context, plus the share of
+    text-layer numbers (text_hint) the extraction does not contain.
+    """
+    if not extraction.units and not extraction.bijections and not extraction.grids:
+        return 0.0, ["empty"]
+
+    units = extraction.units
+    shares: dict[str, float] = {}
+    if units:
+        with_uom = [u for u in units if (u.unit_of_measure or "").strip()]
+        shares["unparseable_values"] = sum(
+            1 for u in with_uom if _as_number(u.value) is None
+        ) / len(units)
+        shares["unknown_units"] = sum(
+            1
+            for u in with_uom
+            if _as_number(u.value) is not None and not is_known_unit(u.unit_of_measure or "")
+        ) / len(units)
+        flagged = {i.source_ids[0] for i in unit_normalization_issues(units) if i.source_ids}
+        shares["unit_normalization"] = len(flagged) / len(units)
+        shares["missing_bbox"] = sum(1 for u in units if u.bbox is None) / len(units)
+        shares["missing_context"] = sum(1 for u in units if not (u.context or "").strip()) / len(
+            units
+        )
+    if text_hint is not None:
+        expected = _numbers(text_hint)
+        if expected:
+            shares["text_layer_disagreement"] = len(expected - _numbers(extraction)) / len(expected)
+
+    penalty = sum(_SIGNAL_WEIGHTS[name] * share for name, share in shares.items())
+    reasons = [f"{name}={share:.2f}" for name, share in shares.items() if share > 0]
+    return max(0.0, 1.0 - penalty), reasons
+
+
 def consensus_extract_page(
     page_index: int,
     image_png_bytes: bytes,
     doc_id: str,
     page_type_hint: str = "",
+    text_hint: PageExtraction | None = None,
+    on_decision: Callable[[ConsensusDecision], None] | None = None,
+    route: Route | None = None,
 ) -> tuple[PageExtraction, float]:
     """Run dual extraction with precision/recall prompts and return merged result + agreement.
 
     Returns (merged_extraction, agreement_score).
-    agreement_score is 0.0-1.0 representing how much the two passes agreed.
+    agreement_score is 0.0-1.0 representing how much the two passes agreed. In adaptive
+    mode a precision pass that scores at or above the threshold is returned alone, with
+    its local score as the agreement. text_hint is the page's text-layer extraction, if any.
+    route picks the model for both passes (see extract_page).
     """
     precision_hint = (
         (page_type_hint + _PRECISION_SUFFIX) if page_type_hint else _PRECISION_SUFFIX.strip()
     )
     recall_hint = (page_type_hint + _RECALL_SUFFIX) if page_type_hint else _RECALL_SUFFIX.strip()
 
-    extraction_a = extract_page(page_index, image_png_bytes, doc_id, page_type_hint=precision_hint)
-    extraction_b = extract_page(page_index, image_png_bytes, doc_id, page_type_hint=recall_hint)
+    if config.CONSENSUS_MODE == "adaptive":
+        extraction_a = extract_page(
+            page_index, image_png_bytes, doc_id, page_type_hint=precision_hint, route=route
+        )
+        score, reasons = score_extraction(extraction_a, text_hint)
+        second_pass = score < config.CONSENSUS_ADAPTIVE_THRESHOLD
+        decision = ConsensusDecision(page_index, "adaptive", second_pass, round(score, 3), reasons)
+        logger.info(
+            "Adaptive consensus page %d (doc_id=%s): score=%.2f, recall pass %s%s",
+            page_index,
+            doc_id,
+            score,
+            "needed" if second_pass else "skipped",
+            f" ({', '.join(reasons)})" if reasons else "",
+        )
+        if on_decision is not None:
+            on_decision(decision)
+        if not second_pass:
+            return extraction_a, score
+        extraction_b = extract_page(
+            page_index, image_png_bytes, doc_id, page_type_hint=recall_hint, route=route
+        )
+    else:
+        # Both passes are in flight together (the recall pass on a helper thread); the shared
+        # rate limiter still meters them, so a consensus page costs about one round-trip.
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="akili-consensus") as pool:
+            recall_future = pool.submit(
+                in_current_work(extract_page),
+                page_index,
+                image_png_bytes,
+                doc_id,
+                page_type_hint=recall_hint,
+                route=route,
+            )
+            extraction_a = extract_page(
+                page_index, image_png_bytes, doc_id, page_type_hint=precision_hint, route=route
+            )
+            extraction_b = recall_future.result()
+        if on_decision is not None:
+            on_decision(ConsensusDecision(page_index, "always", True))
 
     # MEDIUM-1: Warn when both extractions return empty
     if (
@@ -222,8 +490,11 @@ def consensus_extract_page(
             doc_id,
         )
 
-    agreement = compute_agreement(extraction_a, extraction_b)
-    merged = merge_extractions(extraction_a, extraction_b)
+    units_a = _dump_units(extraction_a)
+    units_b = _dump_units(extraction_b)
+    matches = _match_units(units_a, units_b)
+    agreement = _agreement(extraction_a, extraction_b, matches if units_a or units_b else None)
+    merged = _merge(extraction_a, extraction_b, matches)
 
     logger.info(
         "Consensus extraction page %d (doc_id=%s): agreement=%.2f, "
@@ -0,0 +1,511 @@
+"""
+Shared Gemini client: one place for model instances, retries, fallback, timeouts and metrics.
+
+extract_page, classify_page and the shadow formatter all call generate(). The client
+configures the SDK once, caches one GenerativeModel per model name (safe to share across
+worker threads), draws every attempt from the shared rate limiter, retries 429s with
+exponential backoff (or, with the adaptive limiter, lets its reduced rate pace the retry),
+switches to AKILI_GEMINI_FALLBACK_MODEL on NotFound/PermissionDenied
+(A6), and enforces an overall deadline. Per-kind latency, token counts and error classes
+are recorded for GET /status, and per model route (see model_routing.py; the route picks the
+model for the call). With a stream callback the response is streamed and the
+callback receives the text of every chunk as it arrives.
+
+Hedging (AKILI_GEMINI_HEDGE_ENABLED, for calls made with hedge=True): once a route has
+enough latency samples, an attempt still running after the route's rolling p90 latency
+(AKILI_GEMINI_HEDGE_PERCENTILE; per page type where extraction is routed by page type) gets a duplicate request, and whichever succeeds first is
+returned; the other is abandoned. Hedges stay within AKILI_GEMINI_HEDGE_MAX_FRACTION of the
+kind's requests and are admitted by the shared rate limiter like any other request. Hedged
+calls run on one process-wide pool of _HEDGE_POOL_SIZE threads; when it is full a call runs
+unhedged on its own thread. The SDK cannot cancel a request in flight, so the abandoned
+request keeps its limiter slot and key lease until it returns: at most the call's remaining
+deadline (AKILI_GEMINI_CALL_TIMEOUT_SECONDS), which bounds the budget a loser can hold.
+
+With a key pool (AKILI_GEMINI_API_KEYS, see key_pool.py) every request, retries and hedges
+included, is leased to the least-loaded key and admitted by that key's limiter instead of the
+shared one. genai.configure() is process-global, so pooled requests do not go through
+GenerativeModel: they are sent with the SDK's public GenerativeServiceClient, created per key
+with client_options={"api_key": key}, from a request built with the SDK's public type
+converters (content_types, generation_types); concurrent requests on different keys never
+touch the global configuration.
+
+With the scheduler (AKILI_GEMINI_SCHEDULER_ENABLED, see scheduler.py) requests are admitted
+by priority class and tenant of the work that made them instead of in arrival order.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from functools import partial
+from typing import Any, Callable
+
+import google.ai.generativelanguage as glm
+import google.generativeai as genai
+from google.generativeai import protos
+from google.generativeai.types import content_types, generation_types
+
+from akili import config
+from akili.ingest.errors import is_rate_limit_error
+from akili.ingest.key_pool import get_key_pool
+from akili.ingest.model_routing import Route, route_for
+from akili.ingest.rate_limit import get_rate_limiter
+from akili.ingest.scheduler import current_work, get_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Latency samples kept per call kind for percentile reporting.
+_LATENCY_WINDOW = 200
+# Latency samples a kind needs before its percentile is trusted as a hedging delay.
+_HEDGE_MIN_SAMPLES = 20
+# Threads shared by all hedged calls (each uses one, two while hedged); a slot is taken
+# before a task is submitted, so tasks never queue behind a full pool.
+_HEDGE_POOL_SIZE = 32
+_hedge_pool = ThreadPoolExecutor(max_workers=_HEDGE_POOL_SIZE, thread_name_prefix="akili-hedge")
+_hedge_slots = threading.BoundedSemaphore(_HEDGE_POOL_SIZE)
+
+
+def _submit_hedgeable(fn: Callable[..., Any], *args: Any) -> Future | None:
+    """Run fn on the hedge pool; None when every pool thread is taken."""
+    if not _hedge_slots.acquire(blocking=False):
+        return None
+    future = _hedge_pool.submit(fn, *args)
+    future.add_done_callback(lambda _: _hedge_slots.release())
+    return future
+
+
+def is_model_unavailable_error(e: BaseException) -> bool:
+    """Check if error indicates model is unavailable (NotFound/PermissionDenied)."""
+    err_str = str(e).lower()
+    err_type = type(e).__name__.lower()
+    return any(
+        indicator in err_str or indicator in err_type
+        for indicator in ("notfound", "not found", "permissiondenied", "permission denied", "404")
+    )
+
+
+def error_class(e: BaseException) -> str:
+    """Coarse error class used in metrics: rate_limit, model_unavailable, timeout or other."""
+    if is_rate_limit_error(e):
+        return "rate_limit"
+    if is_model_unavailable_error(e):
+        return "model_unavailable"
+    if isinstance(e, TimeoutError) or "deadline" in str(e).lower():
+        return "timeout"
+    return "other"
+
+
+def response_text(response: object) -> str:
+    """Return the stripped text of a Gemini response (first candidate part as fallback)."""
+    text = ""
+    if hasattr(response, "text") and response.text:
+        text = response.text
+    else:
+        candidates = getattr(response, "candidates", None) or []
+        if candidates:
+            c = candidates[0]
+            content = getattr(c, "content", None)
+            parts = getattr(content, "parts", None) if content else None
+            if content and parts:
+                part = parts[0]
+                if hasattr(part, "text") and part.text:
+                    text = part.text
+    return (text or "").strip()
+
+
+def _usage_tokens(response: object) -> tuple[int, int]:
+    """(input, output) token counts from response.usage_metadata, 0 when unavailable."""
+    usage = getattr(response, "usage_metadata", None)
+
+    def count(name: str) -> int:
+        value = getattr(usage, name, 0) if usage is not None else 0
+        return value if isinstance(value, int) else 0
+
+    return count("prompt_token_count"), count("candidates_token_count")
+
+
+@dataclass
+class GeminiResult:
+    """Text of a successful call plus the model that produced it."""
+
+    text: str
+    model_name: str
+    response: Any
+
+
+def _percentile(ordered: list[float], p: float) -> float | None:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+
+
+class _KindMetrics:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.successes = 0
+        self.retries = 0
+        self.fallbacks = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.errors: dict[str, int] = {}
+        self.latencies: deque[float] = deque(maxlen=_LATENCY_WINDOW)
+
+    def snapshot(self) -> dict[str, Any]:
+        ordered = sorted(self.latencies)
+
+        def pct(p: float) -> float | None:
+            value = _percentile(ordered, p)
+            return round(value, 3) if value is not None else None
+
+        return {
+            "calls": self.calls,
+            "successes": self.successes,
+            "retries": self.retries,
+            "fallbacks": self.fallbacks,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "errors": dict(self.errors),
+            "latency_p50_s": pct(0.5),
+            "latency_p90_s": pct(0.9),
+        }
+
+
+class GeminiClient:
+    """Thread-safe Gemini caller shared by every ingest and query-time Gemini call."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._configured_key: str | None = None
+        self._models: dict[str, Any] = {}
+        self._key_clients: dict[str, Any] = {}
+        self._metrics: dict[str, _KindMetrics] = {}
+        self._route_metrics: dict[str, _KindMetrics] = {}
+        self._route_models: dict[str, str] = {}
+
+    def _ensure_configured(self) -> None:
+        key = config.GOOGLE_API_KEY.strip()
+        if not key:
+            raise ValueError("GOOGLE_API_KEY environment variable is required for Gemini calls")
+        with self._lock:
+            if self._configured_key != key:
+                genai.configure(api_key=key)
+                self._configured_key = key
+                self._models.clear()
+
+    def model(self, model_name: str) -> Any:
+        """Return the cached GenerativeModel for model_name, creating it on first use."""
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model
+            return model
+
+    def key_client(self, api_key: str) -> Any:
+        """Return the cached GenerativeServiceClient authenticated with api_key (pooled keys)."""
+        with self._lock:
+            client = self._key_clients.get(api_key)
+            if client is None:
+                client = glm.GenerativeServiceClient(client_options={"api_key": api_key})
+                self._key_clients[api_key] = client
+            return client
+
+    def _kind(self, kind: str) -> _KindMetrics:
+        metrics = self._metrics.get(kind)
+        if metrics is None:
+            metrics = self._metrics.setdefault(kind, _KindMetrics())
+        return metrics
+
+    def _tracked(self, kind: str, route: Route) -> tuple[_KindMetrics, _KindMetrics]:
+        """Metrics of the call kind and of the route (lock held)."""
+        metrics = self._route_metrics.get(route.label)
+        if metrics is None:
+            metrics = self._route_metrics.setdefault(route.label, _KindMetrics())
+        self._route_models[route.label] = route.model or config.GEMINI_MODEL
+        return self._kind(kind), metrics
+
+    def generate(
+        self,
+        kind: str,
+        contents: Any,
+        *,
+        generation_config: dict[str, Any] | None = None,
+        request_tokens: int = 0,
+        max_retries: int | None = None,
+        timeout: float | None = None,
+        rate_limited: bool = True,
+        stream: Callable[[str], None] | None = None,
+        hedge: bool = False,
+        route: Route | None = None,
+    ) -> GeminiResult:
+        """
+        Call Gemini and return the response text.
+
+        kind labels the call in metrics ("extract", "classify", "format", ...).
+        generation_config is passed as GenerationConfig kwargs; if the SDK rejects it the
+        call is repeated without it (prompt-based JSON). max_retries and timeout default to
+        AKILI_GEMINI_MAX_RETRIES and AKILI_GEMINI_CALL_TIMEOUT_SECONDS; timeout bounds the
+        whole call including retries. Raises the last error when retries are exhausted.
+        With stream set, the response is streamed and stream(chunk) is called with the text
+        of every chunk; stream("") is called when each attempt starts, so the consumer can
+        restart its scan when an attempt is retried. rate_limited=False
+        skips waiting for the shared budget (latency-bound calls); the outcome still feeds
+        the adaptive limiter. hedge allows a duplicate request for a slow attempt when
+        hedging is enabled (not for streamed calls). route selects the model and labels the
+        call's route metrics; it defaults to the route for kind (AKILI_GEMINI_MODEL_ROUTES).
+        With a key pool, each request goes to the least-loaded key and its limiter.
+        """
+        pool = get_key_pool()
+        scheduler = get_scheduler()
+        work = current_work()  # hedges run on another thread
+        if pool is None:
+            self._ensure_configured()
+        attempts = max(1, config.GEMINI_MAX_RETRIES if max_retries is None else max_retries)
+        deadline = config.GEMINI_CALL_TIMEOUT if timeout is None else timeout
+        route = route or route_for(kind)
+        model_name = route.model or config.GEMINI_MODEL
+        start = time.monotonic()
+        for attempt in range(attempts):
+            remaining = deadline - (time.monotonic() - start)
+            if remaining <= 0:
+                self._record_error(kind, route, "timeout")
+                raise TimeoutError(
+                    f"Gemini {kind} call exceeded {deadline}s timeout after {attempt} attempts"
+                )
+
+            def request(admitted: threading.Event) -> tuple[Any, float]:
+                with pool.lease() if pool is not None else nullcontext() as pooled:
+                    limiter = pooled.limiter if pooled is not None else get_rate_limiter()
+                    with (
+                        scheduler.admit(limiter, request_tokens, rate_limited, work)
+                        if scheduler is not None
+                        else limiter.admit(request_tokens, wait=rate_limited)
+                    ):
+                        with self._lock:
+                            for metrics in self._tracked(kind, route):
+                                metrics.calls += 1
+                        admitted.set()
+                        t0 = time.monotonic()
+                        response = self._call(
+                            model_name,
+                            contents,
+                            generation_config,
+                            remaining,
+                            stream,
+                            api_key=pooled.key if pooled is not None else None,
+                        )
+                        return response, time.monotonic() - t0
+
+            delay = self._hedge_delay(route) if hedge and stream is None else None
+            try:
+                if delay is None:
+                    response, latency = request(threading.Event())
+                else:
+                    response, latency = self._hedged(kind, request, delay)
+            except Exception as e:
+                self._record_error(kind, route, error_class(e))
+                if is_rate_limit_error(e) and attempt < attempts - 1:
+                    self._count(kind, "retries")
+                    if pool is None and not get_rate_limiter().adaptive:
+                        time.sleep(config.GEMINI_BACKOFF_BASE * (2**attempt))
+                    continue
+                fallback = config.GEMINI_FALLBACK_MODEL
+                if is_model_unavailable_error(e) and fallback and model_name != fallback:
+                    logger.warning(
+                        "Model %s unavailable (%s), trying fallback %s",
+                        model_name,
+                        type(e).__name__,
+                        fallback,
+                    )
+                    self._count(kind, "fallbacks")
+                    model_name = fallback
+                    continue
+                raise
+            self._record_success(kind, route, latency, response)
+            return GeminiResult(response_text(response), model_name, response)
+        raise RuntimeError(f"Gemini {kind} call made no attempts")  # pragma: no cover
+
+    def _hedge_delay(self, route: Route) -> float | None:
+        """Seconds after which an attempt on route is hedged; None when hedging is off or the
+        route has too few latency samples."""
+        if not config.GEMINI_HEDGE_ENABLED:
+            return None
+        with self._lock:
+            metrics = self._route_metrics.get(route.label)
+            latencies = metrics.latencies if metrics is not None else ()
+            if len(latencies) < _HEDGE_MIN_SAMPLES:
+                return None
+            return _percentile(sorted(latencies), config.GEMINI_HEDGE_PERCENTILE)
+
+    def _take_hedge(self, kind: str) -> bool:
+        """Count a hedge for kind if it stays within AKILI_GEMINI_HEDGE_MAX_FRACTION."""
+        with self._lock:
+            metrics = self._kind(kind)
+            if metrics.hedges + 1 > config.GEMINI_HEDGE_MAX_FRACTION * metrics.calls:
+                return False
+            metrics.hedges += 1
+            return True
+
+    def _hedged(
+        self,
+        kind: str,
+        request: Callable[[threading.Event], tuple[Any, float]],
+        delay: float,
+    ) -> tuple[Any, float]:
+        """
+        Run request, and a duplicate if the first is still running delay seconds after the
+        limiter admitted it. Returns the first success (its own latency); raises the primary
+        request's error when both fail. The slower request is left to finish on its own.
+        """
+        admitted = threading.Event()
+        primary = _submit_hedgeable(request, admitted)
+        if primary is None:
+            return request(admitted)
+        # The delay counts from admission; a request that ends before it also ends the wait.
+        primary.add_done_callback(lambda _: admitted.set())
+        admitted.wait()
+        if wait([primary], timeout=delay).done:
+            return primary.result()
+        if not self._take_hedge(kind):
+            return primary.result()
+        hedge = _submit_hedgeable(request, threading.Event())
+        if hedge is None:  # the pool filled up meanwhile; the hedge was not sent
+            with self._lock:
+                self._kind(kind).hedges -= 1
+            return primary.result()
+        logger.debug("Hedging slow Gemini %s call after %.1f s", kind, delay)
+        pending: set[Future] = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        self._count(kind, "hedge_wins")
+                    return future.result()
+        return primary.result()
+
+    def _call(
+        self,
+        model_name: str,
+        contents: Any,
+        generation_config: dict[str, Any] | None,
+        timeout: float,
+        stream: Callable[[str], None] | None = None,
+        api_key: str | None = None,
+    ) -> Any:
+        send = self._send if api_key is None else partial(self._send_with_key, api_key)
+        if stream is not None:
+            stream("")  # a new attempt: discard whatever an earlier attempt streamed
+        response = None
+        if generation_config is not None:
+            try:
+                response = send(model_name, contents, generation_config, timeout, stream)
+            except (TypeError, AttributeError, ValueError):
+                pass
+        if response is None:
+            response = send(model_name, contents, None, timeout, stream)
+        if stream is not None:
+            for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:  # chunk without text parts (e.g. the final usage chunk)
+                    continue
+                if text:
+                    stream(text)
+        return response
+
+    def _send(
+        self,
+        model_name: str,
+        contents: Any,
+        generation_config: dict[str, Any] | None,
+        timeout: float,
+        stream: Callable[[str], None] | None,
+    ) -> Any:
+        """One request through the globally configured GenerativeModel."""
+        kwargs: dict[str, Any] = {"request_options": {"timeout": timeout}}
+        if stream is not None:
+            kwargs["stream"] = True
+        if generation_config is not None:
+            kwargs["generation_config"] = genai.types.GenerationConfig(**generation_config)
+        return self.model(model_name).generate_content(contents, **kwargs)
+
+    def _send_with_key(
+        self,
+        api_key: str,
+        model_name: str,
+        contents: Any,
+        generation_config: dict[str, Any] | None,
+        timeout: float,
+        stream: Callable[[str], None] | None,
+    ) -> Any:
+        """One request through the service client of a pooled key; returns the same response
+        type as GenerativeModel.generate_content."""
+        request = protos.GenerateContentRequest(
+            model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+            contents=content_types.to_contents(contents),
+            generation_config=generation_types.to_generation_config_dict(generation_config or {}),
+        )
+        client = self.key_client(api_key)
+        if stream is not None:
+            return generation_types.GenerateContentResponse.from_iterator(
+                client.stream_generate_content(request, timeout=timeout)
+            )
+        return generation_types.GenerateContentResponse.from_response(
+            client.generate_content(request, timeout=timeout)
+        )
+
+    def _count(self, kind: str, field: str) -> None:
+        with self._lock:
+            metrics = self._kind(kind)
+            setattr(metrics, field, getattr(metrics, field) + 1)
+
+    def _record_error(self, kind: str, route: Route, cls: str) -> None:
+        with self._lock:
+            for metrics in self._tracked(kind, route):
+                metrics.errors[cls] = metrics.errors.get(cls, 0) + 1
+
+    def _record_success(self, kind: str, route: Route, latency: float, response: object) -> None:
+        input_tokens, output_tokens = _usage_tokens(response)
+        with self._lock:
+            for metrics in self._tracked(kind, route):
+                metrics.successes += 1
+                metrics.latencies.append(latency)
+                metrics.input_tokens += input_tokens
+                metrics.output_tokens += output_tokens
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Per-kind call counts, retries, fallbacks, tokens, error classes and latency."""
+        with self._lock:
+            return {kind: m.snapshot() for kind, m in self._metrics.items()}
+
+    def route_stats(self) -> dict[str, dict[str, Any]]:
+        """Calls, tokens, errors and latency per route label, with the model it routes to."""
+        with self._lock:
+            return {
+                label: {"model": self._route_models.get(label), **m.snapshot()}
+                for label, m in self._route_metrics.items()
+            }
+
+
+_client: GeminiClient | None = None
+_client_lock = threading.Lock()
+
+
+def get_gemini_client() -> GeminiClient:
+    """Return the process-wide Gemini client."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = GeminiClient()
+    return _client
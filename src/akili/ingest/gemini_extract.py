@@ -2,27 +2,37 @@
 Call Gemini with a page image and get structured extraction (units, bijections, grids).
 
 Uses response_mime_type=application/json when supported; otherwise prompt-based JSON.
-Retries on 429 (Resource exhausted) with exponential backoff.
+Calls go through the shared Gemini client (gemini_client.py), which draws each attempt
+from the shared rate limiter and retries on 429 (Resource exhausted) with backoff.
+extract_pages packs several pages into one request so the prompt is sent once per batch.
+extract_page(on_item=...) streams the response and hands over each unit, bijection and grid
+as soon as its JSON object is complete (json_stream.py).
 """
 
 from __future__ import annotations
 
-import base64
 import json
 import logging
-import time
+from typing import Callable
 
-import google.generativeai as genai
 from pydantic import ValidationError
 
 from akili import config
-from akili.ingest.errors import is_rate_limit_error as _is_rate_limit_error
-from akili.ingest.extract_schema import PageExtraction
+from akili.ingest.extract_schema import BBoxSchema, GridExtract, PageExtraction
+from akili.ingest.gemini_client import get_gemini_client
+from akili.ingest.json_stream import ArrayItemScanner
+from akili.ingest.model_routing import Route, route_for
+from akili.ingest.rate_limit import estimate_request_tokens
+from akili.ingest.render_profiles import image_mime_type
+from akili.ingest.response_cache import cache_key, get_response_cache
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever EXTRACT_PROMPT or the response schema changes so cached responses stop matching.
+EXTRACT_PROMPT_VERSION = "1"
 
-EXTRACT_PROMPT = """\
+# Rules shared by both wire formats (what to extract and how to place it).
+_PROMPT_RULES = """\
 You are extracting structured, coordinate-grounded facts from a single page of \
 technical documentation (datasheet, schematic, pinout table, etc.).
 
@@ -61,6 +71,10 @@ whether it is minimum, typical, or maximum (e.g. "minimum supply voltage", "maxi
 - Include the section heading or table title in the context when available \
 (e.g. "Absolute Maximum Ratings - storage temperature", "Electrical Characteristics - input leakage current").
 
+"""
+
+# Verbose wire format: one JSON object per fact, matching _simplified_extraction_schema.
+_VERBOSE_FORMAT = """\
 ## JSON Format
 
 - units: array of objects, each with: id (string), value (string or number), \
@@ -177,6 +191,141 @@ Expected output:
 
 Respond with a single JSON object with keys: units, bijections, grids. No other text."""
 
+EXTRACT_PROMPT = _PROMPT_RULES + _VERBOSE_FORMAT
+
+# Compact wire format (AKILI_EXTRACT_COMPACT_SCHEMA): positional arrays instead of objects,
+# so field names, ids and per-cell row/col indices are not repeated in the output.
+# Expanded back into the verbose shape by _normalize_extraction. Bump with the format.
+COMPACT_PROMPT_VERSION = "c1"
+
+_COMPACT_FORMAT = """\
+## JSON Format (compact)
+
+Every fact is a positional array: the fields described above are given by position, \
+without field names or ids. Coordinates are normalized numbers; a bbox is [x1, y1, x2, y2] \
+or null. Use "" for a missing text field.
+- units: [label, value, unit_of_measure, context, x, y, bbox], where x, y is the origin. \
+Example: ["VCC", 3.3, "V", "Electrical Characteristics - typical supply voltage", 0.5, 0.32, null]
+- bijections: [pairs, x, y, bbox], where pairs lists the 1:1 mapping as [left, right] label \
+pairs. Example: [[["1", "VCC"], ["2", "GND"], ["3", "CLK"]], 0.2, 0.3, null]
+- grids: [rows, x, y, bbox], where rows holds one array of cell values per table row \
+(row-major, header row first) and x, y is the table's top-left corner. \
+Example: [[["Pin", "Name"], ["1", "VCC"], ["2", "GND"]], 0.1, 0.15, [0.1, 0.15, 0.9, 0.4]]
+
+## Few-Shot Examples
+
+### Example 1: Pinout Table Page
+Input: A page showing a pin assignment table with columns "Pin Number", "Pin Name", "Function".
+Expected output:
+```json
+{
+  "units": [],
+  "bijections": [
+    [[["1", "VCC"], ["2", "GND"], ["3", "DATA"], ["4", "CLK"]], 0.3, 0.25, [0.1, 0.15, 0.9, 0.55]]
+  ],
+  "grids": [
+    [[["Pin Number", "Pin Name", "Function"],
+      ["1", "VCC", "Power Supply"],
+      ["2", "GND", "Ground"],
+      ["3", "DATA", "Serial Data I/O"],
+      ["4", "CLK", "Clock Input"]], 0.1, 0.15, [0.1, 0.15, 0.9, 0.55]]
+  ]
+}
+```
+
+### Example 2: Electrical Characteristics Table
+Input: A page with a table titled "Electrical Characteristics (TA = 25C)" with columns \
+"Parameter", "Symbol", "Min", "Typ", "Max", "Unit".
+Expected output:
+```json
+{
+  "units": [
+    ["VCC", 2.7, "V", "Electrical Characteristics - minimum supply voltage", 0.35, 0.32, null],
+    ["VCC", 3.3, "V", "Electrical Characteristics - typical supply voltage", 0.5, 0.32, null],
+    ["VCC", 3.6, "V", "Electrical Characteristics - maximum supply voltage", 0.65, 0.32, null],
+    ["ICC", 5, "mA", "Electrical Characteristics - typical supply current", 0.5, 0.38, null],
+    ["ICC", 10, "mA", "Electrical Characteristics - maximum supply current", 0.65, 0.38, null]
+  ],
+  "bijections": [],
+  "grids": [
+    [[["Parameter", "Symbol", "Min", "Typ", "Max", "Unit"],
+      ["Supply Voltage", "VCC", "2.7", "3.3", "3.6", "V"],
+      ["Supply Current", "ICC", "-", "5", "10", "mA"]], 0.05, 0.2, [0.05, 0.2, 0.95, 0.5]]
+  ]
+}
+```
+
+### Example 3: Absolute Maximum Ratings Table
+Input: A page showing "Absolute Maximum Ratings" with parameters, ratings, and units.
+Expected output:
+```json
+{
+  "units": [
+    ["VCC", 7.0, "V", "Absolute Maximum Ratings - supply voltage", 0.5, 0.28, null],
+    ["TSTG", -65, "C", "Absolute Maximum Ratings - storage temperature minimum", 0.4, 0.34, null],
+    ["TSTG", 150, "C", "Absolute Maximum Ratings - storage temperature maximum", 0.6, 0.34, null],
+    ["IO", 25, "mA", "Absolute Maximum Ratings - output current per pin", 0.5, 0.4, null],
+    ["ESD HBM", 2000, "V", "Absolute Maximum Ratings - ESD Human Body Model", 0.5, 0.46, null]
+  ],
+  "bijections": [],
+  "grids": []
+}
+```
+
+Respond with a single JSON object with keys: units, bijections, grids. No other text."""
+
+COMPACT_EXTRACT_PROMPT = _PROMPT_RULES + _COMPACT_FORMAT
+
+
+def extraction_prompt() -> tuple[str, str]:
+    """(prompt, version) of the configured wire format, verbose or compact."""
+    if config.EXTRACT_COMPACT_SCHEMA:
+        return COMPACT_EXTRACT_PROMPT, COMPACT_PROMPT_VERSION
+    return EXTRACT_PROMPT, EXTRACT_PROMPT_VERSION
+
+
+def compact_extraction(extraction: PageExtraction) -> dict:
+    """The compact wire form of an extraction (ids and cell origins are dropped); used to
+    compare output sizes of the two formats (benchmark/output_tokens.py)."""
+
+    def bbox(b: BBoxSchema | None) -> list[float] | None:
+        return [b.x1, b.y1, b.x2, b.y2] if b is not None else None
+
+    def rows(grid: GridExtract) -> list[list]:
+        table: list[list] = [[""] * grid.cols for _ in range(grid.rows)]
+        for cell in grid.cells:
+            if cell.row < grid.rows and cell.col < grid.cols:
+                table[cell.row][cell.col] = cell.value
+        return table
+
+    return {
+        "units": [
+            [
+                u.label or "",
+                u.value,
+                u.unit_of_measure or "",
+                u.context or "",
+                u.origin.x,
+                u.origin.y,
+                bbox(u.bbox),
+            ]
+            for u in extraction.units
+        ],
+        "bijections": [
+            [[[k, v] for k, v in b.mapping.items()], b.origin.x, b.origin.y, bbox(b.bbox)]
+            for b in extraction.bijections
+        ],
+        "grids": [[rows(g), g.origin.x, g.origin.y, bbox(g.bbox)] for g in extraction.grids],
+    }
+
+
+def _generation_config(schema: dict) -> dict:
+    """JSON output, constrained by schema for the verbose format. Gemini response schemas
+    cannot describe positional (mixed-type) arrays, so the compact format is prompt-defined."""
+    if config.EXTRACT_COMPACT_SCHEMA:
+        return {"response_mime_type": "application/json"}
+    return {"response_mime_type": "application/json", "response_schema": schema}
+
 
 def _simplified_extraction_schema() -> dict:
     """Build a flat JSON schema for PageExtraction without $defs.
@@ -317,11 +466,79 @@ def _normalize_bbox(bbox: object) -> dict | None:
     return None
 
 
-def _normalize_bijection_item(item: dict, page_prefix: str, index: int) -> dict | None:
+def _text(value: object) -> str | None:
+    return value if isinstance(value, str) and value.strip() else None
+
+
+def _position(item: list, start: int) -> tuple[list, object]:
+    """Origin [x, y] and bbox at item[start:start + 3] of a compact fact."""
+    origin = item[start : start + 2]
+    bbox = item[start + 2] if len(item) > start + 2 else None
+    return origin, bbox
+
+
+def _expand_compact_unit(item: list) -> dict | None:
+    """[label, value, unit_of_measure, context, x, y, bbox] -> verbose unit object."""
+    if len(item) < 6:
+        return None
+    origin, bbox = _position(item, 4)
+    return {
+        "label": _text(item[0]),
+        "value": item[1],
+        "unit_of_measure": _text(item[2]),
+        "context": _text(item[3]),
+        "origin": origin,
+        "bbox": bbox,
+    }
+
+
+def _expand_compact_bijection(item: list) -> dict | None:
+    """[pairs, x, y, bbox] -> verbose bijection object (left_set, right_set, mapping)."""
+    if len(item) < 3 or not isinstance(item[0], list):
+        return None
+    pairs = [
+        (str(pair[0]), str(pair[1]))
+        for pair in item[0]
+        if isinstance(pair, list) and len(pair) >= 2
+    ]
+    origin, bbox = _position(item, 1)
+    return {
+        "left_set": [left for left, _ in pairs],
+        "right_set": [right for _, right in pairs],
+        "mapping": dict(pairs),
+        "origin": origin,
+        "bbox": bbox,
+    }
+
+
+def _expand_compact_grid(item: list) -> dict | None:
+    """[rows, x, y, bbox] (rows: row-major value arrays) -> verbose grid object with cells."""
+    if len(item) < 3 or not isinstance(item[0], list):
+        return None
+    rows = [row for row in item[0] if isinstance(row, list)]
+    origin, bbox = _position(item, 1)
+    return {
+        "rows": len(rows),
+        "cols": max((len(row) for row in rows), default=0),
+        "cells": [
+            {"row": r, "col": c, "value": value}
+            for r, row in enumerate(rows)
+            for c, value in enumerate(row)
+            if value is not None
+        ],
+        "origin": origin,
+        "bbox": bbox,
+    }
+
+
+def _normalize_bijection_item(item: object, page_prefix: str, index: int) -> dict | None:
     """
     Convert Gemini bijection shape to schema: left_set, right_set, mapping, origin.
-    Accepts: pair (list of 2), or key/value, or already left_set/right_set/mapping.
+    Accepts: pair (list of 2), or key/value, or already left_set/right_set/mapping, or the
+    compact [pairs, x, y, bbox] array.
     """
+    if isinstance(item, list):
+        item = _expand_compact_bijection(item)
     if not isinstance(item, dict):
         return None
     bid = item.get("id")
@@ -366,8 +583,11 @@ def _normalize_grid_item(item: object, page_prefix: str, index: int) -> dict | N
     """
     Convert Gemini grid shape to schema: rows (int), cols (int),
     cells (list of {row, col, value, origin}).
-    Accepts: rows as list of row objects with 'cells', or already rows/cols/cells.
+    Accepts: rows as list of row objects with 'cells', or already rows/cols/cells, or the
+    compact [rows, x, y, bbox] array.
     """
+    if isinstance(item, list):
+        item = _expand_compact_grid(item)
     if not isinstance(item, dict):
         return None
     gid = item.get("id")
@@ -463,6 +683,46 @@ def _normalize_grid_item(item: object, page_prefix: str, index: int) -> dict | N
     return None
 
 
+def _normalize_unit_item(u: object, page_prefix: str, index: int) -> dict | None:
+    """Normalize one unit (object or compact array): value from value/text/label/content,
+    page-namespaced id, origin and bbox; None if it has no usable origin."""
+    if isinstance(u, list):
+        u = _expand_compact_unit(u)
+    if not isinstance(u, dict):
+        return None
+    origin = _normalize_origin(u.get("origin"))
+    if origin is None:
+        return None
+    # Value: prefer value, then text/label/content; fallback "" so schema validates
+    val = u.get("value")
+    if val is None:
+        val = u.get("text") or u.get("label") or u.get("content")
+    if val is None:
+        val = ""
+    # Id: must be string; use existing if non-empty else p{page}_u{i} for global uniqueness
+    uid = u.get("id")
+    if not isinstance(uid, str) or not uid.strip():
+        uid = f"{page_prefix}u{index}"
+    uom = u.get("unit_of_measure")
+    ctx = u.get("context")
+    return {
+        "id": uid,
+        "label": u.get("label") if isinstance(u.get("label"), str) else None,
+        "value": val,
+        "unit_of_measure": uom if isinstance(uom, str) else None,
+        "context": ctx if isinstance(ctx, str) else None,
+        "origin": origin,
+        "bbox": _normalize_bbox(u.get("bbox")),
+    }
+
+
+_ITEM_NORMALIZERS = {
+    "units": _normalize_unit_item,
+    "bijections": _normalize_bijection_item,
+    "grids": _normalize_grid_item,
+}
+
+
 def _normalize_extraction(data: dict, page_index: int = 0) -> dict:
     """
     Normalize Gemini response to match PageExtraction schema.
@@ -478,38 +738,11 @@ def _normalize_extraction(data: dict, page_index: int = 0) -> dict:
     if not isinstance(units_raw, list):
         data["units"] = []
     else:
-        kept = []
-        for i, u in enumerate(units_raw):
-            if not isinstance(u, dict):
-                continue
-            origin = _normalize_origin(u.get("origin"))
-            if origin is None:
-                continue
-            # Value: prefer value, then text/label/content; fallback "" so schema validates
-            val = u.get("value")
-            if val is None:
-                val = u.get("text") or u.get("label") or u.get("content")
-            if val is None:
-                val = ""
-            # Id: must be string; use existing if non-empty else p{page}_u{i} for global uniqueness
-            uid = u.get("id")
-            if not isinstance(uid, str) or not uid.strip():
-                uid = f"{page_prefix}u{i}"
-            uom = u.get("unit_of_measure")
-            ctx = u.get("context")
-            bbox = _normalize_bbox(u.get("bbox"))
-            kept.append(
-                {
-                    "id": uid,
-                    "label": u.get("label") if isinstance(u.get("label"), str) else None,
-                    "value": val,
-                    "unit_of_measure": uom if isinstance(uom, str) else None,
-                    "context": ctx if isinstance(ctx, str) else None,
-                    "origin": origin,
-                    "bbox": bbox,
-                }
-            )
-        data["units"] = kept
+        data["units"] = [
+            u
+            for i, item in enumerate(units_raw)
+            if (u := _normalize_unit_item(item, page_prefix, i)) is not None
+        ]
 
     # Bijections: normalize Gemini shapes (pair, key/value) to left_set, right_set, mapping
     bijections_raw = data.get("bijections")
@@ -535,111 +768,223 @@ def _normalize_extraction(data: dict, page_index: int = 0) -> dict:
     return data
 
 
-def _ensure_configured() -> None:
-    if not config.GOOGLE_API_KEY.strip():
-        raise ValueError("GOOGLE_API_KEY environment variable is required for Gemini extraction")
-
-
-def _is_model_unavailable_error(e: Exception) -> bool:
-    """Check if error indicates model is unavailable (NotFound/PermissionDenied)."""
-    err_str = str(e).lower()
-    err_type = type(e).__name__.lower()
-    return any(
-        indicator in err_str or indicator in err_type
-        for indicator in ("notfound", "not found", "permissiondenied", "permission denied", "404")
-    )
-
-
 def extract_page(
     page_index: int,
     image_png_bytes: bytes,
     doc_id: str,
     page_type_hint: str = "",
+    on_item: Callable[[PageExtraction], None] | None = None,
+    route: Route | None = None,
 ) -> PageExtraction:
     """
     Send one page image to Gemini and return structured extraction.
 
     Raises if API key is missing. Returns empty extraction on parse/API errors.
     page_type_hint is an optional string prepended to the prompt (from page_classifier).
-    Uses fallback model on NotFound/PermissionDenied if configured (A6).
+    Retries, timeout and the fallback model (A6) are handled by the shared Gemini client.
+    With AKILI_GEMINI_CACHE_ENABLED, an identical page/hint/model is answered from the cache.
+    With on_item set, the response is streamed and on_item is called with a one-item
+    PageExtraction per unit, bijection or grid as soon as it has been received (not for
+    cache hits), once even if the call is retried; the returned extraction is still
+    validated from the complete response. route picks the model (model_routing.route_for("extract", page_type); default: the
+    route for "extract").
     """
-    _ensure_configured()
-    genai.configure(api_key=config.GOOGLE_API_KEY)
-
-    model_name = config.GEMINI_MODEL
-    model = genai.GenerativeModel(model_name)
+    # Responses are cached by page content, not position: the raw text is normalized with
+    # the current page_index on a hit, so generated ids are namespaced for this page.
+    cache = get_response_cache()
+    route = route or route_for("extract")
+    model = route.model or config.GEMINI_MODEL
+    base_prompt, prompt_version = extraction_prompt()
+    key = ""
+    if cache is not None:
+        key = cache_key("extract", image_png_bytes, prompt_version, model, page_type_hint)
+        cached = cache.get(key)
+        if cached is not None:
+            data = _decode_response_json(cached, page_index)
+            if data is not None:
+                return _validate_extraction(data, page_index)
+
+    # Raw bytes: the SDK wraps them in a Blob, so no base64 copy of the page is made here.
     image_part = {
-        "inline_data": {
-            "mime_type": "image/png",
-            "data": base64.standard_b64encode(image_png_bytes).decode("utf-8"),
-        }
+        "inline_data": {"mime_type": image_mime_type(image_png_bytes), "data": image_png_bytes}
     }
     hint_block = f"\n\nPAGE TYPE HINT: {page_type_hint}\n" if page_type_hint else ""
 
     # CRITICAL-2: Sanitize doc_id and page_index to prevent prompt injection
     safe_page_index = max(0, int(page_index))
     prompt = (
-        f"{EXTRACT_PROMPT}{hint_block}\n\n"
+        f"{base_prompt}{hint_block}\n\n"
         f"This image is page {safe_page_index}. "
         "Return JSON with keys: units, bijections, grids."
     )
-    contents = [prompt, image_part]
-
-    # RESOURCE-2: Track total elapsed time for timeout
-    start_time = time.monotonic()
-    for attempt in range(config.GEMINI_MAX_RETRIES):
-        elapsed = time.monotonic() - start_time
-        if elapsed > config.GEMINI_CALL_TIMEOUT:
-            raise TimeoutError(
-                f"Gemini API call exceeded {config.GEMINI_CALL_TIMEOUT}s timeout "
-                f"after {attempt} attempts (page {safe_page_index})"
-            )
-        try:
-            try:
-                generation_config = genai.types.GenerationConfig(
-                    response_mime_type="application/json",
-                    response_schema=_simplified_extraction_schema(),
-                )
-                response = model.generate_content(contents, generation_config=generation_config)
-            except (TypeError, AttributeError, ValueError):
-                response = model.generate_content(contents)
-            break
-        except Exception as e:
-            if _is_rate_limit_error(e) and attempt < config.GEMINI_MAX_RETRIES - 1:
-                wait = config.GEMINI_BACKOFF_BASE * (2**attempt)
-                time.sleep(wait)
-                continue
-            # A6: Try fallback model on NotFound/PermissionDenied
-            if _is_model_unavailable_error(e) and config.GEMINI_FALLBACK_MODEL:
-                if model_name != config.GEMINI_FALLBACK_MODEL:
-                    logger.warning(
-                        "Model %s unavailable (%s), trying fallback %s",
-                        model_name,
-                        type(e).__name__,
-                        config.GEMINI_FALLBACK_MODEL,
-                    )
-                    model_name = config.GEMINI_FALLBACK_MODEL
-                    model = genai.GenerativeModel(model_name)
-                    continue
-            raise
-
-    text = ""
-    if hasattr(response, "text") and response.text:
-        text = response.text
-    else:
-        candidates = getattr(response, "candidates", None) or []
-        if candidates:
-            c = candidates[0]
-            content = getattr(c, "content", None)
-            parts = getattr(content, "parts", None) if content else None
-            if content and parts:
-                part = parts[0]
-                if hasattr(part, "text") and part.text:
-                    text = part.text
-    text = (text or "").strip()
-    if not text:
+    stream = None
+    if on_item is not None:
+        scanner = ArrayItemScanner()
+
+        def stream(chunk: str) -> None:
+            for key, index, item in scanner.feed(chunk):
+                extraction = _streamed_item(key, index, item, page_index)
+                if extraction is not None:
+                    on_item(extraction)
+
+    result = get_gemini_client().generate(
+        "extract",
+        [prompt, image_part],
+        generation_config=_generation_config(_simplified_extraction_schema()),
+        request_tokens=estimate_request_tokens(prompt, [image_png_bytes]),
+        stream=stream,
+        hedge=True,
+        route=route,
+    )
+
+    data = _decode_response_json(result.text, page_index)
+    if data is None:
         return PageExtraction(units=[], bijections=[], grids=[])
+    if cache is not None:
+        cache.put(key, "extract", result.model_name, result.text)
+    return _validate_extraction(data, page_index)
+
+
+# Page types whose extraction output is large (dense tables): batched at half the page count.
+_DENSE_PAGE_TYPES = frozenset(
+    {"pinout_table", "electrical_specs", "absolute_max_ratings", "timing_characteristics"}
+)
+
+_BATCH_SUFFIX = """
+
+MULTI-PAGE REQUEST: the images below are datasheet pages {pages}. Each image is preceded by a \
+line "PAGE <n>" (and its page type hint, if any). Extract every page separately, exactly as \
+you would a single page; never merge content across pages. This replaces the single-page \
+response format above: respond with a single JSON object
+{{"pages": [{{"page": <n>, "units": [...], "bijections": [...], "grids": [...]}}, ...]}}
+with one entry per page. No other text."""
+
+
+def max_batch_pages(page_type: str) -> int:
+    """Pages of this type allowed in one extract_pages request (AKILI_EXTRACT_BATCH_PAGES)."""
+    limit = max(1, config.EXTRACT_BATCH_PAGES)
+    return max(1, limit // 2) if page_type in _DENSE_PAGE_TYPES else limit
+
+
+def _batch_extraction_schema() -> dict:
+    """Response schema for extract_pages: a list of per-page extractions keyed by "page"."""
+    page_item = _simplified_extraction_schema()
+    page_item["properties"] = {"page": {"type": "integer"}, **page_item["properties"]}
+    page_item["required"] = ["page", *page_item["required"]]
+    return {
+        "type": "object",
+        "properties": {"pages": {"type": "array", "items": page_item}},
+        "required": ["pages"],
+    }
+
+
+def extract_pages(
+    pages: list[tuple[int, bytes, str]],
+    doc_id: str,
+    route: Route | None = None,
+) -> dict[int, PageExtraction]:
+    """
+    Extract several pages, given as (page_index, image, page_type_hint), in one Gemini call.
+
+    The extraction prompt is sent once for the whole batch instead of once per page; the
+    response is split back into one PageExtraction per page_index. Cached pages are answered
+    from the cache and left out of the request, and each page parsed from the response is
+    cached under its single-page key. Pages missing from the response (or an unparseable
+    response) are re-extracted one at a time with extract_page. All pages go to the model of
+    route (default: the route for "extract"), so callers batch only pages sharing a model.
+    """
+    results: dict[int, PageExtraction] = {}
+    cache = get_response_cache()
+    route = route or route_for("extract")
+    model = route.model or config.GEMINI_MODEL
+    keys: dict[int, str] = {}
+    todo: list[tuple[int, bytes, str]] = []
+    base_prompt, prompt_version = extraction_prompt()
+    for page_index, image_png_bytes, hint in pages:
+        if cache is not None:
+            keys[page_index] = cache_key("extract", image_png_bytes, prompt_version, model, hint)
+            cached = cache.get(keys[page_index])
+            data = _decode_response_json(cached, page_index) if cached is not None else None
+            if data is not None:
+                results[page_index] = _validate_extraction(data, page_index)
+                continue
+        todo.append((page_index, image_png_bytes, hint))
+    if len(todo) <= 1:
+        for page_index, image_png_bytes, hint in todo:
+            results[page_index] = extract_page(
+                page_index, image_png_bytes, doc_id, hint, route=route
+            )
+        return results
+
+    # CRITICAL-2: page numbers in the prompt are sanitized ints, never caller strings
+    page_numbers = [max(0, int(page_index)) for page_index, _, _ in todo]
+    prompt = base_prompt + _BATCH_SUFFIX.format(pages=", ".join(map(str, page_numbers)))
+    contents: list = [prompt]
+    for page_number, (_, image_png_bytes, hint) in zip(page_numbers, todo):
+        header = f"PAGE {page_number}"
+        contents.append(f"{header} - PAGE TYPE HINT: {hint}" if hint else header)
+        contents.append(
+            {
+                "inline_data": {
+                    "mime_type": image_mime_type(image_png_bytes),
+                    "data": image_png_bytes,
+                }
+            }
+        )
+    result = get_gemini_client().generate(
+        "extract_batch",
+        contents,
+        generation_config=_generation_config(_batch_extraction_schema()),
+        request_tokens=estimate_request_tokens(prompt, [image for _, image, _ in todo]),
+        hedge=True,
+        route=route,
+    )
+
+    wanted = {page_index for page_index, _, _ in todo}
+    data = _decode_response_json(result.text, todo[0][0])
+    entries = data.get("pages") if data is not None else None
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict):
+            continue
+        page_index = entry.pop("page", None)
+        if not isinstance(page_index, int) or page_index not in wanted or page_index in results:
+            continue
+        if cache is not None:
+            cache.put(keys[page_index], "extract", result.model_name, json.dumps(entry))
+        results[page_index] = _validate_extraction(entry, page_index)
+
+    missing = [page for page in todo if page[0] not in results]
+    if missing:
+        logger.warning(
+            "Multi-page extraction returned %d of %d page(s); extracting the rest singly.",
+            len(todo) - len(missing),
+            len(todo),
+        )
+    for page_index, image_png_bytes, hint in missing:
+        results[page_index] = extract_page(page_index, image_png_bytes, doc_id, hint, route=route)
+    return results
+
+
+def _streamed_item(key: str, index: int, item: object, page_index: int) -> PageExtraction | None:
+    """A one-item PageExtraction for a streamed array item, normalized as in the full
+    response (same generated id); None for unknown keys or invalid items."""
+    normalize = _ITEM_NORMALIZERS.get(key)
+    normalized = normalize(item, f"p{page_index}_", index) if normalize else None
+    if normalized is None:
+        return None
+    try:
+        return PageExtraction.model_validate({key: [normalized]})
+    except ValidationError as e:
+        logger.debug(
+            "Skipping invalid streamed %s item %d (page %d): %s", key, index, page_index, e
+        )
+        return None
+
 
+def _decode_response_json(text: str, page_index: int) -> dict | None:
+    """Strip code fences and parse response text; None if empty or not valid JSON."""
+    if not text:
+        return None
     if text.startswith("```"):
         lines = text.split("\n")
         if lines[0].startswith("```"):
@@ -660,8 +1005,11 @@ def extract_page(
     try:
         data = json.loads(text)
     except json.JSONDecodeError:
-        return PageExtraction(units=[], bijections=[], grids=[])
+        return None
+    return data if isinstance(data, dict) else None
+
 
+def _validate_extraction(data: dict, page_index: int) -> PageExtraction:
     data = _normalize_extraction(data, page_index)
     try:
         return PageExtraction.model_validate(data)
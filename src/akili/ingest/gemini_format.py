@@ -3,16 +3,17 @@ Shadow formatting: rephrase a verified fact into a 1-sentence answer using Gemin
 
 Strict fact-only prompting; no outside knowledge. Returns None on failure or UNABLE TO PHRASE.
 Used only when we already have an AnswerWithProof — never blocks or replaces the verified answer.
+Calls are single-attempt and bypass the ingest rate budget so queries never wait behind ingest;
+they are interactive work for the Gemini scheduler (scheduler.py).
 """
 
 from __future__ import annotations
 
 import logging
-import os
-
-import google.generativeai as genai
 
 from akili import config
+from akili.ingest.gemini_client import get_gemini_client
+from akili.ingest.scheduler import Priority, gemini_work
 
 logger = logging.getLogger(__name__)
 UNABLE_TO_PHRASE = "UNABLE TO PHRASE"
@@ -29,37 +30,32 @@ FORMAT_PROMPT = (
 )
 
 
+def _generate(prompt: str) -> str:
+    with gemini_work(Priority.INTERACTIVE):
+        return (
+            get_gemini_client()
+            .generate(
+                "format", prompt, max_retries=1, timeout=config.FORMAT_TIMEOUT, rate_limited=False
+            )
+            .text
+        )
+
+
 def format_answer(question: str, verified_fact: str, coordinates: str) -> str | None:
     """
     Ask Gemini to rephrase the verified fact into a 1-sentence answer to the question.
 
     Returns the sentence, or None if API key missing, call fails, or model returns UNABLE TO PHRASE.
     """
-    if not os.environ.get("GOOGLE_API_KEY", "").strip():
+    if not config.GOOGLE_API_KEY.strip():
         return None
-    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
-    model = genai.GenerativeModel(config.GEMINI_MODEL)
     prompt = FORMAT_PROMPT.format(
         question=question,
         verified_fact=verified_fact,
         coordinates=coordinates,
     )
     try:
-        response = model.generate_content(prompt)
-        text = ""
-        if hasattr(response, "text") and response.text:
-            text = response.text
-        else:
-            candidates = getattr(response, "candidates", None) or []
-            if candidates:
-                c = candidates[0]
-                content = getattr(c, "content", None)
-                parts = getattr(content, "parts", None) if content else None
-                if content and parts:
-                    part = parts[0]
-                    if hasattr(part, "text") and part.text:
-                        text = part.text
-        text = (text or "").strip()
+        text = _generate(prompt)
         if not text or UNABLE_TO_PHRASE in text.upper():
             return None
         return text
@@ -92,10 +88,8 @@ def format_refusal(
 
     Returns the reason string, or None if API key missing, call fails, or empty response.
     """
-    if not os.environ.get("GOOGLE_API_KEY", "").strip():
+    if not config.GOOGLE_API_KEY.strip():
         return None
-    genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
-    model = genai.GenerativeModel(config.GEMINI_MODEL)
     doc_summary = (
         f"{n_units} units (e.g. voltages, labels), "
         f"{n_bijections} bijections (e.g. pin name ↔ number), "
@@ -103,21 +97,7 @@ def format_refusal(
     )
     prompt = REFUSAL_PROMPT.format(question=question, doc_summary=doc_summary)
     try:
-        response = model.generate_content(prompt)
-        text = ""
-        if hasattr(response, "text") and response.text:
-            text = response.text
-        else:
-            candidates = getattr(response, "candidates", None) or []
-            if candidates:
-                c = candidates[0]
-                content = getattr(c, "content", None)
-                parts = getattr(content, "parts", None) if content else None
-                if content and parts:
-                    part = parts[0]
-                    if hasattr(part, "text") and part.text:
-                        text = part.text
-        text = (text or "").strip()
+        text = _generate(prompt)
         if not text:
             return None
         return text
@@ -0,0 +1,302 @@
+"""
+Background ingest jobs: a fixed pool of worker threads fed from a bounded FIFO queue.
+
+Uploads are admitted as jobs (persisted via JobStore) and run one per worker, so a burst
+of uploads queues up instead of spawning a thread each or blocking the event loop.
+Admission fails with QueueFullError once max_queued jobs are waiting. drain() stops
+admission and lets running jobs finish; jobs still queued stay "queued" in the store.
+
+Several API instances can share one JobStore (DATABASE_URL), so every job row is leased by
+the manager holding it: its instance_id as owner, and a heartbeat renewed every third of
+lease_seconds. recover() claims only jobs whose lease is free or expired, and keeps doing so
+from the heartbeat thread, so jobs of an instance that stopped (or crashed mid-run) are
+resumed by another one, while jobs a live instance is running are left alone. drain()
+releases the lease on jobs still queued, so a restart picks them up at once; jobs cut off
+mid-run are resumed once their lease expires.
+Retries of an ingested document (retry=True) run as jobs too, and are refused with
+JobConflictError while another job for the same document is unfinished, so two ingests of
+one document never race on its checkpoints and canonical rows.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+from akili.store.jobs import JobStore
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when the ingest queue is at capacity or shutting down."""
+
+
+class JobConflictError(Exception):
+    """Raised when a retry is submitted while a job for the same document is unfinished."""
+
+
+@dataclass
+class IngestJob:
+    """An admitted ingest job; listeners receive every progress event from the worker."""
+
+    job_id: str
+    doc_id: str
+    pdf_path: Path
+    filename: str
+    user_id: str | None = None
+    listeners: list[Callable[[dict], None]] = field(default_factory=list)
+    progress: dict[str, Any] | None = None
+    content_hash: str | None = None  # SHA-256 of the PDF when known at upload
+    retry: bool = False  # re-extraction of an already ingested document
+
+
+# runner(job, progress) runs the ingest and returns the job's result dict.
+JobRunner = Callable[[IngestJob, Callable[[dict], None]], dict[str, Any]]
+
+
+class IngestJobManager:
+    """Fixed-size worker pool with a bounded, position-reporting queue."""
+
+    def __init__(
+        self,
+        runner: JobRunner,
+        job_store: JobStore,
+        workers: int = 2,
+        max_queued: int = 20,
+        lease_seconds: float = 60.0,
+    ):
+        self._runner = runner
+        self._jobs = job_store
+        self._workers = max(1, workers)
+        self._max_queued = max_queued
+        self._lease = max(1.0, lease_seconds)
+        self.instance_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._cond = threading.Condition()
+        self._queue: deque[IngestJob] = deque()
+        self._running: dict[str, IngestJob] = {}
+        self._threads: list[threading.Thread] = []
+        self._accepting = True
+        self._stopped = threading.Event()
+        self._pdf_path_for: Callable[[str], Path] | None = None
+
+    def start(self) -> None:
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self._workers):
+                t = threading.Thread(
+                    target=self._worker_loop, name=f"akili-ingest-job-{i}", daemon=True
+                )
+                t.start()
+                self._threads.append(t)
+            threading.Thread(
+                target=self._heartbeat_loop, name="akili-ingest-job-lease", daemon=True
+            ).start()
+
+    def submit(
+        self,
+        doc_id: str,
+        pdf_path: Path,
+        filename: str,
+        user_id: str | None = None,
+        listener: Callable[[dict], None] | None = None,
+        job_id: str | None = None,
+        content_hash: str | None = None,
+        retry: bool = False,
+    ) -> IngestJob:
+        """Admit a job. Pass job_id to re-queue an existing job record (recovery);
+        content_hash is the PDF's SHA-256 when the upload already computed it. retry marks
+        a re-extraction of an existing document; a new one raises JobConflictError while
+        another job for doc_id is queued or running. Both are stored with the job record. The listener's first event is
+        {"phase": "queued", "job_id", "doc_id", "queue_position"}, sent before any worker
+        can pick the job up."""
+        job = IngestJob(
+            job_id=job_id or str(uuid.uuid4()),
+            doc_id=doc_id,
+            pdf_path=pdf_path,
+            filename=filename,
+            user_id=user_id,
+            listeners=[listener] if listener else [],
+            content_hash=content_hash,
+            retry=retry,
+        )
+        with self._cond:
+            if not self._accepting:
+                raise QueueFullError("Ingest service is shutting down")
+            if (
+                retry
+                and job_id is None
+                and (
+                    any(j.doc_id == doc_id for j in (*self._queue, *self._running.values()))
+                    or self._jobs.unfinished_for_doc(doc_id) is not None
+                )
+            ):
+                raise JobConflictError(f"An ingest job for document {doc_id} is unfinished")
+            if job_id is None and self._max_queued > 0 and len(self._queue) >= self._max_queued:
+                raise QueueFullError(f"Ingest queue is full ({len(self._queue)} jobs waiting)")
+            if job_id is None:
+                self._jobs.create(
+                    job.job_id,
+                    doc_id,
+                    filename,
+                    user_id,
+                    owner=self.instance_id,
+                    content_hash=content_hash,
+                    retry=retry,
+                )
+            else:
+                self._jobs.mark_queued(job.job_id)
+            self._queue.append(job)
+            queued = {
+                "phase": "queued",
+                "job_id": job.job_id,
+                "doc_id": doc_id,
+                "queue_position": len(self._queue),
+            }
+            for notify in job.listeners:
+                notify(queued)
+            self._cond.notify()
+        self.start()
+        return job
+
+    def queue_position(self, job_id: str) -> int | None:
+        """1-based position among waiting jobs, 0 if running, None if not in this process."""
+        with self._cond:
+            if job_id in self._running:
+                return 0
+            for i, job in enumerate(self._queue):
+                if job.job_id == job_id:
+                    return i + 1
+        return None
+
+    def status(self, job_id: str) -> dict[str, Any] | None:
+        """Persisted job record plus live queue position and latest progress event."""
+        record = self._jobs.get(job_id)
+        if record is None:
+            return None
+        with self._cond:
+            live = self._running.get(job_id)
+            progress = dict(live.progress) if live and live.progress else None
+        record["queue_position"] = self.queue_position(job_id)
+        record["progress"] = progress
+        return record
+
+    def stats(self) -> dict[str, int]:
+        with self._cond:
+            return {
+                "workers": self._workers,
+                "running": len(self._running),
+                "queued": len(self._queue),
+                "max_queued": self._max_queued,
+            }
+
+    def drain(self, timeout: float = 30.0) -> None:
+        """Stop admitting jobs and wait up to timeout for running jobs to finish."""
+        with self._cond:
+            self._accepting = False
+            self._cond.notify_all()
+            threads = list(self._threads)
+            waiting = len(self._queue)
+        if waiting:
+            logger.info("Ingest drain: %d queued job(s) will resume on next start.", waiting)
+        for t in threads:
+            t.join(timeout=timeout)
+        with self._cond:
+            still_running = list(self._running)
+            queued = [job.job_id for job in self._queue]
+        self._stopped.set()
+        self._jobs.release(self.instance_id, queued)
+        if still_running:
+            logger.warning(
+                "Ingest drain timed out; %d job(s) will resume from checkpoints on next start.",
+                len(still_running),
+            )
+
+    def recover(self, pdf_path_for: Callable[[str], Path]) -> int:
+        """Resubmit unfinished jobs whose lease is free or expired, now and from then on
+        every heartbeat; pdf_path_for maps a doc_id to its upload. Returns jobs resubmitted."""
+        self._pdf_path_for = pdf_path_for
+        self.start()
+        return self._recover(pdf_path_for)
+
+    def _recover(self, pdf_path_for: Callable[[str], Path]) -> int:
+        resubmitted = 0
+        for record in self._jobs.list_unfinished():
+            with self._cond:
+                if not self._accepting:
+                    break
+                mine = record["job_id"] in self._running or any(
+                    job.job_id == record["job_id"] for job in self._queue
+                )
+            if mine or not self._jobs.claim(record["job_id"], self.instance_id, self._lease):
+                continue
+            pdf_path = pdf_path_for(record["doc_id"])
+            if not pdf_path.is_file():
+                self._jobs.mark_failed(record["job_id"], "Uploaded PDF missing after restart")
+                continue
+            try:
+                self.submit(
+                    record["doc_id"],
+                    pdf_path,
+                    record["filename"],
+                    record["user_id"],
+                    job_id=record["job_id"],
+                    content_hash=record["content_hash"],
+                    retry=record["retry"],
+                )
+            except QueueFullError:  # shutting down; the lease runs out and another instance
+                break  # resumes the job
+            resubmitted += 1
+        if resubmitted:
+            logger.info("Recovered %d unfinished ingest job(s).", resubmitted)
+        return resubmitted
+
+    def _heartbeat_loop(self) -> None:
+        while not self._stopped.wait(self._lease / 3):
+            try:
+                self._jobs.heartbeat(self.instance_id)
+                if self._pdf_path_for is not None:
+                    self._recover(self._pdf_path_for)
+            except Exception as e:
+                logger.warning("Ingest job lease heartbeat failed: %s", e)
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                while self._accepting and not self._queue:
+                    self._cond.wait()
+                if not self._accepting:
+                    return
+                job = self._queue.popleft()
+                self._running[job.job_id] = job
+            try:
+                self._run(job)
+            finally:
+                with self._cond:
+                    self._running.pop(job.job_id, None)
+
+    def _run(self, job: IngestJob) -> None:
+        def progress(msg: dict) -> None:
+            if msg.get("phase") != "fact":  # streamed facts are not progress for GET /jobs
+                job.progress = msg
+            for listener in job.listeners:
+                listener(msg)
+
+        self._jobs.mark_running(job.job_id)
+        try:
+            result = self._runner(job, progress)
+        except Exception as e:
+            logger.exception("Ingest job %s failed: %s", job.job_id, e)
+            self._jobs.mark_failed(job.job_id, f"{type(e).__name__}: {e}")
+            progress({"phase": "error", "job_id": job.job_id, "error": str(e)})
+            return
+        self._jobs.mark_done(job.job_id, result)
+        progress({**result, "phase": "done", "job_id": job.job_id})
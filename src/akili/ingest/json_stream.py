@@ -0,0 +1,105 @@
+"""
+Incremental JSON scanning for streamed Gemini responses.
+
+ArrayItemScanner reads the text of a JSON object response as it arrives and returns each
+object or array inside a top-level array ({"units": [{...}, [...]], "grids": [...]}) as soon
+as its closing bracket has been received, without waiting for the rest of the response.
+Text is fed chunk by chunk; only the unfinished item (or key) is kept, and only the item's own
+text is parsed, so the cost is linear in the response size.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+class ArrayItemScanner:
+    """
+    Scan a growing JSON response for complete objects/arrays in its top-level arrays.
+
+    feed(chunk) takes the next chunk of response text of the current attempt and returns
+    the newly completed items as (array key, index in the array, decoded item). feed("")
+    marks the start of a new attempt (GeminiClient.generate signals each retry that way):
+    the scan restarts, and of the new attempt's items only those at a key and index no
+    earlier attempt returned are returned, so a consumer never sees an item twice.
+    """
+
+    def __init__(self) -> None:
+        self._emitted: set[tuple[str, int]] = set()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._last_key: str | None = None
+        self._array_key: str | None = None
+        self._item_start = 0
+        self._index = 0
+
+    def feed(self, chunk: str) -> list[tuple[str, int, Any]]:
+        if not chunk:
+            self._reset()
+            return []
+        text = self._text + chunk
+        items: list[tuple[str, int, Any]] = []
+        stack = self._stack
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+                    if len(stack) == 1:
+                        self._last_key = self._decode(text[self._string_start : i + 1])
+                continue
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch in "{[":
+                if ch == "[" and len(stack) == 1:
+                    self._array_key = self._last_key
+                    self._index = 0
+                elif len(stack) == 2 and stack[1] == "[":
+                    self._item_start = i
+                stack.append(ch)
+            elif ch == "," and len(stack) == 2 and stack[1] == "[":
+                self._index += 1
+            elif ch in "}]" and stack:
+                stack.pop()
+                if len(stack) == 2 and stack[1] == "[" and self._array_key:
+                    key, index = self._array_key, self._index
+                    item = self._decode(text[self._item_start : i + 1])
+                    if isinstance(item, (dict, list)) and (key, index) not in self._emitted:
+                        self._emitted.add((key, index))
+                        items.append((key, index, item))
+        # Keep only the text an unfinished item or top-level key still needs.
+        if len(stack) > 2:
+            keep = self._item_start
+        elif self._in_string and len(stack) == 1:
+            keep = self._string_start
+        else:
+            keep = len(text)
+        self._text = text[keep:]
+        self._pos = len(self._text)
+        self._item_start -= keep
+        self._string_start -= keep
+        return items
+
+    @staticmethod
+    def _decode(fragment: str) -> Any:
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError:
+            logger.debug("Skipping undecodable streamed JSON fragment (%d chars)", len(fragment))
+            return None
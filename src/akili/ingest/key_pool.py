@@ -0,0 +1,136 @@
+"""
+Pool of Gemini API keys, so aggregate ingest throughput is not capped at one key's quota.
+
+With AKILI_GEMINI_API_KEYS (comma-separated keys, one per key/project) every Gemini request
+leases a key from the pool: the least-loaded one, i.e. the fewest in-flight requests relative
+to the share of its rate the key is currently allowed. Each key has its own adaptive limiter
+with the full AKILI_GEMINI_RPM / AKILI_GEMINI_TPM budget (quotas are per key), so a 429 cuts
+the rate and concurrency of the key that returned it (AIMD, see rate_limit.py) and the pool
+shifts load to the others until that key recovers. Per-key requests, 429s and current
+limits are reported in GET /status under "gemini_keys", keys shown as
+"key<n>...<last 4 characters>".
+
+genai.configure() is process-global, so pooled requests do not reconfigure the SDK; the
+Gemini client sends them through a GenerativeServiceClient per key, created with the key in
+its client_options (see GeminiClient.key_client). Without
+AKILI_GEMINI_API_KEYS there is no pool and calls use GOOGLE_API_KEY and the shared limiter.
+"""
+
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+from akili import config
+from akili.ingest.errors import is_rate_limit_error
+from akili.ingest.rate_limit import RateLimiter
+
+
+@dataclass
+class PooledKey:
+    """One API key with its limiter and usage counters (counters guarded by the pool lock)."""
+
+    label: str
+    key: str
+    limiter: RateLimiter
+    in_flight: int = 0
+    requests: int = 0
+    rate_limited: int = 0
+    errors: int = 0
+
+    def load(self) -> float:
+        """In-flight requests, with this one, per unit of the key's allowed rate."""
+        return (self.in_flight + 1) / max(self.limiter.rate_fraction, 1e-6)
+
+
+class KeyPool:
+    """Thread-safe least-loaded assignment of Gemini requests to API keys."""
+
+    def __init__(self, keys: list[str], limiter_factory: Callable[[], RateLimiter]):
+        unique = list(dict.fromkeys(k.strip() for k in keys if k.strip()))
+        if not unique:
+            raise ValueError("KeyPool needs at least one API key")
+        self._keys = [
+            PooledKey(f"key{i}...{key[-4:]}", key, limiter_factory())
+            for i, key in enumerate(unique, 1)
+        ]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @contextmanager
+    def lease(self) -> Iterator[PooledKey]:
+        """
+        Assign one request to the least-loaded key (ties: the key with the fewest requests)
+        for the duration of the block. The caller admits the request through the key's
+        limiter, which applies the key's AIMD; the lease counts the outcome per key.
+        """
+        with self._lock:
+            pooled = min(self._keys, key=lambda k: (k.load(), k.requests))
+            pooled.in_flight += 1
+            pooled.requests += 1
+        error: Exception | None = None
+        try:
+            yield pooled
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            with self._lock:
+                pooled.in_flight -= 1
+                if error is not None:
+                    if is_rate_limit_error(error):
+                        pooled.rate_limited += 1
+                    else:
+                        pooled.errors += 1
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Requests, 429s, other errors, in-flight requests and current limits per key."""
+        with self._lock:
+            counters = {
+                k.label: {
+                    "requests": k.requests,
+                    "rate_limited": k.rate_limited,
+                    "errors": k.errors,
+                    "in_flight": k.in_flight,
+                }
+                for k in self._keys
+            }
+        for k in self._keys:
+            limits = k.limiter.stats()
+            counters[k.label].update(
+                requests_per_minute=limits["requests_per_minute"],
+                rate_fraction=limits["rate_fraction"],
+                max_concurrent=limits["max_concurrent"],
+            )
+        return counters
+
+
+def _key_limiter() -> RateLimiter:
+    return RateLimiter(
+        config.GEMINI_RPM,
+        config.GEMINI_TPM,
+        adaptive=True,
+        max_concurrency=config.GEMINI_MAX_CONCURRENCY,
+        increase=config.GEMINI_AIMD_INCREASE,
+        decrease=config.GEMINI_AIMD_DECREASE,
+    )
+
+
+_pool: KeyPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_key_pool() -> KeyPool | None:
+    """Return the process-wide key pool, or None when AKILI_GEMINI_API_KEYS is not set."""
+    global _pool
+    if not config.GEMINI_API_KEYS:
+        return None
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = KeyPool(config.GEMINI_API_KEYS, _key_limiter)
+    return _pool
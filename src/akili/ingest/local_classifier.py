@@ -0,0 +1,169 @@
+"""
+Local page classification from PyMuPDF page features, ahead of the Gemini classifier.
+
+Features come from the page itself: section-heading keyword hits ("Absolute Maximum
+Ratings", "Pin Configuration", ...), ruled-line density (tables), image coverage and text
+density. classify_features turns them into a PageType plus a confidence (the winning
+label's share of the total score, scaled down unless a section heading matched);
+classify_page only asks Gemini when that confidence is below
+AKILI_PAGE_CLASSIFY_LOCAL_MIN_CONFIDENCE.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any
+
+from akili.ingest.page_classifier import PageType
+
+logger = logging.getLogger(__name__)
+
+# (phrase, weight) per label. Headings are strong evidence; supporting terms are weak.
+_KEYWORDS: dict[str, list[tuple[str, float]]] = {
+    "absolute_max_ratings": [
+        ("absolute maximum ratings", 4.0),
+        ("absolute maximum rating", 4.0),
+        ("absolute max", 3.0),
+        ("stresses beyond", 2.0),
+        ("storage temperature", 1.0),
+        ("esd", 0.5),
+    ],
+    "pinout_table": [
+        ("pin configuration", 4.0),
+        ("pin description", 4.0),
+        ("pin functions", 4.0),
+        ("pin assignment", 4.0),
+        ("pinout", 3.0),
+        ("pin no", 1.5),
+        ("pin name", 1.5),
+        ("i/o", 0.5),
+    ],
+    "electrical_specs": [
+        ("electrical characteristics", 4.0),
+        ("dc characteristics", 3.0),
+        ("recommended operating conditions", 3.0),
+        ("test conditions", 1.5),
+        ("supply current", 1.0),
+        ("quiescent current", 1.0),
+    ],
+    "timing_characteristics": [
+        ("timing characteristics", 4.0),
+        ("switching characteristics", 4.0),
+        ("ac characteristics", 3.0),
+        ("timing diagram", 3.0),
+        ("setup time", 1.5),
+        ("hold time", 1.5),
+        ("propagation delay", 1.5),
+    ],
+    "package_info": [
+        ("package dimensions", 4.0),
+        ("mechanical data", 4.0),
+        ("package outline", 4.0),
+        ("land pattern", 3.0),
+        ("tape and reel", 2.0),
+        ("thermal resistance", 1.0),
+        ("dimensions in", 1.0),
+    ],
+    "block_diagram": [
+        ("functional block diagram", 4.0),
+        ("block diagram", 3.5),
+        ("functional diagram", 3.0),
+    ],
+    "text_description": [
+        ("features", 1.5),
+        ("applications", 1.5),
+        ("general description", 3.0),
+        ("ordering information", 3.0),
+        ("description", 1.0),
+    ],
+}
+
+# Score of one section-heading hit; weaker evidence gets proportionally less confidence.
+_HEADING_SCORE = 4.0
+
+# Labels whose pages are mostly ruled tables.
+_TABLE_LABELS = (
+    "absolute_max_ratings",
+    "pinout_table",
+    "electrical_specs",
+    "timing_characteristics",
+)
+
+
+@dataclass
+class PageFeatures:
+    """Cheap per-page signals from the PDF (no rendering)."""
+
+    word_count: int = 0
+    text_density: float = 0.0  # characters per 1000 pt^2 (a full Letter text page is ~6)
+    line_density: float = 0.0  # horizontal/vertical rules per 100 words (+1)
+    image_coverage: float = 0.0  # share of page area covered by raster images
+    keyword_scores: dict[str, float] = field(default_factory=dict)
+
+
+def page_features(page: Any) -> PageFeatures:
+    """Compute PageFeatures for a PyMuPDF page."""
+    rect = page.rect
+    area = max(1.0, float(rect.width * rect.height))
+    text = page.get_text("text") or ""
+    lowered = " ".join(text.lower().split())
+    words = len(lowered.split())
+
+    rules = 0
+    for drawing in page.get_cdrawings():
+        for item in drawing.get("items", ()):
+            if item[0] == "l":
+                p1, p2 = item[1], item[2]
+                if abs(p1[0] - p2[0]) < 0.5 or abs(p1[1] - p2[1]) < 0.5:
+                    rules += 1
+            elif item[0] == "re":
+                rules += 4
+
+    covered = 0.0
+    for info in page.get_image_info():
+        x0, y0, x1, y1 = info.get("bbox", (0, 0, 0, 0))
+        covered += max(0.0, x1 - x0) * max(0.0, y1 - y0)
+
+    keyword_scores = {}
+    for label, phrases in _KEYWORDS.items():
+        score = sum(weight for phrase, weight in phrases if phrase in lowered)
+        if score:
+            keyword_scores[label] = score
+
+    return PageFeatures(
+        word_count=words,
+        text_density=len(lowered) * 1000.0 / area,
+        line_density=rules * 100.0 / (words + 1),
+        image_coverage=min(1.0, covered / area),
+        keyword_scores=keyword_scores,
+    )
+
+
+def classify_features(features: PageFeatures) -> tuple[PageType, float]:
+    """Return (label, confidence) from page features; ("other", 0.0) when nothing matches."""
+    scores = dict(features.keyword_scores)
+    is_table = features.line_density >= 5.0
+    for label in _TABLE_LABELS:
+        if label in scores and is_table:
+            scores[label] += 1.0
+    if features.image_coverage >= 0.3 or (features.word_count < 150 and features.line_density > 20):
+        scores["block_diagram"] = scores.get("block_diagram", 0.0) + 1.0
+    if features.text_density >= 4.0 and not is_table and features.image_coverage < 0.3:
+        scores["text_description"] = scores.get("text_description", 0.0) + 1.0
+
+    total = sum(scores.values())
+    if total <= 0:
+        return "other", 0.0
+    label = max(scores, key=lambda k: scores[k])
+    strength = min(1.0, scores[label] / _HEADING_SCORE)
+    return label, scores[label] / total * strength  # type: ignore[return-value]
+
+
+def classify_pdf_page(page: Any) -> tuple[PageType, float]:
+    """Classify a PyMuPDF page locally; ("other", 0.0) if its features cannot be read."""
+    try:
+        return classify_features(page_features(page))
+    except (RuntimeError, ValueError, TypeError, AttributeError) as exc:
+        logger.debug("Local page classification failed: %s", exc)
+        return "other", 0.0
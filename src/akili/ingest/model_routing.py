@@ -0,0 +1,64 @@
+"""
+Per-task, per-page-type Gemini model routing.
+
+Every call used to go to AKILI_GEMINI_MODEL, whether it classified a page in one word,
+rephrased a one-sentence answer, or extracted a 60-row pin table. AKILI_GEMINI_MODEL_ROUTES
+maps a task (extract, for single and multi-page requests alike; classify; classify_batch;
+format), optionally narrowed to a PageType, to a model:
+
+    AKILI_GEMINI_MODEL_ROUTES="classify=gemini-2.0-flash-lite,format=gemini-2.0-flash-lite,
+                               extract:pinout_table=gemini-2.5-pro"
+
+The most specific route wins ("extract:pinout_table", then "extract"); anything without a
+route uses AKILI_GEMINI_MODEL. The response format is the same for every model, so routing
+does not change the extraction contract. GeminiClient records latency and tokens per route
+label (task or task:page_type) for GET /status, so the table can be tuned from real traffic.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
+from akili import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Route:
+    """The model for one Gemini call (None: AKILI_GEMINI_MODEL), and the label its metrics
+    are recorded under."""
+
+    label: str
+    model: str | None = None
+
+
+@lru_cache(maxsize=4)
+def _parse_routes(spec: str) -> Mapping[str, str]:
+    """The route table of an AKILI_GEMINI_MODEL_ROUTES value, parsed (and its malformed
+    entries logged) once per value."""
+    routes: dict[str, str] = {}
+    for item in spec.split(","):
+        key, sep, model = item.partition("=")
+        key, model = key.strip(), model.strip()
+        if not sep or not key or not model:
+            if item.strip():
+                logger.warning("Ignoring malformed AKILI_GEMINI_MODEL_ROUTES entry %r", item)
+            continue
+        routes[key] = model
+    return MappingProxyType(routes)
+
+
+def _routes() -> Mapping[str, str]:
+    return _parse_routes(config.GEMINI_MODEL_ROUTES)
+
+
+def route_for(task: str, page_type: str | None = None) -> Route:
+    """Route for a task, optionally for a page of the given type."""
+    routes = _routes()
+    label = f"{task}:{page_type}" if page_type else task
+    return Route(label, routes.get(label) or routes.get(task))
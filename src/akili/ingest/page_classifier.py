@@ -7,30 +7,19 @@ electrical specs, absolute max ratings, block diagram, or general text.
 
 from __future__ import annotations
 
-import base64
 import logging
-import os
-import time
 from typing import Literal
 
-import google.generativeai as genai
-
 from akili import config
-from akili.ingest.errors import is_rate_limit_error as _is_rate_limit_error
+from akili.ingest.gemini_client import get_gemini_client
+from akili.ingest.model_routing import route_for
+from akili.ingest.rate_limit import estimate_request_tokens
+from akili.ingest.render_profiles import image_mime_type
+from akili.ingest.response_cache import cache_key, get_response_cache
 
 logger = logging.getLogger(__name__)
 
 
-def _is_model_unavailable_error(e: Exception) -> bool:
-    """Check if error indicates model is unavailable (NotFound/PermissionDenied)."""
-    err_str = str(e).lower()
-    err_type = type(e).__name__.lower()
-    return any(
-        indicator in err_str or indicator in err_type
-        for indicator in ("notfound", "not found", "permissiondenied", "permission denied", "404")
-    )
-
-
 PageType = Literal[
     "pinout_table",
     "electrical_specs",
@@ -53,8 +42,10 @@ VALID_PAGE_TYPES: set[str] = {
     "other",
 }
 
-_CLASSIFY_PROMPT = """\
-Classify this datasheet page into exactly ONE of these categories:
+# Bump whenever _CLASSIFY_PROMPT changes so cached classifications stop matching.
+CLASSIFY_PROMPT_VERSION = "1"
+
+CATEGORY_DESCRIPTIONS = """\
 - pinout_table: Pin assignment table, pin diagram, or pin description table
 - electrical_specs: Electrical characteristics table (voltage, current, power specs)
 - absolute_max_ratings: Absolute maximum ratings table
@@ -62,61 +53,62 @@ Classify this datasheet page into exactly ONE of these categories:
 - package_info: Package dimensions, mechanical drawings, or package outline
 - block_diagram: Functional block diagram or internal architecture
 - text_description: General text (features, description, applications, ordering info)
-- other: Anything not matching the above
+- other: Anything not matching the above"""
+
+_CLASSIFY_PROMPT = f"""\
+Classify this datasheet page into exactly ONE of these categories:
+{CATEGORY_DESCRIPTIONS}
 
 Respond with ONLY the category name, nothing else."""
 
 
-def classify_page(image_png_bytes: bytes) -> PageType:
+def classify_page(image_png_bytes: bytes, local: tuple[PageType, float] | None = None) -> PageType:
     """Classify a page image into a PageType category.
 
     Returns "other" on any error or when classification is disabled.
     When AKILI_PAGE_CLASSIFY_ENABLED=0 (default), skips the API call.
+    local is the (label, confidence) from local_classifier; at or above
+    AKILI_PAGE_CLASSIFY_LOCAL_MIN_CONFIDENCE it is returned without calling Gemini.
+    Valid labels are cached by page content when AKILI_GEMINI_CACHE_ENABLED=1.
     """
     if not config.PAGE_CLASSIFY_ENABLED:
         return "other"
+    if local is not None and local[1] >= config.PAGE_CLASSIFY_LOCAL_MIN_CONFIDENCE:
+        return local[0]
 
-    api_key = os.environ.get("GOOGLE_API_KEY")
-    if not api_key:
+    if not config.GOOGLE_API_KEY.strip():
         return "other"
 
-    genai.configure(api_key=api_key)
-    model_name = config.GEMINI_MODEL
-    model = genai.GenerativeModel(model_name)
+    cache = get_response_cache()
+    route = route_for("classify")
+    key = ""
+    if cache is not None:
+        key = cache_key(
+            "classify", image_png_bytes, CLASSIFY_PROMPT_VERSION, route.model or config.GEMINI_MODEL
+        )
+        cached = cache.get(key)
+        if cached in VALID_PAGE_TYPES:
+            return cached  # type: ignore[return-value]
+
+    # Raw bytes: the SDK wraps them in a Blob, so no base64 copy of the page is made here.
     image_part = {
-        "inline_data": {
-            "mime_type": "image/png",
-            "data": base64.standard_b64encode(image_png_bytes).decode("utf-8"),
-        }
+        "inline_data": {"mime_type": image_mime_type(image_png_bytes), "data": image_png_bytes}
     }
+    try:
+        result = get_gemini_client().generate(
+            "classify",
+            [_CLASSIFY_PROMPT, image_part],
+            request_tokens=estimate_request_tokens(_CLASSIFY_PROMPT, [image_png_bytes]),
+            route=route,
+        )
+    except Exception as e:
+        logger.warning("Page classification failed: %s", e)
+        return "other"
 
-    for attempt in range(config.GEMINI_MAX_RETRIES):
-        try:
-            response = model.generate_content([_CLASSIFY_PROMPT, image_part])
-            break
-        except Exception as e:
-            if _is_rate_limit_error(e) and attempt < config.GEMINI_MAX_RETRIES - 1:
-                wait = config.GEMINI_BACKOFF_BASE * (2**attempt)
-                time.sleep(wait)
-                continue
-            # A6: Try fallback model on NotFound/PermissionDenied
-            if _is_model_unavailable_error(e) and config.GEMINI_FALLBACK_MODEL:
-                if model_name != config.GEMINI_FALLBACK_MODEL:
-                    logger.warning(
-                        "Model %s unavailable, trying fallback %s",
-                        model_name,
-                        config.GEMINI_FALLBACK_MODEL,
-                    )
-                    model_name = config.GEMINI_FALLBACK_MODEL
-                    model = genai.GenerativeModel(model_name)
-                    continue
-            logger.warning("Page classification failed: %s", e)
-            return "other"
-
-    text = ""
-    if hasattr(response, "text") and response.text:
-        text = response.text.strip().lower()
+    text = result.text.lower()
     if text in VALID_PAGE_TYPES:
+        if cache is not None:
+            cache.put(key, "classify", result.model_name, text)
         return text  # type: ignore[return-value]
     return "other"
 
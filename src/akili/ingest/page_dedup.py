@@ -0,0 +1,189 @@
+"""
+Near-duplicate page detection, so repeated boilerplate pages are extracted once.
+
+Datasheets repeat pages (revision history, ordering tables per package variant, legal
+notices, family datasheets sharing a page across parts). Each page gets a PageFingerprint:
+a 256-bit difference hash (dHash) of a small grayscale render plus a hash of its normalized
+text layer. Two pages match when their text hashes are equal and their dHashes differ in at
+most AKILI_PAGE_DEDUP_MAX_DISTANCE bits; pages without a text layer must have identical
+dHashes, since a thumbnail alone cannot tell two tables with different numbers apart.
+
+DuplicateIndex finds matches within one ingest; with AKILI_GEMINI_CACHE_ENABLED the
+extraction of every page is also remembered in the response cache, so a matching page in a
+later document is answered without a Gemini call. Cached extractions are keyed by the
+extraction prompt version (verbose or compact format) and the model that produced them, so
+a page is only reused for the same prompt and model route. Reused extractions are remapped
+to the new page number (remap_extraction).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+import fitz  # PyMuPDF
+from pydantic import ValidationError
+
+from akili import config
+from akili.ingest.extract_schema import PageExtraction
+from akili.ingest.gemini_extract import extraction_prompt
+from akili.ingest.response_cache import cache_key, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+# dHash grid: 17x16 grayscale samples -> 16x16 = 256 left/right comparisons.
+_HASH_WIDTH = 17
+_HASH_HEIGHT = 16
+# Render at this multiple of the hash grid and box-average down, so the hash does not
+# depend on which single pixels a tiny render happens to hit.
+_OVERSAMPLE = 4
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class PageFingerprint:
+    """Perceptual hash plus text-layer hash of one page."""
+
+    dhash: int
+    text_hash: str = ""  # "" when the page has no text layer
+
+    def distance(self, other: PageFingerprint) -> int:
+        """Number of differing dHash bits."""
+        return (self.dhash ^ other.dhash).bit_count()
+
+    def matches(self, other: PageFingerprint, max_distance: int | None = None) -> bool:
+        """Whether other is a near-duplicate of this page (see module docstring)."""
+        if self.text_hash != other.text_hash:
+            return False
+        if not self.text_hash:
+            return self.dhash == other.dhash
+        limit = config.PAGE_DEDUP_MAX_DISTANCE if max_distance is None else max_distance
+        return self.distance(other) <= limit
+
+    @property
+    def bucket(self) -> str:
+        """Candidate bucket: pages can only match within the same bucket."""
+        return self.text_hash or f"img:{self.dhash:064x}"
+
+
+def _dhash(page: Any) -> int:
+    rect = page.rect
+    width, height = _HASH_WIDTH * _OVERSAMPLE, _HASH_HEIGHT * _OVERSAMPLE
+    matrix = fitz.Matrix(width / max(1.0, rect.width), height / max(1.0, rect.height))
+    pix = page.get_pixmap(matrix=matrix, colorspace=fitz.csGRAY, alpha=False)
+    samples, pw, ph, stride = pix.samples, pix.width, pix.height, pix.stride
+
+    grid: list[list[float]] = []
+    for gy in range(_HASH_HEIGHT):
+        y0 = gy * ph // _HASH_HEIGHT
+        y1 = max(y0 + 1, (gy + 1) * ph // _HASH_HEIGHT)
+        row: list[float] = []
+        for gx in range(_HASH_WIDTH):
+            x0 = gx * pw // _HASH_WIDTH
+            x1 = max(x0 + 1, (gx + 1) * pw // _HASH_WIDTH)
+            total = sum(sum(samples[y * stride + x0 : y * stride + x1]) for y in range(y0, y1))
+            row.append(total / ((y1 - y0) * (x1 - x0)))
+        grid.append(row)
+
+    bits = 0
+    for row in grid:
+        for left, right in zip(row, row[1:]):
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def page_fingerprint(page: Any) -> PageFingerprint:
+    """Compute the PageFingerprint of a PyMuPDF page."""
+    text = " ".join((page.get_text("text") or "").split())
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest() if text else ""
+    return PageFingerprint(dhash=_dhash(page), text_hash=text_hash)
+
+
+class DuplicateIndex(Generic[T]):
+    """Pages seen so far in one ingest, each with a payload (e.g. its pending result)."""
+
+    def __init__(self) -> None:
+        self._buckets: dict[str, list[tuple[PageFingerprint, int, T]]] = {}
+
+    def add(self, fingerprint: PageFingerprint, page_index: int, payload: T) -> None:
+        self._buckets.setdefault(fingerprint.bucket, []).append((fingerprint, page_index, payload))
+
+    def find(self, fingerprint: PageFingerprint) -> tuple[int, T] | None:
+        """(page_index, payload) of the closest earlier near-duplicate, or None."""
+        best: tuple[int, int, T] | None = None
+        for seen, page_index, payload in self._buckets.get(fingerprint.bucket, ()):
+            if seen.matches(fingerprint):
+                distance = seen.distance(fingerprint)
+                if best is None or distance < best[0]:
+                    best = (distance, page_index, payload)
+        return (best[1], best[2]) if best is not None else None
+
+
+def remap_extraction(extraction: PageExtraction, source_page: int, page: int) -> PageExtraction:
+    """Copy of a page's extraction for another page: "p{source}_" id prefixes are renamed."""
+    if source_page == page:
+        return extraction.model_copy(deep=True)
+    old, new = f"p{source_page}_", f"p{page}_"
+
+    def rename(items: list) -> list:
+        return [
+            item.model_copy(update={"id": new + item.id[len(old) :]})
+            if item.id.startswith(old)
+            else item.model_copy()
+            for item in items
+        ]
+
+    return PageExtraction(
+        units=rename(extraction.units),
+        bijections=rename(extraction.bijections),
+        grids=rename(extraction.grids),
+    )
+
+
+def _cache_key(fingerprint: PageFingerprint, model: str) -> str:
+    return cache_key(
+        "page_dedup",
+        fingerprint.bucket.encode("utf-8"),
+        extraction_prompt()[1],
+        model,
+    )
+
+
+def lookup_cached(fingerprint: PageFingerprint, page: int, model: str) -> PageExtraction | None:
+    """Extraction of a matching page from an earlier ingest by model, remapped to page, or
+    None."""
+    cache = get_response_cache()
+    if cache is None:
+        return None
+    cached = cache.get(_cache_key(fingerprint, model))
+    if cached is None:
+        return None
+    try:
+        entry = json.loads(cached)
+        seen = PageFingerprint(dhash=int(entry["dhash"], 16), text_hash=fingerprint.text_hash)
+        if not seen.matches(fingerprint):
+            return None
+        extraction = PageExtraction.model_validate(entry["extraction"])
+        return remap_extraction(extraction, int(entry["page"]), page)
+    except (ValueError, KeyError, TypeError, ValidationError) as e:
+        logger.debug("Ignoring unreadable page_dedup cache entry: %s", e)
+        return None
+
+
+def remember(
+    fingerprint: PageFingerprint, extraction: PageExtraction, page: int, model: str
+) -> None:
+    """Store a page's extraction by model so matching pages in later ingests can reuse it."""
+    cache = get_response_cache()
+    if cache is None:
+        return
+    entry = {
+        "dhash": f"{fingerprint.dhash:x}",
+        "page": page,
+        "extraction": extraction.model_dump(mode="json"),
+    }
+    cache.put(_cache_key(fingerprint, model), "page_dedup", model, json.dumps(entry))
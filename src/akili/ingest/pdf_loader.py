@@ -1,47 +1,210 @@
 """
 Load PDF and yield (page_index, image_bytes) for each page.
 
-Uses PyMuPDF to render pages as PNG bytes for Gemini vision.
+Uses PyMuPDF to render pages as PNG bytes for Gemini vision. iter_pdf_pages renders lazily,
+one page per step, so callers can start extracting page N while page N+1 is rendered and
+only hold the images that are still in flight. iter_rendered_pages can additionally answer
+born-digital pages from the text layer (see text_layer.py) and skip rendering them.
 """
 
 from __future__ import annotations
 
 import logging
+import time
+from dataclasses import dataclass, replace
 from pathlib import Path
+from typing import Any, Callable, Collection, Iterator, Mapping, TypeVar
 
 import fitz  # PyMuPDF
 
 from akili import config
+from akili.ingest.local_classifier import classify_pdf_page
+from akili.ingest.page_classifier import PageType
+from akili.ingest.page_dedup import PageFingerprint, page_fingerprint
+from akili.ingest.render_profiles import profile_for, render_page
+from akili.ingest.roi import find_content_region
+from akili.ingest.tiling import PageRegion, tile_regions
+from akili.ingest.text_layer import TextLayerResult, extract_text_layer
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
 
-def load_pdf_pages(pdf_path: Path) -> list[tuple[int, bytes]]:
+
+def _check_page_limit(total: int) -> None:
+    if config.MAX_PAGES > 0 and total > config.MAX_PAGES:
+        raise ValueError(
+            f"PDF has {total} pages, exceeding the limit of {config.MAX_PAGES}. "
+            f"Set AKILI_MAX_PAGES to increase the limit."
+        )
+
+
+def count_pdf_pages(pdf_path: Path) -> int:
+    """Return the number of pages in a PDF without rendering any of them."""
+    doc = fitz.open(pdf_path)
+    try:
+        return len(doc)
+    finally:
+        doc.close()
+
+
+@dataclass
+class RenderedPage:
+    """One page from iter_rendered_pages: a PNG for Gemini, or a trusted text-layer result.
+
+    text_hint is an untrusted (below-threshold) text-layer result kept next to the image,
+    used to cross-check the Gemini extraction (adaptive consensus). local_class is the
+    local classifier's (page type, confidence); fingerprint is the page's near-duplicate
+    fingerprint (page_dedup.py). profile names the render profile the image was made with;
+    tiles are the page's overlapping high-DPI tiles for tiled extraction (tiling.py), and a
+    tiled page has no full-page image; page_type is the type the page was rendered for, None
+    when unknown before rendering. region is the content region the image was cropped to
+    (roi.py), None for the full page. error is set (with no image) when the page could not
+    be rendered.
     """
-    Load a PDF and return a list of (page_index, png_bytes) for each page.
 
-    Page indices are 0-based. PNG bytes are suitable for Gemini image input.
-    Skips pages that fail to render (e.g. corrupted) so one bad page does not fail the whole PDF.
-    Raises ValueError if the PDF exceeds AKILIconfig.MAX_PAGES.
+    page_index: int
+    image: bytes | None = None
+    text_layer: TextLayerResult | None = None
+    text_hint: TextLayerResult | None = None
+    local_class: tuple[PageType, float] | None = None
+    fingerprint: PageFingerprint | None = None
+    profile: str = "standard"
+    render_seconds: float = 0.0
+    tiles: list[tuple[PageRegion, bytes]] | None = None
+    page_type: PageType | None = None
+    region: PageRegion | None = None
+    error: str | None = None
+
+
+def _optional(fn: Callable[..., T], page: fitz.Page, *args: Any, step: str) -> T | None:
+    """fn(page, *args), or None (logged) when it fails."""
+    try:
+        return fn(page, *args)
+    except Exception as exc:
+        logger.warning("Page %d %s failed, continuing without it: %s", page.number, step, exc)
+        return None
+
+
+def iter_rendered_pages(
+    pdf_path: Path,
+    text_layer: bool = False,
+    min_confidence: float = 1.0,
+    skip: Collection[int] = (),
+    classify: bool = False,
+    fingerprint: bool = False,
+    page_types: Mapping[int, PageType] | None = None,
+    tile_types: Collection[str] = (),
+    roi: bool = False,
+) -> Iterator[RenderedPage]:
+    """
+    Yield a RenderedPage per page, rendering one page per iteration.
+
+    With text_layer=True, pages whose text-layer extraction is non-empty and at least
+    min_confidence are yielded with text_layer set and no image (they are never rendered);
+    other non-empty text-layer results ride along as text_hint. With classify=True, rendered
+    pages carry local_class from the local page classifier; with fingerprint=True they carry
+    their near-duplicate fingerprint. Each page is rendered with the profile for its type
+    (render_profiles.profile_for): from page_types when given, else from a confident
+    local_class, else the standard profile. Pages whose type is in tile_types are rendered
+    only as AKILI_TILE_ROWS x AKILI_TILE_COLS tiles at AKILI_TILE_DPI. With roi=True the
+    other pages are rendered clipped to their content region (roi.find_content_region).
+    Page indices in skip (e.g. already checkpointed) are neither rendered nor yielded.
+    A page that fails to render (e.g. corrupted) is yielded with error set and no image, so
+    one bad page does not fail the whole PDF and the caller can record it as failed.
+    Raises ValueError (on first iteration) if the PDF exceeds config.MAX_PAGES.
     """
-    pages: list[tuple[int, bytes]] = []
     doc = fitz.open(pdf_path)
     try:
         total = len(doc)
-        if config.MAX_PAGES > 0 and total > config.MAX_PAGES:
-            raise ValueError(
-                f"PDF has {total} pages, exceeding the limit of {config.MAX_PAGES}. "
-                f"Set AKILIconfig.MAX_PAGES to increase the limit."
-            )
+        _check_page_limit(total)
         for page_index in range(total):
+            if page_index in skip:
+                continue
+            hint: TextLayerResult | None = None
+            local_class: tuple[PageType, float] | None = None
+            page_print: PageFingerprint | None = None
             try:
                 page = doc[page_index]
-                pix = page.get_pixmap(dpi=150, alpha=False)
-                png_bytes = pix.tobytes(output="png")
-                pages.append((page_index, png_bytes))
+            except (RuntimeError, ValueError, TypeError) as exc:
+                logger.warning("Failed to load page %d: %s", page_index, exc)
+                yield RenderedPage(page_index, error=f"{type(exc).__name__}: {exc}")
+                continue
+            # The text layer, classifier and fingerprint are optional: a page they fail on
+            # is still rendered and sent to Gemini.
+            if text_layer:
+                result = _optional(extract_text_layer, page, page_index, step="text layer")
+                if result is not None and not result.is_empty:
+                    if result.confidence >= min_confidence:
+                        yield RenderedPage(page_index, text_layer=result)
+                        continue
+                    hint = result
+            if classify:
+                local_class = _optional(classify_pdf_page, page, step="local classification")
+            if fingerprint:
+                page_print = _optional(page_fingerprint, page, step="fingerprint")
+            try:
+                page_type = page_types.get(page_index) if page_types is not None else None
+                if page_type is None and local_class is not None:
+                    if local_class[1] >= config.PAGE_CLASSIFY_LOCAL_MIN_CONFIDENCE:
+                        page_type = local_class[0]
+                profile = profile_for(page_type)
+                started = time.perf_counter()
+                tiled = page_type is not None and page_type in tile_types
+                region = find_content_region(page) if roi and not tiled else None
+                png_bytes = None
+                tiles = None
+                if tiled:
+                    # Only the tiles are sent to Gemini, so the page is not rendered whole.
+                    tile_profile = replace(profile, dpi=config.TILE_DPI)
+                    tiles = [
+                        (region, render_page(page, tile_profile, clip=region.clip(page.rect)))
+                        for region in tile_regions(
+                            config.TILE_ROWS, config.TILE_COLS, config.TILE_OVERLAP
+                        )
+                    ]
+                else:
+                    png_bytes = render_page(
+                        page, profile, clip=region.clip(page.rect) if region is not None else None
+                    )
+                render_seconds = time.perf_counter() - started
             except (RuntimeError, ValueError, TypeError) as exc:
                 logger.warning("Failed to render page %d: %s", page_index, exc)
+                yield RenderedPage(page_index, error=f"{type(exc).__name__}: {exc}")
                 continue
+            yield RenderedPage(
+                page_index,
+                image=png_bytes,
+                text_hint=hint,
+                local_class=local_class,
+                fingerprint=page_print,
+                profile=profile.name,
+                render_seconds=render_seconds,
+                tiles=tiles,
+                page_type=page_type,
+                region=region,
+            )
     finally:
         doc.close()
-    return pages
+
+
+def iter_pdf_pages(pdf_path: Path) -> Iterator[tuple[int, bytes]]:
+    """
+    Yield (page_index, png_bytes) for each page, rendering one page per iteration.
+
+    Page indices are 0-based. PNG bytes are suitable for Gemini image input.
+    Skips pages that fail to render; raises ValueError if the PDF exceeds config.MAX_PAGES.
+    """
+    for page in iter_rendered_pages(pdf_path):
+        if page.image is not None:
+            yield page.page_index, page.image
+
+
+def load_pdf_pages(pdf_path: Path) -> list[tuple[int, bytes]]:
+    """
+    Load a PDF and return a list of (page_index, png_bytes) for each page.
+
+    Materializes every page; prefer iter_pdf_pages for large documents.
+    Raises ValueError if the PDF exceeds config.MAX_PAGES.
+    """
+    return list(iter_pdf_pages(pdf_path))
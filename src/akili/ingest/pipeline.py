@@ -1,6 +1,13 @@
 """
-Orchestrate ingestion: PDF → load pages → Gemini extract → canonicalize → return/store.
-Adds a short delay between pages to reduce 429 rate-limit hits (one Gemini call per page).
+Orchestrate ingestion: PDF → render pages → Gemini extract → canonicalize → return/store.
+Pages are rendered one at a time and extracted by a bounded worker pool, so memory stays flat
+in the page count; all Gemini calls share one RPM/TPM limiter (see rate_limit.py).
+With AKILI_TEXT_LAYER_ENABLED, born-digital pages are answered from the PDF text layer
+(see text_layer.py) and only the remaining pages go to Gemini. With AKILI_EXTRACT_BATCH_PAGES,
+several pages share one extraction request (see gemini_extract.extract_pages); with
+AKILI_PAGE_DEDUP_ENABLED, near-duplicate pages reuse an earlier page's extraction (page_dedup.py);
+with AKILI_TILED_EXTRACTION_ENABLED, dense pages are extracted as parallel tiles (tiling.py);
+with AKILI_ROI_ENABLED, pages are cropped to their content region before extraction (roi.py).
 
 Supports corpus matching: if an uploaded PDF matches a pre-canonicalized entry in the
 public corpus, the canonical data is loaded directly (FR-CORP-2), skipping Gemini calls.
@@ -9,31 +16,115 @@ public corpus, the canonical data is loaded directly (FR-CORP-2), skipping Gemin
 from __future__ import annotations
 
 import logging
+import math
 import os
-import time
+import threading
 import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import asdict
+from functools import partial
 from pathlib import Path
-from typing import Callable
+from typing import Callable, Mapping, NamedTuple
 
 from akili import config
 from akili.canonical import Bijection, ConditionalUnit, Grid, Range, Unit
+from akili.ingest.batch_classifier import classify_pdf_pages
 from akili.ingest.canonicalize import canonicalize_page
-from akili.ingest.consensus import consensus_extract_page, should_use_consensus
+from akili.ingest.consensus import (
+    ConsensusDecision,
+    consensus_extract_page,
+    merge_decisions,
+    should_use_consensus,
+)
 from akili.ingest.errors import is_rate_limit_error as _is_rate_limit_error
+from akili.ingest.extract_schema import PageExtraction
 from akili.ingest.gemini_extract import extract_page as gemini_extract_page
+from akili.ingest.gemini_extract import extract_pages as gemini_extract_pages
+from akili.ingest.gemini_extract import max_batch_pages
+from akili.ingest.key_pool import get_key_pool
+from akili.ingest.model_routing import Route, route_for
 from akili.ingest.multipage import merge_multipage_tables
-from akili.ingest.page_classifier import classify_page, get_extraction_hint
-from akili.ingest.pdf_loader import load_pdf_pages
+from akili.ingest.page_classifier import PageType, classify_page, get_extraction_hint
+from akili.ingest.page_dedup import (
+    DuplicateIndex,
+    PageFingerprint,
+    lookup_cached,
+    remap_extraction,
+    remember,
+)
+from akili.ingest.pdf_loader import count_pdf_pages, iter_rendered_pages
+from akili.ingest.rate_limit import get_rate_limiter
+from akili.ingest.scheduler import in_current_work
+from akili.ingest.tiling import (
+    PageRegion,
+    extract_tiles,
+    tile_hint,
+    to_page_coords,
+    within_region,
+)
+from akili.store.checkpoints import CheckpointStore
 from akili.store.repository import Store
 
 logger = logging.getLogger(__name__)
 
 
-def _check_corpus(pdf_path: Path, store: Store | None) -> tuple[bool, dict | None]:
+class _GroupPage(NamedTuple):
+    """A page waiting in a multi-page group."""
+
+    page_index: int
+    image: bytes
+    text_hint: PageExtraction | None
+    local_class: tuple[PageType, float] | None
+    region: PageRegion | None  # content region the image was cropped to, if any
+
+
+def _fact_payload(obj: Unit | Bijection | Grid) -> dict:
+    """JSON-ready fact for a "fact" progress event: the canonical object plus its type."""
+    kind = (
+        "unit" if isinstance(obj, Unit) else "bijection" if isinstance(obj, Bijection) else "grid"
+    )
+    return {"type": kind, **obj.model_dump(mode="json", exclude_none=True)}
+
+
+def _fan_out(batch: Future, children: dict[int, Future]) -> None:
+    """Resolve each page's future from its group's {page_index: result or error}."""
+    error = batch.exception()
+    results = batch.result() if error is None else {}
+    for page_index, child in children.items():
+        result = results.get(page_index)
+        if error is not None:
+            child.set_exception(error)
+        elif isinstance(result, Exception):
+            child.set_exception(result)
+        elif result is not None:
+            child.set_result(result)
+        else:
+            child.set_exception(
+                RuntimeError(f"page {page_index} missing from its extraction group")
+            )
+
+
+def _resolve_duplicate(target: Future, source_page: int, page_index: int, source: Future) -> None:
+    """Resolve a near-duplicate page's future from its source page's result."""
+    error = source.exception()
+    if error is not None:
+        target.set_exception(
+            RuntimeError(f"near-duplicate of page {source_page}, which failed: {error}")
+        )
+        return
+    extraction, agreement = source.result()
+    target.set_result((remap_extraction(extraction, source_page, page_index), agreement))
+
+
+def _check_corpus(
+    pdf_path: Path, store: Store | None, content_hash: str | None = None
+) -> tuple[bool, dict | None]:
     """
     Check if PDF matches a corpus entry (FR-CORP-2).
 
     Returns (is_match, corpus_entry) where corpus_entry contains canonical data.
+    content_hash is the PDF's SHA-256 if already known (hashed during upload).
     """
     if store is None or not hasattr(store, "get_corpus_entry"):
         return False, None
@@ -41,7 +132,7 @@ def _check_corpus(pdf_path: Path, store: Store | None) -> tuple[bool, dict | Non
     try:
         from akili.corpus.loader import compute_pdf_hash
 
-        pdf_hash = compute_pdf_hash(pdf_path)
+        pdf_hash = content_hash or compute_pdf_hash(pdf_path)
         entry = store.get_corpus_entry(pdf_hash)
         if entry:
             logger.info("Corpus match found for %s (hash=%s...)", pdf_path.name, pdf_hash[:12])
@@ -85,6 +176,9 @@ def ingest_document(
     store: Store | None = None,
     progress_callback: Callable[[dict], None] | None = None,
     uploaded_by: str | None = None,
+    checkpoints: CheckpointStore | None = None,
+    filename: str | None = None,
+    content_hash: str | None = None,
 ) -> tuple[str, list[Unit | Bijection | Grid], int, int]:
     """
     Ingest a PDF: load pages, extract via Gemini, canonicalize.
@@ -95,21 +189,40 @@ def ingest_document(
     If progress_callback is set, it is called with dicts: {"phase": "rendering"},
     {"phase": "rendering_done", "total_pages": N}, {"phase": "extracting", "page": i, "total": N},
     {"phase": "canonicalizing", "page": i, "total": N}, {"phase": "storing", "total_pages": N},
-    {"phase": "done", ...}.
+    {"phase": "done", ...}. "extracting" events come from page workers (possibly out of page
+    order); "canonicalizing" events are always emitted in page order. With
+    AKILI_EXTRACT_STREAMING_ENABLED, pages extracted in a single streamed pass also emit
+    {"phase": "fact", "page": i, "fact": {...}} for each canonical fact as soon as Gemini has
+    returned it. Fact events are a preview: the stored result is the page's full extraction.
+
+    If checkpoints is set, each page's canonical output (or failure) is checkpointed as soon
+    as it is collected, and pages already checkpointed for this doc_id are not re-extracted:
+    calling again with the same doc_id resumes a crashed or partially failed ingest.
+    filename is the display name stored with the document (defaults to the PDF's name).
+    content_hash is the PDF's SHA-256 when the caller already has it (the upload hashes the
+    bytes as it stores them); otherwise the file is hashed for the corpus lookup.
     """
 
+    progress_lock = threading.Lock()
+
     def _progress(msg: dict) -> None:
+        # Called from page workers as well as this thread; serialize for the callback.
         if progress_callback:
-            progress_callback(msg)
+            with progress_lock:
+                progress_callback(msg)
 
     doc_id = doc_id or str(uuid.uuid4())
     pdf_path = Path(pdf_path).resolve()
 
-    # CRITICAL-1: Validate path is within allowed directory to prevent traversal
-    allowed_base = Path(os.environ.get("AKILI_DOCS_DIR", config.DOCS_DIR)).resolve()
-    if not str(pdf_path).startswith(str(allowed_base)):
+    # CRITICAL-1: Validate path is within allowed directory to prevent traversal.
+    # The API stores uploads next to the DB (deps.docs_dir) unless AKILI_DOCS_DIR is set.
+    allowed_bases = [
+        Path(os.environ.get("AKILI_DOCS_DIR", config.DOCS_DIR)).resolve(),
+        Path(config.DB_PATH).resolve().parent / "docs",
+    ]
+    if not any(pdf_path.is_relative_to(base) for base in allowed_bases):
         raise ValueError(
-            f"Path outside allowed directory: {pdf_path} (allowed base: {allowed_base})"
+            f"Path outside allowed directory: {pdf_path} (allowed base: {allowed_bases[0]})"
         )
 
     if not pdf_path.exists():
@@ -117,7 +230,7 @@ def ingest_document(
 
     # FR-CORP-2: Check corpus before ingestion for instant results
     _progress({"phase": "checking_corpus"})
-    corpus_match, corpus_entry = _check_corpus(pdf_path, store)
+    corpus_match, corpus_entry = _check_corpus(pdf_path, store, content_hash)
 
     if corpus_match and corpus_entry:
         logger.info(
@@ -136,7 +249,7 @@ def ingest_document(
             conditional_units = [o for o in all_canonical if isinstance(o, ConditionalUnit)]
             store.store_canonical(
                 doc_id,
-                pdf_path.name,
+                filename or pdf_path.name,
                 1,
                 units,
                 bijections,
@@ -161,8 +274,7 @@ def ingest_document(
         return doc_id, all_canonical, 1, 0
 
     _progress({"phase": "rendering"})
-    pages = load_pdf_pages(pdf_path)
-    total_pages = len(pages)
+    total_pages = count_pdf_pages(pdf_path)
 
     # HIGH-2: Enforce max page limit to prevent memory exhaustion
     if total_pages > config.MAX_PAGES:
@@ -171,37 +283,253 @@ def ingest_document(
             "Set AKILI_MAX_PAGES to override."
         )
 
-    _progress({"phase": "rendering_done", "total_pages": total_pages})
+    # A previous run for this doc_id (crash, partial failure) keeps its name and owner.
+    run = checkpoints.get_run(doc_id) if checkpoints is not None else None
+    if run is not None:
+        filename = filename or run["filename"] or None
+        uploaded_by = uploaded_by or run["uploaded_by"]
+    filename = filename or pdf_path.name
+    resumed: dict[int, list[Unit | Bijection | Grid]] = {}
+    if checkpoints is not None:
+        checkpoints.start_run(doc_id, filename, total_pages, uploaded_by)
+        resumed = checkpoints.completed_pages(doc_id)
+        if resumed:
+            logger.info(
+                "Resuming ingest: %d of %d page(s) already checkpointed (doc_id=%s).",
+                len(resumed),
+                total_pages,
+                doc_id,
+            )
+
+    # Pages are rendered lazily below; "rendering_done" now only means the page count is known.
+    _progress(
+        {"phase": "rendering_done", "total_pages": total_pages, "pages_resumed": len(resumed)}
+    )
 
-    all_canonical: list[Unit | Bijection | Grid] = []
+    page_results: dict[int, list[Unit | Bijection | Grid]] = dict(resumed)
     pages_failed = 0
+    text_layer_pages = 0
+    duplicate_pages = 0
+    tiled_pages = 0
+    cropped_pages = 0
+    page_renders: list[dict] = []
+    render_seconds = 0.0
+    # Near-duplicate detection: pages sent to Gemini (with their pending result) and the
+    # fingerprints still to be remembered in the cache once their extraction is known.
+    duplicates: DuplicateIndex[Future] = DuplicateIndex()
+    fingerprints: dict[int, PageFingerprint] = {}
+    consensus_decisions: dict[int, ConsensusDecision] = {}
+    # Model each page was extracted with; its near-duplicate cache entry is keyed by it.
+    page_models: dict[int, str] = {}
+
+    # Contact-sheet classification: a few Gemini calls for the whole document, started on
+    # the ingest pool below so rendering does not wait for them; a page's lookup waits for
+    # its own sheet only.
+    batch_classify = config.PAGE_CLASSIFY_ENABLED and config.CLASSIFY_BATCH_ENABLED
+    preclassified: Mapping[int, PageType] = {}
+
+    streaming = config.EXTRACT_STREAMING_ENABLED and progress_callback is not None
+
+    def _stream_fact(
+        page_index: int, region: PageRegion | None, extraction: PageExtraction
+    ) -> None:
+        if region is not None:
+            extraction = to_page_coords(extraction, region)
+        for obj in canonicalize_page(extraction, doc_id, page_index):
+            _progress({"phase": "fact", "page": page_index, "fact": _fact_payload(obj)})
+
+    def _record_decision(decision: ConsensusDecision) -> None:
+        consensus_decisions[decision.page_index] = decision
+
+    def _pause_on_rate_limit(e: Exception) -> None:
+        # The adaptive limiter (or the pooled key's) has already cut the rate for this 429.
+        if get_key_pool() is not None or get_rate_limiter().adaptive:
+            return
+        if _is_rate_limit_error(e) and config.GEMINI_429_COOLDOWN > 0:
+            logger.info(
+                "Rate limit detected; pausing Gemini calls for %.0f s (doc_id=%s).",
+                config.GEMINI_429_COOLDOWN,
+                doc_id,
+            )
+            get_rate_limiter().pause(config.GEMINI_429_COOLDOWN)
+
+    def _consensus(
+        page_index: int,
+        image_bytes: bytes,
+        hint: str,
+        text_hint: PageExtraction | None,
+        route: Route,
+    ) -> tuple[PageExtraction, float]:
+        return consensus_extract_page(
+            page_index,
+            image_bytes,
+            doc_id,
+            page_type_hint=hint,
+            text_hint=text_hint,
+            on_decision=_record_decision,
+            route=route,
+        )
 
-    for i, (page_index, image_bytes) in enumerate(pages):
-        if i > 0 and config.GEMINI_PAGE_DELAY > 0:
-            time.sleep(config.GEMINI_PAGE_DELAY)
+    def _extract(
+        page_index: int,
+        image_bytes: bytes | None,
+        text_hint: PageExtraction | None = None,
+        local_class: tuple[PageType, float] | None = None,
+        tiles: list[tuple[PageRegion, bytes]] | None = None,
+        region: PageRegion | None = None,
+        rendered_type: PageType | None = None,
+    ) -> tuple[PageExtraction, float]:
+        """Classify and extract one page, tile by tile when tiles are given (a tiled page has
+        no full image; it keeps the type it was rendered for); an image cropped to region has
+        its coordinates mapped back to the page (runs on a worker thread)."""
         _progress({"phase": "extracting", "page": page_index, "total": total_pages})
         try:
-            page_type = classify_page(image_bytes)
+            page_type = (
+                preclassified.get(page_index)
+                or rendered_type
+                or classify_page(image_bytes or b"", local=local_class)
+            )
             hint = get_extraction_hint(page_type)
-            page_agreement = 0.5  # default for single-pass
+            route = route_for("extract", page_type)
+            page_models[page_index] = route.model or config.GEMINI_MODEL
+            if tiles:
+                tile_decisions: list[ConsensusDecision] = []
+
+                def _extract_tile(region: PageRegion, tile: bytes) -> tuple[PageExtraction, float]:
+                    tile_hint_text = f"{hint} {tile_hint(region)}".strip()
+                    if should_use_consensus(page_type):
+                        # Each tile is cross-checked against the text layer it covers; the
+                        # tiles' decisions are recorded as one for the page.
+                        return consensus_extract_page(
+                            page_index,
+                            tile,
+                            doc_id,
+                            page_type_hint=tile_hint_text,
+                            text_hint=(
+                                within_region(text_hint, region) if text_hint is not None else None
+                            ),
+                            on_decision=tile_decisions.append,
+                            route=route,
+                        )
+                    return gemini_extract_page(
+                        page_index, tile, doc_id, page_type_hint=tile_hint_text, route=route
+                    ), 0.5
+
+                merged = extract_tiles(tiles, _extract_tile)
+                if tile_decisions:
+                    _record_decision(merge_decisions(tile_decisions))
+                return merged
             if should_use_consensus(page_type):
-                extraction, page_agreement = consensus_extract_page(
-                    page_index,
-                    image_bytes,
-                    doc_id,
-                    page_type_hint=hint,
-                )
+                extraction, agreement = _consensus(page_index, image_bytes, hint, text_hint, route)
             else:
+                stream = {"on_item": partial(_stream_fact, page_index, region)} if streaming else {}
                 extraction = gemini_extract_page(
-                    page_index, image_bytes, doc_id, page_type_hint=hint
+                    page_index, image_bytes, doc_id, page_type_hint=hint, route=route, **stream
+                )
+                agreement = 0.5  # default agreement for single-pass
+            if region is not None:
+                extraction = to_page_coords(extraction, region)
+            return extraction, agreement
+        except Exception as e:
+            _pause_on_rate_limit(e)
+            raise
+
+    def _extract_group(
+        group: list[_GroupPage],
+    ) -> dict[int, tuple[PageExtraction, float] | Exception]:
+        """Classify a group of pages and extract them in as few multi-page requests as their
+        page types and model routes allow; consensus pages are extracted singly. A failure
+        fails only its own page: a multi-page request that fails is retried page by page
+        (runs on a worker thread)."""
+        results: dict[int, tuple[PageExtraction, float] | Exception] = {}
+        batch: list[tuple[int, bytes, str]] = []
+        batch_routes: list[Route] = []
+        limit = config.EXTRACT_BATCH_PAGES
+
+        regions = {page.page_index: page.region for page in group if page.region is not None}
+
+        def _flush() -> None:
+            # Pages of one batch share a model; a mixed-type batch is labelled by task only.
+            route = batch_routes[0]
+            if any(r != route for r in batch_routes):
+                route = Route("extract", route.model)
+            try:
+                for index, extraction in gemini_extract_pages(batch, doc_id, route=route).items():
+                    results[index] = (extraction, 0.5)
+            except Exception as e:
+                _pause_on_rate_limit(e)
+                logger.warning(
+                    "Multi-page request for pages %s failed, extracting them singly "
+                    "(doc_id=%s): %s",
+                    [page_index for page_index, _, _ in batch],
+                    doc_id,
+                    e,
+                )
+                for (page_index, image_bytes, hint), page_route in zip(batch, batch_routes):
+                    try:
+                        extraction = gemini_extract_page(
+                            page_index, image_bytes, doc_id, page_type_hint=hint, route=page_route
+                        )
+                        results[page_index] = (extraction, 0.5)
+                    except Exception as page_error:
+                        _pause_on_rate_limit(page_error)
+                        results[page_index] = page_error
+            batch.clear()
+            batch_routes.clear()
+
+        for page_index, image_bytes, text_hint, local_class, _ in group:
+            _progress({"phase": "extracting", "page": page_index, "total": total_pages})
+            try:
+                page_type = preclassified.get(page_index) or classify_page(
+                    image_bytes, local=local_class
                 )
+                hint = get_extraction_hint(page_type)
+                route = route_for("extract", page_type)
+                page_models[page_index] = route.model or config.GEMINI_MODEL
+                if should_use_consensus(page_type):
+                    results[page_index] = _consensus(
+                        page_index, image_bytes, hint, text_hint, route
+                    )
+                    continue
+            except Exception as e:
+                _pause_on_rate_limit(e)
+                results[page_index] = e
+                continue
+            if batch_routes and batch_routes[0].model != route.model:
+                _flush()
+                limit = config.EXTRACT_BATCH_PAGES
+            batch.append((page_index, image_bytes, hint))
+            batch_routes.append(route)
+            limit = min(limit, max_batch_pages(page_type))
+            if len(batch) >= limit:
+                _flush()
+                limit = config.EXTRACT_BATCH_PAGES
+        if batch:
+            _flush()
+        for page_index, region in regions.items():
+            result = results.get(page_index)
+            if result is not None and not isinstance(result, Exception):
+                extraction, agreement = result
+                results[page_index] = (to_page_coords(extraction, region), agreement)
+        return results
+
+    def _collect(page_index: int, future: Future) -> None:
+        nonlocal pages_failed
+        try:
+            extraction, page_agreement = future.result()
             _progress({"phase": "canonicalizing", "page": page_index, "total": total_pages})
             canonical = canonicalize_page(extraction, doc_id, page_index)
             # Propagate consensus agreement to canonical objects
             for obj in canonical:
                 if hasattr(obj, "extraction_agreement"):
                     obj.extraction_agreement = page_agreement
-            all_canonical.extend(canonical)
+            page_results[page_index] = canonical
+            if checkpoints is not None:
+                checkpoints.save_page(doc_id, page_index, canonical)
+            page_print = fingerprints.pop(page_index, None)
+            model = page_models.pop(page_index, None)
+            if page_print is not None and model is not None and canonical:
+                remember(page_print, extraction, page_index, model)
         except Exception as e:
             pages_failed += 1
             logger.warning(
@@ -211,15 +539,173 @@ def ingest_document(
                 e,
                 exc_info=True,
             )
-            if _is_rate_limit_error(e) and config.GEMINI_429_COOLDOWN > 0:
-                logger.info(
-                    "Rate limit detected; waiting %.0f s before next page (doc_id=%s).",
-                    config.GEMINI_429_COOLDOWN,
-                    doc_id,
+            if checkpoints is not None:
+                checkpoints.mark_failed(doc_id, page_index, f"{type(e).__name__}: {e}")
+
+    # Render -> extract pipeline: this thread renders the next page while workers extract
+    # earlier ones (pacing comes from the shared rate limiter). At most `window` page images
+    # are alive at once, and results are collected in page order so canonical output and
+    # failure accounting stay deterministic.
+    # With AKILI_EXTRACT_BATCH_PAGES > 1, rendered pages are grouped (by count and image
+    # bytes) and each group is extracted on one worker with multi-page requests; every page
+    # still gets its own future in `pending`, resolved when its group finishes.
+    workers = max(1, min(config.INGEST_WORKERS, total_pages or 1))
+    group_pages = max(1, config.EXTRACT_BATCH_PAGES)
+    window = (workers + 1) * group_pages
+    pending: deque[tuple[int, Future]] = deque()
+    group: list[_GroupPage] = []
+    group_futures: dict[int, Future] = {}
+    group_bytes = 0
+
+    def _submit_group(pool: ThreadPoolExecutor) -> None:
+        nonlocal group_bytes
+        if not group:
+            return
+        children = dict(group_futures)
+        pool.submit(in_current_work(_extract_group), list(group)).add_done_callback(
+            lambda batch: _fan_out(batch, children)
+        )
+        group.clear()
+        group_futures.clear()
+        group_bytes = 0
+
+    # Adaptive consensus cross-checks Gemini against the text layer, so read it even when
+    # the fast path itself is off (never trusted then: min_confidence is infinite).
+    adaptive_consensus = config.CONSENSUS_ENABLED and config.CONSENSUS_MODE == "adaptive"
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="akili-ingest") as pool:
+        if batch_classify:
+            # Submitted before any extraction, so a worker waiting on a sheet never waits on
+            # a task queued behind itself.
+            preclassified = classify_pdf_pages(
+                pdf_path,
+                skip=resumed.keys(),
+                submit=lambda fn, *args: pool.submit(in_current_work(fn), *args),
+            )
+        for page in iter_rendered_pages(
+            pdf_path,
+            text_layer=config.TEXT_LAYER_ENABLED or adaptive_consensus,
+            min_confidence=(
+                config.TEXT_LAYER_MIN_CONFIDENCE if config.TEXT_LAYER_ENABLED else math.inf
+            ),
+            skip=resumed.keys(),
+            # Render profiles and tiling need the page type before rendering: from the
+            # contact sheets, else from the local classifier.
+            classify=not batch_classify
+            and (
+                (config.PAGE_CLASSIFY_ENABLED and config.PAGE_CLASSIFY_LOCAL)
+                or config.RENDER_PROFILES_ENABLED
+                or config.TILED_EXTRACTION_ENABLED
+            ),
+            fingerprint=config.PAGE_DEDUP_ENABLED,
+            page_types=preclassified,
+            tile_types=config.TILE_PAGE_TYPES if config.TILED_EXTRACTION_ENABLED else (),
+            roi=config.ROI_ENABLED,
+        ):
+            if page.error is not None:
+                # Counted and checkpointed as a failed page, so POST /retry picks it up.
+                future = Future()
+                future.set_exception(RuntimeError(f"Page failed to render: {page.error}"))
+                pending.append((page.page_index, future))
+                continue
+            if (page.image is not None or page.tiles) and config.RENDER_PROFILES_ENABLED:
+                rendered_bytes = (
+                    len(page.image)
+                    if page.image is not None
+                    else sum(len(tile) for _, tile in page.tiles or ())
                 )
-                time.sleep(config.GEMINI_429_COOLDOWN)
-            continue
-
+                page_renders.append(
+                    {"page": page.page_index, "profile": page.profile, "bytes": rendered_bytes}
+                )
+                render_seconds += page.render_seconds
+            local_class = page.local_class if config.PAGE_CLASSIFY_LOCAL else None
+            page_print = page.fingerprint
+            duplicate = duplicates.find(page_print) if page_print is not None else None
+            reused = None
+            if page.text_layer is None and page_print is not None and duplicate is None:
+                # The page's route as far as it is known before classification: from the
+                # contact sheets or a confident local class, else the default route.
+                known_type = preclassified.get(page.page_index) or (
+                    local_class[0]
+                    if local_class is not None
+                    and local_class[1] >= config.PAGE_CLASSIFY_LOCAL_MIN_CONFIDENCE
+                    else None
+                )
+                expected = route_for("extract", known_type)
+                reused = lookup_cached(
+                    page_print, page.page_index, expected.model or config.GEMINI_MODEL
+                )
+            if page.text_layer is not None:
+                # Born-digital page answered from the text layer: never rendered or sent to
+                # Gemini; its coverage confidence stands in for consensus agreement.
+                text_layer_pages += 1
+                _progress({"phase": "extracting", "page": page.page_index, "total": total_pages})
+                future: Future = Future()
+                future.set_result((page.text_layer.extraction, page.text_layer.confidence))
+            elif duplicate is not None or reused is not None:
+                # Near-duplicate of an earlier page in this document (resolved when that page
+                # is) or of a page from an earlier ingest (cache): no Gemini call.
+                duplicate_pages += 1
+                _progress({"phase": "extracting", "page": page.page_index, "total": total_pages})
+                future = Future()
+                if duplicate is not None:
+                    source_page, source = duplicate
+                    source.add_done_callback(
+                        partial(_resolve_duplicate, future, source_page, page.page_index)
+                    )
+                else:
+                    future.set_result((reused, 0.5))
+            else:
+                text_hint = page.text_hint.extraction if page.text_hint is not None else None
+                if page.region is not None:
+                    cropped_pages += 1
+                if page.tiles:
+                    tiled_pages += 1
+                    future = pool.submit(
+                        in_current_work(_extract),
+                        page.page_index,
+                        None,
+                        text_hint,
+                        local_class,
+                        page.tiles,
+                        rendered_type=page.page_type,
+                    )
+                elif group_pages > 1:
+                    image = page.image or b""
+                    if group and group_bytes + len(image) > config.EXTRACT_BATCH_MAX_BYTES:
+                        _submit_group(pool)
+                    future = Future()
+                    group.append(
+                        _GroupPage(page.page_index, image, text_hint, local_class, page.region)
+                    )
+                    group_futures[page.page_index] = future
+                    group_bytes += len(image)
+                    if len(group) >= group_pages:
+                        _submit_group(pool)
+                else:
+                    future = pool.submit(
+                        in_current_work(_extract),
+                        page.page_index,
+                        page.image,
+                        text_hint,
+                        local_class,
+                        region=page.region,
+                    )
+                if page_print is not None:
+                    duplicates.add(page_print, page.page_index, future)
+                    fingerprints[page.page_index] = page_print
+            pending.append((page.page_index, future))
+            del page
+            if len(pending) >= window:
+                _submit_group(pool)  # never wait on a page whose group was not submitted
+            while pending and (len(pending) >= window or pending[0][1].done()):
+                _collect(*pending.popleft())
+        _submit_group(pool)
+        while pending:
+            _collect(*pending.popleft())
+
+    all_canonical: list[Unit | Bijection | Grid] = [
+        obj for page_index in sorted(page_results) for obj in page_results[page_index]
+    ]
     all_canonical, merge_candidates = merge_multipage_tables(all_canonical)
     if merge_candidates:
         logger.info(
@@ -238,7 +724,7 @@ def ingest_document(
     if pages_failed > 0:
         logger.info(
             "Ingest: %s of %s page(s) failed (doc_id=%s). Often rate limits; "
-            "try AKILI_GEMINI_PAGE_DELAY_SECONDS=4 or higher.",
+            "try lowering AKILI_GEMINI_RPM or AKILI_INGEST_WORKERS.",
             pages_failed,
             total_pages,
             doc_id,
@@ -249,9 +735,20 @@ def ingest_document(
         units = [o for o in all_canonical if isinstance(o, Unit)]
         bijections = [o for o in all_canonical if isinstance(o, Bijection)]
         grids = [o for o in all_canonical if isinstance(o, Grid)]
+        # A resumed run replaces the previous run's facts in one transaction: the merge above
+        # may have combined tables differently, and a failed write must not lose them.
         store.store_canonical(
-            doc_id, pdf_path.name, total_pages, units, bijections, grids, uploaded_by=uploaded_by
+            doc_id,
+            filename,
+            total_pages,
+            units,
+            bijections,
+            grids,
+            uploaded_by=uploaded_by,
+            replace=bool(resumed),
         )
+    if checkpoints is not None:
+        checkpoints.finish_run(doc_id, "complete" if pages_failed == 0 else "partial")
 
     result: dict = {
         "phase": "done",
@@ -262,6 +759,31 @@ def ingest_document(
         "bijections_count": len([o for o in all_canonical if isinstance(o, Bijection)]),
         "grids_count": len([o for o in all_canonical if isinstance(o, Grid)]),
     }
+    if text_layer_pages:
+        result["text_layer_pages"] = text_layer_pages
+    if resumed:
+        result["pages_resumed"] = len(resumed)
+    if duplicate_pages:
+        result["duplicate_pages"] = duplicate_pages
+    if tiled_pages:
+        result["tiled_pages"] = tiled_pages
+    if cropped_pages:
+        result["cropped_pages"] = cropped_pages
+    if page_renders:
+        profiles: dict[str, int] = {}
+        for render in page_renders:
+            profiles[render["profile"]] = profiles.get(render["profile"], 0) + 1
+        result["render"] = {
+            "profiles": profiles,
+            "image_bytes": sum(render["bytes"] for render in page_renders),
+            "render_seconds": round(render_seconds, 3),
+            "pages": page_renders,
+        }
+    if consensus_decisions:
+        decisions = [consensus_decisions[i] for i in sorted(consensus_decisions)]
+        result["consensus_pages"] = len(decisions)
+        result["consensus_second_passes"] = sum(1 for d in decisions if d.second_pass)
+        result["consensus_decisions"] = [asdict(d) for d in decisions]
     if (
         result["units_count"] == 0
         and result["bijections_count"] == 0
@@ -276,7 +798,7 @@ def ingest_document(
         result["extraction_note"] = (
             f"Extracted from {total_pages - pages_failed} of {total_pages} pages. "
             f"{pages_failed} page(s) were skipped (often due to rate limits). "
-            "Try increasing AKILI_GEMINI_PAGE_DELAY_SECONDS in .env and re-upload."
+            f"POST /documents/{doc_id}/retry re-extracts only the skipped pages."
         )
     _progress(result)
     return doc_id, all_canonical, total_pages, pages_failed
@@ -0,0 +1,306 @@
+"""
+Shared Gemini rate budget: requests-per-minute and tokens-per-minute token buckets.
+
+Every Gemini call acquires from one process-wide limiter before it is issued, so parallel
+page workers share a single budget instead of each page sleeping a fixed delay.
+A 429 pauses the whole limiter for the configured cooldown.
+
+With AKILI_GEMINI_ADAPTIVE_RATE the limiter also governs adaptively (AIMD): calls enter
+through admit(), which holds one of a bounded number of in-flight slots and reports the
+outcome. Each success grows the allowed concurrency by 1/limit and the request/token rates
+by AKILI_GEMINI_AIMD_INCREASE of the configured rate; a 429 multiplies both by
+AKILI_GEMINI_AIMD_DECREASE and empties the request bucket. 429s from calls admitted before
+the last decrease were caused by the old rate and do not decrease again. Throughput thus
+settles just under the real quota instead of alternating between a fixed cooldown and a
+burst of rejections; the configured RPM/TPM and AKILI_GEMINI_MAX_CONCURRENCY are ceilings.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from akili import config
+from akili.ingest.errors import is_rate_limit_error
+
+logger = logging.getLogger(__name__)
+
+# Gemini bills images in 768x768 tiles of 258 tokens each (smaller images are one tile).
+_IMAGE_TILE_PX = 768
+_TOKENS_PER_IMAGE_TILE = 258
+# Used when the image header cannot be read: a 150 dpi Letter page.
+_DEFAULT_IMAGE_TILES = 6
+# Refill rounding slack: a wait computed from a non-integral rate can refill to just under
+# one request, and the resulting sub-nanosecond wait would never advance a coarse clock.
+_EPSILON = 1e-9
+
+
+def _png_size(image_bytes: bytes) -> tuple[int, int] | None:
+    """Return (width, height) from a PNG IHDR header, or None if not a PNG."""
+    if len(image_bytes) < 24 or not image_bytes.startswith(b"\x89PNG\r\n\x1a\n"):
+        return None
+    width, height = struct.unpack(">II", image_bytes[16:24])
+    return width, height
+
+
+def _jpeg_size(image_bytes: bytes) -> tuple[int, int] | None:
+    """Return (width, height) from a JPEG start-of-frame marker, or None if not a JPEG."""
+    if not image_bytes.startswith(b"\xff\xd8"):
+        return None
+    i = 2
+    while i + 9 <= len(image_bytes):
+        if image_bytes[i] != 0xFF:
+            return None
+        marker = image_bytes[i + 1]
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack(">HH", image_bytes[i + 5 : i + 9])
+            return width, height
+        (length,) = struct.unpack(">H", image_bytes[i + 2 : i + 4])
+        i += 2 + length
+    return None
+
+
+def estimate_image_tokens(image_bytes: bytes) -> int:
+    """Estimate Gemini input tokens for one image (PNG or JPEG)."""
+    size = _png_size(image_bytes) or _jpeg_size(image_bytes)
+    if size is None:
+        return _DEFAULT_IMAGE_TILES * _TOKENS_PER_IMAGE_TILE
+    width, height = size
+    tiles = max(1, math.ceil(width / _IMAGE_TILE_PX)) * max(1, math.ceil(height / _IMAGE_TILE_PX))
+    return tiles * _TOKENS_PER_IMAGE_TILE
+
+
+def estimate_request_tokens(prompt: str, images: list[bytes] | None = None) -> int:
+    """Rough input-token estimate for a request (~4 characters per text token)."""
+    return len(prompt) // 4 + sum(estimate_image_tokens(img) for img in images or [])
+
+
+class RateLimiter:
+    """Blocking limiter over two token buckets (requests and tokens per minute).
+
+    A rate of 0 disables that bucket. Bucket capacity equals one minute of budget,
+    so an idle limiter allows a burst of up to a full minute's quota. With adaptive set,
+    admit() applies AIMD to the rates and to max_concurrency in-flight calls (0: unbounded).
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: float,
+        tokens_per_minute: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        adaptive: bool = False,
+        max_concurrency: int = 0,
+        increase: float = 0.02,
+        decrease: float = 0.5,
+        min_fraction: float = 0.05,
+    ):
+        self._max_rpm = max(0.0, requests_per_minute)
+        self._max_tpm = max(0.0, tokens_per_minute)
+        self._rpm = self._max_rpm
+        self._tpm = self._max_tpm
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._slot_free = threading.Condition(self._lock)
+        now = clock()
+        self._req_tokens = self._rpm
+        self._tok_tokens = self._tpm
+        self._last = now
+        self._paused_until = now
+        # AIMD state: fraction of the configured rates allowed, concurrency limit, in-flight
+        # calls, and the decrease epoch (bumped on every multiplicative decrease).
+        self._adaptive = adaptive
+        self._max_concurrency = max(0, max_concurrency)
+        self._increase = max(0.0, increase)
+        self._decrease = min(1.0, max(0.0, decrease))
+        self._min_fraction = min(1.0, max(0.0, min_fraction))
+        self._fraction = 1.0
+        self._concurrency = float(self._max_concurrency)
+        self._in_flight = 0
+        self._epoch = 0
+
+    def _refill(self, now: float) -> None:
+        elapsed = max(0.0, now - self._last)
+        self._last = now
+        if self._rpm:
+            self._req_tokens = min(self._rpm, self._req_tokens + elapsed * self._rpm / 60.0)
+        if self._tpm:
+            self._tok_tokens = min(self._tpm, self._tok_tokens + elapsed * self._tpm / 60.0)
+
+    def _try_take(self, tokens: int, reserve: float = 0.0) -> float:
+        """Take budget if available and return 0.0; otherwise return seconds to wait.
+        reserve is the share of each bucket that must stay available after the take."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            # A single request larger than the whole bucket is allowed once the bucket is full.
+            need = min(float(tokens), self._tpm) if self._tpm else 0.0
+            need_req = max(1.0, min(1.0 + reserve * self._rpm, self._rpm))
+            need_tok = max(need, min(need + reserve * self._tpm, self._tpm))
+            wait = 0.0
+            if self._rpm and self._req_tokens < need_req - _EPSILON:
+                wait = max(wait, (need_req - self._req_tokens) * 60.0 / self._rpm)
+            if self._tpm and self._tok_tokens < need_tok - _EPSILON:
+                wait = max(wait, (need_tok - self._tok_tokens) * 60.0 / self._tpm)
+            if wait > 0:
+                return wait
+            if self._rpm:
+                self._req_tokens -= 1.0
+            if self._tpm:
+                self._tok_tokens -= need
+            return 0.0
+
+    def acquire(self, tokens: int = 0, reserve: float = 0.0) -> float:
+        """Block until one request costing ``tokens`` fits the budget, leaving ``reserve`` of
+        each bucket untouched. Returns seconds waited."""
+        waited = 0.0
+        while True:
+            wait = self._try_take(tokens, reserve)
+            if wait <= 0:
+                return waited
+            self._sleep(wait)
+            waited += wait
+
+    def charge(self, tokens: int = 0) -> None:
+        """Count one request against the budget without waiting. The buckets may go
+        negative, so the next waiting callers make up for it."""
+        with self._lock:
+            self._refill(self._clock())
+            if self._rpm:
+                self._req_tokens -= 1.0
+            if self._tpm:
+                self._tok_tokens -= min(float(tokens), self._tpm)
+
+    @property
+    def adaptive(self) -> bool:
+        return self._adaptive
+
+    @property
+    def rate_fraction(self) -> float:
+        """Share of the configured rates currently allowed (1.0 unless adaptive)."""
+        return self._fraction
+
+    def _set_fraction(self, fraction: float) -> None:
+        """Scale the bucket rates to fraction of the configured ones (lock held)."""
+        self._fraction = min(1.0, max(self._min_fraction, fraction))
+        self._rpm = self._max_rpm * self._fraction
+        self._tpm = self._max_tpm * self._fraction
+        self._req_tokens = min(self._req_tokens, self._rpm)
+        self._tok_tokens = min(self._tok_tokens, self._tpm)
+
+    def _enter(self, tokens: int, reserve: float = 0.0) -> int:
+        """Wait for an in-flight slot, then for budget; returns the decrease epoch."""
+        with self._slot_free:
+            while self._max_concurrency and self._in_flight >= max(1, int(self._concurrency)):
+                self._slot_free.wait()
+            self._in_flight += 1
+            epoch = self._epoch
+        try:
+            self.acquire(tokens, reserve)
+        except BaseException:
+            self._leave(epoch, None)
+            raise
+        return epoch
+
+    def _leave(self, epoch: int, rate_limited: bool | None) -> None:
+        """Release a slot; rate_limited True/False applies AIMD, None (other error) does not."""
+        with self._slot_free:
+            self._in_flight -= 1
+            if rate_limited and epoch == self._epoch:
+                self._epoch += 1
+                self._set_fraction(self._fraction * self._decrease)
+                self._concurrency = max(1.0, self._concurrency * self._decrease)
+                self._req_tokens = min(self._req_tokens, 0.0)
+                logger.info(
+                    "Gemini rate limited: allowing %.0f%% of the configured rate, %d concurrent.",
+                    self._fraction * 100,
+                    int(self._concurrency),
+                )
+            elif rate_limited is False:
+                self._set_fraction(self._fraction + self._increase)
+                if self._max_concurrency:
+                    self._concurrency = min(
+                        float(self._max_concurrency),
+                        self._concurrency + 1.0 / max(1.0, self._concurrency),
+                    )
+            self._slot_free.notify_all()
+
+    @contextmanager
+    def admit(self, tokens: int = 0, wait: bool = True, reserve: float = 0.0) -> Iterator[None]:
+        """
+        Run one Gemini call under the limiter. Waits for budget (acquire, leaving reserve of
+        it) and, when adaptive, for an in-flight slot; the call's outcome then adjusts the
+        adaptive limits: a rate-limit error raised inside decreases them, a normal exit
+        increases them. With wait False (latency-bound calls) nothing is waited for, only
+        the outcome is reported.
+        """
+        if not self._adaptive:
+            if wait:
+                self.acquire(tokens, reserve)
+            yield
+            return
+        if wait:
+            epoch = self._enter(tokens, reserve)
+        else:
+            with self._lock:
+                self._in_flight += 1
+                epoch = self._epoch
+        try:
+            yield
+        except Exception as e:
+            self._leave(epoch, True if is_rate_limit_error(e) else None)
+            raise
+        except BaseException:
+            self._leave(epoch, None)
+            raise
+        self._leave(epoch, False)
+
+    def stats(self) -> dict[str, float | int | bool]:
+        """Current effective limits (rates scaled by AIMD) and in-flight calls."""
+        with self._lock:
+            return {
+                "adaptive": self._adaptive,
+                "requests_per_minute": round(self._rpm, 2),
+                "tokens_per_minute": round(self._tpm),
+                "rate_fraction": round(self._fraction, 3),
+                "max_concurrent": int(self._concurrency) if self._max_concurrency else 0,
+                "in_flight": self._in_flight,
+            }
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for ``seconds`` (used after a 429 from the API)."""
+        if seconds <= 0:
+            return
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+        logger.info("Gemini rate limiter paused for %.0f s after rate-limit response.", seconds)
+
+
+_limiter: RateLimiter | None = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide limiter (configured from AKILI_GEMINI_RPM / AKILI_GEMINI_TPM,
+    adaptive with AKILI_GEMINI_ADAPTIVE_RATE)."""
+    global _limiter
+    if _limiter is None:
+        with _limiter_lock:
+            if _limiter is None:
+                _limiter = RateLimiter(
+                    config.GEMINI_RPM,
+                    config.GEMINI_TPM,
+                    adaptive=config.GEMINI_ADAPTIVE_RATE,
+                    max_concurrency=config.GEMINI_MAX_CONCURRENCY,
+                    increase=config.GEMINI_AIMD_INCREASE,
+                    decrease=config.GEMINI_AIMD_DECREASE,
+                )
+    return _limiter
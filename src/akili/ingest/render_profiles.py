@@ -0,0 +1,100 @@
+"""
+Page-type-aware render profiles: DPI, color mode and image encoding per PageType.
+
+Every page used to be rendered at 150 dpi RGB PNG. With AKILI_RENDER_PROFILES_ENABLED, a
+page whose type is known before rendering (contact-sheet or confident local classification)
+gets a smaller payload where accuracy allows: grayscale PNG for text and spec tables, a
+higher-DPI grayscale render for dense pin tables, and JPEG for drawings when it is smaller
+than PNG (shaded package renderings and photos; line art stays PNG). Pages of unknown
+type keep the "standard" profile. AKILI_RENDER_PROFILE_MAP overrides the type -> profile
+mapping ("pinout_table=standard,block_diagram=text"); benchmark/render_profiles.py measures
+the size/latency/accuracy trade-off.
+
+PyMuPDF encodes PNG and JPEG only (WebP and 1-bit PNG would need Pillow), so the text
+profile uses 8-bit grayscale PNG, which compresses nearly as well on black-on-white pages.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Literal
+
+import fitz  # PyMuPDF
+
+from akili import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    """How to rasterize a page for Gemini."""
+
+    name: str
+    dpi: int = 150
+    color: Literal["rgb", "gray"] = "rgb"
+    encoding: Literal["png", "jpeg", "auto"] = "png"  # auto: the smaller of the two
+    jpeg_quality: int = 85
+
+
+RENDER_PROFILES: dict[str, RenderProfile] = {
+    "standard": RenderProfile("standard"),
+    "text": RenderProfile("text", color="gray"),
+    "dense_table": RenderProfile("dense_table", dpi=200, color="gray"),
+    "drawing": RenderProfile("drawing", encoding="auto", jpeg_quality=80),
+}
+
+STANDARD_PROFILE = RENDER_PROFILES["standard"]
+
+_DEFAULT_PROFILE_MAP: dict[str, str] = {
+    "pinout_table": "dense_table",
+    "electrical_specs": "text",
+    "absolute_max_ratings": "text",
+    "timing_characteristics": "text",
+    "text_description": "text",
+    "package_info": "drawing",
+    "block_diagram": "drawing",
+}
+
+
+def _profile_map() -> dict[str, str]:
+    mapping = dict(_DEFAULT_PROFILE_MAP)
+    for item in config.RENDER_PROFILE_MAP.split(","):
+        page_type, sep, name = item.partition("=")
+        page_type, name = page_type.strip(), name.strip()
+        if not sep or not page_type:
+            continue
+        if name not in RENDER_PROFILES:
+            logger.warning(
+                "Unknown render profile %r for %s in AKILI_RENDER_PROFILE_MAP", name, page_type
+            )
+            continue
+        mapping[page_type] = name
+    return mapping
+
+
+def profile_for(page_type: str | None) -> RenderProfile:
+    """Render profile for a page type; "standard" when profiles are off or the type is unknown."""
+    if not config.RENDER_PROFILES_ENABLED or page_type is None:
+        return STANDARD_PROFILE
+    return RENDER_PROFILES[_profile_map().get(page_type, "standard")]
+
+
+def render_page(page: Any, profile: RenderProfile = STANDARD_PROFILE, clip: Any = None) -> bytes:
+    """Rasterize a PyMuPDF page (or the clip rectangle of it) with the given profile; returns
+    PNG or JPEG bytes."""
+    colorspace = fitz.csGRAY if profile.color == "gray" else fitz.csRGB
+    pix = page.get_pixmap(dpi=profile.dpi, colorspace=colorspace, alpha=False, clip=clip)
+    if profile.encoding == "png":
+        return pix.tobytes(output="png")
+    jpeg = pix.tobytes(output="jpeg", jpg_quality=profile.jpeg_quality)
+    if profile.encoding == "jpeg":
+        return jpeg
+    png = pix.tobytes(output="png")
+    return jpeg if len(jpeg) < len(png) else png
+
+
+def image_mime_type(image_bytes: bytes) -> str:
+    """MIME type of a rendered page image (JPEG or PNG)."""
+    return "image/jpeg" if image_bytes.startswith(b"\xff\xd8") else "image/png"
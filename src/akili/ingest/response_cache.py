@@ -0,0 +1,256 @@
+"""
+Content-addressed cache of raw Gemini responses for page extraction and classification.
+
+Keyed by SHA-256 of the page PNG plus everything else that shapes the response
+(call kind, prompt version, page-type hint, model name), so re-ingesting an unchanged
+page costs no API call. Stored in SQLite or PostgreSQL via ConnectionManager, with
+size-based LRU eviction and in-process hit/miss counters. The total size is kept in a
+gemini_cache_meta row updated with every write, so a put never sums the table, and
+eviction reads only as many of the oldest entries as it deletes.
+
+Enable with AKILI_GEMINI_CACHE_ENABLED=1; bump the prompt version constants in
+gemini_extract / page_classifier whenever a prompt changes so stale entries stop matching.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from akili import config
+from akili.store.connection import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+# Oldest entries read per eviction query.
+_EVICT_BATCH = 64
+
+
+def cache_key(
+    kind: str,
+    image_png_bytes: bytes,
+    prompt_version: str,
+    model_name: str,
+    page_type_hint: str = "",
+) -> str:
+    """Return the cache key for one Gemini call (hex SHA-256)."""
+    h = hashlib.sha256()
+    for part in (kind, prompt_version, model_name, page_type_hint):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    h.update(hashlib.sha256(image_png_bytes).digest())
+    return h.hexdigest()
+
+
+class GeminiResponseCache:
+    """Persistent response cache with size-bounded LRU eviction."""
+
+    def __init__(
+        self,
+        db_url: str | None = None,
+        db_path: str | Path = "akili.db",
+        max_bytes: int = 256 * 1024 * 1024,
+        conn_manager: ConnectionManager | None = None,
+    ):
+        if conn_manager is not None:
+            self._mgr = conn_manager
+        else:
+            self._mgr = ConnectionManager(db_url=db_url, db_path=db_path)
+        self._max_bytes = max_bytes
+        self._stats_lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        self._evictions = 0
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            if self._mgr.is_postgres:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS gemini_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        size_bytes INTEGER NOT NULL,
+                        last_used DOUBLE PRECISION NOT NULL,
+                        created_at TIMESTAMPTZ DEFAULT NOW()
+                    )
+                """)
+                cur.execute(
+                    "CREATE INDEX IF NOT EXISTS idx_gemini_cache_lru ON gemini_cache(last_used)"
+                )
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS gemini_cache_meta (
+                        id INTEGER PRIMARY KEY,
+                        total_bytes BIGINT NOT NULL
+                    )
+                """)
+            else:
+                cur.executescript("""
+                    CREATE TABLE IF NOT EXISTS gemini_cache (
+                        cache_key TEXT PRIMARY KEY,
+                        kind TEXT NOT NULL,
+                        model TEXT NOT NULL,
+                        response TEXT NOT NULL,
+                        size_bytes INTEGER NOT NULL,
+                        last_used REAL NOT NULL,
+                        created_at TEXT DEFAULT (datetime('now'))
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_gemini_cache_lru ON gemini_cache(last_used);
+                    CREATE TABLE IF NOT EXISTS gemini_cache_meta (
+                        id INTEGER PRIMARY KEY,
+                        total_bytes INTEGER NOT NULL
+                    );
+                """)
+            # Caches created before the meta row start from their current size.
+            cur.execute(
+                "INSERT INTO gemini_cache_meta (id, total_bytes) "
+                "SELECT 1, (SELECT COALESCE(SUM(size_bytes), 0) FROM gemini_cache) "
+                "WHERE NOT EXISTS (SELECT 1 FROM gemini_cache_meta)"
+            )
+
+    def get(self, key: str) -> str | None:
+        """Return the cached response text for key (refreshing its LRU position), or None."""
+        ph = self._mgr.placeholder()
+        try:
+            with self._mgr.connection() as conn:
+                cur = conn.cursor()
+                cur.execute(f"SELECT response FROM gemini_cache WHERE cache_key = {ph}", (key,))
+                row = cur.fetchone()
+                if row is not None:
+                    cur.execute(
+                        f"UPDATE gemini_cache SET last_used = {ph} WHERE cache_key = {ph}",
+                        (time.time(), key),
+                    )
+        except Exception as e:
+            # The cache is an optimization; never fail an ingest because of it.
+            logger.warning("Gemini cache read failed: %s", e)
+            row = None
+        with self._stats_lock:
+            if row is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return row[0] if row is not None else None
+
+    def put(self, key: str, kind: str, model_name: str, response_text: str) -> None:
+        """Store a response and evict least-recently-used entries beyond max_bytes."""
+        size = len(response_text.encode("utf-8"))
+        if self._max_bytes > 0 and size > self._max_bytes:
+            return
+        ph = self._mgr.placeholder()
+        try:
+            with self._mgr.connection() as conn:
+                cur = conn.cursor()
+                cur.execute(f"SELECT size_bytes FROM gemini_cache WHERE cache_key = {ph}", (key,))
+                row = cur.fetchone()
+                cur.execute(
+                    f"""INSERT INTO gemini_cache
+                        (cache_key, kind, model, response, size_bytes, last_used)
+                        VALUES ({ph}, {ph}, {ph}, {ph}, {ph}, {ph})
+                        ON CONFLICT (cache_key) DO UPDATE SET
+                            response = excluded.response,
+                            size_bytes = excluded.size_bytes,
+                            last_used = excluded.last_used""",
+                    (key, kind, model_name, response_text, size, time.time()),
+                )
+                total = self._add_bytes(cur, size - (row[0] if row else 0))
+                evicted = self._evict(cur, total) if self._max_bytes > 0 else 0
+        except Exception as e:
+            logger.warning("Gemini cache write failed: %s", e)
+            return
+        with self._stats_lock:
+            self._writes += 1
+            self._evictions += evicted
+
+    def _add_bytes(self, cur: Any, delta: int) -> int:
+        """Add delta to the tracked total size and return the new total."""
+        ph = self._mgr.placeholder()
+        cur.execute(
+            f"UPDATE gemini_cache_meta SET total_bytes = total_bytes + {ph} WHERE id = 1 "
+            "RETURNING total_bytes",
+            (delta,),
+        )
+        return cur.fetchone()[0]
+
+    def _evict(self, cur: Any, total: int) -> int:
+        """Delete oldest entries until the total size fits max_bytes. Returns rows deleted."""
+        ph = self._mgr.placeholder()
+        deleted = 0
+        excess = total - self._max_bytes
+        while excess > 0:
+            cur.execute(
+                f"SELECT cache_key, size_bytes FROM gemini_cache ORDER BY last_used ASC LIMIT {ph}",
+                (_EVICT_BATCH,),
+            )
+            victims: list[str] = []
+            freed = 0
+            for key, size in cur.fetchall():
+                if excess - freed <= 0:
+                    break
+                victims.append(key)
+                freed += size
+            if not victims:
+                break
+            marks = ", ".join([ph] * len(victims))
+            cur.execute(f"DELETE FROM gemini_cache WHERE cache_key IN ({marks})", victims)
+            excess = self._add_bytes(cur, -freed) - self._max_bytes
+            deleted += len(victims)
+        return deleted
+
+    def clear(self) -> None:
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("DELETE FROM gemini_cache")
+            cur.execute("UPDATE gemini_cache_meta SET total_bytes = 0 WHERE id = 1")
+
+    def stats(self) -> dict[str, Any]:
+        """Return hit/miss counters for this process and the current cache size."""
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT COUNT(*) FROM gemini_cache")
+            entries = cur.fetchone()[0]
+            cur.execute("SELECT total_bytes FROM gemini_cache_meta WHERE id = 1")
+            total_bytes = cur.fetchone()[0]
+        with self._stats_lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "writes": self._writes,
+                "evictions": self._evictions,
+                "entries": entries,
+                "bytes": total_bytes,
+                "max_bytes": self._max_bytes,
+            }
+
+
+_cache: GeminiResponseCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> GeminiResponseCache | None:
+    """Return the process-wide cache, or None when AKILI_GEMINI_CACHE_ENABLED is off."""
+    global _cache
+    if not config.GEMINI_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                db_url = os.environ.get("DATABASE_URL", "")
+                _cache = GeminiResponseCache(
+                    db_url=db_url or None,
+                    db_path=config.GEMINI_CACHE_DB_PATH
+                    or Path(config.DB_PATH).resolve().parent / "akili_cache.db",
+                    max_bytes=config.GEMINI_CACHE_MAX_BYTES,
+                )
+    return _cache
@@ -0,0 +1,87 @@
+"""
+Layout-based region-of-interest cropping: send Gemini the part of a page that holds content.
+
+Datasheet pages carry wide margins, running headers/footers and logos that produce no facts
+but still cost image tokens. With AKILI_ROI_ENABLED, find_content_region reads the page
+layout from PyMuPDF (text blocks, vector drawings such as table rules, placed images), drops
+what sits entirely in the running header/footer bands, and returns the padded bounding box
+of the rest as a PageRegion. The page is rendered clipped to that region (pdf_loader) and
+the extraction's coordinates are mapped back to the full page with tiling.to_page_coords,
+so Point/BBox stay page-normalized.
+
+No region is returned (the full page is sent) when the page has no text layer (scanned
+pages: the layout is unknown) or when the content already fills more than
+AKILI_ROI_MAX_AREA of the page (cropping would save little).
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+
+from akili import config
+from akili.ingest.tiling import PageRegion
+
+logger = logging.getLogger(__name__)
+
+# Blocks entirely inside the top/bottom band of the page are running headers, footers,
+# page numbers and logos.
+_RUNNING_BAND = 0.06
+# Drawings covering nearly the whole page are borders or backgrounds, not content.
+_MAX_DRAWING_AREA = 0.9
+
+
+def _content_rects(page: Any) -> tuple[list[Any], bool]:
+    """Rectangles of the page's text blocks, images and drawings; plus whether it has text."""
+    rects = []
+    has_text = False
+    for block in page.get_text("blocks"):
+        x0, y0, x1, y1, text, _, block_type = block[:7]
+        if block_type == 0 and not str(text).strip():
+            continue
+        has_text = has_text or block_type == 0
+        rects.append((x0, y0, x1, y1))
+    page_area = page.rect.width * page.rect.height
+    for drawing in page.get_drawings():
+        rect = drawing.get("rect")
+        if rect is None or rect.width * rect.height >= _MAX_DRAWING_AREA * page_area:
+            continue
+        rects.append((rect.x0, rect.y0, rect.x1, rect.y1))
+    return rects, has_text
+
+
+def find_content_region(page: Any) -> PageRegion | None:
+    """
+    The padded region of a PyMuPDF page that holds its content, in page-normalized
+    coordinates; None when the full page should be sent (no text layer, or the content
+    covers more than config.ROI_MAX_AREA of the page).
+    """
+    try:
+        rects, has_text = _content_rects(page)
+    except (RuntimeError, ValueError) as e:
+        logger.debug("Layout analysis failed on page %s: %s", page.number, e)
+        return None
+    if not has_text:
+        return None
+    width, height = page.rect.width, page.rect.height
+    if width <= 0 or height <= 0:
+        return None
+    top, bottom = _RUNNING_BAND * height, (1 - _RUNNING_BAND) * height
+    body = [
+        (x0, y0, x1, y1)
+        for x0, y0, x1, y1 in rects
+        if not (y1 <= top or y0 >= bottom) and x1 > x0 and y1 > y0
+    ]
+    if not body:
+        return None
+    pad = config.ROI_PADDING
+    region = PageRegion(
+        x0=max(0.0, min(r[0] for r in body) / width - pad),
+        y0=max(0.0, min(r[1] for r in body) / height - pad),
+        x1=min(1.0, max(r[2] for r in body) / width + pad),
+        y1=min(1.0, max(r[3] for r in body) / height + pad),
+    )
+    area = (region.x1 - region.x0) * (region.y1 - region.y0)
+    if area > config.ROI_MAX_AREA:
+        return None
+    return region
@@ -0,0 +1,213 @@
+"""
+Priority and per-tenant fair scheduling of Gemini requests over the shared rate budget.
+
+Query-time formatting (FORMAT_TIMEOUT of a few seconds) used to compete for the same quota
+as multi-hundred-page ingests and corpus builds, so under load answers came back raw. With
+AKILI_GEMINI_SCHEDULER_ENABLED every request is admitted by the scheduler according to the
+work it belongs to, set with gemini_work() by the code that starts the work:
+
+    interactive  query-time calls (formatting): never wait; they are charged to the budget,
+                 and everything else leaves AKILI_GEMINI_INTERACTIVE_RESERVE of each bucket
+                 untouched, so interactive calls always find headroom within the budget
+    ingest       uploads, streamed or queued, and retries of them
+    bulk         corpus builds (scripts/populate_corpus.py) and anything not tagged
+
+Requests waiting for a limiter's budget are served one at a time: the highest class first,
+and within a class round-robin over tenants (user or org id), so one tenant's 500-page
+upload does not hold up another's 5-page one. The work is a context variable; thread pools
+do not inherit it, so tasks submitted to them are wrapped with in_current_work(). GET
+/status shows admitted and waiting requests per class under "gemini_scheduler".
+"""
+
+from __future__ import annotations
+
+import threading
+import weakref
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Any, Callable, Iterator, TypeVar
+
+from akili import config
+from akili.ingest.rate_limit import RateLimiter
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """Scheduling classes; lower values are served first."""
+
+    INTERACTIVE = 0
+    INGEST = 1
+    BULK = 2
+
+
+@dataclass(frozen=True)
+class Work:
+    """The class and tenant a Gemini request is made for."""
+
+    priority: Priority = Priority.BULK
+    tenant: str = "default"
+
+
+_work: ContextVar[Work] = ContextVar("akili_gemini_work", default=Work())
+
+
+def current_work() -> Work:
+    return _work.get()
+
+
+@contextmanager
+def gemini_work(priority: Priority, tenant: str | None = None) -> Iterator[Work]:
+    """Make Gemini requests in the block count as priority work for tenant (default: the
+    enclosing work's tenant)."""
+    work = Work(priority, tenant or current_work().tenant)
+    token = _work.set(work)
+    try:
+        yield work
+    finally:
+        _work.reset(token)
+
+
+def in_current_work(fn: Callable[..., T]) -> Callable[..., T]:
+    """Wrap fn to run under the caller's work, for tasks submitted to a thread pool."""
+    work = current_work()
+
+    def run(*args: Any, **kwargs: Any) -> T:
+        with gemini_work(work.priority, work.tenant):
+            return fn(*args, **kwargs)
+
+    return run
+
+
+class _FairQueue:
+    """Requests waiting for one limiter's budget; one is admitted at a time, by class, then
+    round-robin over the class's tenants, then in arrival order. Only tenants with waiting
+    requests, and the one last served, keep their place in the rotation, so the table does not
+    grow with every user id ever seen; a returning tenant rejoins at the front."""
+
+    def __init__(self) -> None:
+        self._cond = threading.Condition()
+        self._waiting: dict[int, Work] = {}
+        self._busy = False
+        self._seq = 0
+        self._turns = 0
+        self._last_turn: dict[Work, int] = {}
+
+    def _next(self) -> int:
+        return min(
+            self._waiting,
+            key=lambda seq: (
+                self._waiting[seq].priority,
+                self._last_turn.get(self._waiting[seq], 0),
+                seq,
+            ),
+        )
+
+    @contextmanager
+    def turn(self, work: Work) -> Iterator[None]:
+        """Wait until work is the next request to be admitted and hold the turn in the block."""
+        with self._cond:
+            seq = self._seq
+            self._seq += 1
+            self._waiting[seq] = work
+            try:
+                while self._busy or self._next() != seq:
+                    self._cond.wait()
+            finally:
+                del self._waiting[seq]
+                self._cond.notify_all()
+            self._busy = True
+            self._turns += 1
+            self._last_turn[work] = self._turns
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._busy = False
+                waiting = set(self._waiting.values())
+                for idle in [w for w in self._last_turn if w != work and w not in waiting]:
+                    del self._last_turn[idle]
+                self._cond.notify_all()
+
+    def waiting(self) -> list[Work]:
+        with self._cond:
+            return list(self._waiting.values())
+
+
+class GeminiScheduler:
+    """Admits Gemini requests to their limiter by priority class and tenant."""
+
+    def __init__(self, interactive_reserve: float = 0.1):
+        self._reserve = min(1.0, max(0.0, interactive_reserve))
+        self._lock = threading.Lock()
+        self._queues: weakref.WeakKeyDictionary[RateLimiter, _FairQueue] = (
+            weakref.WeakKeyDictionary()
+        )
+        self._admitted = {p: 0 for p in Priority}
+
+    def _queue(self, limiter: RateLimiter) -> _FairQueue:
+        with self._lock:
+            queue = self._queues.get(limiter)
+            if queue is None:
+                queue = self._queues[limiter] = _FairQueue()
+            return queue
+
+    def _count(self, work: Work) -> None:
+        with self._lock:
+            self._admitted[work.priority] += 1
+
+    @contextmanager
+    def admit(
+        self, limiter: RateLimiter, tokens: int = 0, wait: bool = True, work: Work | None = None
+    ) -> Iterator[None]:
+        """
+        Run one request under limiter.admit() for work (default: the current work).
+        Interactive requests, and any with wait False, are charged to the budget without
+        waiting; the others wait for their turn, then for budget beyond the reserve.
+        """
+        work = work or current_work()
+        if not wait or work.priority is Priority.INTERACTIVE:
+            limiter.charge(tokens)
+            self._count(work)
+            with limiter.admit(tokens, wait=False):
+                yield
+            return
+        with ExitStack() as stack:
+            with self._queue(limiter).turn(work):
+                stack.enter_context(limiter.admit(tokens, reserve=self._reserve))
+            self._count(work)
+            yield
+
+    def stats(self) -> dict[str, Any]:
+        """Admitted requests per class and requests waiting per class and tenant."""
+        with self._lock:
+            admitted = {p.name.lower(): n for p, n in self._admitted.items()}
+            queues = list(self._queues.values())
+        waiting: dict[str, dict[str, int]] = {p.name.lower(): {} for p in Priority}
+        for queue in queues:
+            for work in queue.waiting():
+                tenants = waiting[work.priority.name.lower()]
+                tenants[work.tenant] = tenants.get(work.tenant, 0) + 1
+        return {
+            "interactive_reserve": self._reserve,
+            "admitted": admitted,
+            "waiting": waiting,
+        }
+
+
+_scheduler: GeminiScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> GeminiScheduler | None:
+    """Return the process-wide scheduler, or None when AKILI_GEMINI_SCHEDULER_ENABLED is off."""
+    global _scheduler
+    if not config.GEMINI_SCHEDULER_ENABLED:
+        return None
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = GeminiScheduler(config.GEMINI_INTERACTIVE_RESERVE)
+    return _scheduler
@@ -0,0 +1,266 @@
+"""
+Born-digital fast path: extract facts from a page's PDF text layer with PyMuPDF.
+
+Tables found by PyMuPDF table detection become grids (plus a pin-number → name bijection
+for pinout tables and min/typ/max units for spec tables); "Label: 5.5 V" lines outside
+tables become units. Coordinates come straight from the text layer, normalized to 0-1.
+
+The result carries a confidence: the share of numeric words on the page that ended up in
+an emitted fact. The pipeline only trusts pages at or above
+AKILI_TEXT_LAYER_MIN_CONFIDENCE; everything else is rendered and sent to Gemini.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from akili.ingest.extract_schema import (
+    BBoxSchema,
+    BijectionExtract,
+    GridCellExtract,
+    GridExtract,
+    PageExtraction,
+    PointSchema,
+    UnitExtract,
+)
+
+logger = logging.getLogger(__name__)
+
+# Fewer words than this means a scanned page (or an image-only one): no text layer to trust.
+_MIN_WORDS = 10
+
+_NUMBER_RE = re.compile(r"^[-+±]?\d+(?:\.\d+)?")
+_VALUE_RE = re.compile(r"^\s*(?P<value>[-+]?\d+(?:\.\d+)?)\s*(?P<uom>[A-Za-zµμΩ°%][\w/°Ω]*)?\s*$")
+_LABEL_VALUE_RE = re.compile(
+    r"^\s*(?P<label>[A-Za-z][\w .,()/-]{0,80}?)\s*[:=]\s*"
+    r"(?P<value>[-+]?\d+(?:\.\d+)?)\s*(?P<uom>[A-Za-zµμΩ°%][\w/°Ω]*)?\s*$"
+)
+_PIN_HEADER_RE = re.compile(r"^(pin|pin\s*(no\.?|number|#)|no\.?|#)$", re.IGNORECASE)
+_NAME_HEADER_RE = re.compile(r"^(pin\s*)?(name|signal|symbol)$", re.IGNORECASE)
+_LIMIT_HEADERS = {
+    "min": "min",
+    "minimum": "min",
+    "typ": "typ",
+    "typical": "typ",
+    "max": "max",
+    "maximum": "max",
+}
+_UNIT_HEADERS = {"unit", "units"}
+
+
+@dataclass
+class TextLayerResult:
+    """Text-layer extraction for one page and how much of the page it explains (0-1)."""
+
+    extraction: PageExtraction
+    confidence: float
+
+    @property
+    def is_empty(self) -> bool:
+        e = self.extraction
+        return not (e.units or e.bijections or e.grids)
+
+
+class _Normalizer:
+    """Map PDF points to normalized 0-1 page coordinates."""
+
+    def __init__(self, rect: Any):
+        self._x0, self._y0 = rect.x0, rect.y0
+        self._w = max(rect.width, 1e-6)
+        self._h = max(rect.height, 1e-6)
+
+    def _nx(self, x: float) -> float:
+        return min(1.0, max(0.0, (x - self._x0) / self._w))
+
+    def _ny(self, y: float) -> float:
+        return min(1.0, max(0.0, (y - self._y0) / self._h))
+
+    def center(self, bbox: tuple[float, float, float, float]) -> PointSchema:
+        x1, y1, x2, y2 = bbox
+        return PointSchema(x=self._nx((x1 + x2) / 2), y=self._ny((y1 + y2) / 2))
+
+    def top_left(self, bbox: tuple[float, float, float, float]) -> PointSchema:
+        return PointSchema(x=self._nx(bbox[0]), y=self._ny(bbox[1]))
+
+    def bbox(self, bbox: tuple[float, float, float, float]) -> BBoxSchema:
+        x1, y1, x2, y2 = bbox
+        return BBoxSchema(x1=self._nx(x1), y1=self._ny(y1), x2=self._nx(x2), y2=self._ny(y2))
+
+
+def _clean(text: Any) -> str:
+    return " ".join(str(text).split()) if text is not None else ""
+
+
+def _inside(bbox: tuple[float, ...], regions: list[tuple[float, ...]]) -> bool:
+    cx, cy = (bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2
+    return any(r[0] <= cx <= r[2] and r[1] <= cy <= r[3] for r in regions)
+
+
+def _parse_value(text: str) -> tuple[float, str | None] | None:
+    m = _VALUE_RE.match(text)
+    if not m:
+        return None
+    return float(m.group("value")), m.group("uom")
+
+
+def _table_facts(
+    table: Any,
+    index: int,
+    page_prefix: str,
+    norm: _Normalizer,
+    units: list[UnitExtract],
+) -> tuple[GridExtract | None, BijectionExtract | None]:
+    """Convert one detected table into a grid, an optional bijection, and spec units."""
+    data = table.extract()
+    if not data:
+        return None, None
+    ncols = max(len(r) for r in data)
+    cells: list[GridCellExtract] = []
+    cell_boxes: dict[tuple[int, int], tuple[float, float, float, float]] = {}
+    for ri, row in enumerate(data):
+        row_cells = table.rows[ri].cells if ri < len(table.rows) else []
+        for ci, value in enumerate(row):
+            text = _clean(value)
+            if not text:
+                continue
+            box = row_cells[ci] if ci < len(row_cells) else None
+            if box is not None:
+                cell_boxes[(ri, ci)] = box
+            cells.append(
+                GridCellExtract(
+                    row=ri,
+                    col=ci,
+                    value=text,
+                    origin=norm.center(box) if box is not None else None,
+                )
+            )
+    if not cells:
+        return None, None
+    grid = GridExtract(
+        id=f"{page_prefix}tg{index}",
+        rows=len(data),
+        cols=ncols,
+        cells=cells,
+        origin=norm.top_left(table.bbox),
+        bbox=norm.bbox(table.bbox),
+    )
+
+    header = [_clean(h).lower() for h in data[0]]
+    body = data[1:]
+
+    # Spec tables: one unit per numeric min/typ/max cell, labelled by the row's first column.
+    limit_cols = {ci: _LIMIT_HEADERS[h] for ci, h in enumerate(header) if h in _LIMIT_HEADERS}
+    unit_col = next((ci for ci, h in enumerate(header) if h in _UNIT_HEADERS), None)
+    if limit_cols:
+        for ri, row in enumerate(body, start=1):
+            param = _clean(row[0]) if row else ""
+            if not param:
+                continue
+            row_uom = _clean(row[unit_col]) if unit_col is not None and unit_col < len(row) else ""
+            for ci, kind in limit_cols.items():
+                parsed = _parse_value(_clean(row[ci])) if ci < len(row) else None
+                box = cell_boxes.get((ri, ci))
+                if parsed is None or box is None:
+                    continue
+                value, uom = parsed
+                units.append(
+                    UnitExtract(
+                        id=f"{page_prefix}tu{len(units)}",
+                        label=f"{param} {kind}",
+                        value=value,
+                        unit_of_measure=row_uom or uom,
+                        context=f"{param} ({kind})",
+                        origin=norm.center(box),
+                        bbox=norm.bbox(box),
+                    )
+                )
+
+    # Pinout tables: pin number column ↔ pin name column, kept only if strictly 1:1.
+    bijection = None
+    pin_col = next((ci for ci, h in enumerate(header) if _PIN_HEADER_RE.match(h)), None)
+    name_col = next((ci for ci, h in enumerate(header) if _NAME_HEADER_RE.match(h)), None)
+    if pin_col is not None and name_col is not None and pin_col != name_col:
+        pairs = [
+            (_clean(r[pin_col]), _clean(r[name_col]))
+            for r in body
+            if max(pin_col, name_col) < len(r)
+        ]
+        pairs = [(p, n) for p, n in pairs if p and n]
+        lefts = [p for p, _ in pairs]
+        rights = [n for _, n in pairs]
+        if len(pairs) >= 2 and len(set(lefts)) == len(lefts) and len(set(rights)) == len(rights):
+            bijection = BijectionExtract(
+                id=f"{page_prefix}tb{index}",
+                left_set=lefts,
+                right_set=rights,
+                mapping=dict(pairs),
+                origin=norm.top_left(table.bbox),
+                bbox=norm.bbox(table.bbox),
+            )
+    return grid, bijection
+
+
+def extract_text_layer(page: Any, page_index: int) -> TextLayerResult | None:
+    """
+    Extract facts from a PyMuPDF page's text layer.
+
+    Returns None when the page has no usable text layer (scanned, rotated, or detection
+    failed), so the caller falls back to rendering it for Gemini.
+    """
+    if page.rotation:
+        return None
+    words = page.get_text("words")
+    if len(words) < _MIN_WORDS:
+        return None
+
+    norm = _Normalizer(page.rect)
+    page_prefix = f"p{page_index}_"
+    extraction = PageExtraction()
+    covered: list[tuple[float, ...]] = []
+
+    try:
+        tables = page.find_tables().tables
+    except Exception as e:
+        logger.debug("Table detection failed on page %d: %s", page_index, e)
+        return None
+    for ti, table in enumerate(tables):
+        grid, bijection = _table_facts(table, ti, page_prefix, norm, extraction.units)
+        if grid is not None:
+            extraction.grids.append(grid)
+            covered.append(tuple(table.bbox))
+        if bijection is not None:
+            extraction.bijections.append(bijection)
+
+    for block in page.get_text("dict").get("blocks", []):
+        for line in block.get("lines", []):
+            bbox = tuple(line["bbox"])
+            if _inside(bbox, covered):
+                continue
+            text = _clean("".join(span.get("text", "") for span in line.get("spans", [])))
+            m = _LABEL_VALUE_RE.match(text)
+            if not m:
+                continue
+            label = m.group("label").strip()
+            extraction.units.append(
+                UnitExtract(
+                    id=f"{page_prefix}tu{len(extraction.units)}",
+                    label=label,
+                    value=float(m.group("value")),
+                    unit_of_measure=m.group("uom"),
+                    context=label,
+                    origin=norm.center(bbox),
+                    bbox=norm.bbox(bbox),
+                )
+            )
+            covered.append(bbox)
+
+    numeric = [w[:4] for w in words if _NUMBER_RE.match(w[4])]
+    if extraction.units or extraction.grids or extraction.bijections:
+        explained = sum(1 for w in numeric if _inside(w, covered))
+        confidence = explained / len(numeric) if numeric else 1.0
+    else:
+        confidence = 0.0
+    return TextLayerResult(extraction=extraction, confidence=round(confidence, 4))
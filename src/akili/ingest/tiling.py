@@ -0,0 +1,329 @@
+"""
+Tiled extraction for dense pages: overlapping tiles rendered at higher DPI, extracted in
+parallel and merged back into one page extraction.
+
+Large pin tables and full-page electrical characteristics lose detail at 150 dpi and produce
+huge single responses. With AKILI_TILED_EXTRACTION_ENABLED, pages of a type listed in
+AKILI_TILE_PAGE_TYPES (known before rendering, see pdf_loader) are also rendered as
+AKILI_TILE_ROWS x AKILI_TILE_COLS overlapping tiles at AKILI_TILE_DPI. Each tile is extracted
+on its own, its tile-local coordinates are rescaled into page-normalized space
+(to_page_coords), and merge_tiles removes what the overlap zones produced twice:
+- units with the same label/value/unit at (nearly) the same place keep the copy nearest its
+  tile's center;
+- bijections from different tiles that agree on their shared keys are unioned;
+- grids with the same column count whose rows overlap are stitched into one grid.
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import fitz  # PyMuPDF
+
+from akili.ingest.extract_schema import (
+    BBoxSchema,
+    BijectionExtract,
+    GridCellExtract,
+    GridExtract,
+    PageExtraction,
+    PointSchema,
+    UnitExtract,
+)
+from akili.ingest.scheduler import in_current_work
+
+logger = logging.getLogger(__name__)
+
+# Page-normalized distance under which two equal units from different tiles are one unit.
+_DUPLICATE_DISTANCE = 0.03
+
+
+@dataclass(frozen=True)
+class PageRegion:
+    """A rectangle of a page in page-normalized coordinates (0..1, origin top-left)."""
+
+    x0: float = 0.0
+    y0: float = 0.0
+    x1: float = 1.0
+    y1: float = 1.0
+
+    def to_page(self, x: float, y: float) -> tuple[float, float]:
+        """Map region-normalized (x, y) to page-normalized coordinates."""
+        return self.x0 + x * (self.x1 - self.x0), self.y0 + y * (self.y1 - self.y0)
+
+    def clip(self, rect: Any) -> fitz.Rect:
+        """This region as an absolute clip rectangle of a page rect."""
+        return fitz.Rect(
+            rect.x0 + self.x0 * rect.width,
+            rect.y0 + self.y0 * rect.height,
+            rect.x0 + self.x1 * rect.width,
+            rect.y0 + self.y1 * rect.height,
+        )
+
+    def contains(self, point: PointSchema) -> bool:
+        return self.x0 <= point.x <= self.x1 and self.y0 <= point.y <= self.y1
+
+    @property
+    def center(self) -> tuple[float, float]:
+        return (self.x0 + self.x1) / 2, (self.y0 + self.y1) / 2
+
+    def describe(self) -> str:
+        return f"x {self.x0:.2f}-{self.x1:.2f}, y {self.y0:.2f}-{self.y1:.2f}"
+
+
+def tile_regions(rows: int, cols: int, overlap: float) -> list[PageRegion]:
+    """rows x cols tiles (row-major) covering the page, each grown by overlap/2 per side."""
+    rows, cols = max(1, rows), max(1, cols)
+    half = max(0.0, overlap) / 2
+    regions = []
+    for r in range(rows):
+        for c in range(cols):
+            regions.append(
+                PageRegion(
+                    x0=max(0.0, c / cols - half) if c else 0.0,
+                    y0=max(0.0, r / rows - half) if r else 0.0,
+                    x1=min(1.0, (c + 1) / cols + half) if c < cols - 1 else 1.0,
+                    y1=min(1.0, (r + 1) / rows + half) if r < rows - 1 else 1.0,
+                )
+            )
+    return regions
+
+
+def tile_hint(region: PageRegion) -> str:
+    """Prompt note for a tile image (appended to the page-type hint)."""
+    return (
+        f"This image is a zoomed TILE of the page covering {region.describe()} of the page "
+        "(normalized). Give all coordinates relative to this tile image. Rows or values cut "
+        "off at the tile edge may be skipped; they are covered by the neighbouring tile."
+    )
+
+
+def _point(point: PointSchema, region: PageRegion) -> PointSchema:
+    x, y = region.to_page(point.x, point.y)
+    return PointSchema(x=x, y=y)
+
+
+def _bbox(bbox: BBoxSchema | None, region: PageRegion) -> BBoxSchema | None:
+    if bbox is None:
+        return None
+    x1, y1 = region.to_page(bbox.x1, bbox.y1)
+    x2, y2 = region.to_page(bbox.x2, bbox.y2)
+    return BBoxSchema(x1=x1, y1=y1, x2=x2, y2=y2)
+
+
+def to_page_coords(
+    extraction: PageExtraction, region: PageRegion, suffix: str = ""
+) -> PageExtraction:
+    """Rescale a region-local extraction into page coordinates; suffix is appended to ids."""
+    return PageExtraction(
+        units=[
+            u.model_copy(
+                update={
+                    "id": u.id + suffix,
+                    "origin": _point(u.origin, region),
+                    "bbox": _bbox(u.bbox, region),
+                }
+            )
+            for u in extraction.units
+        ],
+        bijections=[
+            b.model_copy(
+                update={
+                    "id": b.id + suffix,
+                    "origin": _point(b.origin, region),
+                    "bbox": _bbox(b.bbox, region),
+                }
+            )
+            for b in extraction.bijections
+        ],
+        grids=[
+            g.model_copy(
+                update={
+                    "id": g.id + suffix,
+                    "origin": _point(g.origin, region),
+                    "bbox": _bbox(g.bbox, region),
+                    "cells": [
+                        c.model_copy(
+                            update={"origin": _point(c.origin, region) if c.origin else None}
+                        )
+                        for c in g.cells
+                    ],
+                }
+            )
+            for g in extraction.grids
+        ],
+    )
+
+
+def within_region(extraction: PageExtraction, region: PageRegion) -> PageExtraction:
+    """The units and grid cells of a page extraction that lie in region (by origin; cells
+    without one go by their grid's), still in page coordinates. Used to cross-check a tile
+    against the part of the page's text layer it covers."""
+    grids = []
+    for grid in extraction.grids:
+        cells = [c for c in grid.cells if region.contains(c.origin or grid.origin)]
+        if cells:
+            grids.append(grid.model_copy(update={"cells": cells}))
+    return PageExtraction(
+        units=[u for u in extraction.units if region.contains(u.origin)],
+        grids=grids,
+    )
+
+
+def _unit_key(unit: UnitExtract) -> tuple[str, str, str]:
+    def norm(v: object) -> str:
+        return " ".join(str(v).lower().split()) if v is not None else ""
+
+    return norm(unit.label), norm(unit.value), norm(unit.unit_of_measure)
+
+
+def _dedupe_units(tiled: list[tuple[PageRegion, PageExtraction]]) -> list[UnitExtract]:
+    kept: list[tuple[UnitExtract, float, int]] = []  # (unit, distance to tile center, tile)
+    for tile, (region, extraction) in enumerate(tiled):
+        cx, cy = region.center
+        for unit in extraction.units:
+            centrality = abs(unit.origin.x - cx) + abs(unit.origin.y - cy)
+            for i, (other, other_centrality, other_tile) in enumerate(kept):
+                if (
+                    other_tile != tile
+                    and _unit_key(other) == _unit_key(unit)
+                    and abs(other.origin.x - unit.origin.x) <= _DUPLICATE_DISTANCE
+                    and abs(other.origin.y - unit.origin.y) <= _DUPLICATE_DISTANCE
+                ):
+                    if centrality < other_centrality:
+                        kept[i] = (unit, centrality, tile)
+                    break
+            else:
+                kept.append((unit, centrality, tile))
+    return [unit for unit, _, _ in kept]
+
+
+def _union_bbox(a: BBoxSchema | None, b: BBoxSchema | None) -> BBoxSchema | None:
+    if a is None or b is None:
+        return a or b
+    return BBoxSchema(
+        x1=min(a.x1, b.x1), y1=min(a.y1, b.y1), x2=max(a.x2, b.x2), y2=max(a.y2, b.y2)
+    )
+
+
+def _merge_bijections(tiled: list[tuple[PageRegion, PageExtraction]]) -> list[BijectionExtract]:
+    merged: list[tuple[BijectionExtract, set[int]]] = []
+    for tile, (_, extraction) in enumerate(tiled):
+        for bijection in extraction.bijections:
+            for i, (other, tiles) in enumerate(merged):
+                shared = bijection.mapping.keys() & other.mapping.keys()
+                if tile in tiles or not shared:
+                    continue
+                if any(bijection.mapping[k] != other.mapping[k] for k in shared):
+                    continue
+                mapping = {**other.mapping, **bijection.mapping}
+                merged[i] = (
+                    other.model_copy(
+                        update={
+                            "mapping": mapping,
+                            "left_set": list(mapping),
+                            "right_set": list(mapping.values()),
+                            "bbox": _union_bbox(other.bbox, bijection.bbox),
+                        }
+                    ),
+                    tiles | {tile},
+                )
+                break
+            else:
+                merged.append((bijection, {tile}))
+    return [bijection for bijection, _ in merged]
+
+
+def _grid_rows(grid: GridExtract) -> list[tuple[str, ...]]:
+    rows: list[list[str]] = [[""] * grid.cols for _ in range(grid.rows)]
+    for cell in grid.cells:
+        if cell.row < grid.rows and cell.col < grid.cols:
+            rows[cell.row][cell.col] = " ".join(str(cell.value).split())
+    return [tuple(row) for row in rows]
+
+
+def _stitch(upper: GridExtract, lower: GridExtract) -> GridExtract | None:
+    """Append lower's rows after upper's, dropping rows both fragments contain; None if the
+    fragments do not overlap (or lower does not continue upper)."""
+    if upper.cols != lower.cols or not upper.rows or not lower.rows:
+        return None
+    top, bottom = _grid_rows(upper), _grid_rows(lower)
+    skip = 1 if bottom[0] == top[0] else 0  # repeated header row
+    for k in range(min(len(top), len(bottom) - skip), 0, -1):
+        if top[-k:] == bottom[skip : skip + k]:
+            start = skip + k
+            break
+    else:
+        return None
+    offset = upper.rows - start
+    cells = list(upper.cells) + [
+        GridCellExtract(row=c.row + offset, col=c.col, value=c.value, origin=c.origin)
+        for c in lower.cells
+        if c.row >= start
+    ]
+    return upper.model_copy(
+        update={
+            "rows": upper.rows + lower.rows - start,
+            "cells": cells,
+            "bbox": _union_bbox(upper.bbox, lower.bbox),
+        }
+    )
+
+
+def _merge_grids(tiled: list[tuple[PageRegion, PageExtraction]]) -> list[GridExtract]:
+    fragments = sorted(
+        ((tile, grid) for tile, (_, extraction) in enumerate(tiled) for grid in extraction.grids),
+        key=lambda item: item[1].origin.y,
+    )
+    merged: list[tuple[GridExtract, int]] = []
+    for tile, grid in fragments:
+        for i, (other, other_tile) in enumerate(merged):
+            if other_tile == tile:
+                continue
+            stitched = _stitch(other, grid)
+            if stitched is not None:
+                merged[i] = (stitched, tile)
+                break
+        else:
+            merged.append((grid, tile))
+    return [grid for grid, _ in merged]
+
+
+def merge_tiles(tiled: list[tuple[PageRegion, PageExtraction]]) -> PageExtraction:
+    """Merge page-coordinate tile extractions (see to_page_coords), removing overlap duplicates."""
+    return PageExtraction(
+        units=_dedupe_units(tiled),
+        bijections=_merge_bijections(tiled),
+        grids=_merge_grids(tiled),
+    )
+
+
+def extract_tiles(
+    tiles: list[tuple[PageRegion, bytes]],
+    extract: Callable[[PageRegion, bytes], tuple[PageExtraction, float]],
+) -> tuple[PageExtraction, float]:
+    """
+    Extract tiles in parallel with extract(region, image) -> (extraction, agreement).
+
+    Returns the merged page extraction and the lowest tile agreement. A failed tile fails
+    the page (a partial table would otherwise look complete).
+    """
+    with ThreadPoolExecutor(max_workers=len(tiles), thread_name_prefix="akili-tile") as pool:
+        task = in_current_work(extract)
+        futures = [pool.submit(task, region, image) for region, image in tiles]
+        results = [future.result() for future in futures]
+    tiled = [
+        (region, to_page_coords(extraction, region, suffix=f"_t{i}"))
+        for i, ((region, _), (extraction, _)) in enumerate(zip(tiles, results))
+    ]
+    merged = merge_tiles(tiled)
+    logger.debug(
+        "Merged %d tile(s): %d unit(s), %d bijection(s), %d grid(s)",
+        len(tiles),
+        len(merged.units),
+        len(merged.bijections),
+        len(merged.grids),
+    )
+    return merged, min(agreement for _, agreement in results)
@@ -32,6 +32,7 @@ class BaseStore(ABC):
         ranges: list[Range] | None = None,
         conditional_units: list[ConditionalUnit] | None = None,
         uploaded_by: str | None = None,
+        replace: bool = False,
     ) -> None: ...
 
     @abstractmethod
@@ -54,6 +55,9 @@ class BaseStore(ABC):
         self, doc_id: str
     ) -> list[Unit | Bijection | Grid | Range | ConditionalUnit]: ...
 
+    @abstractmethod
+    def clear_canonical(self, doc_id: str) -> None: ...
+
     @abstractmethod
     def delete_document(self, doc_id: str) -> None: ...
 
@@ -0,0 +1,176 @@
+"""
+Content-addressed PDF storage: one file per unique datasheet, shared by every document.
+
+Uploads used to be stored as docs/{doc_id}.pdf, so the same datasheet uploaded by ten users
+was kept ten times. With AKILI_BLOB_STORE_ENABLED the upload is stored once as
+docs/blobs/{sha256[:2]}/{sha256}.pdf; a pdf_blobs row counts the documents that reference
+each blob and document_blobs maps doc_id -> sha256. Deleting a document releases its
+reference and the blob file is removed with the last one.
+
+Several API instances may share the tables (DATABASE_URL), so the refcount change and the
+file move or unlink happen in one transaction that holds the blob's row lock: a put waiting
+on a release that drops the last reference sees the row gone and stores the file again,
+and a release waiting on a put sees the new reference and keeps the file.
+
+Documents stored before the blob store (or with it disabled) keep their docs/{doc_id}.pdf
+file; path_for returns None for them and callers fall back to the per-document path.
+
+Supports both SQLite (local dev) and PostgreSQL (production via DATABASE_URL).
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+
+from akili.store.connection import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+
+class BlobStore:
+    """Reference-counted, content-addressed PDF files under root. Supports SQLite and PostgreSQL."""
+
+    def __init__(
+        self,
+        root: Path | str,
+        db_path: Path | str = "akili.db",
+        db_url: str | None = None,
+        conn_manager: ConnectionManager | None = None,
+    ):
+        self.root = Path(root)
+        if conn_manager is not None:
+            self._mgr = conn_manager
+        else:
+            self._mgr = ConnectionManager(db_url=db_url, db_path=db_path)
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            if self._mgr.is_postgres:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS pdf_blobs (
+                        sha256 TEXT PRIMARY KEY,
+                        size_bytes BIGINT NOT NULL DEFAULT 0,
+                        refcount INTEGER NOT NULL DEFAULT 0,
+                        created_at TIMESTAMPTZ DEFAULT NOW()
+                    )
+                """)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS document_blobs (
+                        doc_id TEXT PRIMARY KEY,
+                        sha256 TEXT NOT NULL
+                    )
+                """)
+            else:
+                cur.executescript("""
+                    CREATE TABLE IF NOT EXISTS pdf_blobs (
+                        sha256 TEXT PRIMARY KEY,
+                        size_bytes INTEGER NOT NULL DEFAULT 0,
+                        refcount INTEGER NOT NULL DEFAULT 0,
+                        created_at TEXT DEFAULT (datetime('now'))
+                    );
+                    CREATE TABLE IF NOT EXISTS document_blobs (
+                        doc_id TEXT PRIMARY KEY,
+                        sha256 TEXT NOT NULL
+                    );
+                """)
+
+    def blob_path(self, sha256: str) -> Path:
+        return self.root / sha256[:2] / f"{sha256}.pdf"
+
+    def put(self, doc_id: str, src: Path, sha256: str) -> Path:
+        """
+        Store the file at src (consumed: moved into place, or deleted when the content is
+        already stored) as doc_id's PDF and return the blob path.
+        """
+        sha256 = sha256.lower()
+        dest = self.blob_path(sha256)
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT sha256 FROM document_blobs WHERE doc_id = {ph}", (doc_id,))
+            if cur.fetchone() is not None:
+                raise ValueError(f"Document {doc_id} already has a stored PDF")
+            # The upsert takes the blob's row lock until commit, so the file cannot be
+            # unlinked by a concurrent release between the check below and the commit.
+            cur.execute(
+                f"""INSERT INTO pdf_blobs (sha256, size_bytes, refcount)
+                    VALUES ({ph}, {ph}, 1)
+                    ON CONFLICT (sha256) DO UPDATE SET
+                        refcount = pdf_blobs.refcount + 1""",
+                (sha256, Path(src).stat().st_size),
+            )
+            cur.execute(
+                f"INSERT INTO document_blobs (doc_id, sha256) VALUES ({ph}, {ph})",
+                (doc_id, sha256),
+            )
+            if dest.is_file():
+                Path(src).unlink(missing_ok=True)
+            else:
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(src, dest)
+        return dest
+
+    def sha256_for(self, doc_id: str) -> str | None:
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT sha256 FROM document_blobs WHERE doc_id = {ph}", (doc_id,))
+            row = cur.fetchone()
+        return row[0] if row else None
+
+    def path_for(self, doc_id: str) -> Path | None:
+        """The blob holding doc_id's PDF; None when the document has no blob."""
+        sha256 = self.sha256_for(doc_id)
+        return self.blob_path(sha256) if sha256 else None
+
+    def refcount(self, sha256: str) -> int:
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT refcount FROM pdf_blobs WHERE sha256 = {ph}", (sha256.lower(),))
+            row = cur.fetchone()
+        return row[0] if row else 0
+
+    def release(self, doc_id: str) -> bool:
+        """Drop doc_id's reference; the blob file is deleted with its last reference.
+        Returns False when the document had no blob."""
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"DELETE FROM document_blobs WHERE doc_id = {ph} RETURNING sha256", (doc_id,)
+            )
+            row = cur.fetchone()
+            if row is None:
+                return False
+            sha256 = row[0]
+            # Holds the blob's row lock until commit; the file goes while it is held.
+            cur.execute(
+                f"UPDATE pdf_blobs SET refcount = refcount - 1 WHERE sha256 = {ph} "
+                "RETURNING refcount",
+                (sha256,),
+            )
+            row = cur.fetchone()
+            if row is not None and row[0] > 0:
+                return True
+            cur.execute(f"DELETE FROM pdf_blobs WHERE sha256 = {ph}", (sha256,))
+            try:
+                self.blob_path(sha256).unlink(missing_ok=True)
+            except OSError:
+                logger.warning("Failed to delete unreferenced PDF blob %s", sha256)
+        return True
+
+    def stats(self) -> dict[str, int]:
+        """Unique blobs, document references and bytes stored."""
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "SELECT COUNT(*), COALESCE(SUM(refcount), 0), COALESCE(SUM(size_bytes), 0) "
+                "FROM pdf_blobs"
+            )
+            blobs, references, size = cur.fetchone()
+        return {"blobs": blobs, "references": references, "bytes": size}
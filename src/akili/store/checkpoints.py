@@ -0,0 +1,226 @@
+"""
+Ingest checkpoints: per-page canonical output persisted as soon as each page finishes.
+
+A run row records the document's filename, page count, owner and status; page rows hold
+either the page's canonical objects (status "done") or the error that failed it
+(status "failed"). ingest_document skips pages that are already "done", so a crashed or
+rate-limited ingest resumes where it stopped and POST /documents/{doc_id}/retry only
+re-extracts the missing pages.
+
+Supports both SQLite (local dev) and PostgreSQL (production via DATABASE_URL).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+from akili.canonical import Bijection, Grid, Unit
+from akili.store.connection import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+_TYPES: dict[str, type[Unit] | type[Bijection] | type[Grid]] = {
+    "unit": Unit,
+    "bijection": Bijection,
+    "grid": Grid,
+}
+
+
+def _serialize(objects: list[Unit | Bijection | Grid]) -> str:
+    out = []
+    for obj in objects:
+        kind = next(k for k, cls in _TYPES.items() if isinstance(obj, cls))
+        out.append({"type": kind, "data": obj.model_dump(mode="json")})
+    return json.dumps(out)
+
+
+def _deserialize(payload: str) -> list[Unit | Bijection | Grid]:
+    return [_TYPES[item["type"]].model_validate(item["data"]) for item in json.loads(payload)]
+
+
+class CheckpointStore:
+    """Per-page ingest checkpoints. Supports SQLite and PostgreSQL."""
+
+    def __init__(
+        self,
+        db_path: Path | str = "akili.db",
+        db_url: str | None = None,
+        conn_manager: ConnectionManager | None = None,
+    ):
+        if conn_manager is not None:
+            self._mgr = conn_manager
+        else:
+            self._mgr = ConnectionManager(db_url=db_url, db_path=db_path)
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            if self._mgr.is_postgres:
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS ingest_runs (
+                        doc_id TEXT PRIMARY KEY,
+                        filename TEXT,
+                        total_pages INTEGER NOT NULL DEFAULT 0,
+                        uploaded_by TEXT,
+                        status TEXT NOT NULL DEFAULT 'running',
+                        updated_at TIMESTAMPTZ DEFAULT NOW()
+                    )
+                """)
+                cur.execute("""
+                    CREATE TABLE IF NOT EXISTS ingest_pages (
+                        doc_id TEXT NOT NULL,
+                        page_index INTEGER NOT NULL,
+                        status TEXT NOT NULL,
+                        canonical_json TEXT,
+                        error TEXT,
+                        updated_at TIMESTAMPTZ DEFAULT NOW(),
+                        PRIMARY KEY (doc_id, page_index)
+                    )
+                """)
+            else:
+                cur.executescript("""
+                    CREATE TABLE IF NOT EXISTS ingest_runs (
+                        doc_id TEXT PRIMARY KEY,
+                        filename TEXT,
+                        total_pages INTEGER NOT NULL DEFAULT 0,
+                        uploaded_by TEXT,
+                        status TEXT NOT NULL DEFAULT 'running',
+                        updated_at TEXT DEFAULT (datetime('now'))
+                    );
+                    CREATE TABLE IF NOT EXISTS ingest_pages (
+                        doc_id TEXT NOT NULL,
+                        page_index INTEGER NOT NULL,
+                        status TEXT NOT NULL,
+                        canonical_json TEXT,
+                        error TEXT,
+                        updated_at TEXT DEFAULT (datetime('now')),
+                        PRIMARY KEY (doc_id, page_index)
+                    );
+                """)
+
+    def start_run(
+        self,
+        doc_id: str,
+        filename: str | None,
+        total_pages: int,
+        uploaded_by: str | None = None,
+    ) -> None:
+        """Create or reopen a run; existing page checkpoints are kept."""
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"""INSERT INTO ingest_runs (doc_id, filename, total_pages, uploaded_by, status)
+                    VALUES ({ph}, {ph}, {ph}, {ph}, 'running')
+                    ON CONFLICT (doc_id) DO UPDATE SET
+                        filename = excluded.filename,
+                        total_pages = excluded.total_pages,
+                        uploaded_by = COALESCE(ingest_runs.uploaded_by, excluded.uploaded_by),
+                        status = 'running'""",
+                (doc_id, filename or "", total_pages, uploaded_by),
+            )
+
+    def save_page(
+        self, doc_id: str, page_index: int, objects: list[Unit | Bijection | Grid]
+    ) -> None:
+        """Checkpoint a finished page's canonical objects."""
+        self._upsert_page(doc_id, page_index, "done", _serialize(objects), None)
+
+    def mark_failed(self, doc_id: str, page_index: int, error: str) -> None:
+        """Record a page that failed extraction so it can be retried."""
+        self._upsert_page(doc_id, page_index, "failed", None, error[:2000])
+
+    def _upsert_page(
+        self,
+        doc_id: str,
+        page_index: int,
+        status: str,
+        canonical_json: str | None,
+        error: str | None,
+    ) -> None:
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"""INSERT INTO ingest_pages (doc_id, page_index, status, canonical_json, error)
+                    VALUES ({ph}, {ph}, {ph}, {ph}, {ph})
+                    ON CONFLICT (doc_id, page_index) DO UPDATE SET
+                        status = excluded.status,
+                        canonical_json = excluded.canonical_json,
+                        error = excluded.error""",
+                (doc_id, page_index, status, canonical_json, error),
+            )
+
+    def completed_pages(self, doc_id: str) -> dict[int, list[Unit | Bijection | Grid]]:
+        """Return {page_index: canonical objects} for every checkpointed page."""
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT page_index, canonical_json FROM ingest_pages "
+                f"WHERE doc_id = {ph} AND status = 'done' ORDER BY page_index",
+                (doc_id,),
+            )
+            rows = cur.fetchall()
+        return {r[0]: _deserialize(r[1]) for r in rows}
+
+    def failed_pages(self, doc_id: str) -> list[int]:
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT page_index FROM ingest_pages "
+                f"WHERE doc_id = {ph} AND status = 'failed' ORDER BY page_index",
+                (doc_id,),
+            )
+            return [r[0] for r in cur.fetchall()]
+
+    def finish_run(self, doc_id: str, status: str) -> None:
+        """Set the run status: 'complete' (every page done) or 'partial' (some failed)."""
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"UPDATE ingest_runs SET status = {ph} WHERE doc_id = {ph}",
+                (status, doc_id),
+            )
+
+    def get_run(self, doc_id: str) -> dict[str, Any] | None:
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT doc_id, filename, total_pages, uploaded_by, status "
+                f"FROM ingest_runs WHERE doc_id = {ph}",
+                (doc_id,),
+            )
+            row = cur.fetchone()
+        if row is None:
+            return None
+        return {
+            "doc_id": row[0],
+            "filename": row[1],
+            "total_pages": row[2],
+            "uploaded_by": row[3],
+            "status": row[4],
+        }
+
+    def list_runs(self, status: str) -> list[dict[str, Any]]:
+        """List runs with the given status (e.g. 'running' runs left behind by a crash)."""
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT doc_id FROM ingest_runs WHERE status = {ph}", (status,))
+            doc_ids = [r[0] for r in cur.fetchall()]
+        return [run for d in doc_ids if (run := self.get_run(d)) is not None]
+
+    def delete_run(self, doc_id: str) -> None:
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"DELETE FROM ingest_pages WHERE doc_id = {ph}", (doc_id,))
+            cur.execute(f"DELETE FROM ingest_runs WHERE doc_id = {ph}", (doc_id,))
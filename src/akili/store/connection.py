@@ -75,8 +75,12 @@ class ConnectionManager:
         else:
             with self._sqlite_lock:
                 assert self._sqlite_conn is not None
-                yield self._sqlite_conn
-                self._sqlite_conn.commit()
+                try:
+                    yield self._sqlite_conn
+                    self._sqlite_conn.commit()
+                except Exception:
+                    self._sqlite_conn.rollback()
+                    raise
 
     def close(self) -> None:
         """Close all connections."""
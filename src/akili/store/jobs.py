@@ -0,0 +1,231 @@
+"""
+Ingest job records: one row per upload accepted by the background job queue.
+
+Status moves queued → running → done | failed. An unfinished job is leased by the API
+instance holding it (owner plus a heartbeat_at its job manager keeps refreshing); once the
+lease expires, e.g. because that instance stopped, any instance may claim and resume the job
+(see ingest/jobs.py).
+
+Supports both SQLite (local dev) and PostgreSQL (production via DATABASE_URL).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any
+
+from akili.store.connection import ConnectionManager
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = (
+    "job_id, doc_id, filename, user_id, status, result_json, error, "
+    "created_at, started_at, finished_at, content_hash, retry"
+)
+
+
+class JobStore:
+    """Persistent ingest job records. Supports SQLite and PostgreSQL."""
+
+    def __init__(
+        self,
+        db_path: Path | str = "akili.db",
+        db_url: str | None = None,
+        conn_manager: ConnectionManager | None = None,
+    ):
+        if conn_manager is not None:
+            self._mgr = conn_manager
+        else:
+            self._mgr = ConnectionManager(db_url=db_url, db_path=db_path)
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        real = "DOUBLE PRECISION" if self._mgr.is_postgres else "REAL"
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS ingest_jobs (
+                    job_id TEXT PRIMARY KEY,
+                    doc_id TEXT NOT NULL,
+                    filename TEXT,
+                    user_id TEXT,
+                    status TEXT NOT NULL,
+                    result_json TEXT,
+                    error TEXT,
+                    created_at {real} NOT NULL,
+                    started_at {real},
+                    finished_at {real}
+                )
+            """)
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status ON ingest_jobs(status)")
+            # Migration: add the lease and resubmission columns to existing ingest_jobs tables
+            for column in (
+                "owner TEXT",
+                f"heartbeat_at {real}",
+                "content_hash TEXT",
+                "retry INTEGER NOT NULL DEFAULT 0",
+            ):
+                if self._mgr.is_postgres:
+                    cur.execute(f"ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS {column}")
+                    continue
+                try:
+                    cur.execute(f"ALTER TABLE ingest_jobs ADD COLUMN {column}")
+                except sqlite3.OperationalError:
+                    pass  # column already exists
+
+    def create(
+        self,
+        job_id: str,
+        doc_id: str,
+        filename: str | None,
+        user_id: str | None,
+        owner: str | None = None,
+        content_hash: str | None = None,
+        retry: bool = False,
+    ) -> None:
+        """Record a queued job. content_hash and retry are kept so a recovered job is
+        resubmitted exactly as it was admitted."""
+        ph = self._mgr.placeholder()
+        now = time.time()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO ingest_jobs (job_id, doc_id, filename, user_id, status, "
+                "created_at, owner, heartbeat_at, content_hash, retry) "
+                f"VALUES ({ph}, {ph}, {ph}, {ph}, 'queued', {ph}, {ph}, {ph}, {ph}, {ph})",
+                (
+                    job_id,
+                    doc_id,
+                    filename or "",
+                    user_id,
+                    now,
+                    owner,
+                    now if owner else None,
+                    content_hash,
+                    int(retry),
+                ),
+            )
+
+    def _update(self, job_id: str, assignments: str, params: tuple) -> None:
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"UPDATE ingest_jobs SET {assignments} WHERE job_id = {ph}", (*params, job_id)
+            )
+
+    def mark_queued(self, job_id: str) -> None:
+        self._update(job_id, "status = 'queued', started_at = NULL", ())
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Take the lease on an unfinished job whose lease is free or has expired. Atomic, so
+        of several instances recovering the same job exactly one gets True."""
+        ph = self._mgr.placeholder()
+        now = time.time()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"UPDATE ingest_jobs SET owner = {ph}, heartbeat_at = {ph} "
+                f"WHERE job_id = {ph} AND status IN ('queued', 'running') "
+                f"AND (owner IS NULL OR heartbeat_at IS NULL OR heartbeat_at < {ph})",
+                (owner, now, job_id, now - lease_seconds),
+            )
+            return cur.rowcount == 1
+
+    def heartbeat(self, owner: str) -> None:
+        """Renew the lease on every unfinished job owner holds."""
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"UPDATE ingest_jobs SET heartbeat_at = {ph} "
+                f"WHERE owner = {ph} AND status IN ('queued', 'running')",
+                (time.time(), owner),
+            )
+
+    def release(self, owner: str, job_ids: list[str]) -> None:
+        """Give up owner's lease on job_ids so the next instance to look resumes them."""
+        if not job_ids:
+            return
+        ph = self._mgr.placeholder()
+        marks = ", ".join([ph] * len(job_ids))
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"UPDATE ingest_jobs SET owner = NULL, heartbeat_at = NULL "
+                f"WHERE owner = {ph} AND job_id IN ({marks})",
+                (owner, *job_ids),
+            )
+
+    def mark_running(self, job_id: str) -> None:
+        ph = self._mgr.placeholder()
+        self._update(job_id, f"status = 'running', started_at = {ph}", (time.time(),))
+
+    def mark_done(self, job_id: str, result: dict[str, Any]) -> None:
+        ph = self._mgr.placeholder()
+        self._update(
+            job_id,
+            f"status = 'done', result_json = {ph}, finished_at = {ph}",
+            (json.dumps(result, default=str), time.time()),
+        )
+
+    def mark_failed(self, job_id: str, error: str) -> None:
+        ph = self._mgr.placeholder()
+        self._update(
+            job_id,
+            f"status = 'failed', error = {ph}, finished_at = {ph}",
+            (error[:2000], time.time()),
+        )
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(f"SELECT {_COLUMNS} FROM ingest_jobs WHERE job_id = {ph}", (job_id,))
+            row = cur.fetchone()
+        return self._row_to_dict(row) if row else None
+
+    def list_unfinished(self) -> list[dict[str, Any]]:
+        """Jobs left queued or running (oldest first), e.g. after a restart."""
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT {_COLUMNS} FROM ingest_jobs "
+                "WHERE status IN ('queued', 'running') ORDER BY created_at"
+            )
+            rows = cur.fetchall()
+        return [self._row_to_dict(r) for r in rows]
+
+    def unfinished_for_doc(self, doc_id: str) -> dict[str, Any] | None:
+        """The queued or running job for doc_id, if any."""
+        ph = self._mgr.placeholder()
+        with self._mgr.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT {_COLUMNS} FROM ingest_jobs "
+                f"WHERE doc_id = {ph} AND status IN ('queued', 'running') ORDER BY created_at",
+                (doc_id,),
+            )
+            row = cur.fetchone()
+        return self._row_to_dict(row) if row else None
+
+    @staticmethod
+    def _row_to_dict(row: Any) -> dict[str, Any]:
+        return {
+            "job_id": row[0],
+            "doc_id": row[1],
+            "filename": row[2],
+            "user_id": row[3],
+            "status": row[4],
+            "result": json.loads(row[5]) if row[5] else None,
+            "error": row[6],
+            "created_at": row[7],
+            "started_at": row[8],
+            "finished_at": row[9],
+            "content_hash": row[10],
+            "retry": bool(row[11]),
+        }
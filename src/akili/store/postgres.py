@@ -274,10 +274,13 @@ class PostgresStore(BaseStore):
         ranges: list[Range] | None = None,
         conditional_units: list[ConditionalUnit] | None = None,
         uploaded_by: str | None = None,
+        replace: bool = False,
     ) -> None:
         self.add_document(doc_id, filename, page_count)
         with self._conn() as conn:
             with conn.cursor() as cur:
+                if replace:  # same transaction as the inserts below
+                    self._delete_canonical(cur, doc_id)
                 for u in units:
                     cur.execute(
                         """INSERT INTO units (doc_id, org_id, page, unit_id, label, value,
@@ -578,6 +581,20 @@ class PostgresStore(BaseStore):
         result.extend(self.get_conditional_units_by_doc(doc_id))
         return result
 
+    def _delete_canonical(self, cur: Any, doc_id: str) -> None:
+        for table in _CANONICAL_TABLES:
+            cur.execute(
+                pgsql.SQL("DELETE FROM {} WHERE doc_id = %s AND org_id = %s").format(
+                    pgsql.Identifier(table)
+                ),
+                (doc_id, self._org_id),
+            )
+
+    def clear_canonical(self, doc_id: str) -> None:
+        with self._conn() as conn:
+            with conn.cursor() as cur:
+                self._delete_canonical(cur, doc_id)
+
     def delete_document(self, doc_id: str) -> None:
         with self._conn() as conn:
             with conn.cursor() as cur:
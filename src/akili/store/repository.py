@@ -37,6 +37,11 @@ def _json_to_bbox(s: str | None) -> BBox | None:
     return BBox(x1=d["x1"], y1=d["y1"], x2=d["x2"], y2=d["y2"])
 
 
+def _delete_canonical(c: Any, doc_id: str) -> None:
+    for table in ("units", "bijections", "grids", "ranges", "conditional_units"):
+        c.execute(f"DELETE FROM {table} WHERE doc_id = ?", (doc_id,))
+
+
 class Store(BaseStore):
     """SQLite-backed store for canonical objects."""
 
@@ -265,14 +270,18 @@ class Store(BaseStore):
         ranges: list[Range] | None = None,
         conditional_units: list[ConditionalUnit] | None = None,
         uploaded_by: str | None = None,
+        replace: bool = False,
     ) -> None:
-        """Persist canonical objects for a document (single transaction)."""
+        """Persist canonical objects for a document (single transaction). With replace, the
+        document's previous objects are deleted in the same transaction."""
         with self._mgr.connection() as c:
             c.execute(
                 "INSERT OR REPLACE INTO documents "
                 "(doc_id, filename, page_count, uploaded_by) VALUES (?, ?, ?, ?)",
                 (doc_id, filename or "", page_count, uploaded_by),
             )
+            if replace:
+                _delete_canonical(c, doc_id)
             for u in units:
                 c.execute(
                     """INSERT OR REPLACE INTO units
@@ -551,6 +560,11 @@ class Store(BaseStore):
             ).fetchone()
         return row[0] if row else None
 
+    def clear_canonical(self, doc_id: str) -> None:
+        """Remove a document's canonical objects but keep the document row (re-ingest)."""
+        with self._mgr.connection() as c:
+            _delete_canonical(c, doc_id)
+
     def delete_document(self, doc_id: str) -> None:
         """Remove a document and all its canonical objects from the store."""
         with self._mgr.connection() as c:
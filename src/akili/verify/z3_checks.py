@@ -96,6 +96,11 @@ def _to_base(value: float, unit_str: str) -> tuple[float, str] | None:
     return value * multiplier, base_unit
 
 
+def is_known_unit(unit_str: str) -> bool:
+    """True if unit_str converts to a base unit (V, A, W, Ω, Hz, ...)."""
+    return _to_base(1.0, unit_str) is not None
+
+
 # ---------------------------------------------------------------------------
 # Result types
 # ---------------------------------------------------------------------------
@@ -191,6 +196,12 @@ def _check_unit_normalization(units: list) -> list[Z3Issue]:
     return issues
 
 
+def unit_normalization_issues(units: list) -> list[Z3Issue]:
+    """Unit-normalization issues of units on their own, e.g. to score one extraction pass
+    before canonicalization (empty without Z3)."""
+    return _check_unit_normalization(units)
+
+
 # ---------------------------------------------------------------------------
 # Check 2: Contradiction detection
 # ---------------------------------------------------------------------------
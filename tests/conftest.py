@@ -3,14 +3,30 @@
 from __future__ import annotations
 
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 
 from akili.canonical import Bijection, Grid, Unit
 from akili.canonical.models import GridCell, Point
+from akili.ingest.rate_limit import RateLimiter
 from akili.store.repository import Store
 
 
+@pytest.fixture(autouse=True)
+def _unlimited_gemini_rate():
+    """Give each test an unlimited limiter so mocked Gemini calls never wait on the budget."""
+    with patch("akili.ingest.rate_limit._limiter", RateLimiter(0, 0)):
+        yield
+
+
+@pytest.fixture(autouse=True)
+def _fresh_gemini_client():
+    """Give each test its own Gemini client so cached models from mocked SDKs never leak."""
+    with patch("akili.ingest.gemini_client._client", None):
+        yield
+
+
 @pytest.fixture()
 def tmp_store(tmp_path: Path) -> Store:
     """Return a Store backed by a temporary SQLite DB."""
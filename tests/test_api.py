@@ -5,7 +5,7 @@ Covers health, status, request validation, document operations, and query flow.
 
 from __future__ import annotations
 
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
 from fastapi.testclient import TestClient
 
@@ -30,6 +30,15 @@ class TestHealthAndStatus:
         assert "GOOGLE_API_KEY_set" in data
         assert "AKILI_DB_PATH" in data
 
+    def test_status_reports_a_failing_store_instead_of_failing(self):
+        broken = MagicMock()
+        broken.stats.side_effect = RuntimeError("database is locked")
+        with patch("akili.api.app.get_response_cache", return_value=broken):
+            r = client.get("/status")
+        assert r.status_code == 200
+        assert r.json()["gemini_cache"] == {"error": "RuntimeError: database is locked"}
+        assert "workers" in r.json()["ingest_jobs"]
+
 
 class TestQueryValidation:
     def test_query_missing_body(self):
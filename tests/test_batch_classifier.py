@@ -0,0 +1,144 @@
+"""Tests for contact-sheet (many pages per call) page classification."""
+
+from __future__ import annotations
+
+import json
+from concurrent.futures import Future
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from akili.ingest.batch_classifier import (
+    build_contact_sheet,
+    classify_pdf_pages,
+    parse_sheet_response,
+)
+
+
+@pytest.fixture()
+def pdf_path(tmp_path):
+    doc = fitz.open()
+    for i in range(5):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((72, 72), f"Page {i}", fontsize=12)
+    path = tmp_path / "doc.pdf"
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _response(*entries: tuple[int, str]) -> str:
+    return json.dumps({"pages": [{"tile": tile, "type": label} for tile, label in entries]})
+
+
+def test_contact_sheet_is_one_png(pdf_path):
+    doc = fitz.open(pdf_path)
+    try:
+        png = build_contact_sheet(doc, [0, 1, 2, 3, 4])
+    finally:
+        doc.close()
+    assert png.startswith(b"\x89PNG")
+    pix = fitz.Pixmap(png)
+    assert pix.width > pix.height * 0.5  # 3x2 grid, not a single tall column
+
+
+def test_parse_maps_tiles_to_page_indices_and_drops_invalid():
+    text = _response((1, "pinout_table"), (2, "not_a_type"), (3, "Electrical_Specs"), (9, "other"))
+    assert parse_sheet_response(text, [4, 7, 10]) == {4: "pinout_table", 10: "electrical_specs"}
+    assert parse_sheet_response("not json", [4, 7]) == {}
+    assert parse_sheet_response('{"pages": "x"}', [4]) == {}
+
+
+@patch("akili.config.PAGE_CLASSIFY_ENABLED", True)
+@patch("akili.config.GOOGLE_API_KEY", "test-key")
+@patch("akili.config.CLASSIFY_SHEET_TILES", 2)
+class TestClassifyPdfPages:
+    def test_one_call_per_sheet_and_skipped_pages_excluded(self, pdf_path):
+        with patch("akili.ingest.batch_classifier.get_gemini_client") as mock_client:
+            generate = mock_client.return_value.generate
+            generate.return_value.text = _response((1, "pinout_table"), (2, "other"))
+            labels = classify_pdf_pages(pdf_path, skip={1})
+        # pages 0, 2, 3, 4 -> sheets [0, 2], [3, 4]
+        assert generate.call_count == 2
+        assert labels == {0: "pinout_table", 2: "other", 3: "pinout_table", 4: "other"}
+        assert generate.call_args.args[0] == "classify_batch"
+
+    def test_sheets_are_submitted_and_lookups_wait_for_their_own_sheet(self, pdf_path):
+        submitted: list[tuple[Future, object, tuple]] = []
+
+        def submit(fn, *args):
+            future: Future = Future()
+            submitted.append((future, fn, args))
+            return future
+
+        with patch("akili.ingest.batch_classifier.get_gemini_client") as mock_client:
+            generate = mock_client.return_value.generate
+            generate.return_value.text = _response((1, "pinout_table"), (2, "other"))
+            labels = classify_pdf_pages(pdf_path, submit=submit)
+            assert generate.call_count == 0 and len(submitted) == 3
+
+            future, fn, args = submitted[0]
+            future.set_result(fn(*args))
+            assert labels.get(1) == "other"  # answered by its sheet while the others run
+            assert generate.call_count == 1
+
+            for future, fn, args in submitted[1:]:
+                future.set_result(fn(*args))
+        assert labels == {
+            0: "pinout_table",
+            1: "other",
+            2: "pinout_table",
+            3: "other",
+            4: "pinout_table",
+        }
+
+    def test_failed_sheet_leaves_pages_for_per_page_fallback(self, pdf_path):
+        with patch("akili.ingest.batch_classifier.get_gemini_client") as mock_client:
+            mock_client.return_value.generate.side_effect = [
+                RuntimeError("boom"),
+                type("R", (), {"text": "garbage", "model_name": "m"})(),
+                type("R", (), {"text": _response((1, "package_info")), "model_name": "m"})(),
+            ]
+            labels = classify_pdf_pages(pdf_path)
+        assert labels == {4: "package_info"}
+
+    def test_disabled_makes_no_calls(self, pdf_path):
+        with (
+            patch("akili.config.PAGE_CLASSIFY_ENABLED", False),
+            patch("akili.ingest.batch_classifier.get_gemini_client") as mock_client,
+        ):
+            assert classify_pdf_pages(pdf_path) == {}
+        mock_client.assert_not_called()
+
+
+@patch("akili.config.PAGE_CLASSIFY_ENABLED", True)
+@patch("akili.config.CLASSIFY_BATCH_ENABLED", True)
+@patch("akili.config.GOOGLE_API_KEY", "test-key")
+@patch("akili.config.CLASSIFY_SHEET_TILES", 2)
+def test_pipeline_classifies_sheets_on_the_ingest_pool(pdf_path, tmp_store, tmp_path):
+    import os
+    import threading
+
+    from akili.ingest.extract_schema import PageExtraction
+    from akili.ingest.pipeline import ingest_document
+
+    sheet_threads: list[str] = []
+
+    def call_sheet(sheet_png, page_indices):
+        sheet_threads.append(threading.current_thread().name)
+        return dict.fromkeys(page_indices, "other")
+
+    with (
+        patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}),
+        patch("akili.config.DOCS_DIR", str(tmp_path)),
+        patch("akili.ingest.batch_classifier._call_sheet", side_effect=call_sheet),
+        patch("akili.ingest.pipeline.classify_page") as classify_page,
+        patch("akili.ingest.pipeline.gemini_extract_page", return_value=PageExtraction()),
+    ):
+        _, _, total_pages, pages_failed = ingest_document(pdf_path, store=tmp_store)
+
+    assert (total_pages, pages_failed) == (5, 0)
+    assert len(sheet_threads) == 3
+    assert all(name.startswith("akili-ingest") for name in sheet_threads)
+    classify_page.assert_not_called()
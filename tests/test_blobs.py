@@ -0,0 +1,130 @@
+"""Tests for the content-addressed PDF blob store."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from akili.ingest.jobs import IngestJobManager
+from akili.store.blobs import BlobStore
+from akili.store.checkpoints import CheckpointStore
+from akili.store.jobs import JobStore
+
+PDF = b"%PDF-1.4 same datasheet"
+SHA = hashlib.sha256(PDF).hexdigest()
+
+
+@pytest.fixture()
+def blobs(tmp_path):
+    return BlobStore(tmp_path / "docs" / "blobs", db_path=tmp_path / "blobs.db")
+
+
+def _upload(tmp_path, name: str):
+    path = tmp_path / name
+    path.write_bytes(PDF)
+    return path
+
+
+class TestBlobStore:
+    def test_identical_uploads_share_one_file(self, tmp_path, blobs):
+        first = blobs.put("doc-a", _upload(tmp_path, "a.part"), SHA)
+        second = blobs.put("doc-b", _upload(tmp_path, "b.part"), SHA)
+
+        assert first == second == blobs.blob_path(SHA)
+        assert first.read_bytes() == PDF
+        assert not (tmp_path / "a.part").exists() and not (tmp_path / "b.part").exists()
+        assert blobs.refcount(SHA) == 2
+        assert blobs.path_for("doc-a") == blobs.path_for("doc-b") == first
+        assert blobs.stats() == {"blobs": 1, "references": 2, "bytes": len(PDF)}
+
+    def test_blob_is_deleted_with_its_last_reference(self, tmp_path, blobs):
+        path = blobs.put("doc-a", _upload(tmp_path, "a.part"), SHA)
+        blobs.put("doc-b", _upload(tmp_path, "b.part"), SHA)
+
+        assert blobs.release("doc-a") is True
+        assert path.is_file() and blobs.refcount(SHA) == 1
+        assert blobs.path_for("doc-a") is None
+
+        assert blobs.release("doc-b") is True
+        assert not path.exists() and blobs.refcount(SHA) == 0
+        assert blobs.release("doc-b") is False
+
+    def test_document_cannot_reference_two_blobs(self, tmp_path, blobs):
+        blobs.put("doc-a", _upload(tmp_path, "a.part"), SHA)
+        with pytest.raises(ValueError):
+            blobs.put("doc-a", _upload(tmp_path, "b.part"), SHA)
+        assert blobs.refcount(SHA) == 1
+
+    def test_instances_sharing_the_tables_never_drop_a_referenced_blob(self, tmp_path):
+        root, db = tmp_path / "docs" / "blobs", tmp_path / "blobs.db"
+        instances = [BlobStore(root, db_path=db), BlobStore(root, db_path=db)]
+        missing: list[str] = []
+
+        def churn(n: int) -> None:
+            store = instances[n]
+            for i in range(30):
+                doc_id = f"doc-{n}-{i}"
+                path = store.put(doc_id, _upload(tmp_path, f"{doc_id}.part"), SHA)
+                if not path.is_file():
+                    missing.append(doc_id)
+                store.release(doc_id)
+
+        threads = [threading.Thread(target=churn, args=(n,)) for n in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join(timeout=30)
+        assert missing == []
+        assert instances[0].refcount(SHA) == 0 and not instances[0].blob_path(SHA).exists()
+
+
+class TestBlobStoreApi:
+    def test_uploads_dedupe_and_delete_releases(self, tmp_path, blobs, tmp_store):
+        from akili.api import deps
+        from akili.api.app import app
+        from akili.api.routers import ingest as ingest_router
+
+        job_store = JobStore(db_path=tmp_path / "jobs.db")
+        checkpoints = CheckpointStore(db_path=tmp_path / "checkpoints.db")
+        manager = IngestJobManager(lambda job, progress: {"doc_id": job.doc_id}, job_store)
+        docs = tmp_path / "docs"
+        client = TestClient(app)
+        with (
+            patch("akili.config.BLOB_STORE_ENABLED", True),
+            patch.object(ingest_router, "_job_manager", manager),
+            patch.object(ingest_router, "docs_dir", return_value=docs),
+            patch.object(deps, "docs_dir", return_value=docs),
+            patch.object(deps, "_blob_store", blobs),
+            patch("akili.api.deps.get_store", return_value=tmp_store),
+            patch("akili.api.routers.documents.get_store", return_value=tmp_store),
+            patch("akili.api.routers.documents.get_checkpoint_store", return_value=checkpoints),
+            patch("akili.api.auth.is_auth_required", return_value=False),
+            patch("akili.api.routers.ingest.is_auth_required", return_value=False),
+        ):
+            jobs = []
+            for name in ("a.pdf", "b.pdf"):
+                r = client.post("/ingest", files={"file": (name, PDF, "application/pdf")})
+                assert r.status_code == 202, r.text
+                jobs.append(r.json())
+            deadline = time.monotonic() + 5
+            while any(job_store.get(j["job_id"])["status"] != "done" for j in jobs):
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+            doc_ids = [j["doc_id"] for j in jobs]
+
+            assert list(docs.glob("*.pdf")) == []
+            assert blobs.refcount(SHA) == 2
+            r = client.get(f"/documents/{doc_ids[1]}/file")
+            assert r.status_code == 200 and r.content == PDF
+
+            assert client.delete(f"/documents/{doc_ids[0]}").status_code == 200
+            assert blobs.refcount(SHA) == 1
+            assert client.get(f"/documents/{doc_ids[1]}/file").content == PDF
+            assert client.delete(f"/documents/{doc_ids[1]}").status_code == 200
+            assert not blobs.blob_path(SHA).exists()
+        manager.drain(timeout=1)
@@ -0,0 +1,228 @@
+"""Tests for per-page ingest checkpoints, resume, and the retry endpoint."""
+
+from __future__ import annotations
+
+import os
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from akili.canonical import Unit
+from akili.canonical.models import Point
+from akili.ingest.extract_schema import PageExtraction, PointSchema, UnitExtract
+from akili.ingest.pipeline import ingest_document
+from akili.store.checkpoints import CheckpointStore
+
+
+@pytest.fixture()
+def checkpoints(tmp_path: Path) -> CheckpointStore:
+    return CheckpointStore(db_path=tmp_path / "checkpoints.db")
+
+
+@pytest.fixture()
+def three_page_pdf(tmp_path: Path) -> Path:
+    import fitz
+
+    pdf_path = tmp_path / "three.pdf"
+    doc = fitz.open()
+    for i in range(3):
+        doc.new_page(width=612, height=792).insert_text((72, 72), f"Page {i}", fontsize=16)
+    doc.save(str(pdf_path))
+    doc.close()
+    return pdf_path
+
+
+@pytest.fixture(autouse=True)
+def _allow_tmp_docs(tmp_path):
+    with patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}):
+        with patch("akili.config.DOCS_DIR", str(tmp_path)):
+            yield
+
+
+def _page_extraction(page_index: int) -> PageExtraction:
+    return PageExtraction(
+        units=[UnitExtract(id=f"u{page_index}", value=page_index, origin=PointSchema(x=0.5, y=0.5))]
+    )
+
+
+class TestCheckpointStore:
+    def test_page_roundtrip_and_failures(self, checkpoints):
+        checkpoints.start_run("doc1", "part.pdf", 3, uploaded_by="alice")
+        unit = Unit(id="u0", value=3.3, origin=Point(x=0.1, y=0.2), doc_id="doc1", page=0)
+        unit.extraction_agreement = 0.9
+        checkpoints.save_page("doc1", 0, [unit])
+        checkpoints.mark_failed("doc1", 1, "ResourceExhausted: 429")
+
+        done = checkpoints.completed_pages("doc1")
+        assert list(done) == [0]
+        assert done[0][0] == unit
+        assert checkpoints.failed_pages("doc1") == [1]
+
+        run = checkpoints.get_run("doc1")
+        assert run["filename"] == "part.pdf"
+        assert run["uploaded_by"] == "alice"
+        assert run["status"] == "running"
+
+    def test_reopening_run_keeps_pages_and_owner(self, checkpoints):
+        checkpoints.start_run("doc1", "part.pdf", 2, uploaded_by="alice")
+        checkpoints.save_page("doc1", 0, [])
+        checkpoints.finish_run("doc1", "partial")
+        checkpoints.start_run("doc1", "part.pdf", 2, uploaded_by=None)
+        assert checkpoints.get_run("doc1")["uploaded_by"] == "alice"
+        assert checkpoints.get_run("doc1")["status"] == "running"
+        assert list(checkpoints.completed_pages("doc1")) == [0]
+
+    def test_delete_run(self, checkpoints):
+        checkpoints.start_run("doc1", "part.pdf", 1)
+        checkpoints.save_page("doc1", 0, [])
+        checkpoints.delete_run("doc1")
+        assert checkpoints.get_run("doc1") is None
+        assert checkpoints.completed_pages("doc1") == {}
+
+
+@patch("akili.ingest.pipeline.classify_page", return_value="other")
+class TestResume:
+    def test_second_run_extracts_only_missing_pages(
+        self, _mock_classify, three_page_pdf, tmp_store, checkpoints
+    ):
+        def flaky(page_index, image_bytes, doc_id, page_type_hint="", route=None):
+            if page_index == 1:
+                raise RuntimeError("429 Resource exhausted")
+            return _page_extraction(page_index)
+
+        with patch("akili.ingest.pipeline.gemini_extract_page", side_effect=flaky):
+            doc_id, _, _, pages_failed = ingest_document(
+                three_page_pdf,
+                store=tmp_store,
+                checkpoints=checkpoints,
+                filename="part.pdf",
+                uploaded_by="alice",
+            )
+        assert pages_failed == 1
+        assert checkpoints.failed_pages(doc_id) == [1]
+        assert checkpoints.get_run(doc_id)["status"] == "partial"
+
+        with patch(
+            "akili.ingest.pipeline.gemini_extract_page",
+            side_effect=lambda i, *a, **k: _page_extraction(i),
+        ) as mock_extract:
+            _, canonical, _, pages_failed = ingest_document(
+                three_page_pdf, doc_id=doc_id, store=tmp_store, checkpoints=checkpoints
+            )
+
+        assert [c.args[0] for c in mock_extract.call_args_list] == [1]
+        assert pages_failed == 0
+        assert sorted(o.page for o in canonical) == [0, 1, 2]
+        assert sorted(u.page for u in tmp_store.get_units_by_doc(doc_id)) == [0, 1, 2]
+        assert checkpoints.get_run(doc_id)["status"] == "complete"
+        docs = {d["doc_id"]: d for d in tmp_store.list_documents()}
+        assert docs[doc_id]["filename"] == "part.pdf"
+        assert tmp_store.get_document_owner(doc_id) == "alice"
+
+    def test_page_that_fails_to_render_is_a_failed_page(
+        self, _mock_classify, three_page_pdf, tmp_store, checkpoints
+    ):
+        from akili.ingest.pdf_loader import render_page as real_render
+
+        def flaky_render(page, *args, **kwargs):
+            if page.number == 1:
+                raise RuntimeError("corrupt content stream")
+            return real_render(page, *args, **kwargs)
+
+        with (
+            patch("akili.ingest.pdf_loader.render_page", side_effect=flaky_render),
+            patch(
+                "akili.ingest.pipeline.gemini_extract_page",
+                side_effect=lambda i, *a, **k: _page_extraction(i),
+            ),
+        ):
+            doc_id, _, _, pages_failed = ingest_document(
+                three_page_pdf, store=tmp_store, checkpoints=checkpoints
+            )
+        assert pages_failed == 1
+        assert checkpoints.failed_pages(doc_id) == [1]
+        assert checkpoints.get_run(doc_id)["status"] == "partial"
+
+
+class TestRetryEndpoint:
+    def test_retry_without_checkpoints_returns_404(self, checkpoints):
+        from akili.api.app import app
+
+        client = TestClient(app)
+        with patch("akili.api.routers.documents.get_checkpoint_store", return_value=checkpoints):
+            r = client.post("/documents/550e8400-e29b-41d4-a716-446655440000/retry")
+        assert r.status_code == 404
+
+    @patch("akili.ingest.pipeline.classify_page", return_value="other")
+    def test_retry_reextracts_failed_pages(
+        self, _mock_classify, tmp_path, three_page_pdf, tmp_store, checkpoints
+    ):
+        from akili.api.app import app
+        from akili.api.routers import ingest as ingest_router
+        from akili.ingest.jobs import IngestJobManager
+        from akili.store.jobs import JobStore
+
+        doc_id = "550e8400-e29b-41d4-a716-446655440000"
+        three_page_pdf.rename(tmp_path / f"{doc_id}.pdf")
+        checkpoints.start_run(doc_id, "part.pdf", 3)
+        for page in (0, 2):
+            checkpoints.save_page(doc_id, page, [])
+        checkpoints.mark_failed(doc_id, 1, "RuntimeError: 429")
+
+        job_store = JobStore(db_path=tmp_path / "jobs.db")
+        manager = IngestJobManager(ingest_router._run_ingest_job, job_store, workers=1)
+        client = TestClient(app)
+        with (
+            patch.object(ingest_router, "_job_manager", manager),
+            patch("akili.api.routers.documents.get_checkpoint_store", return_value=checkpoints),
+            patch("akili.api.routers.ingest.get_checkpoint_store", return_value=checkpoints),
+            patch("akili.api.routers.ingest.get_store", return_value=tmp_store),
+            patch("akili.api.deps.get_store", return_value=tmp_store),
+            patch("akili.api.routers.documents.is_auth_required", return_value=False),
+            patch(
+                "akili.ingest.pipeline.gemini_extract_page",
+                side_effect=lambda i, *a, **k: _page_extraction(i),
+            ) as mock_extract,
+        ):
+            r = client.post(f"/documents/{doc_id}/retry")
+            assert r.status_code == 202, r.text
+            job_id = r.json()["job_id"]
+            deadline = time.monotonic() + 5
+            while job_store.get(job_id)["status"] not in ("done", "failed"):
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+        manager.drain(timeout=1)
+
+        record = job_store.get(job_id)
+        assert record["status"] == "done", record["error"]
+        assert record["result"]["pages_failed"] == 0
+        assert record["result"]["units_count"] == 1
+        assert record["result"]["filename"] == "part.pdf"
+        assert [c.args[0] for c in mock_extract.call_args_list] == [1]
+
+    def test_retry_conflicts_with_an_unfinished_job(self, tmp_path, three_page_pdf, checkpoints):
+        from akili.api.app import app
+        from akili.api.routers import ingest as ingest_router
+        from akili.ingest.jobs import IngestJobManager
+        from akili.store.jobs import JobStore
+
+        doc_id = "550e8400-e29b-41d4-a716-446655440000"
+        three_page_pdf.rename(tmp_path / f"{doc_id}.pdf")
+        checkpoints.start_run(doc_id, "part.pdf", 3)
+        job_store = JobStore(db_path=tmp_path / "jobs.db")
+        job_store.create("job-running", doc_id, "part.pdf", None)
+        job_store.mark_running("job-running")
+        manager = IngestJobManager(lambda job, progress: {}, job_store, workers=1)
+        client = TestClient(app)
+        with (
+            patch.object(ingest_router, "_job_manager", manager),
+            patch("akili.api.routers.documents.get_checkpoint_store", return_value=checkpoints),
+            patch("akili.api.routers.documents.is_auth_required", return_value=False),
+        ):
+            r = client.post(f"/documents/{doc_id}/retry")
+        manager.drain(timeout=1)
+        assert r.status_code == 409
+        assert [j["job_id"] for j in job_store.list_unfinished()] == ["job-running"]
@@ -2,14 +2,21 @@
 
 from __future__ import annotations
 
+import threading
+from unittest.mock import patch
+
 from akili.ingest.consensus import (
     _match_units,
+    _max_weight_assignment,
     _unit_similarity,
     compute_agreement,
+    consensus_extract_page,
     merge_extractions,
+    score_extraction,
     should_use_consensus,
 )
 from akili.ingest.extract_schema import (
+    BBoxSchema,
     PageExtraction,
     PointSchema,
     UnitExtract,
@@ -79,6 +86,113 @@ class TestMatchUnits:
         assert len(unmatched_a) == 0
         assert len(unmatched_b) == 1
 
+    def test_assignment_beats_greedy(self):
+        # Greedy would give row 0 its best column (1) and leave row 1 unmatched.
+        assert sorted(_max_weight_assignment([[0.9, 0.95], [0.0, 0.8]])) == [(0, 0), (1, 1)]
+        assert _max_weight_assignment([[0.7, 0.0, 0.9]]) == [(0, 2)]
+
+    def test_dense_page_matches_shuffled_units(self):
+        a = [
+            {
+                "value": str(i * 0.5),
+                "label": f"P{i}",
+                "unit_of_measure": "V",
+                "origin": {"x": 0.1, "y": i / 400},
+            }
+            for i in range(400)
+        ]
+        b = list(reversed(a))
+        matched, unmatched_a, unmatched_b = _match_units(a, b)
+        assert len(matched) == 400
+        assert not unmatched_a and not unmatched_b
+        assert all(ua is ub for ua, ub, _ in matched)
+
+    def test_same_label_different_value_still_matches(self):
+        origin = {"x": 0.5, "y": 0.5}
+        a = [{"value": "3.3", "label": "VCC", "unit_of_measure": "V", "origin": origin}]
+        b = [{"value": "3.6", "label": "VCC", "unit_of_measure": "V", "origin": origin}]
+        matched, _, _ = _match_units(a, b)
+        assert len(matched) == 1
+
+
+class TestConsensusExtractPage:
+    def test_passes_run_concurrently(self):
+        both_started = threading.Barrier(2, timeout=5)
+
+        def fake_extract(page_index, image, doc_id, page_type_hint="", route=None):
+            both_started.wait()
+            return PageExtraction(units=[_unit("u1", "VCC", 3.3, "V")], bijections=[], grids=[])
+
+        with patch("akili.ingest.consensus.extract_page", side_effect=fake_extract):
+            merged, agreement = consensus_extract_page(0, b"png", "doc1")
+        assert len(merged.units) == 1
+        assert agreement > 0.9
+
+
+def _clean_unit(uid: str, value: float) -> UnitExtract:
+    return UnitExtract(
+        id=uid,
+        label="VCC",
+        value=value,
+        unit_of_measure="V",
+        context="Electrical Characteristics - supply voltage max",
+        origin=PointSchema(x=0.5, y=0.5),
+        bbox=BBoxSchema(x1=0.4, y1=0.45, x2=0.6, y2=0.55),
+    )
+
+
+class TestAdaptiveConsensus:
+    def test_clean_pass_scores_high(self):
+        ext = PageExtraction(units=[_clean_unit("u1", 3.3), _clean_unit("u2", 5.5)])
+        score, reasons = score_extraction(ext)
+        assert score == 1.0
+        assert reasons == []
+
+    def test_signals_lower_the_score(self):
+        ext = PageExtraction(
+            units=[
+                _unit("u1", "VCC", 3.3, "V"),
+                UnitExtract(
+                    id="u2",
+                    label="ICC",
+                    value="n/a",
+                    unit_of_measure="mA",
+                    origin=PointSchema(x=0.5, y=0.5),
+                ),
+            ]
+        )
+        hint = PageExtraction(units=[_clean_unit("t1", 3.3), _clean_unit("t2", 42.0)])
+        score, reasons = score_extraction(ext, text_hint=hint)
+        assert score < 0.85
+        names = {r.split("=")[0] for r in reasons}
+        assert {"unparseable_values", "missing_bbox", "text_layer_disagreement"} <= names
+
+    def test_empty_pass_scores_zero(self):
+        assert score_extraction(PageExtraction()) == (0.0, ["empty"])
+
+    @patch("akili.config.CONSENSUS_MODE", "adaptive")
+    def test_confident_first_pass_skips_recall(self):
+        decisions = []
+        clean = PageExtraction(units=[_clean_unit("u1", 3.3)])
+        with patch("akili.ingest.consensus.extract_page", return_value=clean) as mock_extract:
+            merged, agreement = consensus_extract_page(
+                0, b"png", "doc1", on_decision=decisions.append
+            )
+        assert mock_extract.call_count == 1
+        assert merged is clean
+        assert agreement == 1.0
+        assert decisions[0].second_pass is False
+
+    @patch("akili.config.CONSENSUS_MODE", "adaptive")
+    def test_uncertain_first_pass_runs_recall(self):
+        decisions = []
+        messy = PageExtraction(units=[_unit("u1", "VCC", 3.3, "V")])
+        with patch("akili.ingest.consensus.extract_page", return_value=messy) as mock_extract:
+            consensus_extract_page(0, b"png", "doc1", on_decision=decisions.append)
+        assert mock_extract.call_count == 2
+        assert decisions[0].second_pass is True
+        assert decisions[0].reasons
+
 
 class TestComputeAgreement:
     def test_identical_extractions(self):
@@ -0,0 +1,208 @@
+"""Tests for streamed extraction: incremental JSON scanning and per-fact progress events."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import fitz
+
+from akili.ingest.extract_schema import PageExtraction, PointSchema, UnitExtract
+from akili.ingest.json_stream import ArrayItemScanner
+from akili.ingest.pipeline import ingest_document
+
+RESPONSE = json.dumps(
+    {
+        "units": [
+            {"value": 3.3, "label": "VCC {max}", "origin": {"x": 0.1, "y": 0.2}},
+            "not an object",
+            {"id": "vih", "value": 0.7, "origin": {"x": 0.3, "y": 0.4}},
+        ],
+        "bijections": [],
+        "grids": [
+            {
+                "rows": 1,
+                "cols": 1,
+                "cells": [{"row": 0, "col": 0, "value": "1"}],
+                "origin": {"x": 0.5, "y": 0.5},
+            }
+        ],
+    }
+)
+
+
+def _feed_in_chunks(scanner: ArrayItemScanner, text: str, size: int) -> list:
+    items = []
+    for start in range(0, len(text), size):
+        items += scanner.feed(text[start : start + size])
+    return items
+
+
+class TestArrayItemScanner:
+    def test_items_are_returned_once_complete(self):
+        scanner = ArrayItemScanner()
+        items = _feed_in_chunks(scanner, RESPONSE, 7)
+        assert [(key, index) for key, index, _ in items] == [
+            ("units", 0),
+            ("units", 2),
+            ("grids", 0),
+        ]
+        assert items[0][2]["label"] == "VCC {max}"
+        assert items[2][2]["cells"][0]["value"] == "1"
+
+    def test_compact_array_items_are_returned(self):
+        text = json.dumps({"units": [["VCC", 3.3, "V", "", 0.1, 0.2, [0.1, 0.1, 0.2, 0.3]]]})
+        items = _feed_in_chunks(ArrayItemScanner(), text, 5)
+        assert items == [("units", 0, ["VCC", 3.3, "V", "", 0.1, 0.2, [0.1, 0.1, 0.2, 0.3]])]
+
+    def test_partial_item_is_not_returned(self):
+        scanner = ArrayItemScanner()
+        cut = RESPONSE.index('"id": "vih"')
+        assert [index for _, index, _ in scanner.feed(RESPONSE[:cut])] == [0]
+
+    def test_new_attempt_restarts_the_scan_without_repeating_items(self):
+        scanner = ArrayItemScanner()
+        first = scanner.feed(RESPONSE[: RESPONSE.index('"grids"')])
+        assert len(first) == 2
+        assert scanner.feed("") == []
+        retried = _feed_in_chunks(scanner, RESPONSE, 11)
+        assert [(key, index) for key, index, _ in retried] == [("grids", 0)]
+
+    def test_retry_returns_only_items_the_failed_attempt_did_not(self):
+        scanner = ArrayItemScanner()
+        assert scanner.feed('{"units": [{"a": 1}, {"b"') == [("units", 0, {"a": 1})]
+        scanner.feed("")
+        retried = scanner.feed('{"units": [{"x": 9}, {"y": 8}, {"z": 7}]}')
+        assert retried == [("units", 1, {"y": 8}), ("units", 2, {"z": 7})]
+
+    def test_keys_and_strings_split_across_chunks(self):
+        text = json.dumps({"units": [{"label": 'say "}]" here', "v": [1, 2]}], "grids": [[3]]})
+        items = _feed_in_chunks(ArrayItemScanner(), text, 1)
+        assert items == [
+            ("units", 0, {"label": 'say "}]" here', "v": [1, 2]}),
+            ("grids", 0, [3]),
+        ]
+
+
+def _chunk(text: str) -> MagicMock:
+    chunk = MagicMock()
+    chunk.text = text
+    return chunk
+
+
+@patch("akili.config.GOOGLE_API_KEY", "test-key")
+@patch("akili.ingest.gemini_client.genai")
+def test_extract_page_streams_items_with_final_ids(mock_genai):
+    from akili.ingest.gemini_extract import extract_page
+
+    response = MagicMock()
+    response.text = RESPONSE
+    response.__iter__.return_value = iter(
+        [_chunk(RESPONSE[i : i + 40]) for i in range(0, len(RESPONSE), 40)]
+    )
+    model = mock_genai.GenerativeModel.return_value
+    model.generate_content.return_value = response
+
+    streamed: list[PageExtraction] = []
+    extraction = extract_page(2, b"img", "doc1", on_item=streamed.append)
+
+    assert model.generate_content.call_args.kwargs["stream"] is True
+    assert [len(e.units) + len(e.grids) for e in streamed] == [1, 1, 1]
+    assert [u.id for e in streamed for u in e.units] == [u.id for u in extraction.units]
+    assert [u.id for u in extraction.units] == ["p2_u0", "vih"]
+    assert streamed[2].grids[0].id == extraction.grids[0].id
+
+
+@patch("akili.config.GOOGLE_API_KEY", "test-key")
+@patch("akili.config.GEMINI_MAX_RETRIES", 2)
+@patch("akili.config.GEMINI_BACKOFF_BASE", 0)
+@patch("akili.ingest.gemini_client.genai")
+def test_each_streamed_attempt_starts_with_a_reset(mock_genai):
+    from akili.ingest.gemini_client import GeminiClient
+
+    def failed_attempt():
+        yield _chunk('{"units": [{"a": 1}, {"b"')
+        raise RuntimeError("429 Resource exhausted")
+
+    retried = MagicMock()
+    retried.__iter__.return_value = iter([_chunk('{"units": [{"x": 9}, '), _chunk('{"y": 8}]}')])
+    mock_genai.GenerativeModel.return_value.generate_content.side_effect = [
+        failed_attempt(),
+        retried,
+    ]
+
+    texts: list[str] = []
+    with patch("akili.ingest.gemini_client._client", GeminiClient()):
+        GeminiClient().generate("extract", ["page"], stream=texts.append)
+
+    assert texts == ["", '{"units": [{"a": 1}, {"b"', "", '{"units": [{"x": 9}, ', '{"y": 8}]}']
+
+
+@patch("akili.config.GOOGLE_API_KEY", "test-key")
+@patch("akili.config.GEMINI_MAX_RETRIES", 2)
+@patch("akili.config.GEMINI_BACKOFF_BASE", 0)
+@patch("akili.ingest.gemini_client.genai")
+def test_retried_stream_hands_over_each_fact_once(mock_genai):
+    from akili.ingest.gemini_client import GeminiClient
+    from akili.ingest.gemini_extract import extract_page
+
+    def failed_attempt():
+        yield _chunk(RESPONSE[: RESPONSE.index('"grids"')])
+        raise RuntimeError("429 Resource exhausted")
+
+    retried = MagicMock()
+    retried.text = RESPONSE
+    retried.__iter__.return_value = iter(
+        [_chunk(RESPONSE[i : i + 40]) for i in range(0, len(RESPONSE), 40)]
+    )
+    mock_genai.GenerativeModel.return_value.generate_content.side_effect = [
+        failed_attempt(),
+        retried,
+    ]
+
+    streamed: list[PageExtraction] = []
+    with patch("akili.ingest.gemini_client._client", GeminiClient()):
+        extraction = extract_page(2, b"img", "doc1", on_item=streamed.append)
+
+    assert [u.id for e in streamed for u in e.units] == ["p2_u0", "vih"]
+    assert [g.id for e in streamed for g in e.grids] == [g.id for g in extraction.grids]
+    assert len(streamed) == 3
+
+
+@patch("akili.ingest.pipeline.classify_page", return_value="other")
+@patch("akili.config.EXTRACT_STREAMING_ENABLED", True)
+def test_pipeline_emits_fact_events_before_the_page_completes(
+    _mock_classify, tmp_store, tmp_path: Path
+):
+    doc = fitz.open()
+    doc.new_page(width=612, height=792)
+    path = tmp_path / "one.pdf"
+    doc.save(path)
+    doc.close()
+    events: list[dict] = []
+
+    def fake_extract(page_index, image_bytes, doc_id, page_type_hint="", on_item=None, route=None):
+        unit = UnitExtract(
+            id="p0_u0", value=3.3, unit_of_measure="V", origin=PointSchema(x=0.1, y=0.2)
+        )
+        on_item(PageExtraction(units=[unit]))
+        events.append({"phase": "extract_returned"})
+        return PageExtraction(units=[unit])
+
+    with (
+        patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}),
+        patch("akili.config.DOCS_DIR", str(tmp_path)),
+        patch("akili.ingest.pipeline.gemini_extract_page", side_effect=fake_extract),
+    ):
+        ingest_document(path, store=tmp_store, progress_callback=events.append)
+
+    phases = [e["phase"] for e in events]
+    assert phases.index("fact") < phases.index("extract_returned") < phases.index("canonicalizing")
+    fact = next(e for e in events if e["phase"] == "fact")
+    assert fact["page"] == 0
+    assert fact["fact"]["type"] == "unit"
+    assert fact["fact"]["value"] == 3.3
+    assert fact["fact"]["origin"] == {"x": 0.1, "y": 0.2}
+    json.dumps(fact)  # SSE-serializable
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import json
 from unittest.mock import MagicMock, patch
 
 from akili.ingest.gemini_extract import EXTRACT_PROMPT, _simplified_extraction_schema
@@ -90,7 +91,7 @@ class TestPageClassifier:
         assert result == "other"
 
     @patch("akili.config.PAGE_CLASSIFY_ENABLED", True)
-    @patch("akili.ingest.page_classifier.genai")
+    @patch("akili.ingest.gemini_client.genai")
     def test_classify_returns_valid_type(self, mock_genai):
         mock_response = MagicMock()
         mock_response.text = "electrical_specs"
@@ -98,14 +99,12 @@ class TestPageClassifier:
         mock_model.generate_content.return_value = mock_response
         mock_genai.GenerativeModel.return_value = mock_model
 
-        import os
-
-        with patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"}):
+        with patch("akili.config.GOOGLE_API_KEY", "test-key"):
             result = classify_page(b"fake_image_bytes")
         assert result == "electrical_specs"
 
     @patch("akili.config.PAGE_CLASSIFY_ENABLED", True)
-    @patch("akili.ingest.page_classifier.genai")
+    @patch("akili.ingest.gemini_client.genai")
     def test_classify_invalid_response_returns_other(self, mock_genai):
         mock_response = MagicMock()
         mock_response.text = "some_invalid_type"
@@ -113,16 +112,12 @@ class TestPageClassifier:
         mock_model.generate_content.return_value = mock_response
         mock_genai.GenerativeModel.return_value = mock_model
 
-        import os
-
-        with patch.dict(os.environ, {"GOOGLE_API_KEY": "test-key"}):
+        with patch("akili.config.GOOGLE_API_KEY", "test-key"):
             result = classify_page(b"fake_image_bytes")
         assert result == "other"
 
     def test_classify_no_api_key_returns_other(self):
-        import os
-
-        with patch.dict(os.environ, {}, clear=True):
+        with patch("akili.config.GOOGLE_API_KEY", ""):
             with patch("akili.config.PAGE_CLASSIFY_ENABLED", True):
                 result = classify_page(b"fake_image_bytes")
         assert result == "other"
@@ -151,8 +146,8 @@ class TestPageClassifier:
 class TestModelFallback:
     """A6: Tests for Gemini model fallback on NotFound/PermissionDenied."""
 
-    @patch("akili.ingest.gemini_extract.config")
-    @patch("akili.ingest.gemini_extract.genai")
+    @patch("akili.ingest.gemini_client.config")
+    @patch("akili.ingest.gemini_client.genai")
     def test_extract_page_uses_fallback_on_not_found(self, mock_genai, mock_config):
         """On NotFound error, should retry with fallback model."""
         from akili.ingest.gemini_extract import extract_page
@@ -192,8 +187,8 @@ class TestModelFallback:
         assert "gemini-fallback" in models_returned
         assert result is not None
 
-    @patch("akili.ingest.gemini_extract.config")
-    @patch("akili.ingest.gemini_extract.genai")
+    @patch("akili.ingest.gemini_client.config")
+    @patch("akili.ingest.gemini_client.genai")
     def test_extract_page_raises_when_no_fallback(self, mock_genai, mock_config):
         """Without fallback model, NotFound should propagate."""
         from akili.ingest.gemini_extract import extract_page
@@ -213,3 +208,126 @@ class TestModelFallback:
 
         with pytest.raises(Exception, match="NotFound"):
             extract_page(0, b"fake_image_bytes", "doc1")
+
+
+def _unit(uid: str, value: float) -> dict:
+    return {"id": uid, "value": value, "origin": {"x": 0.1, "y": 0.1}}
+
+
+@patch("akili.config.GOOGLE_API_KEY", "test-key")
+@patch("akili.ingest.gemini_client.genai")
+class TestMultiPageExtraction:
+    """Several pages in one request, split back into per-page extractions."""
+
+    def test_response_is_split_by_page_index(self, mock_genai):
+        from akili.ingest.gemini_extract import extract_pages
+
+        model = mock_genai.GenerativeModel.return_value
+        model.generate_content.return_value.text = json.dumps(
+            {
+                "pages": [
+                    {"page": 4, "units": [_unit("u1", 4.0)], "bijections": [], "grids": []},
+                    {"page": 3, "units": [_unit("u1", 3.0)], "bijections": [], "grids": []},
+                ]
+            }
+        )
+        results = extract_pages([(3, b"img3", ""), (4, b"img4", "hint")], "doc1")
+
+        assert model.generate_content.call_count == 1
+        contents = model.generate_content.call_args.args[0]
+        assert contents[0].startswith(EXTRACT_PROMPT)
+        assert contents[0].count("## Few-Shot Examples") == 1  # prompt sent once for both pages
+        assert contents[1] == "PAGE 3"
+        assert contents[3] == "PAGE 4 - PAGE TYPE HINT: hint"
+        assert results[3].units[0].value == 3.0
+        assert results[4].units[0].value == 4.0
+
+    def test_missing_page_is_extracted_singly(self, mock_genai):
+        from akili.ingest.gemini_extract import extract_pages
+
+        batch_response = MagicMock()
+        batch_response.text = json.dumps(
+            {"pages": [{"page": 0, "units": [_unit("u1", 1.0)], "bijections": [], "grids": []}]}
+        )
+        single_response = MagicMock()
+        single_response.text = json.dumps(
+            {"units": [_unit("u1", 2.0)], "bijections": [], "grids": []}
+        )
+        model = mock_genai.GenerativeModel.return_value
+        model.generate_content.side_effect = [batch_response, single_response]
+
+        results = extract_pages([(0, b"img0", ""), (1, b"img1", "")], "doc1")
+
+        assert model.generate_content.call_count == 2
+        assert results[1].units[0].value == 2.0
+        assert results[1].units[0].id == "u1"
+
+    def test_batch_size_is_halved_for_dense_pages(self, _mock_genai):
+        from akili.ingest.gemini_extract import max_batch_pages
+
+        with patch("akili.config.EXTRACT_BATCH_PAGES", 4):
+            assert max_batch_pages("text_description") == 4
+            assert max_batch_pages("electrical_specs") == 2
+
+
+class TestCompactFormat:
+    """Compact positional wire format, expanded back into PageExtraction."""
+
+    COMPACT = {
+        "units": [["VCC", 3.3, "V", "typical supply voltage", 0.5, 0.32, None], ["x"]],
+        "bijections": [[[["1", "VCC"], ["2", "GND"]], 0.2, 0.3, [0.1, 0.2, 0.9, 0.5]]],
+        "grids": [[[["Pin", "Name"], ["1", "VCC"]], 0.1, 0.15, None]],
+    }
+
+    def test_compact_arrays_are_expanded(self):
+        from akili.ingest.gemini_extract import _validate_extraction
+
+        extraction = _validate_extraction(json.loads(json.dumps(self.COMPACT)), 3)
+        (unit,) = extraction.units  # the malformed unit is dropped
+        assert (unit.id, unit.label, unit.value, unit.unit_of_measure) == ("p3_u0", "VCC", 3.3, "V")
+        assert (unit.origin.x, unit.origin.y, unit.bbox) == (0.5, 0.32, None)
+        bijection = extraction.bijections[0]
+        assert bijection.mapping == {"1": "VCC", "2": "GND"}
+        assert bijection.left_set == ["1", "2"]
+        assert bijection.bbox.x2 == 0.9
+        grid = extraction.grids[0]
+        assert (grid.id, grid.rows, grid.cols) == ("p3_g0", 2, 2)
+        assert {(c.row, c.col, c.value) for c in grid.cells} == {
+            (0, 0, "Pin"),
+            (0, 1, "Name"),
+            (1, 0, "1"),
+            (1, 1, "VCC"),
+        }
+
+    def test_round_trip_is_much_smaller(self):
+        from akili.ingest.gemini_extract import _validate_extraction, compact_extraction
+
+        verbose = EXTRACT_PROMPT.split("### Example 2")[1].split("```json")[1].split("```")[0]
+        extraction = _validate_extraction(json.loads(verbose), 0)
+        compact = compact_extraction(extraction)
+        restored = _validate_extraction(json.loads(json.dumps(compact)), 0)
+        assert [(u.value, u.context) for u in restored.units] == [
+            (u.value, u.context) for u in extraction.units
+        ]
+        assert {(c.row, c.col, str(c.value)) for c in restored.grids[0].cells} == {
+            (c.row, c.col, str(c.value)) for c in extraction.grids[0].cells
+        }
+        compact_size = len(json.dumps(compact, separators=(",", ":")))
+        verbose_size = len(json.dumps(json.loads(verbose), separators=(",", ":")))
+        assert compact_size < 0.6 * verbose_size
+
+    @patch("akili.config.GOOGLE_API_KEY", "test-key")
+    @patch("akili.config.EXTRACT_COMPACT_SCHEMA", True)
+    @patch("akili.ingest.gemini_client.genai")
+    def test_compact_prompt_without_response_schema(self, mock_genai):
+        from akili.ingest.gemini_extract import COMPACT_EXTRACT_PROMPT, extract_page
+
+        model = mock_genai.GenerativeModel.return_value
+        model.generate_content.return_value.text = json.dumps(self.COMPACT)
+        extraction = extract_page(0, b"img", "doc1")
+
+        assert model.generate_content.call_args.args[0][0].startswith(COMPACT_EXTRACT_PROMPT)
+        config_kwargs = mock_genai.types.GenerationConfig.call_args.kwargs
+        assert config_kwargs == {"response_mime_type": "application/json"}
+        assert extraction.units[0].value == 3.3
+        assert extraction.grids[0].rows == 2
@@ -0,0 +1,170 @@
+"""Tests for the shared Gemini client: model reuse, retries, timeout and metrics."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from akili.ingest.gemini_client import GeminiClient, error_class
+
+
+def _response(text: str, input_tokens: int = 0, output_tokens: int = 0) -> MagicMock:
+    response = MagicMock()
+    response.text = text
+    response.usage_metadata.prompt_token_count = input_tokens
+    response.usage_metadata.candidates_token_count = output_tokens
+    return response
+
+
+@pytest.fixture(autouse=True)
+def _api_key():
+    with patch("akili.config.GOOGLE_API_KEY", "test-key"):
+        yield
+
+
+@patch("akili.ingest.gemini_client.genai")
+class TestGeminiClient:
+    def test_model_is_configured_and_built_once(self, mock_genai):
+        mock_genai.GenerativeModel.return_value.generate_content.return_value = _response("ok")
+        client = GeminiClient()
+        assert client.generate("format", "q").text == "ok"
+        assert client.generate("format", "q").text == "ok"
+        mock_genai.configure.assert_called_once_with(api_key="test-key")
+        assert mock_genai.GenerativeModel.call_count == 1
+
+    @patch("akili.ingest.gemini_client.time.sleep")
+    @patch("akili.config.GEMINI_MAX_RETRIES", 3)
+    def test_rate_limit_retries_then_records_metrics(self, _sleep, mock_genai):
+        model = mock_genai.GenerativeModel.return_value
+        model.generate_content.side_effect = [
+            Exception("429 Resource exhausted"),
+            _response('{"units": []}', input_tokens=1200, output_tokens=30),
+        ]
+        client = GeminiClient()
+        result = client.generate("extract", ["prompt"])
+        assert result.text == '{"units": []}'
+
+        stats = client.stats()["extract"]
+        assert stats["calls"] == 2
+        assert stats["successes"] == 1
+        assert stats["retries"] == 1
+        assert stats["errors"] == {"rate_limit": 1}
+        assert stats["input_tokens"] == 1200
+        assert stats["output_tokens"] == 30
+        assert stats["latency_p50_s"] is not None
+
+    @patch("akili.ingest.gemini_client.time.sleep")
+    @patch("akili.config.GEMINI_MAX_RETRIES", 3)
+    def test_adaptive_limiter_paces_retries_instead_of_backoff(self, sleep, mock_genai):
+        from akili.ingest.rate_limit import RateLimiter
+
+        model = mock_genai.GenerativeModel.return_value
+        model.generate_content.side_effect = [
+            Exception("429 Resource exhausted"),
+            _response("ok"),
+        ]
+        limiter = RateLimiter(0, 0, adaptive=True, max_concurrency=4)
+        with patch("akili.ingest.rate_limit._limiter", limiter):
+            assert GeminiClient().generate("classify", ["prompt"]).text == "ok"
+        sleep.assert_not_called()
+        stats = limiter.stats()
+        assert stats["max_concurrent"] == 2
+        assert stats["in_flight"] == 0
+
+    @patch("akili.config.GEMINI_FALLBACK_MODEL", "gemini-fallback")
+    def test_falls_back_once_on_unavailable_model(self, mock_genai):
+        primary, fallback = MagicMock(), MagicMock()
+        primary.generate_content.side_effect = Exception("404 NotFound: model")
+        fallback.generate_content.return_value = _response("ok")
+        mock_genai.GenerativeModel.side_effect = lambda name: (
+            fallback if name == "gemini-fallback" else primary
+        )
+        client = GeminiClient()
+        assert client.generate("classify", ["x"]).model_name == "gemini-fallback"
+        assert client.stats()["classify"]["fallbacks"] == 1
+
+    def test_deadline_exhausted_raises_timeout(self, mock_genai):
+        client = GeminiClient()
+        with pytest.raises(TimeoutError):
+            client.generate("extract", ["x"], timeout=0)
+        assert client.stats()["extract"]["errors"] == {"timeout": 1}
+        mock_genai.GenerativeModel.assert_not_called()
+
+    @patch("akili.config.GEMINI_HEDGE_ENABLED", True)
+    @patch("akili.config.GEMINI_HEDGE_MAX_FRACTION", 1.0)
+    def test_slow_call_is_hedged_and_first_success_wins(self, mock_genai):
+        import threading
+
+        release = threading.Event()
+        calls = 0
+        lock = threading.Lock()
+
+        def generate_content(*args, **kwargs):
+            nonlocal calls
+            with lock:
+                calls += 1
+                call = calls
+            if call == 21:  # the first request after the latency warm-up hangs
+                release.wait(5)
+                return _response("slow")
+            return _response("fast")
+
+        mock_genai.GenerativeModel.return_value.generate_content.side_effect = generate_content
+        client = GeminiClient()
+        for _ in range(20):
+            client.generate("extract", ["x"], hedge=True)
+        try:
+            assert client.generate("extract", ["x"], hedge=True).text == "fast"
+        finally:
+            release.set()
+        stats = client.stats()["extract"]
+        assert stats["hedges"] == 1
+        assert stats["hedge_wins"] == 1
+        assert stats["calls"] == 22
+
+    @patch("akili.config.GEMINI_HEDGE_ENABLED", True)
+    @patch("akili.config.GEMINI_HEDGE_MAX_FRACTION", 1.0)
+    def test_full_hedge_pool_runs_calls_unhedged_on_the_caller(self, mock_genai):
+        import threading
+
+        callers: list[str] = []
+
+        def generate_content(*args, **kwargs):
+            callers.append(threading.current_thread().name)
+            return _response("ok")
+
+        mock_genai.GenerativeModel.return_value.generate_content.side_effect = generate_content
+        client = GeminiClient()
+        for _ in range(21):  # warm-up, then one hedgeable call on the shared pool
+            client.generate("extract", ["x"], hedge=True)
+        assert callers[-1].startswith("akili-hedge")
+        with patch("akili.ingest.gemini_client._hedge_slots", threading.BoundedSemaphore(1)):
+            from akili.ingest import gemini_client
+
+            gemini_client._hedge_slots.acquire()
+            assert client.generate("extract", ["x"], hedge=True).text == "ok"
+        assert callers[-1] == threading.current_thread().name
+        assert client.stats()["extract"]["hedges"] == 0
+
+    @patch("akili.config.GEMINI_HEDGE_ENABLED", True)
+    @patch("akili.config.GEMINI_HEDGE_MAX_FRACTION", 0.0)
+    def test_hedges_respect_the_traffic_cap(self, mock_genai):
+        mock_genai.GenerativeModel.return_value.generate_content.return_value = _response("ok")
+        client = GeminiClient()
+        for _ in range(25):
+            client.generate("extract", ["x"], hedge=True)
+        assert client.stats()["extract"]["hedges"] == 0
+        assert client.stats()["extract"]["calls"] == 25
+
+    def test_missing_api_key_raises(self, mock_genai):
+        with patch("akili.config.GOOGLE_API_KEY", ""):
+            with pytest.raises(ValueError, match="GOOGLE_API_KEY"):
+                GeminiClient().generate("extract", ["x"])
+
+
+def test_error_class():
+    assert error_class(Exception("ResourceExhausted")) == "rate_limit"
+    assert error_class(Exception("PermissionDenied")) == "model_unavailable"
+    assert error_class(TimeoutError("slow")) == "timeout"
+    assert error_class(ValueError("bad")) == "other"
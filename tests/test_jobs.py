@@ -0,0 +1,291 @@
+"""Tests for the background ingest job queue and the /ingest + /jobs endpoints."""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from akili.ingest.jobs import IngestJobManager, QueueFullError
+from akili.store.jobs import JobStore
+
+
+@pytest.fixture()
+def job_store(tmp_path: Path) -> JobStore:
+    return JobStore(db_path=tmp_path / "jobs.db")
+
+
+class _GatedRunner:
+    """Runner that blocks each job until released, recording the order jobs start in."""
+
+    def __init__(self):
+        self.started: list[str] = []
+        self.release = threading.Event()
+
+    def __call__(self, job, progress):
+        self.started.append(job.doc_id)
+        progress({"phase": "extracting", "page": 0})
+        progress({"phase": "fact", "page": 0, "fact": {"type": "unit"}})  # not job progress
+        self.release.wait(5)
+        if job.doc_id == "bad":
+            raise RuntimeError("boom")
+        return {"doc_id": job.doc_id, "units_count": 1}
+
+
+def _wait_for(predicate, timeout: float = 5.0) -> None:
+    done = threading.Event()
+    for _ in range(int(timeout / 0.01)):
+        if predicate():
+            return
+        done.wait(0.01)
+    raise AssertionError("condition not reached")
+
+
+class TestIngestJobManager:
+    def test_jobs_run_in_order_with_queue_positions(self, job_store, tmp_path):
+        runner = _GatedRunner()
+        manager = IngestJobManager(runner, job_store, workers=1, max_queued=5)
+        events: list[dict] = []
+        first = manager.submit("a", tmp_path / "a.pdf", "a.pdf", listener=events.append)
+        second = manager.submit("b", tmp_path / "b.pdf", "b.pdf")
+        third = manager.submit("c", tmp_path / "c.pdf", "c.pdf")
+
+        _wait_for(lambda: manager.queue_position(first.job_id) == 0)
+        assert manager.queue_position(second.job_id) == 1
+        assert manager.queue_position(third.job_id) == 2
+        assert manager.status(first.job_id)["progress"] == {"phase": "extracting", "page": 0}
+        assert manager.status(second.job_id)["status"] == "queued"
+
+        # The idle worker started "a" at once, but the listener still saw "queued" first.
+        assert events[:2] == [
+            {"phase": "queued", "job_id": first.job_id, "doc_id": "a", "queue_position": 1},
+            {"phase": "extracting", "page": 0},
+        ]
+
+        runner.release.set()
+        _wait_for(lambda: job_store.get(third.job_id)["status"] == "done")
+        assert runner.started == ["a", "b", "c"]
+        assert job_store.get(first.job_id)["result"] == {"doc_id": "a", "units_count": 1}
+        assert events[-1] == {
+            "doc_id": "a",
+            "units_count": 1,
+            "phase": "done",
+            "job_id": first.job_id,
+        }
+        manager.drain(timeout=1)
+
+    def test_failed_job_is_recorded(self, job_store, tmp_path):
+        runner = _GatedRunner()
+        runner.release.set()
+        manager = IngestJobManager(runner, job_store, workers=1)
+        events: list[dict] = []
+        job = manager.submit("bad", tmp_path / "bad.pdf", "bad.pdf", listener=events.append)
+        _wait_for(lambda: job_store.get(job.job_id)["status"] == "failed")
+        assert "boom" in job_store.get(job.job_id)["error"]
+        assert events[-1]["phase"] == "error"
+        manager.drain(timeout=1)
+
+    def test_admission_rejects_when_queue_full(self, job_store, tmp_path):
+        runner = _GatedRunner()
+        manager = IngestJobManager(runner, job_store, workers=1, max_queued=1)
+        first = manager.submit("a", tmp_path / "a.pdf", "a.pdf")
+        _wait_for(lambda: manager.queue_position(first.job_id) == 0)
+        manager.submit("b", tmp_path / "b.pdf", "b.pdf")
+        with pytest.raises(QueueFullError):
+            manager.submit("c", tmp_path / "c.pdf", "c.pdf")
+        runner.release.set()
+        manager.drain(timeout=1)
+        with pytest.raises(QueueFullError):
+            manager.submit("d", tmp_path / "d.pdf", "d.pdf")
+
+    def test_recover_resubmits_unfinished_jobs(self, job_store, tmp_path):
+        (tmp_path / "a.pdf").write_bytes(b"%PDF-")
+        job_store.create("job-a", "a", "a.pdf", "alice")
+        job_store.mark_running("job-a")
+        job_store.create("job-gone", "gone", "gone.pdf", None)
+
+        runner = _GatedRunner()
+        runner.release.set()
+        manager = IngestJobManager(runner, job_store, workers=1)
+        assert manager.recover(lambda doc_id: tmp_path / f"{doc_id}.pdf") == 1
+        _wait_for(lambda: job_store.get("job-a")["status"] == "done")
+        assert job_store.get("job-gone")["status"] == "failed"
+        assert job_store.list_unfinished() == []
+        manager.drain(timeout=1)
+
+    def test_recover_leaves_jobs_leased_by_a_live_instance(self, job_store, tmp_path):
+        for doc_id, age in (("live", 0), ("dead", 120)):
+            (tmp_path / f"{doc_id}.pdf").write_bytes(b"%PDF-")
+            # "other" still heartbeats job-live; its last heartbeat on job-dead is 2 min old.
+            with patch("akili.store.jobs.time.time", return_value=time.time() - age):
+                job_store.create(f"job-{doc_id}", doc_id, f"{doc_id}.pdf", None, owner="other")
+            job_store.mark_running(f"job-{doc_id}")
+
+        runner = _GatedRunner()
+        runner.release.set()
+        manager = IngestJobManager(runner, job_store, workers=1, lease_seconds=60)
+        assert manager.recover(lambda doc_id: tmp_path / f"{doc_id}.pdf") == 1
+        _wait_for(lambda: job_store.get("job-dead")["status"] == "done")
+        assert runner.started == ["dead"]
+        assert job_store.get("job-live")["status"] == "running"
+        assert not job_store.claim("job-dead", "another", lease_seconds=60)
+        manager.drain(timeout=1)
+
+    def test_recovered_retry_job_keeps_its_pdf_when_it_fails(self, job_store, tmp_path):
+        from akili.api.routers import ingest as ingest_router
+
+        pdf = tmp_path / "doc.pdf"
+        pdf.write_bytes(b"%PDF-")
+        with patch("akili.store.jobs.time.time", return_value=time.time() - 120):
+            job_store.create(
+                "job-retry",
+                "doc",
+                "doc.pdf",
+                None,
+                owner="gone",
+                retry=True,
+                content_hash="ab" * 32,
+            )
+        hashes: list[str | None] = []
+
+        def fail(*args, content_hash=None, **kwargs):
+            hashes.append(content_hash)
+            raise RuntimeError("Gemini down")
+
+        manager = IngestJobManager(ingest_router._run_ingest_job, job_store, workers=1)
+        with (
+            patch.object(ingest_router, "ingest_document", side_effect=fail),
+            patch.object(ingest_router, "get_store"),
+            patch.object(
+                ingest_router,
+                "get_checkpoint_store",
+                return_value=MagicMock(**{"completed_pages.return_value": []}),
+            ),
+            patch.object(ingest_router, "_drop_upload") as drop,
+        ):
+            assert manager.recover(lambda doc_id: tmp_path / f"{doc_id}.pdf") == 1
+            _wait_for(lambda: job_store.get("job-retry")["status"] == "failed")
+        manager.drain(timeout=1)
+        assert job_store.get("job-retry")["retry"] is True
+        assert hashes == ["ab" * 32]
+        drop.assert_not_called()
+        assert pdf.is_file()
+
+    def test_drain_releases_queued_jobs_for_the_next_start(self, job_store, tmp_path):
+        runner = _GatedRunner()
+        manager = IngestJobManager(runner, job_store, workers=1)
+        running = manager.submit("a", tmp_path / "a.pdf", "a.pdf")
+        _wait_for(lambda: manager.queue_position(running.job_id) == 0)
+        queued = manager.submit("b", tmp_path / "b.pdf", "b.pdf")
+        assert not job_store.claim(queued.job_id, "restarted", lease_seconds=60)
+        manager.drain(timeout=0.05)
+        assert job_store.claim(queued.job_id, "restarted", lease_seconds=60)
+        assert not job_store.claim(running.job_id, "restarted", lease_seconds=60)
+        runner.release.set()
+
+
+class TestJobEndpoints:
+    def test_ingest_returns_202_and_job_completes(self, tmp_path, job_store):
+        from akili.api.app import app
+        from akili.api.routers import ingest as ingest_router
+
+        runner = _GatedRunner()
+        runner.release.set()
+        manager = IngestJobManager(runner, job_store, workers=1)
+        client = TestClient(app)
+        with (
+            patch.object(ingest_router, "_job_manager", manager),
+            patch.object(ingest_router, "docs_dir", return_value=tmp_path),
+            patch("akili.api.routers.ingest.is_auth_required", return_value=False),
+        ):
+            r = client.post(
+                "/ingest", files={"file": ("part.pdf", b"%PDF-1.4 x", "application/pdf")}
+            )
+            assert r.status_code == 202, r.text
+            body = r.json()
+            assert body["status"] == "queued"
+            assert (tmp_path / f"{body['doc_id']}.pdf").is_file()
+
+            _wait_for(lambda: job_store.get(body["job_id"])["status"] == "done")
+            r = client.get(f"/jobs/{body['job_id']}")
+            assert r.status_code == 200
+            assert r.json()["status"] == "done"
+            assert r.json()["result"]["doc_id"] == body["doc_id"]
+
+            r = client.get("/jobs/550e8400-e29b-41d4-a716-446655440000")
+            assert r.status_code == 404
+        manager.drain(timeout=1)
+
+    def test_ingest_returns_503_when_queue_full(self, tmp_path, job_store):
+        from akili.api.app import app
+        from akili.api.routers import ingest as ingest_router
+
+        manager = IngestJobManager(_GatedRunner(), job_store, workers=1)
+        manager.drain(timeout=1)
+        client = TestClient(app)
+        with (
+            patch.object(ingest_router, "_job_manager", manager),
+            patch.object(ingest_router, "docs_dir", return_value=tmp_path),
+        ):
+            r = client.post(
+                "/ingest", files={"file": ("part.pdf", b"%PDF-1.4 x", "application/pdf")}
+            )
+        assert r.status_code == 503
+        assert r.headers["Retry-After"] == "30"
+        assert list(tmp_path.glob("*.pdf")) == []
+
+    def test_upload_is_streamed_hashed_and_renamed(self, tmp_path, job_store):
+        from akili.api.app import app
+        from akili.api.routers import ingest as ingest_router
+
+        hashes: list[str | None] = []
+
+        def runner(job, progress):
+            hashes.append(job.content_hash)
+            return {"doc_id": job.doc_id}
+
+        manager = IngestJobManager(runner, job_store, workers=1)
+        content = b"%PDF-1.4 " + b"x" * 100
+        with (
+            patch.object(ingest_router, "_job_manager", manager),
+            patch.object(ingest_router, "docs_dir", return_value=tmp_path),
+            patch.object(ingest_router, "_UPLOAD_CHUNK_BYTES", 16),
+            patch("akili.api.routers.ingest.is_auth_required", return_value=False),
+        ):
+            r = TestClient(app).post(
+                "/ingest", files={"file": ("part.pdf", content, "application/pdf")}
+            )
+            assert r.status_code == 202, r.text
+            _wait_for(lambda: job_store.get(r.json()["job_id"])["status"] == "done")
+        manager.drain(timeout=1)
+        assert (tmp_path / f"{r.json()['doc_id']}.pdf").read_bytes() == content
+        assert hashes == [hashlib.sha256(content).hexdigest()]
+        assert list(tmp_path.glob(".*.part")) == []
+
+    @pytest.mark.parametrize(
+        ("content", "status"),
+        [(b"%PDF-1.4 " + b"x" * 100, 413), (b"PK\x03\x04 not a pdf", 400), (b"%PD", 400)],
+    )
+    def test_rejected_upload_leaves_no_file(self, tmp_path, job_store, content, status):
+        from akili.api.app import app
+        from akili.api.routers import ingest as ingest_router
+
+        manager = IngestJobManager(_GatedRunner(), job_store, workers=1)
+        with (
+            patch.object(ingest_router, "_job_manager", manager),
+            patch.object(ingest_router, "docs_dir", return_value=tmp_path),
+            patch.object(ingest_router, "_UPLOAD_CHUNK_BYTES", 16),
+            patch("akili.config.MAX_UPLOAD_BYTES", 64),
+            patch("akili.api.routers.ingest.is_auth_required", return_value=False),
+        ):
+            r = TestClient(app).post(
+                "/ingest", files={"file": ("part.pdf", content, "application/pdf")}
+            )
+        manager.drain(timeout=1)
+        assert r.status_code == status
+        assert list(tmp_path.glob("*.pdf*")) == list(tmp_path.glob(".*.part")) == []
@@ -0,0 +1,109 @@
+"""Tests for the Gemini API key pool: least-loaded assignment, per-key 429s and clients."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from google.generativeai import protos
+
+from akili.ingest.gemini_client import GeminiClient
+from akili.ingest.key_pool import KeyPool
+from akili.ingest.rate_limit import RateLimiter
+
+KEYS = ["key-aaaa", "key-bbbb"]
+
+
+class _RateLimited(Exception):
+    def __str__(self) -> str:
+        return "429 Resource exhausted"
+
+
+def _pool() -> KeyPool:
+    return KeyPool(KEYS, lambda: RateLimiter(0, 0, adaptive=True))
+
+
+class TestKeyPool:
+    def test_concurrent_requests_spread_over_keys(self):
+        pool = _pool()
+        with pool.lease() as first, pool.lease() as second:
+            assert {first.key, second.key} == set(KEYS)
+        with pool.lease() as third:
+            assert third.key == KEYS[0]
+        stats = pool.stats()
+        assert [s["requests"] for s in stats.values()] == [2, 1]
+        assert all(s["in_flight"] == 0 for s in stats.values())
+
+    def test_rate_limited_key_gets_less_traffic(self):
+        pool = _pool()
+        with pytest.raises(_RateLimited), pool.lease() as pooled:
+            with pooled.limiter.admit():
+                raise _RateLimited()
+        assert pooled.key == KEYS[0]
+        assert pooled.limiter.rate_fraction == 0.5
+
+        # At half rate, key 1 counts as busy as key 2 with one request in flight.
+        with pool.lease() as a, pool.lease() as b, pool.lease() as c:
+            assert [a.key, b.key, c.key] == [KEYS[1], KEYS[0], KEYS[1]]
+        stats = pool.stats()
+        assert stats["key1...aaaa"]["rate_limited"] == 1
+        assert stats["key1...aaaa"]["rate_fraction"] == 0.5
+        assert stats["key2...bbbb"]["requests"] == 2
+
+    def test_duplicate_keys_are_pooled_once(self):
+        assert len(KeyPool(["k1", " k1 ", "k2", ""], lambda: RateLimiter(0, 0))) == 2
+        with pytest.raises(ValueError):
+            KeyPool([" "], lambda: RateLimiter(0, 0))
+
+
+@patch("akili.ingest.gemini_client.glm.GenerativeServiceClient")
+@patch("akili.ingest.gemini_client.genai")
+def test_client_retries_a_429_on_another_key_without_global_configure(mock_genai, service):
+    pool = _pool()
+    clients: dict[str, MagicMock] = {}
+    requests = []
+
+    def client_for(client_options):
+        key = client_options["api_key"]
+        client = clients[key] = MagicMock()
+
+        def generate_content(request, timeout):
+            requests.append((key, request))
+            if key == "key-aaaa":
+                raise _RateLimited()
+            return protos.GenerateContentResponse(
+                candidates=[{"content": {"parts": [{"text": "ok"}]}}],
+                usage_metadata={"prompt_token_count": 3, "candidates_token_count": 1},
+            )
+
+        client.generate_content.side_effect = generate_content
+        return client
+
+    service.side_effect = client_for
+    with (
+        patch("akili.config.GEMINI_API_KEYS", KEYS),
+        patch("akili.config.GEMINI_MODEL", "gemini-test"),
+        patch("akili.ingest.key_pool._pool", pool),
+        patch("akili.config.GEMINI_MAX_RETRIES", 2),
+    ):
+        client = GeminiClient()
+        result = client.generate(
+            "extract", ["page"], generation_config={"response_mime_type": "application/json"}
+        )
+        assert result.text == "ok"
+        assert client.generate("extract", ["page"]).text == "ok"
+
+    mock_genai.configure.assert_not_called()
+    mock_genai.GenerativeModel.assert_not_called()
+    assert sorted(clients) == KEYS and service.call_count == 2
+    assert [key for key, _ in requests] == ["key-aaaa", "key-bbbb", "key-bbbb"]
+    request = requests[1][1]
+    assert request.model == "models/gemini-test"
+    assert request.contents[0].parts[0].text == "page"
+    assert request.generation_config.response_mime_type == "application/json"
+    stats = pool.stats()
+    assert stats["key1...aaaa"]["rate_limited"] == 1
+    assert stats["key2...bbbb"]["requests"] == 2
+    assert client.stats()["extract"]["retries"] == 1
+    assert client.stats()["extract"]["input_tokens"] == 6
@@ -0,0 +1,74 @@
+"""Tests for the local (PyMuPDF feature) page classifier."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from akili.ingest.local_classifier import (
+    PageFeatures,
+    classify_features,
+    classify_pdf_page,
+    page_features,
+)
+from akili.ingest.page_classifier import classify_page
+
+
+@pytest.fixture()
+def doc():
+    d = fitz.open()
+    yield d
+    d.close()
+
+
+def _ratings_page(doc):
+    page = doc.new_page(width=612, height=792)
+    page.insert_text((72, 72), "ABSOLUTE MAXIMUM RATINGS", fontsize=14)
+    rows = ["Supply voltage VCC -0.3 6.0 V", "Storage temperature -65 150 C", "ESD HBM 2000 V"]
+    for i, row in enumerate(rows):
+        y = 110 + i * 20
+        page.insert_text((72, y), row, fontsize=10)
+        page.draw_line((70, y + 5), (540, y + 5))
+    for x in (70, 300, 380, 460, 540):
+        page.draw_line((x, 95), (x, 165))
+    return page
+
+
+class TestLocalClassifier:
+    def test_heading_and_table_give_confident_label(self, doc):
+        label, confidence = classify_pdf_page(_ratings_page(doc))
+        assert label == "absolute_max_ratings"
+        assert confidence >= 0.6
+
+    def test_features_capture_rules_and_keywords(self, doc):
+        features = page_features(_ratings_page(doc))
+        assert features.keyword_scores["absolute_max_ratings"] >= 4.0
+        assert features.line_density >= 5.0
+        assert features.image_coverage == 0.0
+
+    def test_blank_page_is_other_with_no_confidence(self, doc):
+        assert classify_pdf_page(doc.new_page()) == ("other", 0.0)
+
+    def test_weak_evidence_has_low_confidence(self):
+        label, confidence = classify_features(
+            PageFeatures(word_count=50, keyword_scores={"text_description": 1.0})
+        )
+        assert label == "text_description"
+        assert confidence < 0.6
+
+
+@patch("akili.config.PAGE_CLASSIFY_ENABLED", True)
+@patch("akili.config.GOOGLE_API_KEY", "test-key")
+class TestClassifyPageWithLocalResult:
+    def test_confident_local_label_skips_gemini(self):
+        with patch("akili.ingest.page_classifier.get_gemini_client") as mock_client:
+            assert classify_page(b"png", local=("pinout_table", 0.9)) == "pinout_table"
+        mock_client.assert_not_called()
+
+    def test_low_confidence_defers_to_gemini(self):
+        with patch("akili.ingest.page_classifier.get_gemini_client") as mock_client:
+            mock_client.return_value.generate.return_value.text = "electrical_specs"
+            assert classify_page(b"png", local=("other", 0.1)) == "electrical_specs"
+        mock_client.return_value.generate.assert_called_once()
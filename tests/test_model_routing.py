@@ -0,0 +1,102 @@
+"""Tests for per-task, per-page-type Gemini model routing."""
+
+from __future__ import annotations
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from akili.ingest.gemini_client import GeminiClient
+from akili.ingest.model_routing import Route, route_for
+
+ROUTES = "classify=flash-lite, extract=flash,extract:pinout_table=pro,bogus"
+
+
+@pytest.fixture(autouse=True)
+def _routes():
+    with (
+        patch("akili.config.GEMINI_MODEL_ROUTES", ROUTES),
+        patch("akili.config.GEMINI_MODEL", "default-model"),
+        patch("akili.config.GOOGLE_API_KEY", "test-key"),
+    ):
+        yield
+
+
+def test_most_specific_route_wins():
+    assert route_for("extract", "pinout_table") == Route("extract:pinout_table", "pro")
+    assert route_for("extract", "text_description") == Route("extract:text_description", "flash")
+    assert route_for("classify") == Route("classify", "flash-lite")
+
+
+def test_unrouted_task_uses_the_default_model():
+    assert route_for("format") == Route("format", None)
+    with patch("akili.config.GEMINI_MODEL_ROUTES", ""):
+        assert route_for("extract", "pinout_table").model is None
+
+
+def test_routes_are_parsed_once_per_setting(caplog):
+    with patch("akili.config.GEMINI_MODEL_ROUTES", "extract=pro,bogus"):
+        for _ in range(3):
+            assert route_for("extract").model == "pro"
+    assert caplog.text.count("malformed") == 1
+
+
+@patch("akili.ingest.gemini_client.genai")
+def test_client_calls_the_routed_model_and_records_route_metrics(mock_genai):
+    response = MagicMock(text="ok")
+    response.usage_metadata.prompt_token_count = 100
+    response.usage_metadata.candidates_token_count = 5
+    mock_genai.GenerativeModel.return_value.generate_content.return_value = response
+
+    client = GeminiClient()
+    result = client.generate("extract", ["x"], route=route_for("extract", "pinout_table"))
+    client.generate("format", "q")
+
+    assert result.model_name == "pro"
+    assert [c.args[0] for c in mock_genai.GenerativeModel.call_args_list] == [
+        "pro",
+        "default-model",
+    ]
+    routes = client.route_stats()
+    assert routes["extract:pinout_table"]["model"] == "pro"
+    assert routes["extract:pinout_table"]["input_tokens"] == 100
+    assert routes["extract:pinout_table"]["latency_p50_s"] is not None
+    assert routes["format"]["model"] == "default-model"
+    assert client.stats()["extract"]["calls"] == 1
+
+
+@patch("akili.config.EXTRACT_BATCH_PAGES", 4)
+def test_batched_pages_are_split_by_model(tmp_path, tmp_store):
+    import fitz
+
+    from akili.ingest.extract_schema import PageExtraction
+    from akili.ingest.pipeline import ingest_document
+
+    pdf = tmp_path / "doc.pdf"
+    doc = fitz.open()
+    for i in range(4):
+        doc.new_page().insert_text((72, 72), f"Page {i}")
+    doc.save(str(pdf))
+    doc.close()
+    page_types = ["text_description", "pinout_table", "text_description", "other"]
+    calls: list[tuple[list[int], Route]] = []
+
+    def fake_extract_pages(pages, doc_id, route=None):
+        calls.append(([p[0] for p in pages], route))
+        return {p[0]: PageExtraction() for p in pages}
+
+    with (
+        patch("akili.config.DOCS_DIR", str(tmp_path)),
+        patch.dict("os.environ", {"AKILI_DOCS_DIR": str(tmp_path)}),
+        patch("akili.config.INGEST_WORKERS", 1),
+        patch("akili.config.CONSENSUS_ENABLED", False),
+        patch("akili.ingest.pipeline.classify_page", side_effect=page_types),
+        patch("akili.ingest.pipeline.gemini_extract_pages", side_effect=fake_extract_pages),
+    ):
+        ingest_document(pdf, doc_id="d1", store=tmp_store)
+
+    assert calls == [
+        ([0], Route("extract:text_description", "flash")),
+        ([1], Route("extract:pinout_table", "pro")),
+        ([2, 3], Route("extract", "flash")),
+    ]
@@ -0,0 +1,148 @@
+"""Tests for near-duplicate page detection and extraction reuse."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from akili.ingest.extract_schema import PageExtraction, PointSchema, UnitExtract
+from akili.ingest.page_dedup import (
+    DuplicateIndex,
+    PageFingerprint,
+    lookup_cached,
+    page_fingerprint,
+    remap_extraction,
+    remember,
+)
+from akili.ingest.pipeline import ingest_document
+from akili.ingest.response_cache import GeminiResponseCache
+from akili.ingest.text_layer import TextLayerResult
+
+
+def _page(doc, lines: list[str]):
+    page = doc.new_page(width=612, height=792)
+    for i, line in enumerate(lines):
+        page.insert_text((72, 72 + 20 * i), line, fontsize=12)
+    return page
+
+
+def _extraction(page_index: int) -> PageExtraction:
+    return PageExtraction(
+        units=[
+            UnitExtract(id=f"p{page_index}_u0", value=1.0, origin=PointSchema(x=0.1, y=0.1)),
+            UnitExtract(id="u1", value=2.0, origin=PointSchema(x=0.2, y=0.2)),
+        ]
+    )
+
+
+class TestFingerprint:
+    def test_identical_pages_match_and_changed_values_do_not(self):
+        doc = fitz.open()
+        legal = ["Revision History", "Rev A  Initial release"]
+        a = page_fingerprint(_page(doc, legal))
+        b = page_fingerprint(_page(doc, legal))
+        c = page_fingerprint(_page(doc, ["Revision History", "Rev B  Initial release"]))
+        doc.close()
+        assert a == b
+        assert a.matches(b)
+        assert not a.matches(c)
+
+    def test_pages_without_text_need_identical_hash(self):
+        a = PageFingerprint(dhash=0b1010)
+        assert a.matches(PageFingerprint(dhash=0b1010))
+        assert not a.matches(PageFingerprint(dhash=0b1011))
+        with_text = PageFingerprint(dhash=0b1010, text_hash="t")
+        assert with_text.matches(PageFingerprint(dhash=0b1011, text_hash="t"), max_distance=1)
+
+    def test_index_returns_closest_earlier_page(self):
+        index: DuplicateIndex[str] = DuplicateIndex()
+        index.add(PageFingerprint(dhash=0b1111, text_hash="t"), 0, "far")
+        index.add(PageFingerprint(dhash=0b0001, text_hash="t"), 1, "near")
+        assert index.find(PageFingerprint(dhash=0b0000, text_hash="t")) == (1, "near")
+        assert index.find(PageFingerprint(dhash=0b0000, text_hash="other")) is None
+
+
+def test_remap_renames_page_prefixed_ids():
+    remapped = remap_extraction(_extraction(3), 3, 7)
+    assert [u.id for u in remapped.units] == ["p7_u0", "u1"]
+    assert [u.value for u in remapped.units] == [1.0, 2.0]
+
+
+def test_cache_round_trip_across_documents(tmp_path: Path):
+    cache = GeminiResponseCache(db_path=tmp_path / "cache.db")
+    fingerprint = PageFingerprint(dhash=0b1010, text_hash="t")
+    with patch("akili.ingest.page_dedup.get_response_cache", return_value=cache):
+        assert lookup_cached(fingerprint, 5, "flash") is None
+        remember(fingerprint, _extraction(2), 2, "flash")
+        reused = lookup_cached(PageFingerprint(dhash=0b1011, text_hash="t"), 5, "flash")
+        assert reused is not None
+        assert reused.units[0].id == "p5_u0"
+        assert lookup_cached(PageFingerprint(dhash=0b1010, text_hash="u"), 5, "flash") is None
+        # Another model route or wire format never reuses the entry.
+        assert lookup_cached(fingerprint, 5, "pro") is None
+        with patch("akili.config.EXTRACT_COMPACT_SCHEMA", True):
+            assert lookup_cached(fingerprint, 5, "flash") is None
+
+
+@pytest.fixture()
+def repeated_pdf(tmp_path: Path) -> Path:
+    doc = fitz.open()
+    _page(doc, ["Ordering Information", "AKILI-48Q  QFN-48"])
+    _page(doc, ["Electrical Characteristics", "VCC 3.3 V"])
+    _page(doc, ["Ordering Information", "AKILI-48Q  QFN-48"])
+    path = tmp_path / "repeated.pdf"
+    doc.save(path)
+    doc.close()
+    return path
+
+
+@patch("akili.ingest.pipeline.classify_page", return_value="other")
+@patch("akili.config.PAGE_DEDUP_ENABLED", True)
+def test_pipeline_reuses_duplicate_page(_mock_classify, repeated_pdf, tmp_store, tmp_path):
+    calls: list[int] = []
+
+    def fake_extract(page_index, image_bytes, doc_id, page_type_hint="", route=None):
+        calls.append(page_index)
+        return _extraction(page_index)
+
+    events: list[dict] = []
+    with (
+        patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}),
+        patch("akili.config.DOCS_DIR", str(tmp_path)),
+        patch("akili.ingest.pipeline.gemini_extract_page", side_effect=fake_extract),
+    ):
+        _, canonical, total_pages, pages_failed = ingest_document(
+            repeated_pdf, store=tmp_store, progress_callback=events.append
+        )
+
+    assert calls == [0, 1]
+    assert total_pages == 3
+    assert pages_failed == 0
+    assert events[-1]["duplicate_pages"] == 1
+    page_two = [u for u in canonical if u.page == 2]
+    assert [u.id for u in page_two] == ["p2_u0", "u1"]
+
+
+@patch("akili.config.PAGE_DEDUP_ENABLED", True)
+@patch("akili.config.TEXT_LAYER_ENABLED", True)
+def test_text_layer_pages_skip_the_cache_lookup(repeated_pdf, tmp_store, tmp_path):
+    events: list[dict] = []
+    with (
+        patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}),
+        patch("akili.config.DOCS_DIR", str(tmp_path)),
+        patch(
+            "akili.ingest.pdf_loader.extract_text_layer",
+            side_effect=lambda page, index: TextLayerResult(_extraction(index), 1.0),
+        ),
+        patch("akili.ingest.pipeline.lookup_cached", return_value=None) as lookup,
+        patch("akili.ingest.pipeline.gemini_extract_page") as extract,
+    ):
+        ingest_document(repeated_pdf, store=tmp_store, progress_callback=events.append)
+
+    assert events[-1]["text_layer_pages"] == 3
+    lookup.assert_not_called()
+    extract.assert_not_called()
@@ -99,7 +99,7 @@ class TestPipelineIntegration:
 
     @patch("akili.ingest.pipeline.classify_page", return_value="other")
     @patch("akili.ingest.pipeline.get_extraction_hint", return_value="")
-    @patch("akili.ingest.gemini_extract.genai")
+    @patch("akili.ingest.gemini_client.genai")
     @patch("akili.ingest.gemini_extract.config.GOOGLE_API_KEY", "test-key")
     def test_full_ingest_produces_canonical_objects(
         self, mock_genai, mock_hint, mock_classify, synthetic_pdf, tmp_store
@@ -129,7 +129,7 @@ class TestPipelineIntegration:
 
     @patch("akili.ingest.pipeline.classify_page", return_value="other")
     @patch("akili.ingest.pipeline.get_extraction_hint", return_value="")
-    @patch("akili.ingest.gemini_extract.genai")
+    @patch("akili.ingest.gemini_client.genai")
     @patch("akili.ingest.gemini_extract.config.GOOGLE_API_KEY", "test-key")
     def test_ingest_stores_to_db(
         self, mock_genai, mock_hint, mock_classify, synthetic_pdf, tmp_store
@@ -155,7 +155,7 @@ class TestPipelineIntegration:
 
     @patch("akili.ingest.pipeline.classify_page", return_value="other")
     @patch("akili.ingest.pipeline.get_extraction_hint", return_value="")
-    @patch("akili.ingest.gemini_extract.genai")
+    @patch("akili.ingest.gemini_client.genai")
     @patch("akili.ingest.gemini_extract.config.GOOGLE_API_KEY", "test-key")
     def test_ingest_canonical_data_integrity(
         self, mock_genai, mock_hint, mock_classify, synthetic_pdf, tmp_store
@@ -182,7 +182,7 @@ class TestPipelineIntegration:
 
     @patch("akili.ingest.pipeline.classify_page", return_value="other")
     @patch("akili.ingest.pipeline.get_extraction_hint", return_value="")
-    @patch("akili.ingest.gemini_extract.genai")
+    @patch("akili.ingest.gemini_client.genai")
     @patch("akili.ingest.gemini_extract.config.GOOGLE_API_KEY", "test-key")
     def test_ingest_with_empty_extraction(
         self, mock_genai, mock_hint, mock_classify, synthetic_pdf, tmp_store
@@ -205,7 +205,7 @@ class TestPipelineIntegration:
 
     @patch("akili.ingest.pipeline.classify_page", return_value="other")
     @patch("akili.ingest.pipeline.get_extraction_hint", return_value="")
-    @patch("akili.ingest.gemini_extract.genai")
+    @patch("akili.ingest.gemini_client.genai")
     @patch("akili.ingest.gemini_extract.config.GOOGLE_API_KEY", "test-key")
     def test_ingest_progress_callback(
         self, mock_genai, mock_hint, mock_classify, synthetic_pdf, tmp_store
@@ -239,7 +239,7 @@ class TestPipelineIntegration:
 
     @patch("akili.ingest.pipeline.classify_page", return_value="other")
     @patch("akili.ingest.pipeline.get_extraction_hint", return_value="")
-    @patch("akili.ingest.gemini_extract.genai")
+    @patch("akili.ingest.gemini_client.genai")
     @patch("akili.ingest.gemini_extract.config.GOOGLE_API_KEY", "test-key")
     def test_ingest_gemini_failure_counts_as_failed_page(
         self, mock_genai, mock_hint, mock_classify, synthetic_pdf, tmp_store
@@ -257,3 +257,166 @@ class TestPipelineIntegration:
         assert total_pages == 1
         assert pages_failed == 1
         assert len(canonical) == 0
+
+
+@pytest.fixture()
+def multipage_pdf(tmp_path: Path) -> Path:
+    """Four-page PDF for exercising the parallel page workers."""
+    import fitz
+
+    pdf_path = tmp_path / "multipage.pdf"
+    doc = fitz.open()
+    for i in range(4):
+        page = doc.new_page(width=612, height=792)
+        page.insert_text((72, 72), f"Page {i}", fontsize=16)
+    doc.save(str(pdf_path))
+    doc.close()
+    return pdf_path
+
+
+class TestParallelIngest:
+    """Pages run on a worker pool but results are collected in page order."""
+
+    @patch("akili.ingest.pipeline.classify_page", return_value="other")
+    @patch("akili.config.INGEST_WORKERS", 4)
+    def test_results_in_page_order_with_failure(self, _mock_classify, multipage_pdf, tmp_store):
+        import time
+
+        from akili.ingest.extract_schema import PageExtraction, PointSchema, UnitExtract
+
+        def fake_extract(page_index, image_bytes, doc_id, page_type_hint="", route=None):
+            # Early pages finish last so completion order differs from page order.
+            time.sleep(0.05 * (3 - page_index))
+            if page_index == 2:
+                raise RuntimeError("Gemini API error")
+            return PageExtraction(
+                units=[
+                    UnitExtract(
+                        id=f"u{page_index}", value=page_index, origin=PointSchema(x=0.1, y=0.1)
+                    )
+                ]
+            )
+
+        events: list[dict] = []
+        with patch("akili.ingest.pipeline.gemini_extract_page", side_effect=fake_extract):
+            _, canonical, total_pages, pages_failed = ingest_document(
+                multipage_pdf, store=tmp_store, progress_callback=events.append
+            )
+
+        assert total_pages == 4
+        assert pages_failed == 1
+        assert [o.page for o in canonical] == [0, 1, 3]
+        canonicalizing = [e["page"] for e in events if e["phase"] == "canonicalizing"]
+        assert canonicalizing == [0, 1, 3]
+
+    @patch("akili.ingest.pipeline.classify_page", return_value="other")
+    @patch("akili.config.INGEST_WORKERS", 1)
+    def test_rendering_stays_ahead_by_a_bounded_window(
+        self, _mock_classify, multipage_pdf, tmp_store
+    ):
+        import threading
+
+        from akili.ingest import pipeline
+        from akili.ingest.extract_schema import PageExtraction
+
+        rendered: list[int] = []
+        max_ahead = 0
+        lock = threading.Lock()
+        real_iter = pipeline.iter_rendered_pages
+
+        def tracking_iter(path, **kwargs):
+            for page in real_iter(path, **kwargs):
+                rendered.append(page.page_index)
+                yield page
+
+        def fake_extract(page_index, image_bytes, doc_id, page_type_hint="", route=None):
+            nonlocal max_ahead
+            with lock:
+                max_ahead = max(max_ahead, len(rendered) - page_index)
+            return PageExtraction()
+
+        with (
+            patch("akili.ingest.pipeline.iter_rendered_pages", side_effect=tracking_iter),
+            patch("akili.ingest.pipeline.gemini_extract_page", side_effect=fake_extract),
+        ):
+            _, _, total_pages, pages_failed = ingest_document(multipage_pdf, store=tmp_store)
+
+        assert total_pages == 4
+        assert pages_failed == 0
+        assert rendered == [0, 1, 2, 3]
+        # One worker + one prefetched page: never more than two pages rendered ahead.
+        assert max_ahead <= 2
+
+    @patch("akili.ingest.pipeline.classify_page", return_value="other")
+    @patch("akili.config.INGEST_WORKERS", 2)
+    @patch("akili.config.EXTRACT_BATCH_PAGES", 3)
+    def test_batched_extraction_groups_pages(self, _mock_classify, multipage_pdf, tmp_store):
+        from akili.ingest.extract_schema import PageExtraction, PointSchema, UnitExtract
+
+        groups: list[list[int]] = []
+
+        def fake_extract_pages(pages, doc_id, route=None):
+            groups.append([page_index for page_index, _, _ in pages])
+            return {
+                page_index: PageExtraction(
+                    units=[
+                        UnitExtract(
+                            id=f"u{page_index}", value=page_index, origin=PointSchema(x=0.1, y=0.1)
+                        )
+                    ]
+                )
+                for page_index, _, _ in pages
+            }
+
+        with patch("akili.ingest.pipeline.gemini_extract_pages", side_effect=fake_extract_pages):
+            _, canonical, total_pages, pages_failed = ingest_document(
+                multipage_pdf, store=tmp_store
+            )
+
+        assert total_pages == 4
+        assert pages_failed == 0
+        assert groups == [[0, 1, 2], [3]]
+        assert [o.page for o in canonical] == [0, 1, 2, 3]
+
+    @patch("akili.ingest.pipeline.classify_page", return_value="other")
+    @patch("akili.config.INGEST_WORKERS", 1)
+    @patch("akili.config.EXTRACT_BATCH_PAGES", 3)
+    def test_failed_batch_falls_back_to_single_pages(
+        self, _mock_classify, multipage_pdf, tmp_store
+    ):
+        from akili.ingest.extract_schema import PageExtraction, PointSchema, UnitExtract
+
+        def extraction(page_index):
+            return PageExtraction(
+                units=[
+                    UnitExtract(
+                        id=f"u{page_index}", value=page_index, origin=PointSchema(x=0.1, y=0.1)
+                    )
+                ]
+            )
+
+        def fake_extract_pages(pages, doc_id, route=None):
+            if pages[0][0] == 0:
+                raise RuntimeError("upstream error on the multi-page request")
+            return {page_index: extraction(page_index) for page_index, _, _ in pages}
+
+        singles: list[int] = []
+
+        def fake_extract_page(page_index, image_bytes, doc_id, **kwargs):
+            singles.append(page_index)
+            if page_index == 1:
+                raise RuntimeError("page 1 is unreadable")
+            return extraction(page_index)
+
+        with (
+            patch("akili.ingest.pipeline.gemini_extract_pages", side_effect=fake_extract_pages),
+            patch("akili.ingest.pipeline.gemini_extract_page", side_effect=fake_extract_page),
+        ):
+            _, canonical, total_pages, pages_failed = ingest_document(
+                multipage_pdf, store=tmp_store
+            )
+
+        # Only the page that also failed on its own is lost, not the whole group.
+        assert singles == [0, 1, 2]
+        assert pages_failed == 1
+        assert [o.page for o in canonical] == [0, 2, 3]
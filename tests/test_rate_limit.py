@@ -0,0 +1,183 @@
+"""Tests for the shared Gemini RPM/TPM rate limiter."""
+
+from __future__ import annotations
+
+import struct
+import zlib
+
+import pytest
+
+from akili.ingest.rate_limit import (
+    RateLimiter,
+    estimate_image_tokens,
+    estimate_request_tokens,
+)
+
+
+class FakeClock:
+    """Deterministic clock whose sleep advances time instead of blocking."""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.slept: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def _png_header(width: int, height: int) -> bytes:
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    chunk = b"IHDR" + ihdr
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + struct.pack(">I", len(ihdr))
+        + chunk
+        + struct.pack(">I", zlib.crc32(chunk))
+    )
+
+
+class TestTokenEstimates:
+    def test_small_png_is_one_tile(self):
+        assert estimate_image_tokens(_png_header(300, 300)) == 258
+
+    def test_letter_page_at_150_dpi(self):
+        # 1275 x 1650 px -> 2 x 3 tiles
+        assert estimate_image_tokens(_png_header(1275, 1650)) == 6 * 258
+
+    def test_unknown_format_uses_default(self):
+        assert estimate_image_tokens(b"\xff\xd8\xff\xe0jpeg") == 6 * 258
+
+    def test_request_includes_prompt_text(self):
+        tokens = estimate_request_tokens("x" * 400, [_png_header(100, 100)])
+        assert tokens == 100 + 258
+
+
+class TestRateLimiter:
+    def test_burst_up_to_rpm_then_waits(self):
+        clock = FakeClock()
+        limiter = RateLimiter(60, 0, clock=clock, sleep=clock.sleep)
+        for _ in range(60):
+            assert limiter.acquire() == 0.0
+        waited = limiter.acquire()
+        assert waited == pytest.approx(1.0)
+
+    def test_tokens_per_minute_bucket(self):
+        clock = FakeClock()
+        limiter = RateLimiter(0, 1200, clock=clock, sleep=clock.sleep)
+        assert limiter.acquire(1000) == 0.0
+        # 200 tokens left; 1000 more needs 800 tokens at 20 tokens/s = 40 s
+        assert limiter.acquire(1000) == pytest.approx(40.0)
+
+    def test_request_larger_than_bucket_is_capped(self):
+        clock = FakeClock()
+        limiter = RateLimiter(0, 100, clock=clock, sleep=clock.sleep)
+        assert limiter.acquire(10_000) == 0.0
+
+    def test_zero_rates_are_unlimited(self):
+        clock = FakeClock()
+        limiter = RateLimiter(0, 0, clock=clock, sleep=clock.sleep)
+        for _ in range(1000):
+            limiter.acquire(10_000)
+        assert clock.slept == []
+
+    def test_pause_blocks_callers(self):
+        clock = FakeClock()
+        limiter = RateLimiter(600, 0, clock=clock, sleep=clock.sleep)
+        limiter.pause(30)
+        assert limiter.acquire() == pytest.approx(30.0)
+        assert limiter.acquire() == 0.0
+
+
+class _RateLimited(Exception):
+    def __str__(self) -> str:
+        return "429 Resource exhausted"
+
+
+def _call(limiter: RateLimiter, error: Exception | None = None) -> None:
+    try:
+        with limiter.admit():
+            if error is not None:
+                raise error
+    except type(error) if error is not None else ():
+        pass
+
+
+class TestAdaptiveLimiter:
+    def _limiter(self, clock: FakeClock, **kwargs) -> RateLimiter:
+        kwargs.setdefault("max_concurrency", 8)
+        return RateLimiter(60, 0, clock=clock, sleep=clock.sleep, adaptive=True, **kwargs)
+
+    def test_rate_limit_halves_rate_and_concurrency(self):
+        clock = FakeClock()
+        limiter = self._limiter(clock)
+        _call(limiter, _RateLimited())
+        stats = limiter.stats()
+        assert stats["requests_per_minute"] == 30
+        assert stats["max_concurrent"] == 4
+        assert stats["in_flight"] == 0
+        # The request bucket was emptied: the next call waits one interval at the new rate.
+        with limiter.admit():
+            pass
+        assert clock.slept == [pytest.approx(2.0)]
+
+    def test_successes_increase_additively_up_to_ceiling(self):
+        clock = FakeClock()
+        limiter = self._limiter(clock, increase=0.1)
+        _call(limiter, _RateLimited())
+        for _ in range(3):
+            _call(limiter)
+        assert limiter.stats()["rate_fraction"] == pytest.approx(0.8)
+        for _ in range(50):
+            _call(limiter)
+        assert limiter.stats()["requests_per_minute"] == 60
+        assert limiter.stats()["max_concurrent"] == 8
+
+    def test_rate_limits_from_one_window_decrease_once(self):
+        clock = FakeClock()
+        limiter = self._limiter(clock)
+        with pytest.raises(_RateLimited):
+            with limiter.admit():
+                with pytest.raises(_RateLimited):
+                    with limiter.admit():
+                        raise _RateLimited()
+                raise _RateLimited()
+        assert limiter.stats()["rate_fraction"] == 0.5
+
+    def test_other_errors_do_not_adjust(self):
+        clock = FakeClock()
+        limiter = self._limiter(clock)
+        _call(limiter, ValueError("bad request"))
+        assert limiter.stats()["rate_fraction"] == 1.0
+        assert limiter.stats()["in_flight"] == 0
+
+    def test_concurrency_limit_blocks_until_a_slot_frees(self):
+        import threading
+
+        limiter = RateLimiter(0, 0, adaptive=True, max_concurrency=1)
+        entered = threading.Event()
+        release = threading.Event()
+        second_done = threading.Event()
+
+        def first() -> None:
+            with limiter.admit():
+                entered.set()
+                release.wait(5)
+
+        def second() -> None:
+            with limiter.admit():
+                second_done.set()
+
+        t1 = threading.Thread(target=first)
+        t1.start()
+        entered.wait(5)
+        t2 = threading.Thread(target=second)
+        t2.start()
+        assert not second_done.wait(0.1)
+        release.set()
+        assert second_done.wait(5)
+        t1.join()
+        t2.join()
@@ -0,0 +1,78 @@
+"""Tests for page-type render profiles."""
+
+from __future__ import annotations
+
+from pathlib import Path
+from unittest.mock import patch
+
+import fitz
+import pytest
+
+from akili.ingest.pdf_loader import iter_rendered_pages
+from akili.ingest.rate_limit import _jpeg_size, _png_size, estimate_image_tokens
+from akili.ingest.render_profiles import (
+    RENDER_PROFILES,
+    RenderProfile,
+    image_mime_type,
+    profile_for,
+    render_page,
+)
+
+
+@pytest.fixture()
+def doc():
+    d = fitz.open()
+    page = d.new_page(width=612, height=792)
+    page.insert_text((72, 72), "Electrical Characteristics  VCC 3.3 V", fontsize=12)
+    yield d
+    d.close()
+
+
+class TestProfileSelection:
+    def test_disabled_or_unknown_type_is_standard(self):
+        assert profile_for("pinout_table").name == "standard"
+        with patch("akili.config.RENDER_PROFILES_ENABLED", True):
+            assert profile_for(None).name == "standard"
+            assert profile_for("other").name == "standard"
+
+    @patch("akili.config.RENDER_PROFILES_ENABLED", True)
+    def test_default_map_and_override(self):
+        assert profile_for("text_description").name == "text"
+        assert profile_for("pinout_table").name == "dense_table"
+        with patch(
+            "akili.config.RENDER_PROFILE_MAP", "pinout_table=standard, other=text, x=missing"
+        ):
+            assert profile_for("pinout_table").name == "standard"
+            assert profile_for("other").name == "text"
+
+
+class TestRenderPage:
+    def test_grayscale_text_profile_is_smaller(self, doc):
+        standard = render_page(doc[0])
+        text = render_page(doc[0], RENDER_PROFILES["text"])
+        assert image_mime_type(text) == "image/png"
+        assert _png_size(text) == _png_size(standard)
+        assert len(text) < len(standard)
+
+    def test_jpeg_encoding_and_token_estimate(self, doc):
+        jpeg = render_page(doc[0], RenderProfile("jpeg", dpi=72, encoding="jpeg"))
+        assert image_mime_type(jpeg) == "image/jpeg"
+        assert _jpeg_size(jpeg) == (612, 792)
+        assert estimate_image_tokens(jpeg) == 2 * 258  # 612x792: two 768 px tiles
+
+    def test_auto_encoding_keeps_the_smaller_image(self, doc):
+        auto = render_page(doc[0], RenderProfile("auto", encoding="auto"))
+        png = render_page(doc[0], RenderProfile("png"))
+        jpeg = render_page(doc[0], RenderProfile("jpeg", encoding="jpeg"))
+        assert len(auto) == min(len(png), len(jpeg))
+
+
+@patch("akili.config.RENDER_PROFILES_ENABLED", True)
+def test_loader_renders_with_the_known_page_type(doc, tmp_path: Path):
+    path = tmp_path / "doc.pdf"
+    doc.new_page(width=612, height=792)
+    doc.save(path)
+    pages = list(iter_rendered_pages(path, page_types={0: "pinout_table"}))
+    assert [p.profile for p in pages] == ["dense_table", "standard"]
+    assert _png_size(pages[0].image) == (1700, 2200)
+    assert _png_size(pages[1].image) == (1275, 1650)
@@ -0,0 +1,171 @@
+"""Tests for the content-addressed Gemini response cache."""
+
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from akili.ingest.response_cache import GeminiResponseCache, cache_key
+
+EXTRACTION_JSON = json.dumps(
+    {
+        "units": [{"value": 5.5, "unit_of_measure": "V", "origin": {"x": 0.5, "y": 0.5}}],
+        "bijections": [],
+        "grids": [],
+    }
+)
+
+
+@pytest.fixture()
+def cache(tmp_path: Path) -> GeminiResponseCache:
+    return GeminiResponseCache(db_path=tmp_path / "cache.db")
+
+
+class TestCacheKey:
+    def test_key_depends_on_every_component(self):
+        base = cache_key("extract", b"png", "1", "gemini-2.0-flash", "hint")
+        assert cache_key("extract", b"png", "1", "gemini-2.0-flash", "hint") == base
+        assert cache_key("classify", b"png", "1", "gemini-2.0-flash", "hint") != base
+        assert cache_key("extract", b"png2", "1", "gemini-2.0-flash", "hint") != base
+        assert cache_key("extract", b"png", "2", "gemini-2.0-flash", "hint") != base
+        assert cache_key("extract", b"png", "1", "gemini-2.5-flash", "hint") != base
+        assert cache_key("extract", b"png", "1", "gemini-2.0-flash", "") != base
+
+
+class TestGeminiResponseCache:
+    def test_get_put_and_stats(self, cache):
+        assert cache.get("k1") is None
+        cache.put("k1", "extract", "m", "hello")
+        assert cache.get("k1") == "hello"
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+        assert stats["entries"] == 1
+        assert stats["bytes"] == 5
+
+    def test_lru_eviction_by_size(self, tmp_path):
+        cache = GeminiResponseCache(db_path=tmp_path / "cache.db", max_bytes=20)
+        cache.put("a", "extract", "m", "x" * 8)
+        cache.put("b", "extract", "m", "y" * 8)
+        # Touch "a" so "b" becomes least recently used.
+        with patch("akili.ingest.response_cache.time.time", return_value=1e12):
+            assert cache.get("a") is not None
+        with patch("akili.ingest.response_cache.time.time", return_value=2e12):
+            cache.put("c", "extract", "m", "z" * 8)
+        assert cache.get("b") is None
+        assert cache.get("a") == "x" * 8
+        assert cache.get("c") == "z" * 8
+        assert cache.stats()["evictions"] == 1
+
+    def test_total_size_is_tracked_across_rewrites_and_reopening(self, tmp_path):
+        cache = GeminiResponseCache(db_path=tmp_path / "cache.db", max_bytes=100)
+        cache.put("a", "extract", "m", "x" * 8)
+        cache.put("a", "extract", "m", "x" * 3)
+        cache.put("b", "extract", "m", "y" * 5)
+        assert cache.stats()["bytes"] == 8
+        assert GeminiResponseCache(db_path=tmp_path / "cache.db").stats()["bytes"] == 8
+        cache.clear()
+        assert cache.stats()["bytes"] == 0
+
+    def test_eviction_reads_the_oldest_entries_in_batches(self, tmp_path):
+        cache = GeminiResponseCache(db_path=tmp_path / "cache.db", max_bytes=200)
+        for i in range(100):
+            with patch("akili.ingest.response_cache.time.time", return_value=float(i)):
+                cache.put(f"k{i}", "extract", "m", "x" * 2)
+        with (
+            patch("akili.ingest.response_cache._EVICT_BATCH", 8),
+            patch("akili.ingest.response_cache.time.time", return_value=1000.0),
+        ):
+            cache.put("big", "extract", "m", "y" * 50)
+        stats = cache.stats()
+        assert stats["evictions"] == 25 and stats["bytes"] == 200
+        assert cache.get("k24") is None and cache.get("k25") == "xx"
+
+    def test_default_path_is_next_to_the_database(self, tmp_path):
+        from akili.ingest import response_cache
+
+        with (
+            patch("akili.config.GEMINI_CACHE_ENABLED", True),
+            patch("akili.config.GEMINI_CACHE_DB_PATH", ""),
+            patch("akili.config.DB_PATH", str(tmp_path / "data" / "akili.db")),
+            patch.dict(os.environ, {"DATABASE_URL": ""}),
+            patch.object(response_cache, "_cache", None),
+        ):
+            (tmp_path / "data").mkdir()
+            response_cache.get_response_cache()
+        assert (tmp_path / "data" / "akili_cache.db").is_file()
+
+    def test_oversized_entry_not_stored(self, tmp_path):
+        cache = GeminiResponseCache(db_path=tmp_path / "cache.db", max_bytes=4)
+        cache.put("a", "extract", "m", "too large")
+        assert cache.get("a") is None
+
+
+class TestCachedCalls:
+    @patch("akili.ingest.gemini_client.genai")
+    def test_extract_page_second_call_hits_cache(self, mock_genai, cache):
+        from akili.ingest.gemini_extract import extract_page
+
+        mock_response = MagicMock()
+        mock_response.text = EXTRACTION_JSON
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = mock_response
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        with (
+            patch("akili.ingest.gemini_extract.get_response_cache", return_value=cache),
+            patch("akili.config.GOOGLE_API_KEY", "test-key"),
+        ):
+            first = extract_page(0, b"page-png", "doc1")
+            # Same page content at a different position (e.g. a revised document).
+            second = extract_page(3, b"page-png", "doc2")
+
+        assert mock_model.generate_content.call_count == 1
+        assert first.units[0].id == "p0_u0"
+        assert second.units[0].id == "p3_u0"
+        assert cache.stats()["hits"] == 1
+
+    @patch("akili.ingest.gemini_client.genai")
+    def test_extract_page_does_not_cache_invalid_json(self, mock_genai, cache):
+        from akili.ingest.gemini_extract import extract_page
+
+        mock_response = MagicMock()
+        mock_response.text = "not json"
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = mock_response
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        with (
+            patch("akili.ingest.gemini_extract.get_response_cache", return_value=cache),
+            patch("akili.config.GOOGLE_API_KEY", "test-key"),
+        ):
+            extract_page(0, b"page-png", "doc1")
+            extract_page(0, b"page-png", "doc1")
+
+        assert mock_model.generate_content.call_count == 2
+        assert cache.stats()["entries"] == 0
+
+    @patch("akili.config.PAGE_CLASSIFY_ENABLED", True)
+    @patch("akili.ingest.gemini_client.genai")
+    def test_classify_page_second_call_hits_cache(self, mock_genai, cache):
+        from akili.ingest.page_classifier import classify_page
+
+        mock_response = MagicMock()
+        mock_response.text = "pinout_table"
+        mock_model = MagicMock()
+        mock_model.generate_content.return_value = mock_response
+        mock_genai.GenerativeModel.return_value = mock_model
+
+        with (
+            patch("akili.ingest.page_classifier.get_response_cache", return_value=cache),
+            patch("akili.config.GOOGLE_API_KEY", "test-key"),
+        ):
+            assert classify_page(b"page-png") == "pinout_table"
+            assert classify_page(b"page-png") == "pinout_table"
+
+        assert mock_model.generate_content.call_count == 1
@@ -0,0 +1,104 @@
+"""Tests for layout-based region-of-interest cropping."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import fitz
+
+from akili.ingest.extract_schema import BBoxSchema, PageExtraction, PointSchema, UnitExtract
+from akili.ingest.pdf_loader import iter_rendered_pages
+from akili.ingest.pipeline import ingest_document
+from akili.ingest.rate_limit import _png_size
+from akili.ingest.roi import find_content_region
+
+
+def _spec_page(doc):
+    """A page with a running header, a ruled table in its upper half and a page number."""
+    page = doc.new_page(width=612, height=792)
+    page.insert_text((72, 30), "AKILI-48Q Datasheet", fontsize=9)
+    page.insert_text((100, 150), "Electrical Characteristics", fontsize=12)
+    page.insert_text((100, 180), "VCC  Supply voltage  3.3 V", fontsize=10)
+    page.draw_line((100, 190), (400, 190))
+    page.draw_rect(fitz.Rect(100, 160, 400, 300))
+    page.insert_text((300, 770), "12", fontsize=9)
+    return page
+
+
+def test_region_is_the_body_content_without_running_bands():
+    doc = fitz.open()
+    region = find_content_region(_spec_page(doc))
+    doc.close()
+    assert region is not None
+    assert abs(region.x0 - (100 / 612 - 0.02)) < 0.01
+    assert abs(region.x1 - (400 / 612 + 0.02)) < 0.01
+    assert 0.1 < region.y0 < 0.2
+    assert abs(region.y1 - (300 / 792 + 0.02)) < 0.01
+
+
+def test_no_region_for_scanned_or_full_pages():
+    doc = fitz.open()
+    blank = doc.new_page(width=612, height=792)
+    blank.draw_rect(fitz.Rect(100, 100, 300, 300))  # drawings only: no text layer
+    full = doc.new_page(width=612, height=792)
+    full.insert_text((60, 70), "top left", fontsize=10)
+    full.draw_line((20, 60), (592, 740))
+    assert find_content_region(doc[0]) is None
+    assert find_content_region(doc[1]) is None
+    doc.close()
+
+
+@patch("akili.config.ROI_PADDING", 0.0)
+def test_loader_renders_the_cropped_region(tmp_path: Path):
+    doc = fitz.open()
+    _spec_page(doc)
+    path = tmp_path / "doc.pdf"
+    doc.save(path)
+    doc.close()
+    (page,) = iter_rendered_pages(path, roi=True)
+    assert page.region is not None
+    width, height = _png_size(page.image)
+    assert abs(width - 300 / 72 * 150) <= 2
+    assert height < 1650 / 2
+
+
+@patch("akili.ingest.pipeline.classify_page", return_value="other")
+@patch("akili.config.ROI_ENABLED", True)
+def test_pipeline_maps_cropped_coordinates_to_the_page(_mock_classify, tmp_store, tmp_path):
+    doc = fitz.open()
+    _spec_page(doc)
+    path = tmp_path / "spec.pdf"
+    doc.save(path)
+    doc.close()
+
+    def fake_extract(page_index, image_bytes, doc_id, page_type_hint="", route=None):
+        return PageExtraction(
+            units=[
+                UnitExtract(
+                    id="u0",
+                    value=3.3,
+                    unit_of_measure="V",
+                    origin=PointSchema(x=0.0, y=0.0),
+                    bbox=BBoxSchema(x1=0.0, y1=0.0, x2=1.0, y2=1.0),
+                )
+            ]
+        )
+
+    events: list[dict] = []
+    with (
+        patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}),
+        patch("akili.config.DOCS_DIR", str(tmp_path)),
+        patch("akili.ingest.pipeline.gemini_extract_page", side_effect=fake_extract),
+    ):
+        _, canonical, _, pages_failed = ingest_document(
+            path, store=tmp_store, progress_callback=events.append
+        )
+
+    assert pages_failed == 0
+    assert events[-1]["cropped_pages"] == 1
+    (unit,) = canonical
+    assert abs(unit.origin.x - (100 / 612 - 0.02)) < 0.01
+    assert abs(unit.bbox.x2 - (400 / 612 + 0.02)) < 0.01
+    assert unit.bbox.y2 < 0.5
@@ -0,0 +1,137 @@
+"""Tests for priority and per-tenant fair scheduling of Gemini requests."""
+
+from __future__ import annotations
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from akili.ingest.rate_limit import RateLimiter
+from akili.ingest.scheduler import (
+    GeminiScheduler,
+    Priority,
+    Work,
+    _FairQueue,
+    current_work,
+    gemini_work,
+    in_current_work,
+)
+
+
+class _FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _wait_for(predicate) -> None:
+    deadline = time.monotonic() + 5
+    while not predicate():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_turns_go_by_class_then_round_robin_over_tenants():
+    queue = _FairQueue()
+    order: list[str] = []
+    arrivals = [
+        ("bulk", Work(Priority.BULK, "corpus")),
+        ("a1", Work(Priority.INGEST, "alice")),
+        ("a2", Work(Priority.INGEST, "alice")),
+        ("a3", Work(Priority.INGEST, "alice")),
+        ("b1", Work(Priority.INGEST, "bob")),
+        ("b2", Work(Priority.INGEST, "bob")),
+    ]
+
+    def waiter(name: str, work: Work) -> None:
+        with queue.turn(work):
+            order.append(name)
+
+    threads = []
+    with queue.turn(Work(Priority.INGEST, "alice")):
+        for i, (name, work) in enumerate(arrivals, 1):
+            t = threading.Thread(target=waiter, args=(name, work))
+            t.start()
+            threads.append(t)
+            _wait_for(lambda i=i: len(queue.waiting()) == i)
+    for t in threads:
+        t.join(timeout=5)
+
+    # alice was just served, so bob goes first; bulk waits for every ingest request.
+    assert order == ["b1", "a1", "b2", "a2", "a3", "bulk"]
+
+
+def test_idle_tenants_leave_the_rotation():
+    queue = _FairQueue()
+    for i in range(100):
+        with queue.turn(Work(Priority.INGEST, f"user-{i}")):
+            pass
+    assert list(queue._last_turn) == [Work(Priority.INGEST, "user-99")]
+
+
+def test_background_work_leaves_the_interactive_reserve():
+    clock = _FakeClock()
+    limiter = RateLimiter(10, 0, clock=clock, sleep=clock.sleep)
+    scheduler = GeminiScheduler(interactive_reserve=0.2)
+
+    ingest = Work(Priority.INGEST, "alice")
+    for _ in range(8):
+        with scheduler.admit(limiter, work=ingest):
+            pass
+    assert clock.sleeps == []
+    # Two requests' worth of budget stay available to interactive calls, without waiting.
+    for _ in range(2):
+        with scheduler.admit(limiter, work=Work(Priority.INTERACTIVE)):
+            pass
+    assert clock.sleeps == []
+
+    with scheduler.admit(limiter, work=ingest):
+        pass
+    assert sum(clock.sleeps) == 18.0  # refill to 3 requests (1 + the reserve of 2)
+    stats = scheduler.stats()
+    assert stats["admitted"] == {"interactive": 2, "ingest": 9, "bulk": 0}
+    assert stats["waiting"]["ingest"] == {}
+
+
+def test_work_follows_tasks_into_thread_pools():
+    assert current_work() == Work(Priority.BULK, "default")
+    with gemini_work(Priority.INGEST, "alice"):
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            assert pool.submit(in_current_work(current_work)).result() == Work(
+                Priority.INGEST, "alice"
+            )
+            assert pool.submit(current_work).result() == Work()
+        with gemini_work(Priority.INTERACTIVE):
+            assert current_work() == Work(Priority.INTERACTIVE, "alice")
+    assert current_work() == Work()
+
+
+@patch("akili.ingest.gemini_client.genai")
+def test_client_admits_requests_as_the_current_work(mock_genai):
+    from akili.ingest.gemini_client import GeminiClient
+    from akili.ingest.gemini_format import format_answer
+
+    response = MagicMock(text="Pin 1 is VCC.")
+    response.usage_metadata.prompt_token_count = 1
+    response.usage_metadata.candidates_token_count = 1
+    mock_genai.GenerativeModel.return_value.generate_content.return_value = response
+    scheduler = GeminiScheduler()
+    with (
+        patch("akili.config.GOOGLE_API_KEY", "test-key"),
+        patch("akili.config.GEMINI_SCHEDULER_ENABLED", True),
+        patch("akili.ingest.scheduler._scheduler", scheduler),
+        patch("akili.ingest.gemini_client._client", GeminiClient()),
+    ):
+        with gemini_work(Priority.INGEST, "alice"):
+            GeminiClient().generate("extract", ["page"])
+            assert format_answer("pin 1?", "pin 1 = VCC", "p1") == "Pin 1 is VCC."
+
+    assert scheduler.stats()["admitted"] == {"interactive": 1, "ingest": 1, "bulk": 0}
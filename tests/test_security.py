@@ -67,10 +67,9 @@ class TestMaxPages:
         with (
             patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}),
             patch("akili.config.DOCS_DIR", str(tmp_path)),
-            patch("akili.ingest.pipeline.load_pdf_pages") as mock_load,
+            patch("akili.ingest.pipeline.count_pdf_pages", return_value=11),
             patch("akili.config.MAX_PAGES", 10),
         ):
-            mock_load.return_value = [b"fake"] * 11
             with pytest.raises(ValueError, match="exceeds maximum"):
                 ingest_document(pdf_path)
 
@@ -127,6 +127,20 @@ class TestStoreUnits:
         assert len(units) == 1
         assert float(units[0].value) == 5.0
 
+    def test_replace_swaps_facts_in_one_transaction(self, tmp_store: Store):
+        def unit(uid: str) -> Unit:
+            return Unit(id=uid, value=1.0, origin=Point(x=0.1, y=0.1), doc_id="doc1", page=0)
+
+        tmp_store.store_canonical("doc1", "test.pdf", 1, [unit("old")], [], [])
+        with pytest.raises(AttributeError):
+            tmp_store.store_canonical(
+                "doc1", "test.pdf", 1, [unit("new"), object()], [], [], replace=True
+            )
+        assert [u.id for u in tmp_store.get_units_by_doc("doc1")] == ["old"]
+
+        tmp_store.store_canonical("doc1", "test.pdf", 1, [unit("new")], [], [], replace=True)
+        assert [u.id for u in tmp_store.get_units_by_doc("doc1")] == ["new"]
+
 
 class TestStoreBijections:
     def test_store_and_retrieve_bijection(self, tmp_store: Store):
@@ -0,0 +1,136 @@
+"""Tests for the born-digital text-layer fast path."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from akili.canonical import Bijection, Grid, Unit
+from akili.ingest.pdf_loader import iter_rendered_pages
+from akili.ingest.pipeline import ingest_document
+from akili.ingest.text_layer import extract_text_layer
+
+SPEC_ROWS = [
+    ["Parameter", "Min", "Typ", "Max", "Unit"],
+    ["VCC", "2.7", "3.3", "3.6", "V"],
+    ["ICC", "", "12", "20", "mA"],
+]
+PIN_ROWS = [["Pin", "Name"], ["1", "VCC"], ["2", "GND"], ["3", "SDA"]]
+
+
+def _draw_table(page, rows: list[list[str]], top: float) -> None:
+    import fitz
+
+    for r, row in enumerate(rows):
+        for c, value in enumerate(row):
+            rect = fitz.Rect(72 + c * 90, top + r * 20, 72 + (c + 1) * 90, top + (r + 1) * 20)
+            page.draw_rect(rect, color=(0, 0, 0), width=0.5)
+            if value:
+                page.insert_text((rect.x0 + 4, rect.y1 - 6), value, fontsize=9)
+
+
+@pytest.fixture()
+def digital_pdf(tmp_path: Path) -> Path:
+    """Page 0: born-digital spec + pinout tables. Page 1: almost no text (scanned-like)."""
+    import fitz
+
+    pdf_path = tmp_path / "digital.pdf"
+    doc = fitz.open()
+    page = doc.new_page(width=612, height=792)
+    page.insert_text((72, 60), "Supply Voltage: 3.3 V", fontsize=10)
+    page.insert_text((72, 80), "Operating Current: 12 mA", fontsize=10)
+    _draw_table(page, SPEC_ROWS, 120)
+    _draw_table(page, PIN_ROWS, 260)
+    sparse = doc.new_page(width=612, height=792)
+    sparse.insert_text((72, 72), "Figure 3", fontsize=12)
+    doc.save(str(pdf_path))
+    doc.close()
+    return pdf_path
+
+
+@pytest.fixture(autouse=True)
+def _allow_tmp_docs(tmp_path):
+    with patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}):
+        with patch("akili.config.DOCS_DIR", str(tmp_path)):
+            yield
+
+
+class TestExtractTextLayer:
+    def test_tables_and_labelled_values(self, digital_pdf):
+        import fitz
+
+        with fitz.open(digital_pdf) as doc:
+            result = extract_text_layer(doc[0], 0)
+
+        assert result is not None
+        assert result.confidence == 1.0
+        units = {(u.label, u.value, u.unit_of_measure) for u in result.extraction.units}
+        assert ("VCC max", 3.6, "V") in units
+        assert ("ICC typ", 12.0, "mA") in units
+        assert ("Supply Voltage", 3.3, "V") in units
+        assert [(g.rows, g.cols) for g in result.extraction.grids] == [(3, 5), (4, 2)]
+        assert result.extraction.bijections[0].mapping == {"1": "VCC", "2": "GND", "3": "SDA"}
+
+    def test_coordinates_are_normalized_to_the_cell(self, digital_pdf):
+        import fitz
+
+        with fitz.open(digital_pdf) as doc:
+            result = extract_text_layer(doc[0], 0)
+
+        vcc_max = next(u for u in result.extraction.units if u.label == "VCC max")
+        # Max column spans x 342..432 pt, VCC row spans y 140..160 pt on a 612 x 792 page.
+        assert vcc_max.origin.x == pytest.approx(387 / 612, abs=0.01)
+        assert vcc_max.origin.y == pytest.approx(150 / 792, abs=0.01)
+
+    def test_sparse_page_has_no_text_layer(self, digital_pdf):
+        import fitz
+
+        with fitz.open(digital_pdf) as doc:
+            assert extract_text_layer(doc[1], 1) is None
+
+
+class TestTextLayerIngest:
+    def test_confident_pages_are_not_rendered(self, digital_pdf):
+        pages = list(iter_rendered_pages(digital_pdf, text_layer=True, min_confidence=0.7))
+        assert pages[0].text_layer is not None and pages[0].image is None
+        assert pages[1].text_layer is None and pages[1].image is not None
+
+    def test_failing_text_layer_falls_back_to_rendering(self, digital_pdf):
+        def flaky(page, page_index):
+            if page_index == 0:
+                raise ValueError("broken font table")
+            return extract_text_layer(page, page_index)
+
+        with (
+            patch("akili.ingest.pdf_loader.extract_text_layer", side_effect=flaky),
+            patch("akili.ingest.pdf_loader.page_fingerprint", side_effect=RuntimeError("x")),
+        ):
+            pages = list(
+                iter_rendered_pages(
+                    digital_pdf, text_layer=True, min_confidence=0.7, fingerprint=True
+                )
+            )
+        assert [p.page_index for p in pages] == [0, 1]
+        assert pages[0].text_layer is None and pages[0].image is not None
+        assert pages[0].fingerprint is None
+
+    @patch("akili.config.TEXT_LAYER_ENABLED", True)
+    @patch("akili.ingest.pipeline.classify_page", return_value="other")
+    def test_only_fallback_pages_reach_gemini(self, _mock_classify, digital_pdf, tmp_store):
+        from akili.ingest.extract_schema import PageExtraction
+
+        with patch(
+            "akili.ingest.pipeline.gemini_extract_page", return_value=PageExtraction()
+        ) as mock_extract:
+            _, canonical, total_pages, pages_failed = ingest_document(digital_pdf, store=tmp_store)
+
+        assert total_pages == 2
+        assert pages_failed == 0
+        assert [call.args[0] for call in mock_extract.call_args_list] == [1]
+        assert any(isinstance(o, Grid) for o in canonical)
+        assert any(isinstance(o, Bijection) for o in canonical)
+        units = [o for o in canonical if isinstance(o, Unit)]
+        assert units and all(u.page == 0 and u.extraction_agreement == 1.0 for u in units)
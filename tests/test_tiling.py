@@ -0,0 +1,257 @@
+"""Tests for tiled extraction of dense pages."""
+
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import fitz
+
+from akili.ingest.consensus import ConsensusDecision, merge_decisions
+from akili.ingest.extract_schema import (
+    BijectionExtract,
+    GridCellExtract,
+    GridExtract,
+    PageExtraction,
+    PointSchema,
+    UnitExtract,
+)
+from akili.ingest.pdf_loader import iter_rendered_pages
+from akili.ingest.pipeline import ingest_document
+from akili.ingest.rate_limit import _png_size
+from akili.ingest.tiling import (
+    PageRegion,
+    extract_tiles,
+    merge_tiles,
+    tile_regions,
+    to_page_coords,
+    within_region,
+)
+
+TOP = PageRegion(0.0, 0.0, 1.0, 0.55)
+BOTTOM = PageRegion(0.0, 0.45, 1.0, 1.0)
+
+
+def _unit(uid: str, value: float, x: float, y: float) -> UnitExtract:
+    return UnitExtract(
+        id=uid, label="VCC", value=value, unit_of_measure="V", origin=PointSchema(x=x, y=y)
+    )
+
+
+def _grid(gid: str, rows: list[list[str]], y: float) -> GridExtract:
+    return GridExtract(
+        id=gid,
+        rows=len(rows),
+        cols=len(rows[0]),
+        cells=[
+            GridCellExtract(row=r, col=c, value=value)
+            for r, row in enumerate(rows)
+            for c, value in enumerate(row)
+        ],
+        origin=PointSchema(x=0.1, y=y),
+    )
+
+
+def test_tile_regions_cover_the_page_with_overlap():
+    regions = tile_regions(2, 1, 0.1)
+    assert regions == [PageRegion(0.0, 0.0, 1.0, 0.55), PageRegion(0.0, 0.45, 1.0, 1.0)]
+    assert tile_regions(1, 1, 0.1) == [PageRegion()]
+
+
+def test_to_page_coords_rescales_and_suffixes_ids():
+    extraction = PageExtraction(units=[_unit("u0", 3.3, 0.5, 0.5)])
+    moved = to_page_coords(extraction, BOTTOM, suffix="_t1")
+    assert moved.units[0].id == "u0_t1"
+    assert moved.units[0].origin.x == 0.5
+    assert abs(moved.units[0].origin.y - 0.725) < 1e-9
+
+
+def test_merge_drops_duplicates_from_the_overlap():
+    tiled = [
+        (TOP, PageExtraction(units=[_unit("a", 3.3, 0.2, 0.5), _unit("b", 1.8, 0.2, 0.1)])),
+        (BOTTOM, PageExtraction(units=[_unit("c", 3.3, 0.21, 0.51), _unit("d", 5.0, 0.2, 0.9)])),
+    ]
+    merged = merge_tiles(tiled)
+    # c sits nearer its tile's center than a, so c is the copy kept
+    assert sorted(u.id for u in merged.units) == ["b", "c", "d"]
+
+
+def test_merge_unions_agreeing_bijections():
+    def bijection(bid: str, mapping: dict[str, str]) -> BijectionExtract:
+        return BijectionExtract(
+            id=bid,
+            left_set=list(mapping),
+            right_set=list(mapping.values()),
+            mapping=mapping,
+            origin=PointSchema(x=0.1, y=0.1),
+        )
+
+    tiled = [
+        (TOP, PageExtraction(bijections=[bijection("b0", {"1": "VCC", "2": "GND"})])),
+        (BOTTOM, PageExtraction(bijections=[bijection("b1", {"2": "GND", "3": "SDA"})])),
+    ]
+    merged = merge_tiles(tiled)
+    assert len(merged.bijections) == 1
+    assert merged.bijections[0].mapping == {"1": "VCC", "2": "GND", "3": "SDA"}
+
+
+def test_merge_stitches_grid_fragments():
+    header = ["Pin", "Name"]
+    upper = _grid("g0", [header, ["1", "VCC"], ["2", "GND"]], y=0.1)
+    lower = _grid("g1", [header, ["2", "GND"], ["3", "SDA"]], y=0.46)
+    merged = merge_tiles(
+        [(TOP, PageExtraction(grids=[upper])), (BOTTOM, PageExtraction(grids=[lower]))]
+    )
+    assert len(merged.grids) == 1
+    grid = merged.grids[0]
+    assert grid.rows == 4
+    assert {(c.row, c.value) for c in grid.cells if c.col == 1} == {
+        (0, "Name"),
+        (1, "VCC"),
+        (2, "GND"),
+        (3, "SDA"),
+    }
+
+
+def test_extract_tiles_maps_each_tile_and_keeps_lowest_agreement():
+    seen: list[PageRegion] = []
+
+    def fake_extract(region: PageRegion, image: bytes) -> tuple[PageExtraction, float]:
+        seen.append(region)
+        agreement = 0.9 if region == TOP else 0.6
+        return PageExtraction(units=[_unit("u0", float(image[0]), 0.5, 0.5)]), agreement
+
+    merged, agreement = extract_tiles([(TOP, b"\x01"), (BOTTOM, b"\x02")], fake_extract)
+    assert sorted(seen, key=lambda r: r.y0) == [TOP, BOTTOM]
+    assert agreement == 0.6
+    assert sorted(u.id for u in merged.units) == ["u0_t0", "u0_t1"]
+
+
+@patch("akili.config.TILE_DPI", 144)
+def test_loader_renders_tiles_for_listed_types(tmp_path: Path):
+    doc = fitz.open()
+    for _ in range(2):
+        doc.new_page(width=612, height=792)
+    path = tmp_path / "doc.pdf"
+    doc.save(path)
+    doc.close()
+    pages = list(
+        iter_rendered_pages(
+            path, page_types={0: "pinout_table", 1: "other"}, tile_types={"pinout_table"}
+        )
+    )
+    assert pages[1].tiles is None and pages[1].image is not None
+    # A tiled page is rendered only as tiles, not also as a full-page image.
+    assert pages[0].image is None and pages[0].page_type == "pinout_table"
+    assert [region for region, _ in pages[0].tiles] == tile_regions(2, 1, 0.1)
+    width, height = _png_size(pages[0].tiles[0][1])
+    assert width == 1224
+    assert abs(height - 0.55 * 792 * 2) <= 2
+
+
+@patch("akili.config.CONSENSUS_ENABLED", False)
+@patch("akili.config.RENDER_PROFILES_ENABLED", True)
+@patch("akili.config.TILED_EXTRACTION_ENABLED", True)
+@patch("akili.ingest.pdf_loader.classify_pdf_page", return_value=("pinout_table", 0.99))
+@patch("akili.ingest.pipeline.classify_page", return_value="pinout_table")
+def test_pipeline_extracts_tiles_of_listed_types(_classify, _local, tmp_store, tmp_path):
+    doc = fitz.open()
+    doc.new_page(width=612, height=792)
+    path = tmp_path / "pins.pdf"
+    doc.save(path)
+    doc.close()
+    hints: list[str] = []
+
+    def fake_extract(page_index, image_bytes, doc_id, page_type_hint="", route=None):
+        hints.append(page_type_hint)
+        return PageExtraction(units=[_unit("p0_u0", float(len(hints)), 0.5, 0.5)])
+
+    events: list[dict] = []
+    with (
+        patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}),
+        patch("akili.config.DOCS_DIR", str(tmp_path)),
+        patch("akili.ingest.pipeline.gemini_extract_page", side_effect=fake_extract),
+    ):
+        _, canonical, _, pages_failed = ingest_document(
+            path, store=tmp_store, progress_callback=events.append
+        )
+
+    assert pages_failed == 0
+    assert len(hints) == 2
+    assert all("TILE of the page" in hint for hint in hints)
+    assert events[-1]["tiled_pages"] == 1
+    assert sorted(u.id for u in canonical) == ["p0_u0_t0", "p0_u0_t1"]
+    assert events[-1]["render"]["image_bytes"] > 0
+    _classify.assert_not_called()  # the type the page was tiled for is kept
+
+
+def test_within_region_keeps_what_the_tile_covers():
+    page = PageExtraction(
+        units=[_unit("top", 1.0, 0.5, 0.2), _unit("bottom", 2.0, 0.5, 0.9)],
+        grids=[
+            GridExtract(
+                id="g",
+                rows=2,
+                cols=1,
+                cells=[
+                    GridCellExtract(row=0, col=0, value="3", origin=PointSchema(x=0.1, y=0.3)),
+                    GridCellExtract(row=1, col=0, value="4", origin=PointSchema(x=0.1, y=0.8)),
+                ],
+                origin=PointSchema(x=0.1, y=0.3),
+            )
+        ],
+    )
+    top = within_region(page, TOP)
+    assert [u.id for u in top.units] == ["top"]
+    assert [c.value for c in top.grids[0].cells] == ["3"]
+    bottom = within_region(page, BOTTOM)
+    assert [u.id for u in bottom.units] == ["bottom"]
+    assert [c.value for c in bottom.grids[0].cells] == ["4"]
+
+
+def test_tile_decisions_merge_into_one_page_decision():
+    merged = merge_decisions(
+        [
+            ConsensusDecision(3, "adaptive", False, 0.9),
+            ConsensusDecision(3, "adaptive", True, 0.6, ["missing_bbox=0.50"]),
+        ]
+    )
+    assert merged == ConsensusDecision(3, "adaptive", True, 0.6, ["missing_bbox=0.50"])
+
+
+@patch("akili.config.CONSENSUS_ENABLED", True)
+@patch("akili.config.RENDER_PROFILES_ENABLED", False)
+@patch("akili.config.TILED_EXTRACTION_ENABLED", True)
+@patch("akili.ingest.pipeline.should_use_consensus", return_value=True)
+@patch("akili.ingest.pdf_loader.classify_pdf_page", return_value=("pinout_table", 0.99))
+@patch("akili.ingest.pipeline.classify_page", return_value="pinout_table")
+def test_tiled_consensus_pages_record_one_decision(
+    _classify, _local, _consensus, tmp_store, tmp_path
+):
+    doc = fitz.open()
+    doc.new_page(width=612, height=792)
+    path = tmp_path / "pins.pdf"
+    doc.save(path)
+    doc.close()
+    calls: list[dict] = []
+
+    def fake_consensus(page_index, image_bytes, doc_id, **kwargs):
+        calls.append(kwargs)
+        second_pass = len(calls) == 2
+        kwargs["on_decision"](ConsensusDecision(page_index, "adaptive", second_pass, 0.5))
+        return PageExtraction(units=[_unit("p0_u0", float(len(calls)), 0.5, 0.5)]), 0.8
+
+    events: list[dict] = []
+    with (
+        patch.dict(os.environ, {"AKILI_DOCS_DIR": str(tmp_path)}),
+        patch("akili.config.DOCS_DIR", str(tmp_path)),
+        patch("akili.ingest.pipeline.consensus_extract_page", side_effect=fake_consensus),
+    ):
+        ingest_document(path, store=tmp_store, progress_callback=events.append)
+
+    # Tiling alone turns on the pre-render classifier that decides which pages to tile.
+    assert events[-1]["tiled_pages"] == 1
+    assert len(calls) == 2 and all("text_hint" in kwargs for kwargs in calls)
+    assert events[-1]["consensus_pages"] == 1
+    assert events[-1]["consensus_second_passes"] == 1
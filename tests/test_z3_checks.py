@@ -35,6 +35,12 @@ class TestUnitConversion:
         assert abs(val - 0.25) < 1e-9
         assert base == "A"
 
+    def test_is_known_unit(self):
+        from akili.verify.z3_checks import is_known_unit
+
+        assert is_known_unit("mV")
+        assert not is_known_unit("furlongs")
+
 
 class TestRangeConsistency:
     def test_valid_range(self):